@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+"""
+apply_fix_rules.py
+
+Apply the declarative rule files, which specify the fixes to add to and
+remove from data requests, to the database in a single transaction.
+"""
+import argparse
+import logging.config
+import os
+import sys
+
+import django
+django.setup()
+
+from pre_proc_app.rules import apply_rules, load_rule_files
+
+
+__version__ = '0.1.0b1'
+
+DEFAULT_LOG_LEVEL = logging.WARNING
+DEFAULT_LOG_FORMAT = '%(levelname)s: %(message)s'
+
+DEFAULT_RULES_DIR = os.path.join(os.path.dirname(__file__), '..',
+                                 'fix_rules')
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    """
+    Parse command-line arguments
+    """
+    parser = argparse.ArgumentParser(description='Apply the fix rule files '
+                                                 'to the database.')
+    parser.add_argument('rule_paths', help='the rule files or directories of '
+                                           'rule files to apply (default: '
+                                           'fix_rules/)', nargs='*')
+    parser.add_argument('-l', '--log-level', help='set logging level to one '
+                                                  'of debug, info, warn (the '
+                                                  'default), or error')
+    parser.add_argument('--version', action='version',
+                        version='%(prog)s {}'.format(__version__))
+    args = parser.parse_args()
+
+    return args
+
+
+def main(args):
+    """
+    Main entry point
+    """
+    rules = load_rule_files(args.rule_paths or [DEFAULT_RULES_DIR])
+    num_added, num_removed = apply_rules(rules)
+    logger.debug('{} rules applied. {} fixes added to and {} fixes removed '
+                 'from data requests.'.format(len(rules), num_added,
+                                              num_removed))
+
+
+if __name__ == "__main__":
+    cmd_args = parse_args()
+
+    # determine the log level
+    if cmd_args.log_level:
+        try:
+            log_level = getattr(logging, cmd_args.log_level.upper())
+        except AttributeError:
+            logger.setLevel(logging.WARNING)
+            logger.error('log-level must be one of: debug, info, warn or error')
+            sys.exit(1)
+    else:
+        log_level = DEFAULT_LOG_LEVEL
+
+    # configure the logger
+    logging.config.dictConfig({
+        'version': 1,
+        'disable_existing_loggers': False,
+        'formatters': {
+            'standard': {
+                'format': DEFAULT_LOG_FORMAT,
+            },
+        },
+        'handlers': {
+            'default': {
+                'level': log_level,
+                'class': 'logging.StreamHandler',
+                'formatter': 'standard'
+            },
+        },
+        'loggers': {
+            '': {
+                'handlers': ['default'],
+                'level': log_level,
+                'propagate': True
+            }
+        }
+    })
+
+    # run the code
+    main(cmd_args)
@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+"""
+benchmark_data_request_lookup.py
+
+Measure how long it takes to find the data request for a file in a
+database containing a large number of synthetic data requests. The
+database is created in a temporary directory and so the real database is
+never touched.
+"""
+import argparse
+import itertools
+import logging.config
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+# Use a temporary database rather than the one in DATABASE_DIR
+BENCHMARK_DATABASE_DIR = tempfile.mkdtemp()
+os.environ['DATABASE_DIR'] = BENCHMARK_DATABASE_DIR
+
+import django
+django.setup()
+
+from django.core.management import call_command
+from django.db import connection, transaction
+
+from pre_proc.esgf_submission import EsgfSubmission
+from pre_proc.rule_provider import (ArtefactRuleProvider,
+                                    DatabaseRuleProvider, write_artefact)
+from pre_proc_app.models import (Institution, ClimateModel, Experiment,
+                                 DataRequest, cmor_name_base)
+from pre_proc_app.rules import data_request_fixes
+
+
+__version__ = '0.1.0b1'
+
+DEFAULT_LOG_LEVEL = logging.WARNING
+DEFAULT_LOG_FORMAT = '%(levelname)s: %(message)s'
+
+logger = logging.getLogger(__name__)
+
+NUM_MODELS = 10
+NUM_EXPERIMENTS = 20
+NUM_VARIANTS = 5
+NUM_TABLES = 10
+
+# The indexes added for the lookups, which can be dropped for comparison
+LOOKUP_INDEXES = ['data_request_lookup', 'data_request_base_lookup']
+
+
+def parse_args():
+    """
+    Parse command-line arguments
+    """
+    parser = argparse.ArgumentParser(description='Benchmark data request '
+                                                 'lookups.')
+    parser.add_argument('-n', '--num-rows', help='the number of data '
+                                                 'requests to create '
+                                                 '(default: %(default)s)',
+                        type=int, default=100000)
+    parser.add_argument('-q', '--num-queries', help='the number of lookups '
+                                                    'of each type to time '
+                                                    '(default: %(default)s)',
+                        type=int, default=1000)
+    parser.add_argument('--drop-indexes', help='drop the lookup indexes '
+                                               'before timing',
+                        action='store_true')
+    parser.add_argument('-l', '--log-level', help='set logging level to one '
+                                                  'of debug, info, warn (the '
+                                                  'default), or error')
+    parser.add_argument('--version', action='version',
+                        version='%(prog)s {}'.format(__version__))
+    args = parser.parse_args()
+
+    return args
+
+
+def make_data_requests(num_rows):
+    """
+    Create at least `num_rows` synthetic data requests. One in five
+    variables has a numeric suffix.
+
+    :param int num_rows: The number of data requests to create.
+    :returns: The (source_id, experiment_id, variant_label, table_id,
+        cmor_name) of every data request.
+    :rtype: list
+    """
+    per_variable = NUM_MODELS * NUM_EXPERIMENTS * NUM_VARIANTS * NUM_TABLES
+    num_variables = -(-num_rows // per_variable)
+    cmor_names = ['var{}{}'.format(index, 'x27' if index % 5 == 0 else 'a')
+                  for index in range(num_variables)]
+
+    with transaction.atomic():
+        institution = Institution.objects.create(name='Institution')
+        models = [ClimateModel.objects.create(name='Model{}'.format(index))
+                  for index in range(NUM_MODELS)]
+        experiments = [Experiment.objects.create(name='exp{}'.format(index))
+                       for index in range(NUM_EXPERIMENTS)]
+        variants = ['r{}i1p1f1'.format(index + 1)
+                    for index in range(NUM_VARIANTS)]
+        tables = ['table{}'.format(index) for index in range(NUM_TABLES)]
+        rows = list(itertools.product(models, experiments, variants, tables,
+                                      cmor_names))[:num_rows]
+        DataRequest.objects.bulk_create(
+            [DataRequest(institution_id=institution, source_id=model,
+                         experiment_id=experiment, variant_label=variant,
+                         table_id=table, cmor_name=cmor_name,
+                         cmor_name_base=cmor_name_base(cmor_name))
+             for model, experiment, variant, table, cmor_name in rows],
+            batch_size=5000
+        )
+    return [(model.name, experiment.name, variant, table, cmor_name)
+            for model, experiment, variant, table, cmor_name in rows]
+
+
+def time_lookups(keys, lookup):
+    """
+    Time finding the data request for each key.
+
+    :param list keys: (source_id, experiment_id, variant_label, table_id,
+        cmor_name) tuples.
+    :param lookup: The function that finds the data request for a
+        submission.
+    :returns: The time taken for each lookup in seconds, sorted.
+    :rtype: list
+    """
+    timings = []
+    for key in keys:
+        submission = EsgfSubmission(*key, filepath='/benchmark/file.nc')
+        start_time = time.perf_counter()
+        lookup(submission)
+        timings.append(time.perf_counter() - start_time)
+    return sorted(timings)
+
+
+def query_plan(key):
+    """
+    Return SQLite's plan for the query that finds a data request.
+
+    :param tuple key: The (source_id, experiment_id, variant_label,
+        table_id, cmor_name).
+    :returns: The details of each step in the plan.
+    :rtype: list
+    """
+    query = DataRequest.objects.filter(
+        source_id__name=key[0], experiment_id__name=key[1],
+        variant_label=key[2], table_id=key[3], cmor_name=key[4]
+    ).query
+    sql, params = query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def main(args):
+    """
+    Main entry point
+    """
+    call_command('migrate', verbosity=0)
+    start_time = time.time()
+    rows = make_data_requests(args.num_rows)
+    logger.info('{} data requests created in {:.1f} seconds'.
+                format(len(rows), time.time() - start_time))
+
+    if args.drop_indexes:
+        with connection.cursor() as cursor:
+            for index_name in LOOKUP_INDEXES:
+                cursor.execute('DROP INDEX {}'.format(index_name))
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+    random.seed(0)
+    exact_keys = random.sample(rows, min(args.num_queries, len(rows)))
+    suffix_keys = [key[:4] + (cmor_name_base(key[4]),)
+                   for key in rows if key[4] != cmor_name_base(key[4])]
+    suffix_keys = random.sample(suffix_keys,
+                                min(args.num_queries, len(suffix_keys)))
+
+    logger.info('Query plan: {}'.format('; '.join(query_plan(rows[0]))))
+
+    artefact_path = os.path.join(BENCHMARK_DATABASE_DIR, 'rules.pickle')
+    write_artefact(artefact_path, data_request_fixes())
+    start_time = time.perf_counter()
+    artefact_provider = ArtefactRuleProvider(artefact_path)
+    print('Rules artefact of {} bytes loaded in {:.1f} ms'.
+          format(os.path.getsize(artefact_path),
+                 1000 * (time.perf_counter() - start_time)))
+
+    lookups = (('database', DatabaseRuleProvider._get_data_request),
+               ('artefact', artefact_provider.get_fix_names))
+    for lookup_name, lookup in lookups:
+        for name, keys in (('exact', exact_keys), ('suffix', suffix_keys)):
+            timings = time_lookups(keys, lookup)
+            if not timings:
+                continue
+            print('{} rows, {} {} lookups: {} mean {:.3f} ms, median '
+                  '{:.3f} ms, 95th percentile {:.3f} ms'.format(
+                      len(rows), lookup_name, name, len(timings),
+                      1000 * sum(timings) / len(timings),
+                      1000 * timings[len(timings) // 2],
+                      1000 * timings[int(len(timings) * 0.95)]))
+
+
+if __name__ == "__main__":
+    cmd_args = parse_args()
+
+    # determine the log level
+    if cmd_args.log_level:
+        try:
+            log_level = getattr(logging, cmd_args.log_level.upper())
+        except AttributeError:
+            logger.setLevel(logging.WARNING)
+            logger.error('log-level must be one of: debug, info, warn or error')
+            sys.exit(1)
+    else:
+        log_level = DEFAULT_LOG_LEVEL
+
+    # configure the logger
+    logging.config.dictConfig({
+        'version': 1,
+        'disable_existing_loggers': False,
+        'formatters': {
+            'standard': {
+                'format': DEFAULT_LOG_FORMAT,
+            },
+        },
+        'handlers': {
+            'default': {
+                'level': log_level,
+                'class': 'logging.StreamHandler',
+                'formatter': 'standard'
+            },
+        },
+        'loggers': {
+            '': {
+                'handlers': ['default'],
+                'level': log_level,
+                'propagate': True
+            }
+        }
+    })
+
+    # run the code
+    try:
+        main(cmd_args)
+    finally:
+        shutil.rmtree(BENCHMARK_DATABASE_DIR)
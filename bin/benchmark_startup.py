@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+"""
+benchmark_startup.py
+
+Measure how long a new Python process takes to import pre_proc and create
+a set of fixes, which is the start-up cost paid by every file-level job.
+The heavy modules that have been loaded by then are also reported, as
+they should only be loaded when a fix that needs them is run.
+"""
+import argparse
+import json
+import logging.config
+import os
+import subprocess
+import sys
+
+__version__ = '0.1.0b1'
+
+DEFAULT_LOG_LEVEL = logging.WARNING
+DEFAULT_LOG_FORMAT = '%(levelname)s: %(message)s'
+
+logger = logging.getLogger(__name__)
+
+# Fixes that only change attributes
+DEFAULT_FIXES = ['ParentBranchTimeAdd', 'ParentBranchTimeDoubleFix',
+                 'ForcingIndexIntFix']
+
+# Modules that shouldn't be loaded by a run that only changes attributes
+HEAVY_MODULES = ['cftime', 'dask', 'django', 'fix_lons', 'h5py',
+                 'highresmip_fix', 'iris', 'netCDF4', 'numpy']
+
+# The code run in each new process
+STARTUP_CODE = '''
+import json
+import sys
+import time
+start_time = time.perf_counter()
+import pre_proc
+fixes = [getattr(pre_proc.file_fix, name)('file.nc', '/directory')
+         for name in {fixes!r}]
+seconds = time.perf_counter() - start_time
+print(json.dumps({{
+    'seconds': seconds,
+    'loaded': [name for name in {heavy!r}
+               if name in sys.modules and
+               type(sys.modules[name]).__name__ != '_LazyModule']
+}}))
+'''
+
+
+def parse_args():
+    """
+    Parse command-line arguments
+    """
+    parser = argparse.ArgumentParser(description='Benchmark the time taken '
+                                                 'to start a job.')
+    parser.add_argument('fixes', help='the fixes to create (default: {})'.
+                        format(' '.join(DEFAULT_FIXES)), nargs='*')
+    parser.add_argument('-r', '--repeats', help='the number of processes to '
+                                                'start (default: '
+                                                '%(default)s)',
+                        type=int, default=10)
+    parser.add_argument('-t', '--target', help='the maximum acceptable '
+                                               'median time in milliseconds '
+                                               '(default: %(default)s)',
+                        type=float, default=300.)
+    parser.add_argument('-l', '--log-level', help='set logging level to one '
+                                                  'of debug, info, warn (the '
+                                                  'default), or error')
+    parser.add_argument('--version', action='version',
+                        version='%(prog)s {}'.format(__version__))
+    args = parser.parse_args()
+
+    return args
+
+
+def time_startup(fixes):
+    """
+    Time importing pre_proc and creating the fixes in a new process.
+
+    :param list fixes: The names of the fixes to create.
+    :returns: The time taken in seconds and the heavy modules loaded.
+    :rtype: dict
+    """
+    code = STARTUP_CODE.format(fixes=fixes, heavy=HEAVY_MODULES)
+    output = subprocess.check_output([sys.executable, '-c', code],
+                                     env=dict(os.environ),
+                                     universal_newlines=True)
+    return json.loads(output.strip().split('\n')[-1])
+
+
+def main(args):
+    """
+    Main entry point
+    """
+    fixes = args.fixes or DEFAULT_FIXES
+    results = [time_startup(fixes) for _ in range(args.repeats)]
+    timings = sorted(1000 * result['seconds'] for result in results)
+    median = timings[len(timings) // 2]
+    loaded = sorted({name for result in results for name in result['loaded']})
+
+    print('Import and create {} fixes: median {:.0f} ms, min {:.0f} ms, '
+          'max {:.0f} ms over {} processes'.format(len(fixes), median,
+                                                   timings[0], timings[-1],
+                                                   len(timings)))
+    print('Heavy modules loaded: {}'.format(', '.join(loaded) or 'none'))
+    if median > args.target:
+        logger.error('Median start-up time {:.0f} ms is more than the target '
+                     'of {:.0f} ms'.format(median, args.target))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    cmd_args = parse_args()
+
+    # determine the log level
+    if cmd_args.log_level:
+        try:
+            log_level = getattr(logging, cmd_args.log_level.upper())
+        except AttributeError:
+            logger.setLevel(logging.WARNING)
+            logger.error('log-level must be one of: debug, info, warn or error')
+            sys.exit(1)
+    else:
+        log_level = DEFAULT_LOG_LEVEL
+
+    # configure the logger
+    logging.config.dictConfig({
+        'version': 1,
+        'disable_existing_loggers': False,
+        'formatters': {
+            'standard': {
+                'format': DEFAULT_LOG_FORMAT,
+            },
+        },
+        'handlers': {
+            'default': {
+                'level': log_level,
+                'class': 'logging.StreamHandler',
+                'formatter': 'standard'
+            },
+        },
+        'loggers': {
+            '': {
+                'handlers': ['default'],
+                'level': log_level,
+                'propagate': True
+            }
+        }
+    })
+
+    # run the code
+    main(cmd_args)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""
+convert_fix_requests.py
+
+Generate declarative rule files from the fix_request scripts in
+bin/fix_requests. Scripts that can't be converted are listed and should
+still be run by hand.
+"""
+import argparse
+import glob
+import json
+import logging.config
+import os
+import sys
+
+import django
+django.setup()
+
+from pre_proc_app.rule_converter import convert_script, ConversionError
+
+
+__version__ = '0.1.0b1'
+
+DEFAULT_LOG_LEVEL = logging.WARNING
+DEFAULT_LOG_FORMAT = '%(levelname)s: %(message)s'
+
+FIX_REQUESTS_DIR = os.path.join(os.path.dirname(__file__), 'fix_requests')
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    """
+    Parse command-line arguments
+    """
+    parser = argparse.ArgumentParser(description='Convert fix_request '
+                                                 'scripts to rule files.')
+    parser.add_argument('output_dir', help='the directory to write the rule '
+                                           'files to')
+    parser.add_argument('scripts', help='the scripts to convert (default: '
+                                        'all of the fix_request scripts)',
+                        nargs='*')
+    parser.add_argument('-l', '--log-level', help='set logging level to one '
+                                                  'of debug, info, warn (the '
+                                                  'default), or error')
+    parser.add_argument('--version', action='version',
+                        version='%(prog)s {}'.format(__version__))
+    args = parser.parse_args()
+
+    return args
+
+
+def main(args):
+    """
+    Main entry point
+    """
+    scripts = args.scripts or sorted(
+        glob.glob(os.path.join(FIX_REQUESTS_DIR, 'fix_request_*.py'))
+    )
+    os.makedirs(args.output_dir, exist_ok=True)
+    failed = []
+    for script in scripts:
+        with open(script) as fh:
+            source = fh.read()
+        try:
+            rule_file = convert_script(source, os.path.basename(script))
+        except ConversionError as exc:
+            logger.warning(str(exc))
+            failed.append(os.path.basename(script))
+            continue
+        output_path = os.path.join(
+            args.output_dir,
+            os.path.splitext(os.path.basename(script))[0] + '.json'
+        )
+        with open(output_path, 'w') as fh:
+            json.dump(rule_file, fh, indent=4)
+            fh.write('\n')
+
+    logger.debug('{} scripts converted'.format(len(scripts) - len(failed)))
+    if failed:
+        logger.warning('{} scripts could not be converted: {}'.
+                       format(len(failed), ', '.join(failed)))
+
+
+if __name__ == "__main__":
+    cmd_args = parse_args()
+
+    # determine the log level
+    if cmd_args.log_level:
+        try:
+            log_level = getattr(logging, cmd_args.log_level.upper())
+        except AttributeError:
+            logger.setLevel(logging.WARNING)
+            logger.error('log-level must be one of: debug, info, warn or error')
+            sys.exit(1)
+    else:
+        log_level = DEFAULT_LOG_LEVEL
+
+    # configure the logger
+    logging.config.dictConfig({
+        'version': 1,
+        'disable_existing_loggers': False,
+        'formatters': {
+            'standard': {
+                'format': DEFAULT_LOG_FORMAT,
+            },
+        },
+        'handlers': {
+            'default': {
+                'level': log_level,
+                'class': 'logging.StreamHandler',
+                'formatter': 'standard'
+            },
+        },
+        'loggers': {
+            '': {
+                'handlers': ['default'],
+                'level': log_level,
+                'propagate': True
+            }
+        }
+    })
+
+    # run the code
+    main(cmd_args)
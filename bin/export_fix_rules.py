@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+"""
+export_fix_rules.py
+
+Compile the fixes for every data request in the database into a rules
+artefact that workers can load without Django by setting the
+PRE_PROC_RULES_ARTEFACT environment variable.
+"""
+import argparse
+import logging.config
+import os
+import sys
+
+import django
+django.setup()
+
+from pre_proc.rule_provider import write_artefact
+from pre_proc_app.rules import data_request_fixes
+
+
+__version__ = '0.1.0b1'
+
+DEFAULT_LOG_LEVEL = logging.WARNING
+DEFAULT_LOG_FORMAT = '%(levelname)s: %(message)s'
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    """
+    Parse command-line arguments
+    """
+    parser = argparse.ArgumentParser(description='Export the fixes in the '
+                                                 'database to a rules '
+                                                 'artefact.')
+    parser.add_argument('artefact_path', help='the full path of the '
+                                              'artefact to write', type=str)
+    parser.add_argument('-l', '--log-level', help='set logging level to one '
+                                                  'of debug, info, warn (the '
+                                                  'default), or error')
+    parser.add_argument('--version', action='version',
+                        version='%(prog)s {}'.format(__version__))
+    args = parser.parse_args()
+
+    return args
+
+
+def main(args):
+    """
+    Main entry point
+    """
+    data_requests = data_request_fixes()
+    sha256 = write_artefact(args.artefact_path, data_requests)
+    logger.debug('{} data requests written to {} ({} bytes, SHA-256 {})'.
+                 format(len(data_requests), args.artefact_path,
+                        os.path.getsize(args.artefact_path), sha256))
+
+
+if __name__ == "__main__":
+    cmd_args = parse_args()
+
+    # determine the log level
+    if cmd_args.log_level:
+        try:
+            log_level = getattr(logging, cmd_args.log_level.upper())
+        except AttributeError:
+            logger.setLevel(logging.WARNING)
+            logger.error('log-level must be one of: debug, info, warn or error')
+            sys.exit(1)
+    else:
+        log_level = DEFAULT_LOG_LEVEL
+
+    # configure the logger
+    logging.config.dictConfig({
+        'version': 1,
+        'disable_existing_loggers': False,
+        'formatters': {
+            'standard': {
+                'format': DEFAULT_LOG_FORMAT,
+            },
+        },
+        'handlers': {
+            'default': {
+                'level': log_level,
+                'class': 'logging.StreamHandler',
+                'formatter': 'standard'
+            },
+        },
+        'loggers': {
+            '': {
+                'handlers': ['default'],
+                'level': log_level,
+                'propagate': True
+            }
+        }
+    })
+
+    # run the code
+    main(cmd_args)
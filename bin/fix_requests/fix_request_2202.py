@@ -13,6 +13,7 @@ import sys
 import django
 django.setup()
 
+from pre_proc_app.bulk import attach_fixes
 from pre_proc_app.models import DataRequest, FileFix
 
 
@@ -54,13 +55,7 @@ def main():
         FileFix.objects.get(name='CellMeasuresAreacellaAdd')
     ]
 
-    # This next line could be done more quickly by:
-    # further_info_url_fix.datarequest_set.add(*data_reqs)
-    # but sqlite3 gives an error of:
-    # django.db.utils.OperationalError: too many SQL variables
-    for data_req in data_reqs:
-        for fix in fixes:
-            data_req.fixes.add(fix)
+    attach_fixes(data_reqs, fixes)
 
     num_data_reqs = data_reqs.count()
     for fix in fixes:
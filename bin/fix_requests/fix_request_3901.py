@@ -13,6 +13,7 @@ import sys
 import django
 django.setup()
 
+from pre_proc_app.bulk import attach_fixes
 from pre_proc_app.models import DataRequest, FileFix  # noqa
 
 
@@ -56,9 +57,7 @@ def main():
         FileFix.objects.get(name='ExternalVariablesAreacella'),
     ]
 
-    for data_req in data_reqs:
-        for fix in fixes:
-            data_req.fixes.add(fix)
+    attach_fixes(data_reqs, fixes)
 
     num_data_reqs = data_reqs.count()
     for fix in fixes:
@@ -77,9 +76,7 @@ def main():
         FileFix.objects.get(name='ExternalVariablesAreacello'),
     ]
 
-    for data_req in data_reqs:
-        for fix in fixes:
-            data_req.fixes.add(fix)
+    attach_fixes(data_reqs, fixes)
 
     num_data_reqs = data_reqs.count()
     for fix in fixes:
@@ -98,9 +95,7 @@ def main():
         FileFix.objects.get(name='ExternalVariablesAreacelloVolcello'),
     ]
 
-    for data_req in data_reqs:
-        for fix in fixes:
-            data_req.fixes.add(fix)
+    attach_fixes(data_reqs, fixes)
 
     num_data_reqs = data_reqs.count()
     for fix in fixes:
@@ -120,9 +115,7 @@ def main():
         FileFix.objects.get(name='MissingValueNeg999'),
     ]
 
-    for data_req in data_reqs:
-        for fix in fixes:
-            data_req.fixes.add(fix)
+    attach_fixes(data_reqs, fixes)
 
     num_data_reqs = data_reqs.count()
     for fix in fixes:
@@ -140,9 +133,7 @@ def main():
         FileFix.objects.get(name='SitimefracStandardNameAdd'),
     ]
 
-    for data_req in data_reqs:
-        for fix in fixes:
-            data_req.fixes.add(fix)
+    attach_fixes(data_reqs, fixes)
 
     num_data_reqs = data_reqs.count()
     for fix in fixes:
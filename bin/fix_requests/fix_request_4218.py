@@ -13,6 +13,7 @@ import sys
 import django
 django.setup()
 
+from pre_proc_app.bulk import attach_fixes, detach_fixes
 from pre_proc_app.models import DataRequest, FileFix
 
 
@@ -60,9 +61,8 @@ def main():
         logger.error(msg)
         sys.exit(1)
 
+    detach_fixes(data_reqs)
     for data_req in data_reqs:
-        for fix in data_req.fixes.all():
-            data_req.fixes.remove(fix)
         if data_req.fixes.count() != 0:
             msg = f'{data_req} still contains fixes'
             logger.warning(msg)
@@ -71,13 +71,7 @@ def main():
         FileFix.objects.get(name='TrackingIdNew'),
     ]
 
-    # This next line could be done more quickly by:
-    # further_info_url_fix.datarequest_set.add(*data_reqs)
-    # but sqlite3 gives an error of:
-    # django.db.utils.OperationalError: too many SQL variables
-    for fix in fixes:
-        for data_req in data_reqs:
-            data_req.fixes.add(fix)
+    attach_fixes(data_reqs, fixes)
 
     num_data_reqs = data_reqs.count()
     for fix in fixes:
@@ -13,6 +13,7 @@ import sys
 import django
 django.setup()
 
+from pre_proc_app.bulk import attach_fixes, detach_fixes
 from pre_proc_app.models import DataRequest, FileFix
 
 
@@ -57,9 +58,7 @@ def main():
         FileFix.objects.get(name='CellMeasuresAreacellaAdd'),
     ]
 
-    for data_req in data_reqs:
-        for fix in bad_fixes:
-            data_req.fixes.remove(fix)
+    detach_fixes(data_reqs, bad_fixes)
 
     num_data_reqs = data_reqs.count()
     for fix in bad_fixes:
@@ -71,9 +70,7 @@ def main():
         FileFix.objects.get(name='CellMeasuresAreacelloAdd'),
     ]
 
-    for data_req in data_reqs:
-        for fix in fixes:
-            data_req.fixes.add(fix)
+    attach_fixes(data_reqs, fixes)
 
     num_data_reqs = data_reqs.count()
     for fix in fixes:
@@ -93,9 +90,7 @@ def main():
         FileFix.objects.get(name='CellMethodsSeaAreaTimeMeanAdd'),
     ]
 
-    for data_req in data_reqs:
-        for fix in fixes:
-            data_req.fixes.add(fix)
+    attach_fixes(data_reqs, fixes)
 
     num_data_reqs = data_reqs.count()
     for fix in fixes:
@@ -13,6 +13,7 @@ import sys
 import django
 django.setup()
 
+from pre_proc_app.bulk import detach_fixes
 from pre_proc_app.models import DataRequest, FileFix
 
 
@@ -48,9 +49,7 @@ def main():
         experiment_id__name__startswith='primWP5-amv'
     )
 
-    for data_req in data_reqs:
-        for fix in data_req.fixes.all():
-            data_req.fixes.remove(fix)
+    detach_fixes(data_reqs)
 
     logger.debug(f'All FileFixes removed from {data_reqs.count()} '
                  f'data requests.')
@@ -14,6 +14,7 @@ import sys
 import django
 django.setup()
 
+from pre_proc_app.bulk import attach_fixes, detach_fixes
 from pre_proc_app.models import DataRequest, FileFix
 
 
@@ -54,13 +55,7 @@ def main():
     further_info_url_fix = FileFix.objects.get(name='FurtherInfoUrlToHttps')
     data_specs = FileFix.objects.get(name='DataSpecsVersionAdd')
 
-    # This next line could be done more quickly by:
-    # further_info_url_fix.datarequest_set.add(*data_reqs)
-    # but sqlite3 gives an error of:
-    # django.db.utils.OperationalError: too many SQL variables
-    for data_req in data_reqs:
-        data_req.fixes.add(further_info_url_fix)
-        data_req.fixes.add(data_specs)
+    attach_fixes(data_reqs, [further_info_url_fix, data_specs])
 
     logger.debug('FileFix {} added to {} data requests.'.
                  format(further_info_url_fix.name, data_reqs.count()))
@@ -72,8 +67,7 @@ def main():
         source_id__name='HadGEM3-GC31-HH',
         experiment_id__name__in=['control-1950', 'hist-1950']
     )
-    for data_req in data_reqs:
-        data_req.fixes.remove(further_info_url_fix)
+    detach_fixes(data_reqs, [further_info_url_fix])
 
     logger.debug('FileFix {} removed from {} data requests.'.
                  format(further_info_url_fix.name, data_reqs.count()))
@@ -87,8 +81,7 @@ def main():
 
     data_specs = FileFix.objects.get(name='DataSpecsVersionAdd')
 
-    for data_req in data_reqs:
-        data_req.fixes.add(data_specs)
+    attach_fixes(data_reqs, [data_specs])
 
     logger.debug('FileFix {} added to {} data requests.'.
                  format(data_specs.name, data_reqs.count()))
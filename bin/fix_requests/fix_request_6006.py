@@ -13,6 +13,7 @@ import sys
 import django
 django.setup()
 
+from pre_proc_app.bulk import attach_fixes
 from pre_proc_app.models import DataRequest, FileFix  # nopep8
 
 
@@ -51,12 +52,7 @@ def main():
 
     wind_speed_fix = FileFix.objects.get(name='WindSpeedStandardNameAdd')
 
-    # This next line could be done more quickly by:
-    # further_info_url_fix.datarequest_set.add(*data_reqs)
-    # but sqlite3 gives an error of:
-    # django.db.utils.OperationalError: too many SQL variables
-    for data_req in data_reqs:
-        data_req.fixes.add(wind_speed_fix)
+    attach_fixes(data_reqs, [wind_speed_fix])
 
     logger.debug('FileFix {} added to {} data requests.'.
                  format(wind_speed_fix.name, data_reqs.count()))
@@ -13,6 +13,7 @@ import sys
 import django
 django.setup()
 
+from pre_proc_app.bulk import attach_fixes
 from pre_proc_app.models import DataRequest, FileFix
 
 
@@ -51,12 +52,7 @@ def main():
 
     nr100 = FileFix.objects.get(name='NominalResolution100km')
 
-    # This next line could be done more quickly by:
-    # further_info_url_fix.datarequest_set.add(*data_reqs)
-    # but sqlite3 gives an error of:
-    # django.db.utils.OperationalError: too many SQL variables
-    for data_req in data_reqs:
-        data_req.fixes.add(nr100)
+    attach_fixes(data_reqs, [nr100])
 
     logger.debug('FileFix {} added to {} data requests.'.
                  format(nr100.name, data_reqs.count()))
@@ -69,12 +65,7 @@ def main():
 
     nr50 = FileFix.objects.get(name='NominalResolution50km')
 
-    # This next line could be done more quickly by:
-    # further_info_url_fix.datarequest_set.add(*data_reqs)
-    # but sqlite3 gives an error of:
-    # django.db.utils.OperationalError: too many SQL variables
-    for data_req in data_reqs:
-        data_req.fixes.add(nr50)
+    attach_fixes(data_reqs, [nr50])
 
     logger.debug('FileFix {} added to {} data requests.'.
                  format(nr50.name, data_reqs.count()))
@@ -87,12 +78,7 @@ def main():
 
     nr100 = FileFix.objects.get(name='NominalResolution100km')
 
-    # This next line could be done more quickly by:
-    # further_info_url_fix.datarequest_set.add(*data_reqs)
-    # but sqlite3 gives an error of:
-    # django.db.utils.OperationalError: too many SQL variables
-    for data_req in data_reqs:
-        data_req.fixes.add(nr100)
+    attach_fixes(data_reqs, [nr100])
 
     logger.debug('FileFix {} added to {} data requests.'.
                  format(nr100.name, data_reqs.count()))
@@ -105,12 +91,7 @@ def main():
 
     nr25 = FileFix.objects.get(name='NominalResolution25km')
 
-    # This next line could be done more quickly by:
-    # further_info_url_fix.datarequest_set.add(*data_reqs)
-    # but sqlite3 gives an error of:
-    # django.db.utils.OperationalError: too many SQL variables
-    for data_req in data_reqs:
-        data_req.fixes.add(nr25)
+    attach_fixes(data_reqs, [nr25])
 
     logger.debug('FileFix {} added to {} data requests.'.
                  format(nr25.name, data_reqs.count()))
@@ -123,12 +104,7 @@ def main():
 
     nr10 = FileFix.objects.get(name='NominalResolution10km')
 
-    # This next line could be done more quickly by:
-    # further_info_url_fix.datarequest_set.add(*data_reqs)
-    # but sqlite3 gives an error of:
-    # django.db.utils.OperationalError: too many SQL variables
-    for data_req in data_reqs:
-        data_req.fixes.add(nr10)
+    attach_fixes(data_reqs, [nr10])
 
     logger.debug('FileFix {} added to {} data requests.'.
                  format(nr10.name, data_reqs.count()))
@@ -14,6 +14,7 @@ import sys
 import django
 django.setup()
 
+from pre_proc_app.bulk import detach_fixes
 from pre_proc_app.models import DataRequest, FileFix
 
 
@@ -54,9 +55,7 @@ def main():
         FileFix.objects.get(name='ChildBranchTimeDoubleFix')
     ]
 
-    for data_req in data_reqs:
-        for fix in fixes:
-            data_req.fixes.remove(fix)
+    detach_fixes(data_reqs, fixes)
 
     num_data_reqs = data_reqs.count()
     for fix in fixes:
@@ -14,6 +14,7 @@ import sys
 import django
 django.setup()
 
+from pre_proc_app.bulk import attach_fixes, detach_fixes
 from pre_proc_app.models import DataRequest, FileFix
 
 
@@ -67,8 +68,7 @@ def main():
         FileFix.objects.get(name='VerticesLonStdNameDelete'),
     ]
 
-    for data_req in data_reqs:
-        data_req.fixes.add(*fixes)
+    attach_fixes(data_reqs, fixes)
 
     num_data_reqs = data_reqs.count()
     for fix in fixes:
@@ -98,9 +98,7 @@ def main():
 
     remove_reqs = siday | simon
 
-    for data_req in remove_reqs:
-        for fix in fixes:
-            data_req.fixes.remove(fix)
+    detach_fixes(remove_reqs, fixes)
 
     num_data_reqs = remove_reqs.count()
     for fix in fixes:
@@ -13,6 +13,7 @@ import sys
 import django
 django.setup()
 
+from pre_proc_app.bulk import attach_fixes, detach_fixes
 from pre_proc_app.models import DataRequest, FileFix
 
 
@@ -52,12 +53,7 @@ def main():
     # Old fix previously applied
     wrong_fix = FileFix.objects.get(name='FixMaskOrca025UOlevel')
 
-    # This next line could be done more quickly by:
-    # further_info_url_fix.datarequest_set.add(*data_reqs)
-    # but sqlite3 gives an error of:
-    # django.db.utils.OperationalError: too many SQL variables
-    for data_req in data_reqs:
-        data_req.fixes.remove(wrong_fix)
+    detach_fixes(data_reqs, [wrong_fix])
 
     num_data_reqs = data_reqs.count()
     logger.debug('FileFix {} removed from {} data requests.'.
@@ -66,8 +62,7 @@ def main():
     # Correct fix
     new_fix = FileFix.objects.get(name='FixMaskOrca025USingleLevel')
 
-    for data_req in data_reqs:
-        data_req.fixes.add(new_fix)
+    attach_fixes(data_reqs, [new_fix])
 
     num_data_reqs = data_reqs.count()
     logger.debug('FileFix {} added to {} data requests.'.
@@ -14,6 +14,7 @@ import sys
 import django
 django.setup()
 
+from pre_proc_app.bulk import detach_fixes
 from pre_proc_app.models import DataRequest, FileFix
 
 
@@ -50,9 +51,7 @@ def main():
                       'PrimSIday']
     )
 
-    for data_req in data_reqs:
-        for fix in data_req.fixes.all():
-            data_req.fixes.remove(fix)
+    detach_fixes(data_reqs)
 
     num_data_reqs = data_reqs.count()
     logger.debug('FileFixes removed from {} data requests.'.
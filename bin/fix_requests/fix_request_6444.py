@@ -14,6 +14,7 @@ import sys
 import django
 django.setup()
 
+from pre_proc_app.bulk import attach_fixes, detach_fixes
 from pre_proc_app.models import DataRequest, FileFix
 
 
@@ -55,13 +56,7 @@ def main():
     further_info_url_fix = FileFix.objects.get(name='FurtherInfoUrlPrimToHttps')
     prim_further_info_fix = FileFix.objects.get(name='FurtherInfoUrlToPrim')
 
-    # This next line could be done more quickly by:
-    # further_info_url_fix.datarequest_set.add(*data_reqs)
-    # but sqlite3 gives an error of:
-    # django.db.utils.OperationalError: too many SQL variables
-    for data_req in data_reqs:
-        data_req.fixes.remove(further_info_url_fix)
-        data_req.fixes.remove(prim_further_info_fix)
+    detach_fixes(data_reqs, [further_info_url_fix, prim_further_info_fix])
 
     logger.debug('FileFix {} removed from {} data requests.'.
                  format(further_info_url_fix.name, data_reqs.count()))
@@ -78,8 +73,7 @@ def main():
         name='FurtherInfoUrlToPrim'
     )
 
-    for data_req in data_reqs:
-        data_req.fixes.add(prim_further_info_fix)
+    attach_fixes(data_reqs, [prim_further_info_fix])
 
     logger.debug('FileFix {} added to {} data requests.'.
                  format(prim_further_info_fix.name, data_reqs.count()))
@@ -14,6 +14,7 @@ import sys
 import django
 django.setup()
 
+from pre_proc_app.bulk import attach_fixes, detach_fixes
 from pre_proc_app.models import DataRequest, FileFix
 
 
@@ -55,8 +56,7 @@ def main():
         name='FurtherInfoUrlPrimToHttps'
     )
 
-    for data_req in data_reqs:
-        data_req.fixes.add(prim_further_info_fix)
+    attach_fixes(data_reqs, [prim_further_info_fix])
 
     logger.debug('FileFix {} added to {} data requests.'.
                  format(prim_further_info_fix.name, data_reqs.count()))
@@ -76,9 +76,8 @@ def main():
         name='FurtherInfoUrlToPrim'
     )
 
-    for data_req in data_reqs:
-        data_req.fixes.remove(prim_further_info_fix)
-        data_req.fixes.add(prim_https)
+    detach_fixes(data_reqs, [prim_further_info_fix])
+    attach_fixes(data_reqs, [prim_https])
 
     logger.debug('FileFix {} removed from {} data requests.'.
                  format(prim_further_info_fix.name, data_reqs.count()))
@@ -14,6 +14,7 @@ import sys
 import django
 django.setup()
 
+from pre_proc_app.bulk import attach_fixes, detach_fixes
 from pre_proc_app.models import DataRequest, FileFix
 
 
@@ -60,21 +61,14 @@ def main():
         FileFix.objects.get(name='DataSpecsVersion29Add'),
     ]
 
-    # This next line could be done more quickly by:
-    # further_info_url_fix.datarequest_set.add(*data_reqs)
-    # but sqlite3 gives an error of:
-    # django.db.utils.OperationalError: too many SQL variables
-    for data_req in data_reqs:
-        for fix in old_fixes:
-            data_req.fixes.remove(fix)
+    detach_fixes(data_reqs, old_fixes)
 
     num_data_reqs = data_reqs.count()
     for fix in old_fixes:
         logger.debug('FileFix {} removed from {} data requests.'.
                      format(fix.name, num_data_reqs))
 
-    for data_req in data_reqs:
-        data_req.fixes.add(*new_fixes)
+    attach_fixes(data_reqs, new_fixes)
 
     num_data_reqs = data_reqs.count()
     for fix in new_fixes:
@@ -14,6 +14,7 @@ import sys
 import django
 django.setup()
 
+from pre_proc_app.bulk import attach_fixes
 from pre_proc_app.models import DataRequest, FileFix  # nopep8
 
 
@@ -58,8 +59,7 @@ def main():
             source_id__name='HadGEM3-GC31-HH'
         )
         fix = FileFix.objects.get(name=variables[variable])
-        for data_req in data_reqs:
-            data_req.fixes.add(fix)
+        attach_fixes(data_reqs, [fix])
         num_data_reqs = data_reqs.count()
         logger.debug(f'FileFix {fix.name} added to '
                      f'{num_data_reqs} data requests.')
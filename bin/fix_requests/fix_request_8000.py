@@ -14,6 +14,7 @@ import sys
 import django
 django.setup()
 
+from pre_proc_app.bulk import attach_fixes, detach_fixes
 from pre_proc_app.models import DataRequest, FileFix
 
 
@@ -51,8 +52,7 @@ def main():
 
     lat_dir = FileFix.objects.get(name='LatDirection')
 
-    for data_req in data_reqs:
-        data_req.fixes.remove(lat_dir)
+    detach_fixes(data_reqs, [lat_dir])
 
     logger.debug('FileFix {} removed from {} data requests.'.
                  format(lat_dir.name, data_reqs.count()))
@@ -65,8 +65,7 @@ def main():
                         'PrimSIday', 'SIday', 'SImon'],
     )
 
-    for data_req in data_reqs:
-        data_req.fixes.add(lat_dir)
+    attach_fixes(data_reqs, [lat_dir])
 
     logger.debug('FileFix {} added to {} data requests.'.
                  format(lat_dir.name, data_reqs.count()))
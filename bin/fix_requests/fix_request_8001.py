@@ -13,6 +13,7 @@ import sys
 import django
 django.setup()
 
+from pre_proc_app.bulk import attach_fixes
 from pre_proc_app.models import DataRequest, FileFix
 
 
@@ -51,12 +52,7 @@ def main():
 
     data_specs = FileFix.objects.get(name='DataSpecsVersionAdd')
 
-    # This next line could be done more quickly by:
-    # further_info_url_fix.datarequest_set.add(*data_reqs)
-    # but sqlite3 gives an error of:
-    # django.db.utils.OperationalError: too many SQL variables
-    for data_req in data_reqs:
-        data_req.fixes.add(data_specs)
+    attach_fixes(data_reqs, [data_specs])
 
     logger.debug('FileFix {} added to {} data requests.'.
                  format(data_specs.name, data_reqs.count()))
@@ -13,6 +13,7 @@ import sys
 import django
 django.setup()
 
+from pre_proc_app.bulk import attach_fixes
 from pre_proc_app.models import DataRequest, FileFix
 
 
@@ -170,12 +171,7 @@ def main():
 
     ext_var_cella = FileFix.objects.get(name='ExternalVariablesAreacella')
 
-    # This next line could be done more quickly by:
-    # further_info_url_fix.datarequest_set.add(*data_reqs)
-    # but sqlite3 gives an error of:
-    # django.db.utils.OperationalError: too many SQL variables
-    for data_req in data_reqs:
-        data_req.fixes.add(ext_var_cella)
+    attach_fixes(data_reqs, [ext_var_cella])
 
     logger.debug('FileFix {} added to {} data requests.'.
                  format(ext_var_cella.name, data_reqs.count()))
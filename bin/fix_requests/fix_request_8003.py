@@ -13,6 +13,7 @@ import sys
 import django
 django.setup()
 
+from pre_proc_app.bulk import attach_fixes
 from pre_proc_app.models import DataRequest, FileFix
 
 
@@ -108,12 +109,7 @@ def main():
 
     ext_var_cello = FileFix.objects.get(name='ExternalVariablesAreacello')
 
-    # This next line could be done more quickly by:
-    # further_info_url_fix.datarequest_set.add(*data_reqs)
-    # but sqlite3 gives an error of:
-    # django.db.utils.OperationalError: too many SQL variables
-    for data_req in data_reqs:
-        data_req.fixes.add(ext_var_cello)
+    attach_fixes(data_reqs, [ext_var_cello])
 
     logger.debug('FileFix {} added to {} data requests.'.
                  format(ext_var_cello.name, data_reqs.count()))
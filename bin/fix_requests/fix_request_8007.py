@@ -13,6 +13,7 @@ import sys
 import django
 django.setup()
 
+from pre_proc_app.bulk import attach_fixes
 from pre_proc_app.models import DataRequest, FileFix
 
 
@@ -54,13 +55,7 @@ def main():
     cmeas_aco = FileFix.objects.get(name='CellMeasuresAreacelloAdd')
     cmeth_mwst = FileFix.objects.get(name='CellMethodsSeaAreaTimeMeanAdd')
 
-    # This next line could be done more quickly by:
-    # further_info_url_fix.datarequest_set.add(*data_reqs)
-    # but sqlite3 gives an error of:
-    # django.db.utils.OperationalError: too many SQL variables
-    for data_req in data_reqs:
-        data_req.fixes.add(cmeas_aco)
-        data_req.fixes.add(cmeth_mwst)
+    attach_fixes(data_reqs, [cmeas_aco, cmeth_mwst])
 
     logger.debug('FileFix {} added to {} data requests.'.
                  format(cmeas_aco.name, data_reqs.count()))
@@ -13,6 +13,7 @@ import sys
 import django
 django.setup()
 
+from pre_proc_app.bulk import attach_fixes
 from pre_proc_app.models import DataRequest, FileFix
 
 
@@ -53,12 +54,7 @@ def main():
 
     sisaltmass = FileFix.objects.get(name='SisaltmassStandardNameAdd')
 
-    # This next line could be done more quickly by:
-    # further_info_url_fix.datarequest_set.add(*data_reqs)
-    # but sqlite3 gives an error of:
-    # django.db.utils.OperationalError: too many SQL variables
-    for data_req in data_reqs:
-        data_req.fixes.add(sisaltmass)
+    attach_fixes(data_reqs, [sisaltmass])
 
     logger.debug('FileFix {} added to {} data requests.'.
                  format(sisaltmass.name, data_reqs.count()))
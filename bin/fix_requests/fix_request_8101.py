@@ -13,6 +13,7 @@ import sys
 import django
 django.setup()
 
+from pre_proc_app.bulk import attach_fixes
 from pre_proc_app.models import DataRequest, FileFix
 
 
@@ -89,12 +90,7 @@ def main():
 
     cm_atm = FileFix.objects.get(name='CellMethodsAreaTimeMeanAdd')
 
-    # This next line could be done more quickly by:
-    # further_info_url_fix.datarequest_set.add(*data_reqs)
-    # but sqlite3 gives an error of:
-    # django.db.utils.OperationalError: too many SQL variables
-    for data_req in data_reqs:
-        data_req.fixes.add(cm_atm)
+    attach_fixes(data_reqs, [cm_atm])
 
     logger.debug('FileFix {} added to {} data requests.'.
                  format(cm_atm.name, data_reqs.count()))
@@ -13,6 +13,7 @@ import sys
 import django
 django.setup()
 
+from pre_proc_app.bulk import attach_fixes
 from pre_proc_app.models import DataRequest, FileFix
 
 
@@ -52,12 +53,7 @@ def main():
 
     clt = FileFix.objects.get(name='VarUnitsToPercent')
 
-    # This next line could be done more quickly by:
-    # further_info_url_fix.datarequest_set.add(*data_reqs)
-    # but sqlite3 gives an error of:
-    # django.db.utils.OperationalError: too many SQL variables
-    for data_req in data_reqs:
-        data_req.fixes.add(clt)
+    attach_fixes(data_reqs, [clt])
 
     logger.debug('FileFix {} added to {} data requests.'.
                  format(clt.name, data_reqs.count()))
@@ -13,6 +13,7 @@ import sys
 import django
 django.setup()
 
+from pre_proc_app.bulk import attach_fixes, detach_fixes
 from pre_proc_app.models import DataRequest, FileFix
 
 
@@ -51,13 +52,8 @@ def main():
     fix_tracking_id = FileFix.objects.get(name='TrackingIdFix')
     new_tracking_id = FileFix.objects.get(name='TrackingIdNew')
 
-    # This next line could be done more quickly by:
-    # further_info_url_fix.datarequest_set.add(*data_reqs)
-    # but sqlite3 gives an error of:
-    # django.db.utils.OperationalError: too many SQL variables
-    for data_req in data_reqs:
-        data_req.fixes.remove(fix_tracking_id)
-        data_req.fixes.add(new_tracking_id)
+    detach_fixes(data_reqs, [fix_tracking_id])
+    attach_fixes(data_reqs, [new_tracking_id])
 
     logger.debug('FileFix {} added to {} data requests.'.
                  format(new_tracking_id.name, data_reqs.count()))
@@ -5,16 +5,13 @@ make_db_from_json.py
 Use Django to populate the database from the JSON file generated by the DMT.
 """
 import argparse
-import json
 import logging.config
 import sys
 
 import django
 django.setup()
 
-import pre_proc_app.models
-from pre_proc_app.models import (Institution, ClimateModel, Experiment,
-                                 DataRequest)
+from pre_proc_app.bulk import DmtJsonLoader, DEFAULT_BATCH_SIZE
 
 
 __version__ = '0.1.0b1'
@@ -25,42 +22,6 @@ DEFAULT_LOG_FORMAT = '%(levelname)s: %(message)s'
 logger = logging.getLogger(__name__)
 
 
-def _dict_to_object(dict_):
-    """
-    Convert a dictionary to an object.
-
-    This was designed to be passed to the object_hook argument in json.load()
-    but has been modified to be called on its own because in this application
-    the order that objects are created in is important because of the
-    foreign key relationships.
-    """
-    klass = getattr(pre_proc_app.models, dict_['__class__'])
-    if dict_['__class__'] in ('ClimateModel', 'Experiment', 'Institution'):
-        inst = klass.objects.get_or_create(
-            name=dict_['__kwargs__']['short_name']
-        )
-    elif dict_['__class__'] == 'DataRequest':
-        institution_id = Institution.objects.get(
-            name=dict_['__kwargs__']['institution_id__name'])
-        source_id = ClimateModel.objects.get(
-            name=dict_['__kwargs__']['source_id__name'])
-        experiment_id = Experiment.objects.get(
-            name=dict_['__kwargs__']['experiment_id__name'])
-        inst = DataRequest.objects.get_or_create(
-            institution_id=institution_id,
-            source_id=source_id,
-            experiment_id=experiment_id,
-            table_id=dict_['__kwargs__']['table_id'],
-            cmor_name=dict_['__kwargs__']['cmor_name'],
-            variant_label=dict_['__kwargs__']['variant_label']
-        )
-    else:
-        msg = ('Cannot load from JSON files class {}'.
-               format(dict_['__class__']))
-        raise NotImplementedError(msg)
-    return inst
-
-
 def parse_args():
     """
     Parse command-line arguments
@@ -74,6 +35,10 @@ def parse_args():
                                                   'default), or error')
     parser.add_argument('--version', action='version',
                         version='%(prog)s {}'.format(__version__))
+    parser.add_argument('-b', '--batch-size', help='the number of objects to '
+                                                   'write to the database at a '
+                                                   'time (default: %(default)s)',
+                        type=int, default=DEFAULT_BATCH_SIZE)
     args = parser.parse_args()
 
     return args
@@ -83,17 +48,17 @@ def main(args):
     """
     Main entry point
     """
+    loader = DmtJsonLoader(args.batch_size)
     with open(args.json_file) as fh:
-        json_dict = json.load(fh,)
+        report = loader.load(fh)
 
     for object_type in ['institution_id', 'source_id', 'experiment_id',
                         'data_requests']:
-        num_created = 0
-        for object_instance in json_dict[object_type]:
-            _obj, created = _dict_to_object(object_instance)
-            if created:
-                num_created += 1
-        logger.debug('{} new {} created'.format(num_created, object_type))
+        logger.debug('{} new {} created'.format(
+            report['{}_created'.format(object_type)], object_type))
+    logger.info('{} rows loaded in {:.1f} seconds ({:.0f} rows/second)'.
+                format(report['rows'], report['seconds'],
+                       report['rows_per_second']))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+"""
+plan_shards.py
+
+Split the files below a directory into shards that are each predicted to
+take a similar time to fix and write a manifest for each shard. Each task of
+a batch array job can then fix one shard by running run_pre_proc.py with the
+--manifest option. The time taken to fix each file is predicted from the
+file's size and the fixes for its dataset.
+"""
+import argparse
+import logging.config
+import os
+import sys
+import traceback
+
+from pre_proc.dataset import group_by_dataset
+from pre_proc.scanner import DirectoryScanner, DEFAULT_SCAN_THREADS
+from pre_proc.shard import CostModel, plan_shards, write_manifests
+
+__version__ = '0.1.0b1'
+
+DEFAULT_LOG_LEVEL = logging.WARNING
+DEFAULT_LOG_FORMAT = '%(levelname)s: %(message)s'
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    """
+    Parse command-line arguments
+    """
+    parser = argparse.ArgumentParser(description='Split the files to fix '
+                                                 'into balanced shards.')
+    parser.add_argument('directory', help='the directory where the files to '
+                                          'fix are stored', type=str)
+    parser.add_argument('manifest_dir', help='the directory to write the '
+                                             'manifests to', type=str)
+    parser.add_argument('-n', '--shards', help='the number of shards',
+                        type=int, required=True)
+    parser.add_argument('-c', '--coefficients',
+                        help='a JSON file of the cost coefficients to use '
+                             'instead of the defaults')
+    parser.add_argument('--scan-threads', help='the number of directories '
+                                               'to read in parallel '
+                                               '(default: %(default)s)',
+                        type=int, default=DEFAULT_SCAN_THREADS)
+    parser.add_argument('--inventory', help='keep an inventory of the '
+                                            'directories scanned in this '
+                                            'file so that unchanged '
+                                            'directories are not read again')
+    parser.add_argument('-l', '--log-level', help='set logging level to one '
+                                                  'of debug, info, warn (the '
+                                                  'default), or error')
+    parser.add_argument('--version', action='version',
+                        version='%(prog)s {}'.format(__version__))
+    args = parser.parse_args()
+
+    return args
+
+
+def predict_costs(datasets, cost_model):
+    """
+    Predict the time taken to fix each file.
+
+    :param list datasets: The datasets containing the files.
+    :param pre_proc.shard.CostModel cost_model: The cost model.
+    :returns: The predicted seconds by each file's full path.
+    :rtype: dict
+    """
+    costs = {}
+    for dataset in datasets:
+        try:
+            fix_names = dataset.resolve_fixes()
+        except Exception:
+            # The files will fail quickly when they're run
+            logger.warning('Determining the fixes for {} failed\n{}'.
+                           format(dataset, traceback.format_exc()))
+            fix_names = []
+        for filepath in dataset.filepaths:
+            costs[filepath] = cost_model.predict(os.path.getsize(filepath),
+                                                 fix_names)
+    return costs
+
+
+def main(args):
+    """
+    Main entry point
+    """
+    if args.coefficients:
+        cost_model = CostModel.from_file(args.coefficients)
+    else:
+        cost_model = CostModel()
+
+    scanner = DirectoryScanner(threads=args.scan_threads,
+                               inventory_path=args.inventory)
+    datasets = group_by_dataset(scanner.scan(args.directory))
+    costs = predict_costs(datasets, cost_model)
+
+    try:
+        shards = plan_shards(costs, args.shards)
+    except ValueError as exc:
+        logger.error(str(exc))
+        sys.exit(1)
+    write_manifests(args.manifest_dir, shards)
+
+    for shard in shards:
+        logger.debug('Shard {}: {} files, predicted {:.0f} seconds'.
+                     format(shard.index, len(shard.filepaths), shard.cost))
+    shard_costs = [shard.cost for shard in shards]
+    logger.info('{} files in {} datasets split into {} shards predicted to '
+                'take between {:.0f} and {:.0f} seconds'.
+                format(len(costs), len(datasets), len(shards),
+                       min(shard_costs), max(shard_costs)))
+
+
+if __name__ == "__main__":
+    cmd_args = parse_args()
+
+    # determine the log level
+    if cmd_args.log_level:
+        try:
+            log_level = getattr(logging, cmd_args.log_level.upper())
+        except AttributeError:
+            logger.setLevel(logging.WARNING)
+            logger.error('log-level must be one of: debug, info, warn or error')
+            sys.exit(1)
+    else:
+        log_level = DEFAULT_LOG_LEVEL
+
+    # configure the logger
+    logging.config.dictConfig({
+        'version': 1,
+        'disable_existing_loggers': False,
+        'formatters': {
+            'standard': {
+                'format': DEFAULT_LOG_FORMAT,
+            },
+        },
+        'handlers': {
+            'default': {
+                'level': log_level,
+                'class': 'logging.StreamHandler',
+                'formatter': 'standard'
+            },
+        },
+        'loggers': {
+            '': {
+                'handlers': ['default'],
+                'level': log_level,
+                'propagate': True
+            }
+        }
+    })
+
+    # run the code
+    main(cmd_args)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+"""
+preflight.py
+
+Check the preconditions of the fixes for every file below a directory
+without changing any of the files, for example that the data is in Kelvin
+before it's converted to degrees Celsius. Only the files' headers are read.
+The fixes that would fail are reported with the files that they would fail
+on, so that bad rules can be corrected before any data is rewritten.
+"""
+import argparse
+import logging.config
+import sys
+import traceback
+
+from pre_proc.dataset import group_by_dataset
+from pre_proc.preflight import log_problems, preflight
+from pre_proc.scanner import DirectoryScanner, DEFAULT_SCAN_THREADS
+
+__version__ = '0.1.0b1'
+
+DEFAULT_LOG_LEVEL = logging.WARNING
+DEFAULT_LOG_FORMAT = '%(levelname)s: %(message)s'
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    """
+    Parse command-line arguments
+    """
+    parser = argparse.ArgumentParser(description='Check the preconditions '
+                                                 'of the fixes for the files '
+                                                 'in a directory.')
+    parser.add_argument('directory', help='the directory where the files to '
+                                          'check are stored', type=str)
+    parser.add_argument('-p', '--processes', help='the number of files to '
+                                                  'check in parallel '
+                                                  '(default: %(default)s)',
+                        type=int, default=1)
+    parser.add_argument('-a', '--all', help='list every file that a fix '
+                                            'would fail on rather than a few '
+                                            'examples', action='store_true')
+    parser.add_argument('--scan-threads', help='the number of directories '
+                                               'to read in parallel '
+                                               '(default: %(default)s)',
+                        type=int, default=DEFAULT_SCAN_THREADS)
+    parser.add_argument('-l', '--log-level', help='set logging level to one '
+                                                  'of debug, info, warn (the '
+                                                  'default), or error')
+    parser.add_argument('--version', action='version',
+                        version='%(prog)s {}'.format(__version__))
+    args = parser.parse_args()
+
+    return args
+
+
+def main(args):
+    """
+    Main entry point
+    """
+    scanner = DirectoryScanner(threads=args.scan_threads)
+    datasets = group_by_dataset(scanner.scan(args.directory))
+
+    resolved = []
+    files_unresolved = 0
+    for dataset in datasets:
+        try:
+            dataset.resolve_fixes()
+        except Exception:
+            logger.error('Determining the fixes for {} failed\n{}'.
+                         format(dataset, traceback.format_exc()))
+            files_unresolved += len(dataset.filepaths)
+        else:
+            resolved.append(dataset)
+
+    problems = preflight(resolved, args.processes)
+    log_problems(problems, None if args.all else 3)
+    logger.info('{} files checked in {} datasets; the fixes would fail on '
+                '{} files and could not be determined for {} files'.
+                format(sum(len(dataset.filepaths) for dataset in datasets),
+                       len(datasets), len(problems), files_unresolved))
+    if problems or files_unresolved:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    cmd_args = parse_args()
+
+    # determine the log level
+    if cmd_args.log_level:
+        try:
+            log_level = getattr(logging, cmd_args.log_level.upper())
+        except AttributeError:
+            logger.setLevel(logging.WARNING)
+            logger.error('log-level must be one of: debug, info, warn or error')
+            sys.exit(1)
+    else:
+        log_level = DEFAULT_LOG_LEVEL
+
+    # configure the logger
+    logging.config.dictConfig({
+        'version': 1,
+        'disable_existing_loggers': False,
+        'formatters': {
+            'standard': {
+                'format': DEFAULT_LOG_FORMAT,
+            },
+        },
+        'handlers': {
+            'default': {
+                'level': log_level,
+                'class': 'logging.StreamHandler',
+                'formatter': 'standard'
+            },
+        },
+        'loggers': {
+            '': {
+                'handlers': ['default'],
+                'level': log_level,
+                'propagate': True
+            }
+        }
+    })
+
+    # run the code
+    main(cmd_args)
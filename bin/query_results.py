@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+"""
+query_results.py
+
+List the outcomes of fixing files that were recorded in the results
+database by run_pre_proc.py --results, for example the files in a dataset
+where a fix failed or the slowest files.
+"""
+import argparse
+import logging.config
+import sys
+
+import django
+django.setup()
+
+from pre_proc_app.results import failed_files, slowest_files
+
+
+__version__ = '0.1.0b1'
+
+DEFAULT_LOG_LEVEL = logging.WARNING
+DEFAULT_LOG_FORMAT = '%(levelname)s: %(message)s'
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    """
+    Parse command-line arguments
+    """
+    parser = argparse.ArgumentParser(description='Query the outcomes of '
+                                                 'fixing files.')
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('-f', '--failed', help='list the files that could '
+                                              'not be fixed',
+                       action='store_true')
+    group.add_argument('-s', '--slowest', help='list this number of the '
+                                               'slowest files', type=int)
+    parser.add_argument('--fix', help='only list the files where this fix '
+                                      'failed')
+    parser.add_argument('--dataset', help='only list the files in this '
+                                          'dataset, which is the directory '
+                                          'and the filename without the time '
+                                          'range')
+    parser.add_argument('-l', '--log-level', help='set logging level to one '
+                                                  'of debug, info, warn (the '
+                                                  'default), or error')
+    parser.add_argument('--version', action='version',
+                        version='%(prog)s {}'.format(__version__))
+    args = parser.parse_args()
+
+    return args
+
+
+def main(args):
+    """
+    Main entry point
+    """
+    if args.failed:
+        results = failed_files(args.fix, args.dataset)
+    else:
+        results = slowest_files(args.slowest)
+    for result in results:
+        print('{}\t{}\t{:.1f}\t{}\t{}'.format(
+            result.filepath, result.status, result.duration,
+            result.failed_batch or result.failed_fix or '',
+            result.error_class or ''
+        ))
+
+
+if __name__ == "__main__":
+    cmd_args = parse_args()
+
+    # determine the log level
+    if cmd_args.log_level:
+        try:
+            log_level = getattr(logging, cmd_args.log_level.upper())
+        except AttributeError:
+            logger.setLevel(logging.WARNING)
+            logger.error('log-level must be one of: debug, info, warn or error')
+            sys.exit(1)
+    else:
+        log_level = DEFAULT_LOG_LEVEL
+
+    # configure the logger
+    logging.config.dictConfig({
+        'version': 1,
+        'disable_existing_loggers': False,
+        'formatters': {
+            'standard': {
+                'format': DEFAULT_LOG_FORMAT,
+            },
+        },
+        'handlers': {
+            'default': {
+                'level': log_level,
+                'class': 'logging.StreamHandler',
+                'formatter': 'standard'
+            },
+        },
+        'loggers': {
+            '': {
+                'handlers': ['default'],
+                'level': log_level,
+                'propagate': True
+            }
+        }
+    })
+
+    # run the code
+    main(cmd_args)
@@ -4,7 +4,8 @@ run_force_fix.py
 
 Run PRIMAVERA pre-processing as part of the CEDA CREPP workflow. A directory
 is specified and all files in this directory are fixed with the specified
-FileFix.
+FileFix. Alternatively, the files listed in a manifest written by
+plan_shards.py can be fixed.
 """
 import argparse
 import logging.config
@@ -16,11 +17,10 @@ import time
 import traceback
 import warnings
 
-import dask
-
-import pre_proc
 from pre_proc import EsgfSubmission
 from pre_proc.common import list_files
+from pre_proc.file_fix.registry import get_fix_class
+from pre_proc.shard import manifest_path, read_manifest
 
 __version__ = '0.1.0b1'
 
@@ -45,6 +45,15 @@ def parse_args():
     parser.add_argument('-f', '--file', help='Process single file rather than '
                                              'directory',
                         action='store_true')
+    parser.add_argument('-m', '--manifest',
+                        help='process the files listed in a manifest, or if '
+                             'a directory of manifests is specified then in '
+                             'the manifest of the shard from --shard or the '
+                             "batch scheduler's array index",
+                        action='store_true')
+    parser.add_argument('-s', '--shard', help='the number of the shard to '
+                                              'process from a directory of '
+                                              'manifests', type=int)
     parser.add_argument('-t', '--temp-dir',
                         help='copy each file to the specified temporary '
                              'directory before processing it')
@@ -62,8 +71,9 @@ def main(args):
     """
     Main entry point
     """
-    # Assume that this will be run with one CPU allocated
-    dask.config.set(scheduler='synchronous')
+    # Assume that this will be run with one CPU allocated. Dask reads this
+    # when it's first imported, which is only if a fix loads data with Iris.
+    os.environ['DASK_SCHEDULER'] = 'synchronous'
 
     logger.debug('Database directory is {}'.
                  format(os.environ['DATABASE_DIR']))
@@ -72,6 +82,14 @@ def main(args):
 
     if args.file:
         files_to_process = [args.directory]
+    elif args.manifest:
+        try:
+            manifest = manifest_path(args.directory, args.shard)
+        except ValueError as exc:
+            logger.error(str(exc))
+            sys.exit(1)
+        logger.debug('Manifest is {}'.format(manifest))
+        files_to_process = read_manifest(manifest)
     else:
         files_to_process = sorted(list_files(args.directory))
 
@@ -95,7 +113,7 @@ def main(args):
             else:
                 process_path = filepath
             esgf_submission = EsgfSubmission.from_file(process_path)
-            esgf_submission.fixes = [getattr(pre_proc.file_fix, args.fix_name)
+            esgf_submission.fixes = [get_fix_class(args.fix_name)
                                      (os.path.basename(process_path),
                                       os.path.dirname(process_path))]
             esgf_submission.run_fixes()
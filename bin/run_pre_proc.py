@@ -3,24 +3,51 @@
 run_pre_proc.py
 
 Run PRIMAVERA pre-processing as part of the CEDA CREPP workflow. A directory
-is specified and all files in this directory are fixed. It is likely that the
-same fixes will be applied to all of the files, however, the fixes to apply
-are calculated again for each file.
+is specified and all files in this directory are fixed. The files are
+grouped into the datasets that they belong to and the fixes to apply, and
+any values that are the same for every file in the dataset, are only
+determined once for each dataset. Datasets can be processed in parallel by
+several processes, with each dataset being processed by a single process,
+or the files can be fixed concurrently in a single process, which runs the
+fixes' external commands on an asyncio event loop.
+The directory is scanned by several threads and, if the directory is in the
+DRS structure, only the specified tables, variables and versions are
+scanned. Alternatively, the files listed in a manifest written by
+plan_shards.py can be fixed, or files can be claimed from a work queue
+created by work_queue.py until the queue is empty.
 """
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+import contextlib
+from functools import partial
+from itertools import repeat
 import logging.config
+import multiprocessing
 import os
 import shutil
 import sys
 import tempfile
+import threading
 import time
 import traceback
 import warnings
 
-import dask
-
-from pre_proc import EsgfSubmission
-from pre_proc.common import list_files
+from pre_proc.common import blocking
+from pre_proc.dataset import dataset_key, group_by_dataset, DatasetGroup
+from pre_proc.orchestrator import (AsyncOrchestrator, DEFAULT_MAX_PROCESSES,
+                                   DEFAULT_MAX_IO_PER_FILESYSTEM)
+from pre_proc.metrics import (DEFAULT_EXPORT_INTERVAL, Metrics,
+                              MetricsExporter)
+from pre_proc.preflight import log_problems, preflight
+from pre_proc.results import (combine_recorders, drain_results, FileResult,
+                              QueuedRecorder, SKIPPED)
+from pre_proc.scanner import (DirectoryScanner, DEFAULT_SCAN_THREADS,
+                              DRS_DIRECTORIES)
+from pre_proc.shard import manifest_path, read_manifest
+from pre_proc.tracing import (DEFAULT_SAMPLE_RATE, span, start_tracing,
+                              stop_tracing, trace_file)
+from pre_proc.work_queue import (DEFAULT_POLL_INTERVAL, LeaseKeeper,
+                                 WorkQueue, worker_id)
 
 __version__ = '0.1.0b1'
 
@@ -39,80 +66,779 @@ def parse_args():
     """
     parser = argparse.ArgumentParser(description='Pre-process PRIMAVERA data.')
     parser.add_argument('directory', help='the directory where the files to '
-                                          'fix are stored', type=str)
+                                          'fix are stored, or a manifest '
+                                          'if --manifest is set or a work '
+                                          'queue if --queue is set',
+                        type=str)
+    parser.add_argument('-m', '--manifest',
+                        help='fix the files listed in a manifest, or if a '
+                             'directory of manifests is specified then in '
+                             'the manifest of the shard from --shard or the '
+                             "batch scheduler's array index",
+                        action='store_true')
+    parser.add_argument('-s', '--shard', help='the number of the shard to '
+                                              'fix from a directory of '
+                                              'manifests', type=int)
+    parser.add_argument('--queue', help='claim files from a work queue '
+                                        'until it is empty',
+                        action='store_true')
+    parser.add_argument('--claim-size', help='the maximum number of files '
+                                             'to claim from the queue at a '
+                                             'time (default: %(default)s)',
+                        type=int, default=10)
     parser.add_argument('-t', '--temp-dir',
                         help='copy each file to the specified temporary '
                              'directory before processing it')
+    parser.add_argument('-p', '--processes', help='the number of datasets to '
+                                                  'process in parallel '
+                                                  '(default: %(default)s)',
+                        type=int, default=1)
+    parser.add_argument('--preflight', help='check the preconditions of '
+                                            'the fixes for every file '
+                                            'first and do not fix any files '
+                                            'if any of the fixes would fail',
+                        action='store_true')
+    parser.add_argument('--results', help='record the outcome of each file '
+                                          'in the results database',
+                        action='store_true')
+    parser.add_argument('--metrics-textfile',
+                        help='periodically write metrics of the progress to '
+                             'this Prometheus textfile')
+    parser.add_argument('--metrics-json',
+                        help='periodically write metrics of the progress to '
+                             'this JSON file')
+    parser.add_argument('--metrics-interval',
+                        help='the seconds between writing the metrics '
+                             '(default: %(default)s)',
+                        type=float, default=DEFAULT_EXPORT_INTERVAL)
+    parser.add_argument('--trace',
+                        help='write a timeline of the fixes, commands and '
+                             'file opens of each file to this Chrome '
+                             'trace-event JSON file')
+    parser.add_argument('--trace-sample-rate',
+                        help='the fraction of files to trace (default: '
+                             '%(default)s)',
+                        type=float, default=DEFAULT_SAMPLE_RATE)
+    parser.add_argument('--canary', help='fix the first file of each '
+                                         'dataset before the others and '
+                                         'skip the rest of the dataset if '
+                                         'it fails', action='store_true')
+    parser.add_argument('-c', '--concurrent-files',
+                        help='the number of files to fix at once in this '
+                             'process, running their external commands '
+                             'concurrently (default: %(default)s)',
+                        type=int, default=1)
+    parser.add_argument('--max-commands',
+                        help='the maximum number of external commands to '
+                             'run at once with --concurrent-files '
+                             '(default: %(default)s)',
+                        type=int, default=DEFAULT_MAX_PROCESSES)
+    parser.add_argument('--max-filesystem-commands',
+                        help='the maximum number of external commands to '
+                             'run at once on the files on each filesystem '
+                             'with --concurrent-files (default: '
+                             '%(default)s)',
+                        type=int, default=DEFAULT_MAX_IO_PER_FILESYSTEM)
+    parser.add_argument('--scan-threads', help='the number of directories '
+                                               'to read in parallel '
+                                               '(default: %(default)s)',
+                        type=int, default=DEFAULT_SCAN_THREADS)
+    parser.add_argument('--inventory', help='keep an inventory of the '
+                                            'directories scanned in this '
+                                            'file so that unchanged '
+                                            'directories are not read again')
+    parser.add_argument('--drs-root', help='the DRS component of the '
+                                           "directory's sub-directories "
+                                           '(default: %(default)s)',
+                        choices=DRS_DIRECTORIES, default='mip_era')
+    parser.add_argument('--tables', help='only scan these table_id '
+                                         'directories', nargs='+')
+    parser.add_argument('--variables', help='only scan these variable_id '
+                                            'directories', nargs='+')
+    parser.add_argument('--versions', help='only scan these version '
+                                           'directories', nargs='+')
     parser.add_argument('-l', '--log-level', help='set logging level to one '
                                                   'of debug, info, warn (the '
                                                   'default), or error')
     parser.add_argument('--version', action='version',
                         version='%(prog)s {}'.format(__version__))
     args = parser.parse_args()
+    if args.concurrent_files > 1 and (args.processes > 1 or args.queue):
+        parser.error('--concurrent-files cannot be used with --processes '
+                     'or --queue')
 
     return args
 
 
+def process_file(filepath, dataset, temp_dir=None, result=None):
+    """
+    Fix a single file.
+
+    :param str filepath: The full path of the file.
+    :param pre_proc.dataset.DatasetGroup dataset: The file's dataset.
+    :param str temp_dir: The directory to copy the file to before fixing it
+        or None to fix it in place.
+    :param pre_proc.results.FileResult result: If not None then the fix
+        that failed and the time taken by each fix are recorded in this.
+    """
+    logger.debug('Processing {}'.format(filepath))
+    if temp_dir:
+        file_temp_dir = tempfile.mkdtemp(dir=temp_dir)
+        logger.debug('Temporary directory is {}'.format(file_temp_dir))
+        temp_path = os.path.join(file_temp_dir, os.path.basename(filepath))
+        # Other files can be fixed concurrently while this one is copied
+        with span('copy to temp_dir', 'copy', path=temp_path):
+            try:
+                with blocking(filepath):
+                    shutil.copyfile(filepath, temp_path)
+            except PermissionError:
+                # A PermisssionError occurs on the JASMIN storage
+                # occasionally and so wait and then retry once.
+                logger.warning('PermissionError copying file to temp_dir. '
+                               'Waiting ten minutes')
+                with blocking():
+                    time.sleep(600)
+                with blocking(filepath):
+                    shutil.copyfile(filepath, temp_path)
+        process_path = temp_path
+    else:
+        process_path = filepath
+    esgf_submission = dataset.create_submission(process_path)
+    try:
+        esgf_submission.run_fixes()
+    finally:
+        if result is not None:
+            result.failed_fix = esgf_submission.failed_fix
+            result.failed_batch = esgf_submission.failed_batch
+            result.fix_durations = esgf_submission.fix_durations
+    esgf_submission.update_history()
+    if temp_dir:
+        os.rename(filepath, filepath + '.old')
+        with span('copy from temp_dir', 'copy', path=filepath):
+            try:
+                with blocking(filepath):
+                    shutil.copyfile(temp_path, filepath)
+            except PermissionError:
+                # A PermisssionError occurs on the JASMIN storage
+                # occasionally and so wait and then retry once. The later
+                # operations could also be affected but take much less
+                # time and so are less likely to be affected. If experience
+                # shows that they would also benefit from a repeat then
+                # this can be added later. The later operations are also
+                # easier to recover from.
+                logger.warning('PermissionError copying file from '
+                               'temp_dir. Waiting ten minutes')
+                with blocking():
+                    time.sleep(600)
+                with blocking(filepath):
+                    shutil.copyfile(temp_path, filepath)
+        os.remove(temp_path)
+        os.rmdir(file_temp_dir)
+        os.remove(filepath + '.old')
+
+
+def resolve_fixes(dataset, report, recorder=None):
+    """
+    Determine the fixes for a dataset from its first file.
+
+    :param pre_proc.dataset.DatasetGroup dataset: The dataset.
+    :param function report: Called with the full path of each of the
+        dataset's files and the error if the fixes can't be determined.
+        The fixes aren't determined again if they already have been.
+    :param pre_proc_app.results.ResultRecorder recorder: If not None then
+        the failure of each file is recorded with this.
+    :returns: True if the fixes were determined.
+    :rtype: bool
+    """
+    try:
+        fix_names = dataset.fix_names
+        if fix_names is None:
+            fix_names = dataset.resolve_fixes()
+    except Exception as exc:
+        tb_string = traceback.format_exc()
+        logger.error('Determining the fixes for {} failed\n{}'.
+                     format(dataset, tb_string))
+        for filepath in dataset.filepaths:
+            report(filepath, tb_string)
+            if recorder is not None:
+                recorder.add(new_result(filepath, dataset).finish(exc))
+        return False
+    logger.debug('Fixes for {}: {}'.format(dataset,
+                                           ', '.join(fix_names) or 'none'))
+    return True
+
+
+def fix_file(filepath, dataset, temp_dir, report, recorder=None):
+    """
+    Fix a single file, logging any error.
+
+    :param str filepath: The full path of the file.
+    :param pre_proc.dataset.DatasetGroup dataset: The file's dataset, whose
+        fixes have been determined.
+    :param str temp_dir: The directory to copy the file to before fixing it
+        or None to fix it in place.
+    :param function report: Called with the file's full path and None if
+        it was fixed or the error if it wasn't.
+    :param pre_proc_app.results.ResultRecorder recorder: If not None then
+        the outcome is recorded with this.
+    :returns: True if the file was fixed.
+    :rtype: bool
+    """
+    result = new_result(filepath, dataset) if recorder is not None else None
+    try:
+        with trace_file(filepath):
+            process_file(filepath, dataset, temp_dir, result)
+    except:
+        exc_type, exc_value, exc_tb = sys.exc_info()
+        tb_list = traceback.format_exception(exc_type, exc_value, exc_tb)
+        tb_string = '\n'.join(tb_list)
+        logger.error('Processing file {} failed\n{}'.
+                     format(filepath, tb_string))
+        report(filepath, tb_string)
+        if result is not None:
+            recorder.add(result.finish(exc_value))
+        return False
+    report(filepath, None)
+    if result is not None:
+        recorder.add(result.finish())
+    return True
+
+
+def new_result(filepath, dataset):
+    """
+    Start recording the outcome of fixing a file.
+
+    :param str filepath: The full path of the file.
+    :param pre_proc.dataset.DatasetGroup dataset: The file's dataset.
+    :returns: The result.
+    :rtype: pre_proc.results.FileResult
+    """
+    return FileResult(filepath, os.path.join(*dataset.key),
+                      dataset.fix_names, worker_id())
+
+
+def _ignore_outcome(filepath, error):
+    """
+    The report function used when outcomes aren't recorded.
+    """
+    pass
+
+
+def block_dataset(dataset, filepaths, report, recorder=None):
+    """
+    Skip the remaining files in a dataset whose first file couldn't be
+    fixed, as they would almost certainly fail in the same way.
+
+    :param pre_proc.dataset.DatasetGroup dataset: The dataset.
+    :param list filepaths: The full paths of the files to skip.
+    :param function report: Called with the full path of each file skipped
+        and the reason that it was skipped.
+    :param pre_proc_app.results.ResultRecorder recorder: If not None then
+        the files skipped are recorded with this.
+    :returns: The full paths of the files skipped.
+    :rtype: list
+    """
+    dataset.blocked = True
+    reason = ('Skipped because the first file in the dataset, {}, could not '
+              'be fixed'.format(dataset.filepaths[0]))
+    if filepaths:
+        logger.error('{} blocked because its first file could not be '
+                     'fixed; {} files skipped'.format(dataset,
+                                                      len(filepaths)))
+    for filepath in filepaths:
+        report(filepath, reason)
+        if recorder is not None:
+            recorder.add(new_result(filepath, dataset).finish(reason,
+                                                              SKIPPED))
+    return list(filepaths)
+
+
+def process_dataset(dataset, temp_dir=None, report=None, canary=False,
+                    recorder=None):
+    """
+    Fix all of the files in a dataset. The fixes are determined from the
+    dataset's first file and are then applied to every file.
+
+    :param pre_proc.dataset.DatasetGroup dataset: The dataset.
+    :param str temp_dir: The directory to copy each file to before fixing
+        it or None to fix the files in place.
+    :param function report: If not None then this is called with the full
+        path of each file and None if it was fixed or the error if it
+        wasn't.
+    :param bool canary: If True then the remaining files aren't tried if
+        the first file can't be fixed.
+    :param pre_proc_app.results.ResultRecorder recorder: If not None then
+        the outcome of each file is recorded with this and the results are
+        written once the dataset is finished.
+    :returns: The full paths of the files that couldn't be fixed.
+    :rtype: list
+    """
+    report = report or _ignore_outcome
+    try:
+        if not resolve_fixes(dataset, report, recorder):
+            return list(dataset.filepaths)
+        filepaths = dataset.filepaths
+        if canary:
+            if not fix_file(filepaths[0], dataset, temp_dir, report,
+                            recorder):
+                return [filepaths[0]] + block_dataset(
+                    dataset, filepaths[1:], report, recorder
+                )
+            filepaths = filepaths[1:]
+        return [filepath for filepath in filepaths
+                if not fix_file(filepath, dataset, temp_dir, report,
+                                recorder)]
+    finally:
+        if recorder is not None:
+            recorder.flush()
+
+
+def fix_in_order(datasets, fix_files, canary=False, recorder=None):
+    """
+    Fix the files in several datasets with a function that fixes many files
+    at once, for example on an event loop or on the processes of a pool.
+
+    :param list datasets: The datasets.
+    :param function fix_files: Called with a list of the full paths of
+        files and a dictionary of the dataset of each file, which fixes the
+        files and returns the full paths of those that couldn't be fixed.
+    :param bool canary: If True then the first file of every dataset is
+        fixed first and the remaining files of a dataset aren't tried if
+        its first file can't be fixed.
+    :param pre_proc_app.results.ResultRecorder recorder: If not None then
+        the outcome of each file is recorded with this.
+    :returns: The full paths of the files that couldn't be fixed.
+    :rtype: list
+    """
+    files_failed = []
+    file_datasets = {}
+    for dataset in datasets:
+        if resolve_fixes(dataset, _ignore_outcome, recorder):
+            for filepath in dataset.filepaths:
+                file_datasets[filepath] = dataset
+        else:
+            files_failed.extend(dataset.filepaths)
+
+    filepaths = list(file_datasets)
+    if canary:
+        resolved = [dataset for dataset in datasets
+                    if dataset.filepaths[0] in file_datasets]
+        canaries_failed = set(fix_files([dataset.filepaths[0]
+                                         for dataset in resolved],
+                                        file_datasets))
+        files_failed.extend(canaries_failed)
+        filepaths = []
+        for dataset in resolved:
+            if dataset.filepaths[0] in canaries_failed:
+                files_failed.extend(block_dataset(dataset,
+                                                  dataset.filepaths[1:],
+                                                  _ignore_outcome, recorder))
+            else:
+                filepaths.extend(dataset.filepaths[1:])
+    files_failed.extend(fix_files(filepaths, file_datasets))
+    if recorder is not None:
+        recorder.flush()
+    return files_failed
+
+
+def process_concurrently(datasets, temp_dir, orchestrator, canary=False,
+                         recorder=None):
+    """
+    Fix the files in several datasets at once in this process, running the
+    fixes' external commands on an event loop.
+
+    :param list datasets: The datasets.
+    :param str temp_dir: The directory to copy each file to before fixing
+        it or None to fix the files in place.
+    :param pre_proc.orchestrator.AsyncOrchestrator orchestrator: The
+        orchestrator.
+    :param bool canary: If True then the first file of every dataset is
+        fixed first and the remaining files of a dataset aren't tried if
+        its first file can't be fixed.
+    :param pre_proc_app.results.ResultRecorder recorder: If not None then
+        the outcome of each file is recorded with this.
+    :returns: The full paths of the files that couldn't be fixed.
+    :rtype: list
+    """
+    def fix_files(filepaths, file_datasets):
+        results = orchestrator.run(
+            lambda filepath: fix_file(filepath, file_datasets[filepath],
+                                      temp_dir, _ignore_outcome, recorder),
+            filepaths
+        )
+        failed = []
+        for filepath, fixed in zip(filepaths, results):
+            if isinstance(fixed, Exception):
+                logger.error('Processing file {} failed\n{}'.
+                             format(filepath, fixed))
+            if fixed is not True:
+                failed.append(filepath)
+        return failed
+
+    files_failed = fix_in_order(datasets, fix_files, canary, recorder)
+    logger.debug('At most {} commands ran at once and {} on one '
+                 'filesystem'.format(orchestrator.peak_processes,
+                                     orchestrator.peak_filesystem_processes))
+    return files_failed
+
+
+def fix_pool_file(filepath, key, fix_names, temp_dir=None, recorder=None):
+    """
+    Fix a single file on one of the processes of a pool. Only the key and
+    the fixes of the file's dataset are sent to the process, rather than
+    the full paths of all of the dataset's files.
+
+    :param str filepath: The full path of the file.
+    :param tuple key: The key of the file's dataset.
+    :param list fix_names: The fixes of the file's dataset.
+    :param str temp_dir: The directory to copy the file to before fixing it
+        or None to fix it in place.
+    :param pre_proc.results.QueuedRecorder recorder: If not None then the
+        outcome is recorded with this.
+    :returns: True if the file was fixed.
+    :rtype: bool
+    """
+    dataset = DatasetGroup(key, [filepath])
+    dataset.fix_names = fix_names
+    try:
+        return fix_file(filepath, dataset, temp_dir, _ignore_outcome,
+                        recorder)
+    finally:
+        if recorder is not None:
+            recorder.flush()
+
+
+def process_in_pool(datasets, temp_dir, executor, canary=False,
+                    recorder=None):
+    """
+    Fix the files in several datasets on the processes of a pool, one file
+    at a time on each process, so that the files of a single dataset are
+    fixed in parallel.
+
+    :param list datasets: The datasets.
+    :param str temp_dir: The directory to copy each file to before fixing
+        it or None to fix the files in place.
+    :param concurrent.futures.ProcessPoolExecutor executor: The pool.
+    :param bool canary: If True then the first file of every dataset is
+        fixed first and the remaining files of a dataset aren't tried if
+        its first file can't be fixed.
+    :param pre_proc.results.QueuedRecorder recorder: If not None then the
+        outcome of each file is recorded with this.
+    :returns: The full paths of the files that couldn't be fixed.
+    :rtype: list
+    """
+    def fix_files(filepaths, file_datasets):
+        results = executor.map(
+            fix_pool_file, filepaths,
+            [file_datasets[filepath].key for filepath in filepaths],
+            [file_datasets[filepath].fix_names for filepath in filepaths],
+            repeat(temp_dir), repeat(recorder)
+        )
+        return [filepath for filepath, fixed in zip(filepaths, results)
+                if not fixed]
+
+    return fix_in_order(datasets, fix_files, canary, recorder)
+
+
+def process_queue(queue_path, temp_dir=None, claim_size=10, canary=False,
+                  recorder=None, poll_interval=DEFAULT_POLL_INTERVAL):
+    """
+    Claim files from a work queue and fix them until the queue is empty.
+    The files claimed each time are from a single dataset.
+
+    :param str queue_path: The full path of the queue.
+    :param str temp_dir: The directory to copy each file to before fixing
+        it or None to fix the files in place.
+    :param int claim_size: The maximum number of files to claim at a time.
+    :param bool canary: If True then the first file of each dataset is
+        claimed on its own and the dataset's other files are only claimed
+        once it has been fixed. If it can't be fixed then the dataset's
+        other files are marked as failed in the queue without being tried.
+    :param pre_proc_app.results.ResultRecorder recorder: If not None then
+        the outcome of each file is recorded with this.
+    :param float poll_interval: The seconds to wait before claiming again
+        when the only pending files are waiting for the first file of their
+        dataset to be fixed by another worker.
+    :returns: The full paths of the files that couldn't be fixed.
+    :rtype: list
+    """
+    queue = WorkQueue(queue_path)
+    worker = worker_id()
+    files_failed = []
+    try:
+        while True:
+            filepaths = queue.claim(worker, claim_size, canary)
+            if not filepaths:
+                if canary and queue.waiting():
+                    time.sleep(poll_interval)
+                    continue
+                break
+            is_canary = canary and queue.is_canary(filepaths[0])
+            dataset = DatasetGroup(dataset_key(filepaths[0]), filepaths)
+            with LeaseKeeper(queue, worker, filepaths):
+                files_failed.extend(process_dataset(
+                    dataset, temp_dir, partial(queue.complete, worker),
+                    is_canary, recorder
+                ))
+            if dataset.blocked:
+                num_blocked = queue.block_dataset(
+                    filepaths[0], 'Skipped because {} in the same dataset '
+                                  'could not be fixed'.format(filepaths[0])
+                )
+                if num_blocked:
+                    logger.error('{} files in the queue skipped because {} '
+                                 'could not be fixed'.format(num_blocked,
+                                                             filepaths[0]))
+    finally:
+        # Return any files that weren't finished if the worker is stopped
+        queue.release(worker)
+    return files_failed
+
+
+def check_preconditions(datasets, processes):
+    """
+    Check the preconditions of the fixes for every file in the datasets
+    before any of them are fixed. Datasets whose fixes can't be determined
+    are reported when they're processed.
+
+    :param list datasets: The datasets.
+    :param int processes: The number of processes to check the files on.
+    :returns: True if none of the fixes would fail.
+    :rtype: bool
+    """
+    resolved = []
+    for dataset in datasets:
+        if dataset.fix_names is None:
+            try:
+                dataset.resolve_fixes()
+            except Exception:
+                continue
+        resolved.append(dataset)
+    problems = preflight(resolved, processes)
+    if problems:
+        log_problems(problems)
+        logger.error('No files have been fixed because the fixes would fail '
+                     'on {} files'.format(len(problems)))
+        return False
+    return True
+
+
+def process_datasets(args, results_recorder=None, metrics=None):
+    """
+    Fix the files from the directory or the manifest.
+
+    :param argparse.Namespace args: The command-line arguments.
+    :param pre_proc_app.results.ResultRecorder results_recorder: If not
+        None then the outcome of each file is recorded with this.
+    :param pre_proc.metrics.Metrics metrics: If not None then these are
+        updated with the outcome of each file.
+    :returns: The full paths of the files that couldn't be fixed.
+    :rtype: list
+    """
+    if args.manifest:
+        try:
+            manifest = manifest_path(args.directory, args.shard)
+        except ValueError as exc:
+            logger.error(str(exc))
+            sys.exit(1)
+        logger.debug('Manifest is {}'.format(manifest))
+        filepaths = read_manifest(manifest)
+    else:
+        filters = {}
+        for component, names in (('table_id', args.tables),
+                                 ('variable_id', args.variables),
+                                 ('version', args.versions)):
+            if names:
+                filters[component] = set(names)
+        scanner = DirectoryScanner(filters=filters, drs_root=args.drs_root,
+                                   threads=args.scan_threads,
+                                   inventory_path=args.inventory)
+        filepaths = scanner.scan(args.directory)
+    datasets = group_by_dataset(filepaths)
+    num_files = sum(len(dataset.filepaths) for dataset in datasets)
+    logger.debug('{} files in {} datasets'.format(num_files, len(datasets)))
+    if metrics is not None:
+        metrics.files_planned = num_files
+
+    if args.preflight and not check_preconditions(datasets, args.processes):
+        return [filepath for dataset in datasets
+                for filepath in dataset.filepaths]
+
+    recorder = combine_recorders(metrics, results_recorder)
+    files_failed = []
+    if args.concurrent_files > 1:
+        orchestrator = AsyncOrchestrator(
+            max_processes=args.max_commands,
+            max_io_per_filesystem=args.max_filesystem_commands,
+            max_files=args.concurrent_files
+        )
+        files_failed = process_concurrently(datasets, args.temp_dir,
+                                            orchestrator, args.canary,
+                                            recorder)
+    elif args.processes > 1:
+        with pool_recorder(results_recorder, metrics,
+                           args.metrics_interval) as queued_recorder, \
+                ProcessPoolExecutor(args.processes) as executor:
+            files_failed = process_in_pool(datasets, args.temp_dir, executor,
+                                           args.canary, queued_recorder)
+    else:
+        for dataset in datasets:
+            files_failed.extend(process_dataset(dataset, args.temp_dir,
+                                                canary=args.canary,
+                                                recorder=recorder))
+    return files_failed
+
+
+def result_recorder():
+    """
+    Create the recorder that writes the outcome of each file to the results
+    database, setting up Django if it hasn't been already.
+
+    :returns: The recorder.
+    :rtype: pre_proc_app.results.ResultRecorder
+    """
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+    from pre_proc_app.results import ResultRecorder
+    return ResultRecorder()
+
+
+@contextlib.contextmanager
+def pool_recorder(results_recorder, metrics=None,
+                  metrics_interval=DEFAULT_EXPORT_INTERVAL):
+    """
+    Run a single process that writes the results from the processes of a
+    pool, so that they don't compete for the results database's lock. If
+    there are metrics then the pool's processes send their results to a
+    thread in this process, which updates the metrics and passes the
+    results on to the writer.
+
+    :param pre_proc_app.results.ResultRecorder results_recorder: The
+        recorder whose settings the writer uses or None if the results
+        aren't recorded.
+    :param pre_proc.metrics.Metrics metrics: The metrics to update or None.
+    :param float metrics_interval: The maximum seconds that the pool's
+        processes hold a result before sending it for the metrics.
+    :returns: The recorder to pass to the pool's processes or None if
+        nothing is recorded.
+    :rtype: pre_proc.results.QueuedRecorder
+    """
+    with contextlib.ExitStack() as stack:
+        writer_recorder = None
+        if results_recorder is not None:
+            from pre_proc_app.results import ResultWriter
+            writer = stack.enter_context(ResultWriter(
+                results_recorder.batch_size, results_recorder.flush_interval
+            ))
+            writer_recorder = writer.recorder()
+        if metrics is None:
+            yield writer_recorder
+            return
+        manager = stack.enter_context(multiprocessing.Manager())
+        result_queue = manager.Queue()
+        recorder = combine_recorders(metrics, writer_recorder)
+        collector = threading.Thread(
+            target=drain_results, name='result-collector',
+            args=(result_queue, recorder, metrics_interval)
+        )
+        collector.start()
+        try:
+            yield QueuedRecorder(result_queue,
+                                 flush_interval=metrics_interval)
+        finally:
+            result_queue.put(None)
+            collector.join()
+            recorder.flush()
+
+
+def update_queue_files(queue, metrics):
+    """
+    Update the metrics with the number of files in each state in the work
+    queue.
+
+    :param pre_proc.work_queue.WorkQueue queue: The queue.
+    :param pre_proc.metrics.Metrics metrics: The metrics.
+    """
+    metrics.set_queue_files(queue.counts())
+
+
+def metrics_exporter(args, metrics):
+    """
+    Create the exporter that periodically writes the metrics.
+
+    :param argparse.Namespace args: The command-line arguments.
+    :param pre_proc.metrics.Metrics metrics: The metrics or None if they
+        aren't being written.
+    :returns: The exporter to enter.
+    :rtype: contextlib.AbstractContextManager
+    """
+    if metrics is None:
+        return contextlib.ExitStack()
+    update = None
+    if args.queue:
+        update = partial(update_queue_files, WorkQueue(args.directory))
+    return MetricsExporter(metrics, args.metrics_textfile,
+                           args.metrics_json, args.metrics_interval, update)
+
+
+@contextlib.contextmanager
+def file_tracing(args):
+    """
+    Trace a sample of the files fixed by this process and its pool, if
+    --trace is set, and write the trace when the block is left.
+
+    :param argparse.Namespace args: The command-line arguments.
+    """
+    if not args.trace:
+        yield
+        return
+    start_tracing(args.trace, args.trace_sample_rate)
+    try:
+        yield
+    finally:
+        num_events = stop_tracing()
+        logger.debug('{} trace events written to {}'.format(num_events,
+                                                            args.trace))
+
+
 def main(args):
     """
     Main entry point
     """
-    # Assume that this will be run with one CPU allocated
-    dask.config.set(scheduler='synchronous')
+    # Assume that this will be run with one CPU allocated for each process.
+    # Dask reads this when it's first imported, which is only if a fix loads
+    # data with Iris.
+    os.environ['DASK_SCHEDULER'] = 'synchronous'
 
     logger.debug('Database directory is {}'.
                  format(os.environ['DATABASE_DIR']))
 
+    results_recorder = result_recorder() if args.results else None
+    metrics = None
+    if args.metrics_textfile or args.metrics_json:
+        metrics = Metrics({'worker': worker_id()})
+
     files_failed = []
-    for filepath in sorted(list_files(args.directory)):
-        logger.debug('Processing {}'.format(filepath))
-        try:
-            if args.temp_dir:
-                temp_dir = tempfile.mkdtemp(dir=args.temp_dir)
-                logger.debug('Temporary directory is {}'.format(temp_dir))
-                temp_path = os.path.join(temp_dir, os.path.basename(filepath))
-                try:
-                    shutil.copyfile(filepath, temp_path)
-                except PermissionError:
-                    # A PermisssionError occurs on the JASMIN storage
-                    # occasionally and so wait and then retry once.
-                    logger.warning('PermissionError copying file to temp_dir. '
-                                   'Waiting ten minutes')
-                    time.sleep(600)
-                    shutil.copyfile(filepath, temp_path)
-                process_path = temp_path
-            else:
-                process_path = filepath
-            esgf_submission = EsgfSubmission.from_file(process_path)
-            esgf_submission.determine_fixes()
-            esgf_submission.run_fixes()
-            esgf_submission.update_history()
-            if args.temp_dir:
-                os.rename(filepath, filepath + '.old')
-                try:
-                    shutil.copyfile(temp_path, filepath)
-                except PermissionError:
-                    # A PermisssionError occurs on the JASMIN storage
-                    # occasionally and so wait and then retry once. The later
-                    # operations could also be affected but take much less
-                    # time and so are less likely to be affected. If experience
-                    # shows that they would also benefit from a repeat then
-                    # this can be added later. The later operations are also
-                    # easier to recover from.
-                    logger.warning('PermissionError copying file from '
-                                   'temp_dir. Waiting ten minutes')
-                    time.sleep(600)
-                    shutil.copyfile(temp_path, filepath)
-                os.remove(temp_path)
-                os.rmdir(temp_dir)
-                os.remove(filepath + '.old')
-        except:
-            files_failed.append(filepath)
-            exc_type, exc_value, exc_tb = sys.exc_info()
-            tb_list = traceback.format_exception(exc_type, exc_value, exc_tb)
-            tb_string = '\n'.join(tb_list)
-            logger.error('Processing file {} failed\n{}'.
-                         format(filepath, tb_string))
+    with file_tracing(args), metrics_exporter(args, metrics):
+        if args.queue and args.processes > 1:
+            with pool_recorder(results_recorder, metrics,
+                               args.metrics_interval) as queued_recorder, \
+                    ProcessPoolExecutor(args.processes) as executor:
+                futures = [executor.submit(process_queue, args.directory,
+                                           args.temp_dir, args.claim_size,
+                                           args.canary, queued_recorder)
+                           for _ in range(args.processes)]
+                for future in futures:
+                    files_failed.extend(future.result())
+        elif args.queue:
+            files_failed = process_queue(
+                args.directory, args.temp_dir, args.claim_size, args.canary,
+                combine_recorders(metrics, results_recorder)
+            )
+        else:
+            files_failed = process_datasets(args, results_recorder, metrics)
 
     if files_failed:
         logger.error('{} files failed:\n{}'.format(len(files_failed),
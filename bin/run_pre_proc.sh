@@ -13,18 +13,27 @@ export MKL_NUM_THREADS=1
 export VECLIB_MAXIMUM_THREADS=1
 export NUMEXPR_NUM_THREADS=1
 
+# The number of threads each job uses to compress the chunks of changed
+# variables. Set this to the number of cores allocated to each job.
+export PRE_PROC_COMPRESSION_THREADS=${PRE_PROC_COMPRESSION_THREADS:-1}
+
 export PATH=$CONDA_DIR:$PATH
 . activate py3-6_iris2-3_nco
 export DJANGO_SETTINGS_MODULE=pre_proc_site.settings
 export PYTHONPATH=$INSTALL_DIR:$INSTALL_DIR/HighResMIP-fix:$INSTALL_DIR/cmor-fixer
 
-export DATABASE_DIR=`mktemp -d /tmp/prima-crepp.XXXXXXX`
-cp $INSTALL_DIR/db/pre-proc_db.sqlite3 $DATABASE_DIR
+# Read the master database in place, which is safe for many concurrent jobs
+# as long as the database isn't changed while they're running
+export DATABASE_DIR=$INSTALL_DIR/db
+export PRE_PROC_DATABASE_READ_ONLY=1
+
+# Use the rules artefact exported by bin/export_fix_rules.py if there is one
+RULES_ARTEFACT=$INSTALL_DIR/db/fix_rules.pickle
+if [ -f $RULES_ARTEFACT ]; then
+    export PRE_PROC_RULES_ARTEFACT=$RULES_ARTEFACT
+fi
 
 $CONDA_ENV_DIR/python $INSTALL_DIR/bin/run_pre_proc.py -l debug "$@"
 RETURN_CODE=$?
 
-rm $DATABASE_DIR/pre-proc_db.sqlite3
-rmdir $DATABASE_DIR
-
 exit $RETURN_CODE
@@ -9,8 +9,6 @@ import logging.config
 import os
 import sys
 
-import dask
-
 from pre_proc import EsgfSubmission
 from pre_proc.exceptions import PreProcError
 
@@ -44,8 +42,9 @@ def main(args):
     """
     Main entry point
     """
-    # Assume that this will be run with one CPU allocated
-    dask.config.set(scheduler='synchronous')
+    # Assume that this will be run with one CPU allocated. Dask reads this
+    # when it's first imported, which is only if a fix loads data with Iris.
+    os.environ['DASK_SCHEDULER'] = 'synchronous'
 
     logger.debug('Database directory is {}'.
                  format(os.environ['DATABASE_DIR']))
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+"""
+stress_results.py
+
+Check that no results are lost when many processes record the outcome of
+fixing files at once, and measure how many results are written each
+second. The results database is created in a temporary directory and so
+the real results database is never touched.
+"""
+import argparse
+import contextlib
+import logging.config
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# Use a temporary results database rather than the one in DATABASE_DIR
+STRESS_DATABASE_DIR = tempfile.mkdtemp()
+os.environ['PRE_PROC_RESULTS_DATABASE'] = os.path.join(
+    STRESS_DATABASE_DIR, 'results.sqlite3'
+)
+
+import django
+django.setup()
+
+from django.core.management import call_command
+from django.db import connections
+
+from pre_proc.results import FileResult
+from pre_proc_app.models import ProcessingResult
+from pre_proc_app.results import ResultRecorder, ResultWriter
+from pre_proc_app.routers import RESULTS_DATABASE
+
+
+__version__ = '0.1.0b1'
+
+DEFAULT_LOG_LEVEL = logging.WARNING
+DEFAULT_LOG_FORMAT = '%(levelname)s: %(message)s'
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    """
+    Parse command-line arguments
+    """
+    parser = argparse.ArgumentParser(description='Stress test recording '
+                                                 'results from many '
+                                                 'processes.')
+    parser.add_argument('-p', '--processes', help='the number of processes '
+                                                  'recording results '
+                                                  '(default: %(default)s)',
+                        type=int, default=32)
+    parser.add_argument('-n', '--num-results', help='the number of results '
+                                                    'that each process '
+                                                    'records (default: '
+                                                    '%(default)s)',
+                        type=int, default=2000)
+    parser.add_argument('-b', '--batch-size', help='the number of results '
+                                                   'written at a time '
+                                                   '(default: %(default)s)',
+                        type=int, default=100)
+    parser.add_argument('--direct', help='each process writes its own '
+                                         'results to the database rather '
+                                         'than sending them to a single '
+                                         'writer process',
+                        action='store_true')
+    parser.add_argument('-l', '--log-level', help='set logging level to one '
+                                                  'of debug, info, warn (the '
+                                                  'default), or error')
+    parser.add_argument('--version', action='version',
+                        version='%(prog)s {}'.format(__version__))
+    args = parser.parse_args()
+
+    return args
+
+
+def record_results(process_index, num_results, recorder):
+    """
+    Record synthetic results from one process.
+
+    :param int process_index: The index of the process, which makes its
+        files' names unique.
+    :param int num_results: The number of results to record.
+    :param recorder: The ResultRecorder or QueuedRecorder to record the
+        results with.
+    """
+    for index in range(num_results):
+        filepath = '/stress/p{}/file{}.nc'.format(process_index, index)
+        result = FileResult(filepath, '/stress/p{}'.format(process_index),
+                            ['ToDegC', 'LatDirection'],
+                            'worker{}'.format(process_index))
+        recorder.add(result.finish())
+    recorder.flush()
+
+
+def run_processes(args):
+    """
+    Record the results from each process, either directly or through a
+    single writer.
+
+    :param argparse.Namespace args: The command-line arguments.
+    """
+    # Each process opens its own connection
+    connections.close_all()
+    with contextlib.ExitStack() as stack:
+        if args.direct:
+            recorder = ResultRecorder(args.batch_size)
+        else:
+            writer = stack.enter_context(ResultWriter(args.batch_size))
+            recorder = writer.recorder()
+        processes = [
+            multiprocessing.Process(target=record_results,
+                                    args=(index, args.num_results, recorder))
+            for index in range(args.processes)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+    failed = [process for process in processes if process.exitcode]
+    if failed:
+        logger.error('{} processes exited with an error'.format(len(failed)))
+
+
+def main(args):
+    """
+    Main entry point
+    """
+    call_command('migrate', database=RESULTS_DATABASE, verbosity=0)
+    with connections[RESULTS_DATABASE].cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode')
+        logger.info('Journal mode is {}'.format(cursor.fetchone()[0]))
+
+    start_time = time.time()
+    run_processes(args)
+    duration = time.time() - start_time
+
+    expected = args.processes * args.num_results
+    written = ProcessingResult.objects.count()
+    unique = ProcessingResult.objects.values('filepath').distinct().count()
+    print('{} processes {} {} results in {:.1f} seconds, {:.0f} results '
+          'per second'.format(args.processes,
+                              'wrote' if args.direct else 'sent',
+                              written, duration, written / duration))
+    if written != expected or unique != expected:
+        logger.error('{} results were expected but {} were written, of '
+                     'which {} were unique'.format(expected, written, unique))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    cmd_args = parse_args()
+
+    # determine the log level
+    if cmd_args.log_level:
+        try:
+            log_level = getattr(logging, cmd_args.log_level.upper())
+        except AttributeError:
+            logger.setLevel(logging.WARNING)
+            logger.error('log-level must be one of: debug, info, warn or error')
+            sys.exit(1)
+    else:
+        log_level = DEFAULT_LOG_LEVEL
+
+    # configure the logger
+    logging.config.dictConfig({
+        'version': 1,
+        'disable_existing_loggers': False,
+        'formatters': {
+            'standard': {
+                'format': DEFAULT_LOG_FORMAT,
+            },
+        },
+        'handlers': {
+            'default': {
+                'level': log_level,
+                'class': 'logging.StreamHandler',
+                'formatter': 'standard'
+            },
+        },
+        'loggers': {
+            '': {
+                'handlers': ['default'],
+                'level': log_level,
+                'propagate': True
+            }
+        }
+    })
+
+    # run the code
+    try:
+        main(cmd_args)
+    finally:
+        shutil.rmtree(STRESS_DATABASE_DIR)
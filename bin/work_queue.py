@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+"""
+work_queue.py
+
+Manage a work queue of files to fix. Files are added to the queue from a
+directory or a manifest, and then any number of run_pre_proc.py --queue
+workers on any nodes claim files from the queue until it's empty. The
+status of the queue can be displayed, and failed files, or files whose
+workers have died, can be returned to the queue.
+"""
+import argparse
+import logging.config
+import sys
+
+from pre_proc.scanner import DirectoryScanner, DEFAULT_SCAN_THREADS
+from pre_proc.shard import read_manifest
+from pre_proc.work_queue import (WorkQueue, CLAIMED, DONE, FAILED,
+                                 PENDING)
+
+__version__ = '0.1.0b1'
+
+DEFAULT_LOG_LEVEL = logging.WARNING
+DEFAULT_LOG_FORMAT = '%(levelname)s: %(message)s'
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    """
+    Parse command-line arguments
+    """
+    parser = argparse.ArgumentParser(description='Manage a work queue of '
+                                                 'files to fix.')
+    parser.add_argument('queue', help='the full path of the queue, which is '
+                                      'created if it does not exist',
+                        type=str)
+    parser.add_argument('-l', '--log-level', help='set logging level to one '
+                                                  'of debug, info, warn (the '
+                                                  'default), or error')
+    parser.add_argument('--version', action='version',
+                        version='%(prog)s {}'.format(__version__))
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    add = subparsers.add_parser('add', help='add the files below a '
+                                            'directory to the queue')
+    add.add_argument('directory', help='the directory where the files to '
+                                       'fix are stored, or a manifest if '
+                                       '--manifest is set')
+    add.add_argument('-m', '--manifest', help='add the files listed in a '
+                                              'manifest',
+                     action='store_true')
+    add.add_argument('--scan-threads', help='the number of directories to '
+                                            'read in parallel (default: '
+                                            '%(default)s)',
+                     type=int, default=DEFAULT_SCAN_THREADS)
+
+    subparsers.add_parser('status', help='display the number of files in '
+                                         'each state and the failures')
+
+    requeue = subparsers.add_parser('requeue', help='return files to the '
+                                                    'queue')
+    requeue.add_argument('--failed', help='return the failed files',
+                         action='store_true')
+    requeue.add_argument('--expired', help='return the files whose leases '
+                                           'have expired',
+                         action='store_true')
+    args = parser.parse_args()
+
+    return args
+
+
+def main(args):
+    """
+    Main entry point
+    """
+    queue = WorkQueue(args.queue)
+
+    if args.command == 'add':
+        if args.manifest:
+            filepaths = read_manifest(args.directory)
+        else:
+            filepaths = DirectoryScanner(threads=args.scan_threads).scan(
+                args.directory
+            )
+        num_added = queue.add(filepaths)
+        logger.debug('{} files added to the queue and {} were already in '
+                     'it'.format(num_added, len(filepaths) - num_added))
+    elif args.command == 'status':
+        counts = queue.counts()
+        for state in [PENDING, CLAIMED, DONE, FAILED]:
+            print('{}: {}'.format(state, counts.get(state, 0)))
+        for filepath, error in queue.failures():
+            print('Failed {}\n{}'.format(filepath, error))
+    elif args.command == 'requeue':
+        if args.expired:
+            logger.debug('{} files had expired leases'.
+                         format(queue.requeue_expired()))
+        if args.failed:
+            logger.debug('{} failed files returned to the queue'.
+                         format(queue.requeue_failed()))
+
+
+if __name__ == "__main__":
+    cmd_args = parse_args()
+
+    # determine the log level
+    if cmd_args.log_level:
+        try:
+            log_level = getattr(logging, cmd_args.log_level.upper())
+        except AttributeError:
+            logger.setLevel(logging.WARNING)
+            logger.error('log-level must be one of: debug, info, warn or error')
+            sys.exit(1)
+    else:
+        log_level = DEFAULT_LOG_LEVEL
+
+    # configure the logger
+    logging.config.dictConfig({
+        'version': 1,
+        'disable_existing_loggers': False,
+        'formatters': {
+            'standard': {
+                'format': DEFAULT_LOG_FORMAT,
+            },
+        },
+        'handlers': {
+            'default': {
+                'level': log_level,
+                'class': 'logging.StreamHandler',
+                'formatter': 'standard'
+            },
+        },
+        'loggers': {
+            '': {
+                'handlers': ['default'],
+                'level': log_level,
+                'propagate': True
+            }
+        }
+    })
+
+    # run the code
+    main(cmd_args)
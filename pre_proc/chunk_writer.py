@@ -0,0 +1,153 @@
+"""
+chunk_writer.py
+
+Write the values of a chunked HDF5 dataset (a netCDF4 variable), compressing
+independent chunks in parallel on a pool of threads. zlib releases the GIL
+while compressing and so the threads run concurrently. The chunks are then
+written with direct chunk writes and so are identical to those that the
+HDF5 shuffle and deflate filters would produce.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import itertools
+import logging
+import os
+import zlib
+
+from pre_proc.common import lazy_import
+
+np = lazy_import('numpy')
+
+logger = logging.getLogger(__name__)
+
+# The environment variable that sets the number of compression threads used
+# by each worker
+COMPRESSION_THREADS_ENV_VAR = 'PRE_PROC_COMPRESSION_THREADS'
+
+# The approximate maximum number of uncompressed bytes to hold in memory at
+# a time
+BATCH_BYTES = 64 * 1024 ** 2
+
+# HDF5 filter identifiers
+H5Z_FILTER_DEFLATE = 1
+H5Z_FILTER_SHUFFLE = 2
+
+
+def compression_threads():
+    """
+    Return the number of compression threads to use, which is set by the
+    PRE_PROC_COMPRESSION_THREADS environment variable and defaults to one.
+
+    :returns: The number of threads
+    :rtype: int
+    """
+    return max(1, int(os.environ.get(COMPRESSION_THREADS_ENV_VAR, 1)))
+
+
+def deflate_settings(h5_dataset):
+    """
+    Determine how the chunks of a dataset are compressed.
+
+    :param h5py.Dataset h5_dataset: The dataset
+    :returns: The deflate level and whether the shuffle filter is applied, or
+        None if the dataset isn't chunked and compressed with only the
+        shuffle and deflate filters.
+    :rtype: tuple
+    """
+    if h5_dataset.chunks is None:
+        return None
+    plist = h5_dataset.id.get_create_plist()
+    filters = [plist.get_filter(index)[:3]
+               for index in range(plist.get_nfilters())]
+    codes = [code for code, _flags, _values in filters]
+    if codes == [H5Z_FILTER_DEFLATE]:
+        return filters[0][2][0], False
+    elif codes == [H5Z_FILTER_SHUFFLE, H5Z_FILTER_DEFLATE]:
+        return filters[1][2][0], True
+    else:
+        return None
+
+
+def encode_chunk(values, chunk_shape, fill_value, level, shuffle):
+    """
+    Pad a chunk's values to the full chunk shape and apply the shuffle and
+    deflate filters in the same way as HDF5.
+
+    :param numpy.ndarray values: The chunk's values
+    :param tuple chunk_shape: The dataset's chunk shape
+    :param fill_value: The value to pad edge chunks with
+    :param int level: The deflate level
+    :param bool shuffle: True if the shuffle filter should be applied
+    :returns: The encoded chunk
+    :rtype: bytes
+    """
+    if values.shape != tuple(chunk_shape):
+        padded = np.full(chunk_shape, fill_value, dtype=values.dtype)
+        padded[tuple(slice(0, length) for length in values.shape)] = values
+        values = padded
+    raw = np.ascontiguousarray(values).view(np.uint8)
+    if shuffle and values.dtype.itemsize > 1:
+        raw = raw.reshape(-1, values.dtype.itemsize).T
+    return zlib.compress(raw.tobytes(), level)
+
+
+def write_compressed(h5_dataset, read_values, threads=None):
+    """
+    Write the values of `h5_dataset`, compressing its chunks on a pool of
+    threads. The values are read in batches of whole chunks along the first
+    dimension.
+
+    :param h5py.Dataset h5_dataset: The chunked and compressed dataset to
+        write to. Its shape must already be the final shape.
+    :param read_values: A function that takes a tuple of slices and returns
+        the values for that part of the dataset.
+    :param int threads: The number of compression threads. Defaults to
+        compression_threads().
+    :raises ValueError: If the dataset's chunks can't be written directly.
+    """
+    settings = deflate_settings(h5_dataset)
+    if settings is None:
+        raise ValueError('Dataset {} is not compressed with only the shuffle '
+                         'and deflate filters'.format(h5_dataset.name))
+    level, shuffle = settings
+    threads = threads or compression_threads()
+
+    shape = h5_dataset.shape
+    chunks = h5_dataset.chunks
+    dtype = h5_dataset.dtype
+    fill_value = h5_dataset.fillvalue
+    inner_offsets = list(itertools.product(
+        *[range(0, length, chunk) for length, chunk in zip(shape[1:],
+                                                           chunks[1:])]
+    ))
+    # Read enough rows of chunks to keep every thread busy while staying
+    # within the memory limit
+    chunk_bytes = dtype.itemsize * int(np.prod(chunks))
+    batch_chunks = max(threads, BATCH_BYTES // max(1, chunk_bytes))
+    chunk_rows = max(1, min(-(-batch_chunks // len(inner_offsets)),
+                            BATCH_BYTES // max(1, chunk_bytes *
+                                               len(inner_offsets))))
+    rows = chunks[0] * chunk_rows
+
+    def encode(job):
+        """ Encode a single chunk """
+        slab, slab_offset = job
+        selection = tuple(slice(offset, offset + chunk)
+                          for offset, chunk in zip(slab_offset, chunks))
+        return encode_chunk(slab[selection], chunks, fill_value, level,
+                            shuffle)
+
+    with ThreadPoolExecutor(threads) as pool:
+        for start in range(0, shape[0], rows):
+            end = min(start + rows, shape[0])
+            selection = ((slice(start, end),) +
+                         tuple(slice(0, length) for length in shape[1:]))
+            slab = np.asarray(read_values(selection), dtype=dtype)
+            jobs = [(slab, (row,) + inner)
+                    for row in range(0, end - start, chunks[0])
+                    for inner in inner_offsets]
+            for (_slab, offset), chunk in zip(jobs, pool.map(encode, jobs)):
+                h5_dataset.id.write_direct_chunk(
+                    (start + offset[0],) + offset[1:], chunk
+                )
+    logger.debug('Wrote {} with {} compression threads'.
+                 format(h5_dataset.name, threads))
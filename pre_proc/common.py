@@ -3,14 +3,25 @@ common.py
 
 Library code used by many functions.
 """
+import contextlib
+import importlib.util
 import inspect
-import logging.config
+import logging
 import os
 import re
 import subprocess
+import sys
+import threading
+
+from pre_proc.tracing import span
 
 logger = logging.getLogger(__name__)
 
+# The function that runs the commands passed to run_command() by each
+# thread, if it isn't subprocess, and the context manager entered by
+# blocking()
+_command_runners = threading.local()
+
 
 def run_command(command):
     """
@@ -20,21 +31,99 @@ def run_command(command):
     :returns: Any output from the command as a list of strings.
     :raises RuntimeError: If the command did not complete successfully.
     """
-    try:
-        cmd_out = subprocess.check_output(command, stderr=subprocess.STDOUT,
-                                          shell=True)
-    except subprocess.CalledProcessError as exc:
-        msg = ('Command did not complete sucessfully.\ncommmand:\n{}\n'
-               'produced error:\n{}'.format(command, exc.output))
-        logger.warning(msg)
-        raise RuntimeError(msg)
-
+    runner = getattr(_command_runners, 'runner', None)
+    with span((command.split(None, 1) or [''])[0], 'command',
+              command=command):
+        if runner is not None:
+            return runner(command)
+
+        try:
+            cmd_out = subprocess.check_output(
+                command, stderr=subprocess.STDOUT, shell=True
+            )
+        except subprocess.CalledProcessError as exc:
+            msg = ('Command did not complete sucessfully.\ncommmand:\n{}\n'
+                   'produced error:\n{}'.format(command, exc.output))
+            logger.warning(msg)
+            raise RuntimeError(msg)
+
+    # check_output() returns bytes, which are decoded in the same way as
+    # the output of the commands run by pre_proc.orchestrator
+    if isinstance(cmd_out, bytes):
+        cmd_out = cmd_out.decode(errors='replace')
     if isinstance(cmd_out, str):
         return cmd_out.rstrip().split('\n')
     else:
         return None
 
 
+def set_command_runner(runner):
+    """
+    Set the function that runs the commands passed to run_command() by the
+    current thread, so that they can be run on an event loop by
+    pre_proc.orchestrator.
+
+    :param function runner: A function with the same signature and
+        behaviour as run_command() or None to run commands with subprocess.
+    """
+    _command_runners.runner = runner
+
+
+def set_blocking_handler(handler):
+    """
+    Set the context manager entered by blocking() in the current thread, so
+    that pre_proc.orchestrator can fix other files while the thread waits.
+
+    :param function handler: A function that is called with the path
+        passed to blocking() and returns a context manager, or None.
+    """
+    _command_runners.blocking = handler
+
+
+@contextlib.contextmanager
+def blocking(path=None):
+    """
+    Mark a block of code that waits, for example by copying a file or
+    sleeping, without using netCDF4 or any other state shared between
+    threads. When files are fixed by pre_proc.orchestrator, other files are
+    fixed while the block runs.
+
+    :param str path: A file read or written by the block, whose filesystem
+        limits how many blocks and commands run at once, or None if the
+        block doesn't use a filesystem.
+    """
+    handler = getattr(_command_runners, 'blocking', None)
+    if handler is None:
+        yield
+    else:
+        with handler(path):
+            yield
+
+
+def lazy_import(name):
+    """
+    Return a module that is only loaded when one of its attributes is first
+    used. This keeps heavy dependencies that are only needed by a few fixes
+    from slowing the start of every job.
+
+    :param str name: The module's full name.
+    :returns: The module, which may not have been loaded yet.
+    :rtype: module
+    :raises ImportError: If the module can't be found.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError('No module named {}'.format(name), name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
 def list_files(directory, suffix='.nc'):
     """
     Return a list of all the files with the specified suffix in the submission
@@ -44,36 +133,27 @@ def list_files(directory, suffix='.nc'):
     :param str suffix: The suffix of the files of interest
     :returns: A list of absolute filepaths
     """
-    nc_files = []
-
-    dir_files = os.listdir(directory)
-    for filename in dir_files:
-        file_path = os.path.join(directory, filename)
-        if os.path.isdir(file_path):
-            nc_files.extend(list_files(file_path, suffix))
-        elif file_path.endswith(suffix):
-            nc_files.append(file_path)
-
-    return nc_files
+    return list(ilist_files(directory, suffix))
 
 
 def ilist_files(directory, suffix='.nc'):
     """
     Return an iterator of all the files with the specified suffix in the
-    submission directory structure and sub-directories.
+    submission directory structure and sub-directories. Large archives are
+    scanned much more quickly by pre_proc.scanner.DirectoryScanner.
 
     :param str directory: The root directory of the submission
     :param str suffix: The suffix of the files of interest
     :returns: A list of absolute filepaths
     """
-    dir_files = os.listdir(directory)
-    for filename in dir_files:
-        file_path = os.path.join(directory, filename)
-        if os.path.isdir(file_path):
-            for ifile in ilist_files(file_path):
-                yield ifile
-        elif file_path.endswith(suffix):
-            yield file_path
+    with os.scandir(directory) as entries:
+        # is_dir() doesn't need a stat on most filesystems
+        for entry in entries:
+            if entry.is_dir():
+                for ifile in ilist_files(entry.path, suffix):
+                    yield ifile
+            elif entry.name.endswith(suffix):
+                yield entry.path
 
 
 def get_concrete_subclasses(parent_object):
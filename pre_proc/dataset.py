@@ -0,0 +1,115 @@
+"""
+dataset.py
+
+Group files into the datasets that they belong to so that the fixes to
+apply, and any values that are the same for every file in a dataset, are
+only determined once for each dataset.
+"""
+import itertools
+import os
+
+from pre_proc.esgf_submission import EsgfSubmission
+from pre_proc.rule_provider import get_rule_provider
+
+# The number of components in a CMIP6 filename that identify its dataset:
+# variable_id, table_id, source_id, experiment_id, member_id and grid_label
+DATASET_FILENAME_COMPONENTS = 6
+
+
+def dataset_key(filepath):
+    """
+    Return the key that identifies the dataset that a file belongs to. This
+    is the file's directory and its filename without the time range, e.g.
+    tas_Amon_HadGEM3-GC31-LL_hist-1950_r1i1p1f1_gn. Files whose names don't
+    follow the CMIP6 convention are each in a dataset of their own.
+
+    :param str filepath: The file's full path.
+    :returns: The directory and the dataset's name.
+    :rtype: tuple
+    """
+    stem = os.path.splitext(os.path.basename(filepath))[0]
+    components = stem.split('_')
+    if len(components) >= DATASET_FILENAME_COMPONENTS:
+        stem = '_'.join(components[:DATASET_FILENAME_COMPONENTS])
+    return os.path.dirname(filepath), stem
+
+
+def group_by_dataset(filepaths):
+    """
+    Group files by the dataset that they belong to.
+
+    :param list filepaths: The full paths of the files.
+    :returns: The datasets in key order, each containing its files in name
+        order.
+    :rtype: list
+    """
+    def sort_key(filepath):
+        return dataset_key(filepath), filepath
+
+    return [DatasetGroup(key, list(group))
+            for key, group in itertools.groupby(sorted(filepaths,
+                                                       key=sort_key),
+                                                dataset_key)]
+
+
+class DatasetGroup(object):
+    """
+    The files in a dataset and the state that's shared between them: the
+    names of the fixes to apply and the values calculated by the fixes that
+    are the same for every file in the dataset.
+    """
+    def __init__(self, key, filepaths):
+        """
+        Initialise the class
+
+        :param tuple key: The dataset's key from dataset_key().
+        :param list filepaths: The full paths of the dataset's files.
+        """
+        self.key = key
+        self.filepaths = filepaths
+        self.fix_names = None
+        self.values = {}
+        # True if the dataset's first file couldn't be fixed and so the
+        # other files weren't tried
+        self.blocked = False
+
+    def __repr__(self):
+        return '<DatasetGroup {} ({} files)>'.format(
+            os.path.join(*self.key), len(self.filepaths)
+        )
+
+    def resolve_fixes(self, rule_provider=None):
+        """
+        Determine the fixes to apply to every file in the dataset from its
+        first file.
+
+        :param pre_proc.rule_provider.RuleProvider rule_provider: The
+            provider of the fixes to apply. If None then the provider from
+            get_rule_provider() is used.
+        :returns: The names of the fixes.
+        :rtype: list
+        :raises pre_proc.exceptions.DataRequestNotFound: If no data request
+            matches the dataset.
+        :raises pre_proc.exceptions.MultipleDataRequestsFound: If several
+            data requests match the dataset.
+        """
+        submission = EsgfSubmission.from_file(self.filepaths[0])
+        rule_provider = rule_provider or get_rule_provider()
+        self.fix_names = rule_provider.get_fix_names(submission)
+        return self.fix_names
+
+    def create_submission(self, filepath):
+        """
+        Create the submission for one of the dataset's files, with the
+        dataset's fixes.
+
+        :param str filepath: The full path of the file to fix, which may be
+            a temporary copy of one of the dataset's files.
+        :returns: The submission.
+        :rtype: pre_proc.EsgfSubmission
+        """
+        if self.fix_names is None:
+            self.resolve_fixes()
+        submission = EsgfSubmission.from_file(filepath)
+        submission.create_fixes(self.fix_names, self.values)
+        return submission
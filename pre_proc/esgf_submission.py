@@ -4,21 +4,17 @@ esgf_sumbission.py
 The basic class that forms an ESGF submission.
 """
 import datetime
+import itertools
 import logging
 import os
+import time
 
-from netCDF4 import Dataset
-
-import django
-import django.core.exceptions
-
-django.setup()
-
-import pre_proc
-from pre_proc.common import run_command
-from pre_proc.exceptions import DataRequestNotFound, MultipleDataRequestsFound
-from pre_proc_app.models import DataRequest
+from pre_proc.common import lazy_import, run_command
+from pre_proc.file_fix.registry import get_fix_class
+from pre_proc.rule_provider import get_rule_provider
+from pre_proc.tracing import span, traced_open
 
+netCDF4 = lazy_import('netCDF4')
 
 logger = logging.getLogger(__name__)
 
@@ -28,7 +24,8 @@ class EsgfSubmission(object):
     The basic class that forms an ESGF submission.
     """
     def __init__(self, source_id=None, experiment_id=None, variant_label=None,
-                 table_id=None, cmor_name=None, filepath=None):
+                 table_id=None, cmor_name=None, filepath=None,
+                 rule_provider=None):
         """
         Initialise the class.
 
@@ -38,6 +35,9 @@ class EsgfSubmission(object):
         :param str table_id: The CMIP6 table_id
         :param str cmor_name: The CMIP6 cmor_name
         :param str filepath: The full path to the file to be fixed
+        :param pre_proc.rule_provider.RuleProvider rule_provider: The
+            provider of the fixes to apply. If None then the provider from
+            get_rule_provider() is used.
         """
         self.source_id = source_id
         self.experiment_id = experiment_id
@@ -47,13 +47,25 @@ class EsgfSubmission(object):
         self.filename = os.path.basename(filepath)
         self.directory = os.path.dirname(filepath)
         self.fixes = []
+        self.rule_provider = rule_provider
+        # The name of the fix that was running when run_fixes() failed, or
+        # the first of the fixes that were being applied together
+        self.failed_fix = None
+        # The names of all of the fixes that were being applied together
+        # when run_fixes() failed, or None if the fix was applied alone
+        self.failed_batch = None
+        # The seconds taken by each fix, or by each group of fixes applied
+        # together, that run_fixes() completed
+        self.fix_durations = {}
 
     @classmethod
-    def from_file(cls, filepath):
+    def from_file(cls, filepath, rule_provider=None):
         """
         Create a submission from a specified file.
 
         :param str filepath: The file's full path
+        :param pre_proc.rule_provider.RuleProvider rule_provider: The
+            provider of the fixes to apply.
         :returns: An EsgfSubmission object initialised from the specified
             file
         :rtype: pre_proc.EsgfSubmission
@@ -66,25 +78,68 @@ class EsgfSubmission(object):
             kwargs[cmpt_name] = cmpt
 
         kwargs['filepath'] = filepath
+        kwargs['rule_provider'] = rule_provider
 
         return cls(**kwargs)
 
     def determine_fixes(self):
         """
-        Scan through the DB, determine the fixes that need to be run on
-        this ESGF dataset and add them to the list.
+        Ask the rule provider for the fixes that need to be run on this
+        ESGF dataset and add them to the list.
+        """
+        rule_provider = self.rule_provider or get_rule_provider()
+        self.create_fixes(rule_provider.get_fix_names(self))
+
+    def create_fixes(self, fix_names, dataset_values=None):
+        """
+        Create the fixes to run on this file.
+
+        :param list fix_names: The names of the fixes in the order to run
+            them.
+        :param dict dataset_values: Values that are the same for every file
+            in the file's dataset, which are shared between the fixes of all
+            of the dataset's files, or None if they aren't shared.
         """
-        self.fixes = [getattr(pre_proc.file_fix, fix_name.name)(self.filename,
-                                                                self.directory)
-                      for fix_name in self._get_data_request().
-                          fixes.order_by('name')]
+        self.fixes = []
+        for fix_name in fix_names:
+            fix = get_fix_class(fix_name)(self.filename, self.directory)
+            fix.dataset_values = dataset_values
+            self.fixes.append(fix)
 
     def run_fixes(self):
         """
-        Loop through the fixes and run each of them in turn.
+        Loop through the fixes and run each of them in turn. Consecutive
+        fixes that are defined in the attribute_add table are applied
+        together with a single call to ncatted.
         """
-        for fix in self.fixes:
-            fix.apply_fix()
+        for from_table, fixes in itertools.groupby(self.fixes,
+                                                   _from_attribute_table):
+            fixes = list(fixes)
+            if from_table and len(fixes) > 1:
+                from pre_proc.file_fix.attribute_add import (
+                    apply_attribute_fixes
+                )
+                fix_names = [type(fix).__name__ for fix in fixes]
+                self.failed_fix = fix_names[0]
+                self.failed_batch = fix_names
+                batch_name = ', '.join(fix_names)
+                start = time.perf_counter()
+                with span(batch_name, 'fix'):
+                    apply_attribute_fixes(fixes[0].filename,
+                                          fixes[0].directory, fix_names,
+                                          fixes[0].dataset_values)
+                self.fix_durations[batch_name] = time.perf_counter() - start
+                self.failed_batch = None
+            else:
+                for fix in fixes:
+                    self.failed_fix = type(fix).__name__
+                    start = time.perf_counter()
+                    with span(self.failed_fix, 'fix'):
+                        fix.apply_fix()
+                    self.fix_durations[self.failed_fix] = (
+                        time.perf_counter() - start
+                    )
+        self.failed_fix = None
 
     def update_history(self):
         """
@@ -107,37 +162,17 @@ class EsgfSubmission(object):
 
             _set_attribute(filepath, 'history', new_history)
 
-    def _get_data_request(self):
-        """
-        Return the DataRequest object from the database that corresponds to
-        this ESGF submission.
 
-        :returns: the data request object corresponding to this submission
-        :rtype: pre_proc_app.models.DataRequest
-        """
-        try:
-            dreq = DataRequest.objects.get(
-                source_id__name=self.source_id,
-                experiment_id__name=self.experiment_id,
-                variant_label=self.variant_label,
-                table_id=self.table_id,
-                cmor_name=self.cmor_name
-            )
-        except django.core.exceptions.ObjectDoesNotExist:
-            try:
-                dreq = DataRequest.objects.get(
-                    source_id__name=self.source_id,
-                    experiment_id__name=self.experiment_id,
-                    variant_label=self.variant_label,
-                    table_id=self.table_id,
-                    cmor_name__regex=r'{}\d+'.format(self.cmor_name)
-                )
-            except django.core.exceptions.ObjectDoesNotExist:
-                raise DataRequestNotFound(self.directory, self.filename)
-            except django.core.exceptions.MultipleObjectsReturned:
-                raise MultipleDataRequestsFound(self.directory, self.filename)
+def _from_attribute_table(fix):
+    """
+    Check whether a fix is defined by a row of
+    pre_proc.file_fix.attribute_add.ATTRIBUTE_ADD_FIXES.
 
-        return dreq
+    :param pre_proc.file_fix.FileFix fix: The fix.
+    :returns: True if the fix is defined by the table.
+    :rtype: bool
+    """
+    return getattr(type(fix), 'spec', None) is not None
 
 
 def _get_attribute(filepath, attr_name):
@@ -151,7 +186,7 @@ def _get_attribute(filepath, attr_name):
     :raises RunTimeError: if unable to open the file
     """
     try:
-        with Dataset(filepath) as rootgrp:
+        with traced_open(netCDF4.Dataset, filepath) as rootgrp:
             attr_value = getattr(rootgrp, attr_name, None)
     except IOError:
         msg = 'Unable to open file {}'.format(filepath)
@@ -9,7 +9,10 @@ __all__ = ['PreProcError', 'CannotLoadSourceFileError',
            'AttributeNotFoundError', 'AttributeConversionError',
            'ExistingAttributeError', 'InstanceVariableNotDefinedError',
            'CdoError', 'NcattedError', 'NcpdqError', 'Ncap2Error', 'NcksError',
-           'NcrenameError', 'DataRequestNotFound', 'MultipleDataRequestsFound']
+           'NcrenameError', 'NetcdfCopyError', 'UnsupportedNetcdfError',
+           'TimeOffsetError', 'DataRequestNotFound',
+           'MultipleDataRequestsFound', 'RulesArtefactError',
+           'UnknownFixError']
 
 
 class PreProcError(Exception):
@@ -159,6 +162,48 @@ class NcrenameError(ExternalCommandError):
                          traceback_text)
 
 
+class NetcdfCopyError(PreProcError):
+    """
+    When copying a file with pre_proc.netcdf_copy fails.
+    """
+    def __init__(self, class_name, filename, traceback_text):
+        self.class_name = class_name
+        self.filename = filename
+        self.traceback_text = traceback_text
+
+    def __str__(self):
+        return ('Exception in class {} when copying file {}.\n{}'.
+                format(self.class_name, self.filename, self.traceback_text))
+
+
+class UnsupportedNetcdfError(PreProcError):
+    """
+    When a file uses a netCDF feature that pre_proc.netcdf_copy can't copy.
+    """
+    def __init__(self, filename, feature):
+        self.filename = filename
+        self.feature = feature
+
+    def __str__(self):
+        return ('Cannot copy file {} because copying netCDF {} is not '
+                'supported'.format(self.filename, self.feature))
+
+
+class TimeOffsetError(PreProcError):
+    """
+    When the offset to a new time reference date isn't a whole number and
+    so can't be added to a variable's integer values.
+    """
+    def __init__(self, filename, variable, offset):
+        self.filename = filename
+        self.variable = variable
+        self.offset = offset
+
+    def __str__(self):
+        return ('Cannot add the offset {} to the integer values of {} in '
+                'file {}'.format(self.offset, self.variable, self.filename))
+
+
 class DataRequestNotFound(PreProcError):
     """
     When a pre_proc data request cannot be found.
@@ -183,3 +228,26 @@ class MultipleDataRequestsFound(PreProcError):
     def __str__(self):
         return ('Multiple pre_proc DataRequest found for file {}'.
                 format(os.path.join(self.directory, self.filename)))
+
+
+class RulesArtefactError(PreProcError):
+    """
+    When a compiled rules artefact cannot be used.
+    """
+    def __init__(self, filename, message):
+        self.filename = filename
+        self.message = message
+
+    def __str__(self):
+        return 'Rules artefact {} {}'.format(self.filename, self.message)
+
+
+class UnknownFixError(PreProcError):
+    """
+    When there is no fix with the specified name.
+    """
+    def __init__(self, fix_name):
+        self.fix_name = fix_name
+
+    def __str__(self):
+        return 'Unknown fix {}'.format(self.fix_name)
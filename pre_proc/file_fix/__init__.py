@@ -1,10 +1,31 @@
 """
 file_fix/__init__.py
 
-The workers that fix the netCDF files
+The workers that fix the netCDF files. The abstract base classes are always
+imported but the modules containing the fixes are only imported when one of
+their fixes is first used, e.g. `pre_proc.file_fix.ToDegC`.
 """
+import sys
+import types
+
 from .abstract import *
-from .attribute_add import *
-from .attribute_update import *
-from .copy_attribute import *
-from .data_fixes import *
+from .registry import get_fix_class
+from pre_proc.exceptions import UnknownFixError
+
+
+class _FileFixModule(types.ModuleType):
+    """
+    Find fixes that haven't been imported yet by name. This works on
+    versions of Python without module level __getattr__ functions.
+    """
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        try:
+            return get_fix_class(name)
+        except UnknownFixError:
+            raise AttributeError("module '{}' has no attribute '{}'".
+                                 format(self.__name__, name))
+
+
+sys.modules[__name__].__class__ = _FileFixModule
@@ -4,22 +4,43 @@ abstract.py
 The abstract base file fixes.
 """
 from abc import ABCMeta, abstractmethod
+from functools import lru_cache
 import os
-import shutil
 import traceback
 
-from netCDF4 import Dataset
-
-from pre_proc.common import run_command
+from pre_proc.common import lazy_import, run_command
+from pre_proc.file_fix import registry
 from pre_proc.exceptions import (AttributeNotFoundError,
+                                 CannotLoadSourceFileError,
                                  InstanceVariableNotDefinedError,
-                                 Ncap2Error, NcattedError, NcksError)
+                                 Ncap2Error, NcattedError, NcksError,
+                                 NetcdfCopyError, TimeOffsetError)
+from pre_proc.netcdf_copy import copy_netcdf
+from pre_proc.scratch import ScratchManager
+from pre_proc.tracing import traced_open
+
+cftime = lazy_import('cftime')
+netCDF4 = lazy_import('netCDF4')
+
+# The numpy dtype kinds of integer variables
+INTEGER_KINDS = ('i', 'u')
 
 
 class FileFix(object, metaclass=ABCMeta):
     """
     The abstract base class that all fixes are made from
     """
+    # Whether the fix only changes attributes ('attribute') or also changes
+    # the data ('data')
+    fix_kind = None
+    # The parts of the file that the fix reads and writes: 'attributes',
+    # 'data' and 'file' if the whole file is rewritten
+    reads = frozenset()
+    writes = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        registry.register(cls)
 
     def __init__(self, filename, directory):
         """
@@ -31,17 +52,44 @@ class FileFix(object, metaclass=ABCMeta):
         self.filename = filename
         self.directory = directory
         self.variable_name = self.filename.split('_')[0]
+        # Values that are the same for every file in the file's dataset,
+        # which are shared between the fixes of all of the dataset's files
+        self.dataset_values = None
 
     @abstractmethod
     def apply_fix(self):
         pass
 
+    def check(self, header):
+        """
+        Check the fix's preconditions against the file's header without
+        changing the file, so that a fix that would fail is found before
+        any files are rewritten. Fixes without preconditions pass.
+
+        :param pre_proc.preflight.FileHeader header: The file's header.
+        :raises pre_proc.exceptions.PreProcError: If the fix would fail.
+        """
+        pass
+
+    def update_header(self, header):
+        """
+        Make the changes to the file's header that the fix will make to the
+        file, after check() has passed, so that the fixes after it are
+        checked against the file as it will be. Fixes that don't change the
+        attributes leave the header unchanged.
+
+        :param pre_proc.preflight.FileHeader header: The file's header.
+        """
+        pass
+
 
 class AttributeEdit(FileFix, metaclass=ABCMeta):
     """
     An abstract base class for fixes that require the use of `ncatted` to
     fix a metadata attribute.
     """
+    fix_kind = 'attribute'
+    writes = frozenset(['attributes'])
 
     def __init__(self, filename, directory):
         """
@@ -74,6 +122,16 @@ class AttributeEdit(FileFix, metaclass=ABCMeta):
         """
         pass
 
+    def update_header(self, header):
+        """
+        Set the attribute to the new value calculated by check().
+
+        :param pre_proc.preflight.FileHeader header: The file's header.
+        """
+        if self.new_value is not None:
+            header.set_attribute(self.attribute_visibility,
+                                 self.attribute_name, self.new_value)
+
     def _run_ncatted(self, nco_mode):
         """
         Run the command
@@ -90,16 +148,9 @@ class AttributeEdit(FileFix, metaclass=ABCMeta):
         # Aiming for:
         # ncatted -h -a branch_time_in_parent,global,o,d,10800.0
 
-        quote_mark = "'" if isinstance(self.new_value, str) else ""
-
-        cmd = 'ncatted -h -a {},{},{},{},{}{}{} {}'.format(
-            self.attribute_name,
-            self.attribute_visibility,
-            nco_mode,
-            self.attribute_type,
-            quote_mark,
-            self.new_value,
-            quote_mark,
+        cmd = 'ncatted -h {} {}'.format(
+            ncatted_argument(self.attribute_name, self.attribute_visibility,
+                             nco_mode, self.attribute_type, self.new_value),
             os.path.join(self.directory, self.filename)
         )
         try:
@@ -113,6 +164,10 @@ class DataFix(FileFix, metaclass=ABCMeta):
     """
     An abstract base class for fixes that edit the data in a netCDF file.
     """
+    fix_kind = 'data'
+    reads = frozenset(['attributes', 'data'])
+    writes = frozenset(['attributes', 'data'])
+
     def __init__(self, filename, directory):
         """
         Initialise the class
@@ -126,6 +181,8 @@ class NcoDataFix(DataFix, metaclass=ABCMeta):
     using the NCO tools. The specified command is run and the input and output
     names are appended by this class.
     """
+    writes = frozenset(['attributes', 'data', 'file'])
+
     def __init__(self, filename, directory):
         """
         Initialise the class
@@ -157,44 +214,131 @@ class NcoDataFix(DataFix, metaclass=ABCMeta):
         os.rename(temp_file, output_file)
 
 
-class NcksAppendDataFix(DataFix, metaclass=ABCMeta):
+class PassthroughDataFix(DataFix, metaclass=ABCMeta):
     """
-    An abstract base class for fixes that edit the data in a netCDF file
-    using ncks to append a reference file into the specified file. The file
-    to append should be specified in the command and the specified file's name
-    will be added to this by the class when the command is run.
+    An abstract base class for fixes that rewrite a netCDF file with
+    pre_proc.netcdf_copy.copy_netcdf(). The compressed chunks of unchanged
+    variables are moved without decompressing them and the chunks of any
+    variables whose values are changed are compressed in parallel.
     """
+    writes = frozenset(['attributes', 'data', 'file'])
 
     def __init__(self, filename, directory):
         """
         Initialise the class
         """
         super().__init__(filename, directory)
-        self.command = None
 
-    def _run_ncks_command(self):
+    def _run_copy(self, **kwargs):
         """
-        Run the nco command.
+        Copy the file to a temporary file and then replace the original
+        file with it.
+
+        :param kwargs: Keyword arguments to pass to copy_netcdf()
         """
         output_file = os.path.join(self.directory, self.filename)
         temp_file = output_file + '.temp'
-        # Remove any temporary file left over from a previous failed
-        # run as it could prevent some nco commands from running.
         if os.path.exists(temp_file):
             os.remove(temp_file)
 
-        shutil.copyfile(output_file, temp_file)
-
-        cmd = f'{self.command} {temp_file}'
         try:
-            run_command(cmd)
+            copy_netcdf(output_file, temp_file, **kwargs)
         except Exception:
-            os.remove(temp_file)
-            raise NcksError(type(self).__name__, self.filename, cmd,
-                            traceback.format_exc())
-        else:
-            os.remove(output_file)
-            os.rename(temp_file, output_file)
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+            raise NetcdfCopyError(type(self).__name__, self.filename,
+                                  traceback.format_exc())
+
+        os.remove(output_file)
+        os.rename(temp_file, output_file)
+
+
+class ScalarCoordinateAppend(DataFix, metaclass=ABCMeta):
+    """
+    An abstract base class for fixes that add a scalar coordinate variable,
+    which is copied from a reference file, and add it to the data variable's
+    coordinates attribute. The file is edited in place in a single open and
+    the reference variable is only read once per process.
+    """
+    def __init__(self, filename, directory):
+        """
+        Initialise the class
+        """
+        super().__init__(filename, directory)
+        # The file to take the scalar coordinate from
+        self.reference_file = None
+        # The name of the scalar coordinate variable
+        self.coordinate_name = None
+        self._set_coordinate()
+
+    @abstractmethod
+    def _set_coordinate(self):
+        """
+        In concrete implementations, set reference_file and coordinate_name
+        here.
+        """
+        pass
+
+    def apply_fix(self):
+        """
+        Add the scalar coordinate and update the coordinates attribute.
+        """
+        for attr_name in ['reference_file', 'coordinate_name']:
+            if getattr(self, attr_name, None) is None:
+                raise InstanceVariableNotDefinedError(type(self).__name__,
+                                                      attr_name)
+
+        dtype, value, attributes = _load_scalar_variable(
+            self.reference_file, self.coordinate_name
+        )
+
+        filepath = os.path.join(self.directory, self.filename)
+        with traced_open(netCDF4.Dataset, filepath, 'a') as rootgrp:
+            if self.coordinate_name in rootgrp.variables:
+                coord = rootgrp.variables[self.coordinate_name]
+            else:
+                coord = rootgrp.createVariable(
+                    self.coordinate_name, dtype, (),
+                    fill_value=attributes.get('_FillValue')
+                )
+            coord.setncatts({name: attr_value
+                             for name, attr_value in attributes.items()
+                             if name != '_FillValue'})
+            coord.assignValue(value)
+
+            data_var = rootgrp.variables[self.variable_name]
+            coordinates = getattr(data_var, 'coordinates', '').split()
+            if self.coordinate_name not in coordinates:
+                coordinates.append(self.coordinate_name)
+            data_var.coordinates = ' '.join(coordinates)
+
+    def check(self, header):
+        """
+        Check that the reference file exists.
+
+        :param pre_proc.preflight.FileHeader header: The file's header.
+        :raises pre_proc.exceptions.CannotLoadSourceFileError: If the
+            reference file doesn't exist.
+        """
+        _check_source_file(self.reference_file)
+
+
+@lru_cache(maxsize=None)
+def _load_scalar_variable(reference_file, var_name):
+    """
+    Load a scalar variable from a reference file. The result is cached so
+    that each reference file is only read once per process.
+
+    :param str reference_file: The path of the file to read.
+    :param str var_name: The variable to read.
+    :returns: The variable's type, value and attributes.
+    :rtype: tuple
+    """
+    with traced_open(netCDF4.Dataset, reference_file) as rootgrp:
+        rootgrp.set_auto_maskandscale(False)
+        var = rootgrp.variables[var_name]
+        attributes = {name: var.getncattr(name) for name in var.ncattrs()}
+        return var.datatype, var.getValue(), attributes
 
 
 class AttributeUpdate(AttributeEdit, metaclass=ABCMeta):
@@ -202,6 +346,7 @@ class AttributeUpdate(AttributeEdit, metaclass=ABCMeta):
     An abstract base class for fixes that require the use of `ncatted` to
     fix a metadata attribute.
     """
+    reads = frozenset(['attributes'])
 
     def __init__(self, filename, directory):
         """
@@ -225,18 +370,34 @@ class AttributeUpdate(AttributeEdit, metaclass=ABCMeta):
         Get the value of the existing attribute from the current file
         """
         filepath = os.path.join(self.directory, self.filename)
-        with Dataset(filepath) as rootgrp:
+        with traced_open(netCDF4.Dataset, filepath) as rootgrp:
             self.existing_value = getattr(rootgrp, self.attribute_name, None)
 
         if self.existing_value is None:
             raise AttributeNotFoundError(self.filename, self.attribute_name)
 
+    def check(self, header):
+        """
+        Check that the attribute exists and that its new value can be
+        calculated.
+
+        :param pre_proc.preflight.FileHeader header: The file's header.
+        :raises pre_proc.exceptions.PreProcError: If the fix would fail.
+        """
+        self.existing_value = header.global_attributes.get(
+            self.attribute_name
+        )
+        if self.existing_value is None:
+            raise AttributeNotFoundError(self.filename, self.attribute_name)
+        self._calculate_new_value()
+
 
 class CopyAttribute(AttributeEdit, metaclass=ABCMeta):
     """
     An abstract base class for fixes that require the use of `ncatted` to
     copy a metadata value from one attribute to another.
     """
+    reads = frozenset(['attributes'])
 
     @abstractmethod
     def __init__(self, filename, directory):
@@ -281,12 +442,24 @@ class CopyGlobalAttribute(CopyAttribute, metaclass=ABCMeta):
         Get the value of the existing attribute from the current file
         """
         filepath = os.path.join(self.directory, self.filename)
-        with Dataset(filepath) as rootgrp:
+        with traced_open(netCDF4.Dataset, filepath) as rootgrp:
             self.new_value = getattr(rootgrp, self.source_attribute, None)
 
         if self.new_value is None:
             raise AttributeNotFoundError(self.filename, self.source_attribute)
 
+    def check(self, header):
+        """
+        Check that the attribute to copy exists.
+
+        :param pre_proc.preflight.FileHeader header: The file's header.
+        :raises pre_proc.exceptions.AttributeNotFoundError: If the attribute
+            doesn't exist.
+        """
+        self.new_value = header.global_attributes.get(self.source_attribute)
+        if self.new_value is None:
+            raise AttributeNotFoundError(self.filename, self.source_attribute)
+
 
 class CopyVariableAttribute(CopyAttribute, metaclass=ABCMeta):
     """
@@ -312,7 +485,7 @@ class CopyVariableAttribute(CopyAttribute, metaclass=ABCMeta):
                 '{}.{}'.format(self.variable_name, self.source_attribute)
             )
         filepath = os.path.join(self.directory, self.filename)
-        with Dataset(filepath) as rootgrp:
+        with traced_open(netCDF4.Dataset, filepath) as rootgrp:
             netcdf_vars = getattr(rootgrp, 'variables', None)
             if netcdf_vars is None:
                 raise_error()
@@ -323,6 +496,22 @@ class CopyVariableAttribute(CopyAttribute, metaclass=ABCMeta):
         if self.new_value is None:
             raise_error()
 
+    def check(self, header):
+        """
+        Check that the variable attribute to copy exists.
+
+        :param pre_proc.preflight.FileHeader header: The file's header.
+        :raises pre_proc.exceptions.AttributeNotFoundError: If the attribute
+            doesn't exist.
+        """
+        attributes = header.variable_attributes.get(self.variable_name, {})
+        self.new_value = attributes.get(self.source_attribute)
+        if self.new_value is None:
+            raise AttributeNotFoundError(
+                self.filename,
+                '{}.{}'.format(self.variable_name, self.source_attribute)
+            )
+
 
 class AttributeAdd(AttributeEdit, metaclass=ABCMeta):
     """
@@ -343,6 +532,15 @@ class AttributeAdd(AttributeEdit, metaclass=ABCMeta):
         self._calculate_new_value()
         self._run_ncatted('o')
 
+    def update_header(self, header):
+        """
+        Add the attribute with its new value.
+
+        :param pre_proc.preflight.FileHeader header: The file's header.
+        """
+        self._calculate_new_value()
+        super().update_header(header)
+
 
 class AttributeDelete(AttributeEdit, metaclass=ABCMeta):
     """
@@ -368,6 +566,15 @@ class AttributeDelete(AttributeEdit, metaclass=ABCMeta):
         self._calculate_new_value()
         self._run_ncatted('d')
 
+    def update_header(self, header):
+        """
+        Delete the attribute.
+
+        :param pre_proc.preflight.FileHeader header: The file's header.
+        """
+        header.delete_attribute(self.attribute_visibility,
+                                self.attribute_name)
+
 
 class RemoveHalo(NcoDataFix, metaclass=ABCMeta):
     """
@@ -396,16 +603,158 @@ class RemoveHalo(NcoDataFix, metaclass=ABCMeta):
         self._run_nco_command(NcksError)
 
 
+class SetTimeReference(DataFix, metaclass=ABCMeta):
+    """
+    An abstract base class for fixes that change the reference date of the
+    time coordinate. The values of the time variable and of its bounds are
+    rewritten in place and so the data variable's chunks aren't touched.
+    """
+    def __init__(self, filename, directory):
+        """
+        Initialise the class
+        """
+        super().__init__(filename, directory)
+        # The new reference date, e.g. '1949-01-01 00:00:00'
+        self.new_reference = None
+        self.time_variable_name = 'time'
+
+    @abstractmethod
+    def _set_new_reference(self):
+        """
+        In concrete implementations, specify the new reference date here.
+        """
+        pass
+
+    def apply_fix(self):
+        """
+        Add the offset between the existing and new reference dates to the
+        time values and their bounds and then update their units.
+        """
+        self._set_new_reference()
+        if self.new_reference is None:
+            raise InstanceVariableNotDefinedError(type(self).__name__,
+                                                  'new_reference')
+
+        filepath = os.path.join(self.directory, self.filename)
+        with traced_open(netCDF4.Dataset, filepath, 'a') as rootgrp:
+            time = rootgrp.variables[self.time_variable_name]
+            if 'units' not in time.ncattrs():
+                raise AttributeNotFoundError(self.filename, 'units')
+            new_units, offset = self._offset(
+                time.units, getattr(time, 'calendar', 'standard')
+            )
+
+            variables = [time]
+            for attribute in ('bounds', 'climatology'):
+                if attribute in time.ncattrs():
+                    bounds_name = time.getncattr(attribute)
+                    if bounds_name in rootgrp.variables:
+                        variables.append(rootgrp.variables[bounds_name])
+
+            # Integer values can't be changed by a fraction of their unit
+            # and so nothing is changed
+            for var in variables:
+                if (getattr(var.dtype, 'kind', None) in INTEGER_KINDS and
+                        offset != int(offset)):
+                    raise TimeOffsetError(self.filename, var.name, offset)
+
+            for var in variables:
+                var.set_auto_maskandscale(False)
+                var[:] = var[:] + offset
+                if 'units' in var.ncattrs():
+                    var.units = new_units
+            time.units = new_units
+
+    def _offset(self, old_units, calendar):
+        """
+        Calculate the new units and the offset to add to the time values.
+
+        :param str old_units: The time variable's existing units.
+        :param str calendar: The time variable's calendar.
+        :returns: The new units and the offset.
+        :rtype: tuple
+        """
+        interval = old_units.split(' since ')[0]
+        new_units = f'{interval} since {self.new_reference}'
+        offset = cftime.date2num(
+            cftime.num2date(0, old_units, calendar), new_units, calendar
+        )
+        return new_units, offset
+
+    def check(self, header):
+        """
+        Check that the time variable has units with a reference date and
+        that the offset can be added to the values of the time variable and
+        its bounds.
+
+        :param pre_proc.preflight.FileHeader header: The file's header.
+        :raises pre_proc.exceptions.PreProcError: If the fix would fail.
+        """
+        self._set_new_reference()
+        if self.new_reference is None:
+            raise InstanceVariableNotDefinedError(type(self).__name__,
+                                                  'new_reference')
+        attributes = header.variable_attributes.get(self.time_variable_name,
+                                                    {})
+        if ' since ' not in attributes.get('units', ''):
+            raise AttributeNotFoundError(
+                self.filename, '{}.units'.format(self.time_variable_name)
+            )
+        names = [self.time_variable_name]
+        names.extend(attributes[attribute]
+                     for attribute in ('bounds', 'climatology')
+                     if attribute in attributes)
+        integer_names = [name for name in names
+                         if header.variable_kinds.get(name) in INTEGER_KINDS]
+        if integer_names:
+            _new_units, offset = self._offset(
+                attributes['units'], attributes.get('calendar', 'standard')
+            )
+            if offset != int(offset):
+                raise TimeOffsetError(self.filename, integer_names[0], offset)
+
+
 class MultiStageDataFix(DataFix, metaclass=ABCMeta):
     """
     A DataFix where intermediate files are generated by multiple intermediate
-    commands. When an external command fails then these intermediate files are
-    deleted.
+    commands. The intermediate files are written uncompressed to the scratch
+    directory (see pre_proc.scratch) and only the final file is moved back
+    over the original file. When an external command fails then these
+    intermediate files are deleted.
     """
+    writes = frozenset(['attributes', 'data', 'file'])
+
     def __init__(self, filename, directory):
         """Initialise the class"""
         super().__init__(filename, directory)
         self.intermediate_files = []
+        self.scratch = None
+
+    def _intermediate_file(self, suffix):
+        """
+        Return the path of a new intermediate file in the scratch directory.
+
+        :param str suffix: The suffix to append to the file's name
+        :returns: The path of the intermediate file
+        :rtype: str
+        """
+        if self.scratch is None:
+            self.scratch = ScratchManager(
+                os.path.join(self.directory, self.filename)
+            )
+        path = self.scratch.intermediate_path(suffix)
+        self.intermediate_files.append(path)
+        return path
+
+    def _move_back(self, final_file):
+        """
+        Replace the original file with `final_file` and remove the other
+        intermediate files.
+
+        :param str final_file: The path of the final intermediate file
+        """
+        self.scratch.move_back(final_file)
+        self.intermediate_files = []
 
     def _run_command(self, cmd, cmd_error):
         """
@@ -419,9 +768,9 @@ class MultiStageDataFix(DataFix, metaclass=ABCMeta):
         try:
             run_command(cmd)
         except Exception:
-            for fn in self.intermediate_files:
-                if os.path.exists(fn):
-                    os.remove(fn)
+            if self.scratch is not None:
+                self.scratch.remove_intermediates()
+            self.intermediate_files = []
             raise cmd_error(type(self).__name__, self.filename, cmd,
                             traceback.format_exc())
 
@@ -449,19 +798,18 @@ class FixHadGEMMask(MultiStageDataFix, metaclass=ABCMeta):
         Add the byte mask, mask the relevant points and remove the mask.
         """
         self._set_byte_mask()
-        # Make a temporary copy of the file that will be worked upon
         output_file = os.path.join(self.directory, self.filename)
-        temp_file = output_file + '.temp'
-        masked_file = output_file + '.temp_masked'
-        final_file = output_file + '.temp_final'
-        self.intermediate_files = [temp_file, masked_file, final_file]
-
-        # Remove any temporary file left over from a previous failed
-        # run as it could prevent some nco commands from running.
-        for fn in self.intermediate_files:
-            if os.path.exists(fn):
-                os.remove(fn)
-        shutil.copyfile(output_file, temp_file)
+        # The intermediate files are uncompressed and so the compression of
+        # each variable is read now to be restored in the final file
+        deflation = self._variable_deflation(output_file)
+        temp_file = self._intermediate_file('.temp')
+        masked_file = self._intermediate_file('.temp_masked')
+        final_file = self._intermediate_file('.temp_final')
+
+        # Make an uncompressed copy of the file that will be worked upon
+        command = (f"ncks -h --no_alphabetize -L 0 {output_file} "
+                   f"{temp_file}")
+        self._run_command(command, NcksError)
 
         # Copy the mask into the file
         command = (f"ncks -h --no_alphabetize -A -v {self.mask_var_name} "
@@ -469,22 +817,63 @@ class FixHadGEMMask(MultiStageDataFix, metaclass=ABCMeta):
         self._run_command(command, NcksError)
 
         # Do the masking
-        command = (f"ncap2 -h -s 'where({self.mask_var_name}!=0) "
+        command = (f"ncap2 -h -L 0 -s 'where({self.mask_var_name}!=0) "
                    f"{self.variable_name}={self.variable_name}@_FillValue' "
                    f"{temp_file} {masked_file}")
         self._run_command(command, Ncap2Error)
 
-        # Remove the mask
-        command = (f"ncks -h --no_alphabetize -x -v {self.mask_var_name} "
-                   f"{masked_file} {final_file}")
+        # Remove the mask and compress the final file with the original
+        # deflate level of each variable. The variables with the data
+        # variable's level are written first and the others are appended
+        # with their own levels.
+        levels = {}
+        for var_name, level in deflation.items():
+            if var_name != self.mask_var_name:
+                levels.setdefault(level, []).append(var_name)
+        main_level = deflation.get(self.variable_name, 0)
+        other_levels = [level for level in levels if level != main_level]
+        excluded = [self.mask_var_name]
+        for level in other_levels:
+            excluded.extend(levels[level])
+        command = (f"ncks -h --no_alphabetize -L {main_level} -x -v "
+                   f"{','.join(excluded)} {masked_file} {final_file}")
         self._run_command(command, NcksError)
+        for level in other_levels:
+            command = (f"ncks -h --no_alphabetize -A -L {level} -v "
+                       f"{','.join(levels[level])} {masked_file} "
+                       f"{final_file}")
+            self._run_command(command, NcksError)
 
         # Set the name on the file and remove intermediate files
-        os.remove(output_file)
-        os.rename(final_file, output_file)
-        self.intermediate_files.remove(final_file)
-        for fn in self.intermediate_files:
-            os.remove(fn)
+        self._move_back(final_file)
+
+    def _variable_deflation(self, filepath):
+        """
+        Read the deflate level of each variable in a file.
+
+        :param str filepath: The file's full path.
+        :returns: The deflate level of each variable, which is 0 if the
+            variable isn't compressed.
+        :rtype: dict
+        """
+        deflation = {}
+        with traced_open(netCDF4.Dataset, filepath) as rootgrp:
+            for var_name, var in rootgrp.variables.items():
+                filters = var.filters() or {}
+                deflation[var_name] = (filters.get('complevel', 0)
+                                       if filters.get('zlib') else 0)
+        return deflation
+
+    def check(self, header):
+        """
+        Check that the byte mask file exists.
+
+        :param pre_proc.preflight.FileHeader header: The file's header.
+        :raises pre_proc.exceptions.CannotLoadSourceFileError: If the mask
+            file doesn't exist.
+        """
+        self._set_byte_mask()
+        _check_source_file(self.byte_mask_file)
 
 
 class InsertHadGEMGrid(MultiStageDataFix, metaclass=ABCMeta):
@@ -498,41 +887,39 @@ class InsertHadGEMGrid(MultiStageDataFix, metaclass=ABCMeta):
 
     def apply_fix(self):
         """
-        Insert the correct grid. The file is first converted to netCDF3
-        because the version 4 library has known bugs that prevent these
-        operations.
+        Insert the correct grid. The grid variables are copied from the
+        known good file into a new copy of the file, which the other
+        variables' compressed chunks are copied into unchanged.
         """
         self._set_known_good()
         output_file = os.path.join(self.directory, self.filename)
-        temp_file = output_file + '.temp'
-        backup_file = output_file + '.temp_backup'
-        self.intermediate_files = [temp_file, backup_file]
+        final_file = self._intermediate_file('.temp_final')
 
-        if os.path.exists(temp_file):
-            os.remove(temp_file)
-
-        # Convert to netCDF3
-        command = (f'ncks -h --no_alphabetize -3 '
-                   f'{output_file} {temp_file}')
-        self._run_command(command, NcksError)
-
-        # Paste in the grid
-        command = (f'ncks -h --no_alphabetize -A -v latitude,longitude,'
-                   f'vertices_latitude,vertices_longitude '
-                   f'{self.known_good_file} {temp_file}')
-        self._run_command(command, NcksError)
+        try:
+            copy_netcdf(output_file, final_file,
+                        donor_path=self.known_good_file,
+                        donor_variables=['latitude', 'longitude',
+                                         'vertices_latitude',
+                                         'vertices_longitude'])
+        except Exception:
+            if os.path.exists(final_file):
+                os.remove(final_file)
+            raise NetcdfCopyError(type(self).__name__, self.filename,
+                                  traceback.format_exc())
 
-        # All's gone well so rename the original file
-        os.rename(output_file, backup_file)
+        # All's gone well so replace the original file
+        self._move_back(final_file)
 
-        # Save as netCDF v4
-        command = (f'ncks -h --no_alphabetize -7 --deflate=3 {temp_file} '
-                   f'{output_file}')
-        self._run_command(command, NcksError)
+    def check(self, header):
+        """
+        Check that the known good grid file exists.
 
-        # Complete so remove the intermediate files
-        for fn in self.intermediate_files:
-            os.remove(fn)
+        :param pre_proc.preflight.FileHeader header: The file's header.
+        :raises pre_proc.exceptions.CannotLoadSourceFileError: If the grid
+            file doesn't exist.
+        """
+        self._set_known_good()
+        _check_source_file(self.known_good_file)
 
     @abstractmethod
     def _set_known_good(self):
@@ -541,3 +928,37 @@ class InsertHadGEMGrid(MultiStageDataFix, metaclass=ABCMeta):
         good grid here.
         """
         pass
+
+
+def _check_source_file(filepath):
+    """
+    Check that a file that a fix copies from exists.
+
+    :param str filepath: The file's full path.
+    :raises pre_proc.exceptions.CannotLoadSourceFileError: If the file
+        doesn't exist.
+    """
+    if filepath is None or not os.path.exists(filepath):
+        raise CannotLoadSourceFileError(filepath)
+
+
+def ncatted_argument(attribute_name, attribute_visibility, nco_mode,
+                     attribute_type, new_value):
+    """
+    Return the ncatted option that edits an attribute, e.g.
+    -a branch_time_in_parent,global,o,d,10800.0
+
+    :param str attribute_name: The name of the attribute.
+    :param str attribute_visibility: The variable that the attribute belongs
+        to or global.
+    :param str nco_mode: The mode to run nco in.
+    :param str attribute_type: The attribute's nco type.
+    :param new_value: The attribute's new value.
+    :returns: The option.
+    :rtype: str
+    """
+    quote_mark = "'" if isinstance(new_value, str) else ""
+    return '-a {},{},{},{},{}{}{}'.format(attribute_name,
+                                          attribute_visibility, nco_mode,
+                                          attribute_type, quote_mark,
+                                          new_value, quote_mark)
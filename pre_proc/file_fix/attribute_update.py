@@ -7,14 +7,15 @@ abstract base class.
 import numbers
 import os
 
-from netCDF4 import Dataset
-
-from pre_proc.common import to_float, to_int
+from pre_proc.common import lazy_import, to_float, to_int
 from pre_proc.exceptions import (AttributeNotFoundError,
                                  AttributeConversionError,
                                  ExistingAttributeError)
+from pre_proc.tracing import traced_open
 from .abstract import AttributeUpdate
 
+netCDF4 = lazy_import('netCDF4')
+
 
 class ParentBranchTimeDoubleFix(AttributeUpdate):
     """
@@ -34,13 +35,17 @@ class ParentBranchTimeDoubleFix(AttributeUpdate):
 
     def _calculate_new_value(self):
         """
-        The new value is the existing string converted to a double.
+        The new value is the existing string converted to a double. An
+        existing number, for example from an earlier fix, is kept.
         """
-        try:
-            self.new_value = to_float(self.existing_value)
-        except ValueError:
-            raise AttributeConversionError(self.filename, self.attribute_name,
-                                           'float')
+        if isinstance(self.existing_value, numbers.Number):
+            self.new_value = float(self.existing_value)
+        else:
+            try:
+                self.new_value = to_float(self.existing_value)
+            except ValueError:
+                raise AttributeConversionError(self.filename,
+                                               self.attribute_name, 'float')
 
 
 class ChildBranchTimeDoubleFix(AttributeUpdate):
@@ -61,13 +66,17 @@ class ChildBranchTimeDoubleFix(AttributeUpdate):
 
     def _calculate_new_value(self):
         """
-        The new value is the existing string converted to a double.
+        The new value is the existing string converted to a double. An
+        existing number, for example from an earlier fix, is kept.
         """
-        try:
-            self.new_value = to_float(self.existing_value)
-        except ValueError:
-            raise AttributeConversionError(self.filename, self.attribute_name,
-                                           'float')
+        if isinstance(self.existing_value, numbers.Number):
+            self.new_value = float(self.existing_value)
+        else:
+            try:
+                self.new_value = to_float(self.existing_value)
+            except ValueError:
+                raise AttributeConversionError(self.filename,
+                                               self.attribute_name, 'float')
 
 
 class ForcingIndexIntFix(AttributeUpdate):
@@ -245,7 +254,7 @@ class FurtherInfoUrlAWISourceIdAndHttps(AttributeUpdate):
         Get the value of the existing attribute from the current file
         """
         filepath = os.path.join(self.directory, self.filename)
-        with Dataset(filepath) as rootgrp:
+        with traced_open(netCDF4.Dataset, filepath) as rootgrp:
             self.existing_value = getattr(rootgrp, self.attribute_name, None)
             self.source_id = getattr(rootgrp, 'source_id', None)
 
@@ -255,6 +264,20 @@ class FurtherInfoUrlAWISourceIdAndHttps(AttributeUpdate):
         if self.source_id is None:
             raise AttributeNotFoundError(self.filename, 'source_id')
 
+    def check(self, header):
+        """
+        Check that the attributes exist and that the new value can be
+        calculated.
+
+        :param pre_proc.preflight.FileHeader header: The file's header.
+        :raises pre_proc.exceptions.PreProcError: If the fix would fail.
+        """
+        self.source_id = header.global_attributes.get('source_id')
+        if (self.source_id is None and
+                header.global_attributes.get(self.attribute_name) is not None):
+            raise AttributeNotFoundError(self.filename, 'source_id')
+        super().check(header)
+
 
 class FurtherInfoUrlPrimToHttps(AttributeUpdate):
     """
@@ -377,9 +400,17 @@ class CICE12UComment(AttributeUpdate):
         Get the value of the existing attribute from the current file
         """
         filepath = os.path.join(self.directory, self.filename)
-        with Dataset(filepath) as rootgrp:
+        with traced_open(netCDF4.Dataset, filepath) as rootgrp:
             self.existing_value = getattr(rootgrp, self.attribute_name, None)
 
+    def check(self, header):
+        """
+        The comment is added whether or not there's an existing comment.
+
+        :param pre_proc.preflight.FileHeader header: The file's header.
+        """
+        pass
+
     def _calculate_new_value(self):
         """
         Add new comment.
@@ -8,18 +8,19 @@ import os
 import traceback
 import warnings
 
-import iris
-
-from .abstract import (DataFix, FixHadGEMMask, NcoDataFix, NcksAppendDataFix,
-                       RemoveHalo, InsertHadGEMGrid)
-from pre_proc.common import run_command
-from pre_proc.exceptions import (ExistingAttributeError, CdoError, Ncap2Error,
-                                 NcattedError, NcpdqError, NcksError,
-                                 NcrenameError)
-
-from highresmip_fix.fix_latlon_atmosphere import (fix_latlon_atmosphere,
-                                                  binary_size)
-import fix_lons
+from .abstract import (DataFix, FixHadGEMMask, NcoDataFix, PassthroughDataFix,
+                       RemoveHalo, InsertHadGEMGrid, ScalarCoordinateAppend,
+                       SetTimeReference)
+from pre_proc.common import lazy_import, run_command
+from pre_proc.exceptions import (AttributeNotFoundError,
+                                 ExistingAttributeError,
+                                 NcattedError, NcpdqError, NcksError)
+from pre_proc.tracing import span
+
+# These are only loaded when a fix that needs them is run
+iris = lazy_import('iris')
+fix_latlon = lazy_import('highresmip_fix.fix_latlon_atmosphere')
+fix_lons = lazy_import('fix_lons')
 
 # Ignore warnings displayed when loading data into Iris to check it
 warnings.filterwarnings("ignore")
@@ -32,6 +33,34 @@ CICE_COORDS_DIR = ('/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/'
                    'cice_coords')
 CICE_MASK_DIR = '/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/cice_masks'
 
+# The units attributes that Iris identifies as Kelvin
+KELVIN_UNITS = ('K', 'kelvin', 'Kelvin', 'degK', 'deg_K')
+
+
+def load_cube(filepath):
+    """
+    Load the cube in a file with Iris.
+
+    :param str filepath: The file's full path.
+    :returns: The cube.
+    :rtype: iris.cube.Cube
+    """
+    with span('load_cube', 'iris', path=filepath):
+        return iris.load_cube(filepath)
+
+
+def kelvin_to_celsius(values):
+    """
+    Convert an array of temperatures from Kelvin to degrees Celsius, keeping
+    its type so that single precision data is calculated as by ncap2.
+
+    :param numpy.ndarray values: The temperatures in Kelvin
+    :returns: The temperatures in degrees Celsius
+    :rtype: numpy.ndarray
+    """
+    return values - values.dtype.type(273.15)
+
+
 class LatDirection(NcoDataFix):
     """
     Reverse the direction of the latitude dimension using ncpdq.
@@ -95,15 +124,28 @@ class LatDirection(NcoDataFix):
 
         :returns: True if the latitude coordinate is decreasing.
         """
-        cube = iris.load_cube(os.path.join(self.directory, self.filename))
+        cube = load_cube(os.path.join(self.directory, self.filename))
         lat_coord = cube.coord('latitude')
         if lat_coord.points[0] > lat_coord.points[1]:
             return True
         else:
             return False
 
+    def check(self, header):
+        """
+        Check that the latitude coordinate is decreasing.
+
+        :param pre_proc.preflight.FileHeader header: The file's header.
+        :raises pre_proc.exceptions.ExistingAttributeError: If the latitude
+            isn't decreasing.
+        """
+        points = header.leading_values('latitude')
+        if len(points) < 2 or not points[0] > points[1]:
+            raise ExistingAttributeError(self.filename, 'latitude',
+                                         'Latitude is not decreasing.')
+
 
-class LevToPlev(NcoDataFix):
+class LevToPlev(PassthroughDataFix):
     """
     Rename the lev dimension and variable to plev.
     """
@@ -115,13 +157,13 @@ class LevToPlev(NcoDataFix):
 
     def apply_fix(self):
         """
-        Run ncpdq and then swap the columns in lat_bnds.
+        Copy the file with the dimension and variable renamed.
         """
-        self.command = 'ncrename -h -d lev,plev -v lev,plev'
-        self._run_nco_command(NcrenameError)
+        self._run_copy(rename_dimensions={'lev': 'plev'},
+                       rename_variables={'lev': 'plev'})
 
 
-class ToDegC(NcoDataFix):
+class ToDegC(PassthroughDataFix):
     """
     Convert the data and units of a file from Kelvin to degrees Celsius.
     """
@@ -141,21 +183,18 @@ class ToDegC(NcoDataFix):
         rm filename.nc
         mv filename.nc.temp filename.nc
         ncatted -h -a units,tos,m,c,'degC' filename.nc
+
+        but the data is compressed on several threads and the units are set
+        in the same pass.
         """
         if not self._is_kelvin():
             raise ExistingAttributeError(self.filename, 'units',
                                          'Units are not K.')
 
-        self.command = (f"ncap2 -h -s '{self.variable_name}="
-                        f"{self.variable_name}-273.15f'")
-        self._run_nco_command(Ncap2Error)
-        units_command = (f"ncatted -h -a units,{self.variable_name},m,c,'degC' "
-                         f"{os.path.join(self.directory, self.filename)}")
-        try:
-            run_command(units_command)
-        except Exception:
-            raise NcattedError(type(self).__name__, self.filename,
-                               units_command, traceback.format_exc())
+        self._run_copy(
+            transforms={self.variable_name: kelvin_to_celsius},
+            variable_attributes={self.variable_name: {'units': 'degC'}}
+        )
 
     def _is_kelvin(self):
         """
@@ -163,11 +202,24 @@ class ToDegC(NcoDataFix):
 
         :returns: True if the units are Kelvin.
         """
-        cube = iris.load_cube(os.path.join(self.directory, self.filename))
+        cube = load_cube(os.path.join(self.directory, self.filename))
         return True if cube.units.symbol == 'K' else False
 
+    def check(self, header):
+        """
+        Check that the units are K.
 
-class AAVarNameToFileName(NcoDataFix):
+        :param pre_proc.preflight.FileHeader header: The file's header.
+        :raises pre_proc.exceptions.ExistingAttributeError: If the units
+            aren't Kelvin.
+        """
+        attributes = header.variable_attributes.get(self.variable_name, {})
+        if attributes.get('units') not in KELVIN_UNITS:
+            raise ExistingAttributeError(self.filename, 'units',
+                                         'Units are not K.')
+
+
+class AAVarNameToFileName(PassthroughDataFix):
     """
     Rename the variable itself and variable_id global attribute to the first
     component of the filename.
@@ -185,19 +237,27 @@ class AAVarNameToFileName(NcoDataFix):
         var_name = self.filename.split('_')[0]
         existing_name = self._get_existing_name()
 
-        self.command = f'ncrename -h -v {existing_name},{var_name}'
-        self._run_nco_command(NcrenameError)
-
-        self.command = f'ncatted -h -a variable_id,global,m,c,{var_name}'
-        self._run_nco_command(NcattedError)
+        self._run_copy(rename_variables={existing_name: var_name},
+                       global_attributes={'variable_id': var_name})
 
     def _get_existing_name(self):
         """
         Get the global attribute variable_id
         """
-        cube = iris.load_cube(os.path.join(self.directory, self.filename))
+        cube = load_cube(os.path.join(self.directory, self.filename))
         return cube.attributes['variable_id']
 
+    def check(self, header):
+        """
+        Check that the variable_id attribute exists.
+
+        :param pre_proc.preflight.FileHeader header: The file's header.
+        :raises pre_proc.exceptions.AttributeNotFoundError: If variable_id
+            doesn't exist.
+        """
+        if 'variable_id' not in header.global_attributes:
+            raise AttributeNotFoundError(self.filename, 'variable_id')
+
 
 class ZZEcEarthAtmosFix(DataFix):
     """
@@ -205,6 +265,9 @@ class ZZEcEarthAtmosFix(DataFix):
     longitudes into scalar coordinates. The ZZ at the start of the name causes
     this to be one of the last fixes to run.
     """
+    # The EC-Earth modules may rewrite the whole file
+    writes = frozenset(['attributes', 'data', 'file'])
+
     def __init__(self, filename, directory):
         """
         Initialise the class
@@ -218,9 +281,9 @@ class ZZEcEarthAtmosFix(DataFix):
         """
         Fix the affected file
         """
-        fix_latlon_atmosphere(
+        fix_latlon.fix_latlon_atmosphere(
             os.path.join(self.directory, self.filename),
-            binary_size(self.default_chunk_size)
+            fix_latlon.binary_size(self.default_chunk_size)
         )
 
 
@@ -229,6 +292,9 @@ class ZZZEcEarthLongitudeFix(DataFix):
     Use the EC-Earth provided module to fix the EC-Earth longitude. The ZZZ
     at the start of the name causes this to be the last fix to run.
     """
+    # The EC-Earth modules may rewrite the whole file
+    writes = frozenset(['attributes', 'data', 'file'])
+
     def __init__(self, filename, directory):
         """
         Initialise the class
@@ -246,7 +312,7 @@ class ZZZEcEarthLongitudeFix(DataFix):
         )
 
 
-class SetTimeReference1949(NcoDataFix):
+class SetTimeReference1949(SetTimeReference):
     """
     Set the reference time of the time variable to be 1949-01-01
     """
@@ -256,43 +322,24 @@ class SetTimeReference1949(NcoDataFix):
         """
         super().__init__(filename, directory)
 
-    def apply_fix(self):
-        """
-        Use cdo to set the reference time.
-        """
-        self.command = "cdo -z zip_3 -setreftime,'1949-01-01','00:00:00'"
-        self._run_nco_command(CdoError)
+    def _set_new_reference(self):
+        """Set the new reference date"""
+        self.new_reference = '1949-01-01 00:00:00'
 
 
-class ZZZAddHeight2m(NcksAppendDataFix):
+class ZZZAddHeight2m(ScalarCoordinateAppend):
     """
-    Add a heighr2m dimension from the reference file.
+    Add a height2m scalar coordinate from the reference file.
     """
-    def __init__(self, filename, directory):
+    def _set_coordinate(self):
         """
-        Initialise the class
+        Set the reference file and the coordinate's name.
         """
-        super().__init__(filename, directory)
         self.reference_file = (
             '/gws/nopw/j04/primavera1/cache/jseddon/reference_files/'
             'height2m_reference.nc'
         )
-
-    def apply_fix(self):
-        """
-        Use cdo to set the reference time.
-        """
-        self.command = f"ncks -h -A -v height {self.reference_file}"
-        self._run_ncks_command()
-
-        units_command = (f"ncatted -h -a coordinates,{self.variable_name},o,c,"
-                         f"'height' "
-                         f"{os.path.join(self.directory, self.filename)}")
-        try:
-            run_command(units_command)
-        except Exception:
-            raise NcattedError(type(self).__name__, self.filename,
-                               units_command, traceback.format_exc())
+        self.coordinate_name = 'height'
 
 
 class AAARemoveOrca1Halo(RemoveHalo):
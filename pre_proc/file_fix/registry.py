@@ -0,0 +1,203 @@
+"""
+registry.py
+
+A registry of the fixes, which every subclass of FileFix is added to when
+it's defined. The modules containing the fixes and each fix's metadata are
+also stored in an index file so that a fix can be found by name, and a list
+of fixes classified, without importing all of the modules.
+"""
+from collections import namedtuple
+from functools import lru_cache
+import importlib
+import inspect
+import json
+import os
+
+from pre_proc.exceptions import UnknownFixError
+
+# The modules that contain the fixes
+FIX_MODULES = ['pre_proc.file_fix.attribute_add',
+               'pre_proc.file_fix.attribute_update',
+               'pre_proc.file_fix.copy_attribute',
+               'pre_proc.file_fix.data_fixes']
+
+# The index of the fixes generated by bin/make_fix_index.py
+INDEX_PATH = os.path.join(os.path.dirname(__file__), 'fix_index.json')
+
+# A fix's name, the module that defines it, whether it only changes
+# attributes ('attribute') or also changes the data ('data') and the parts
+# of the file that it reads and writes
+FixInfo = namedtuple('FixInfo', 'name module kind reads writes')
+
+# All of the subclasses of FileFix that have been defined, by name
+_fixes = {}
+
+# Functions that define a fix when it's first needed, by the fix's name
+_factories = {}
+
+
+def register(fix_class):
+    """
+    Add a fix to the registry. This is called by FileFix.__init_subclass__()
+    and so abstract classes are registered too.
+
+    :param type fix_class: The fix.
+    """
+    _fixes[fix_class.__name__] = fix_class
+
+
+def register_factory(name, factory):
+    """
+    Register a function that defines a fix, so that the fix is only
+    created when it's first needed. The function must define a subclass of
+    FileFix called `name`.
+
+    :param str name: The fix's name.
+    :param function factory: The function that defines the fix.
+    """
+    _factories[name] = factory
+
+
+def registered_fixes():
+    """
+    Return the concrete fixes that have been defined so far.
+
+    :returns: The fixes by name.
+    :rtype: dict
+    """
+    return {name: fix_class for name, fix_class in _fixes.items()
+            if not inspect.isabstract(fix_class)}
+
+
+def load_all():
+    """
+    Import all of the modules containing fixes.
+
+    :returns: All of the concrete fixes by name.
+    :rtype: dict
+    """
+    for module_name in FIX_MODULES:
+        importlib.import_module(module_name)
+    for name in list(_factories):
+        _registered_fix(name)
+    return registered_fixes()
+
+
+def fix_info(fix_class):
+    """
+    Return a fix's metadata.
+
+    :param type fix_class: The fix.
+    :returns: The metadata.
+    :rtype: FixInfo
+    """
+    return FixInfo(fix_class.__name__, fix_class.__module__,
+                   fix_class.fix_kind, sorted(fix_class.reads),
+                   sorted(fix_class.writes))
+
+
+@lru_cache()
+def load_index(path=INDEX_PATH):
+    """
+    Load the index of the fixes.
+
+    :param str path: The index file.
+    :returns: The metadata of each fix by name.
+    :rtype: dict
+    """
+    with open(path) as fh:
+        index = json.load(fh)
+    return {name: FixInfo(name, **info) for name, info in index.items()}
+
+
+def write_index(path=INDEX_PATH):
+    """
+    Import all of the fixes and write their metadata to the index.
+
+    :param str path: The index file to write.
+    :returns: The number of fixes in the index.
+    :rtype: int
+    """
+    fixes = load_all()
+    lines = []
+    for name in sorted(fixes):
+        info = fix_info(fixes[name])._asdict()
+        del info['name']
+        lines.append('    {}: {}'.format(json.dumps(name),
+                                         json.dumps(info, sort_keys=True)))
+    # One fix per line keeps the differences small when fixes are added
+    with open(path, 'w') as fh:
+        fh.write('{\n' + ',\n'.join(lines) + '\n}\n')
+    load_index.cache_clear()
+    return len(lines)
+
+
+def get_fix_class(name):
+    """
+    Return a fix by name, importing the module that defines it if it hasn't
+    been imported already.
+
+    :param str name: The fix's name.
+    :returns: The fix.
+    :rtype: type
+    :raises pre_proc.exceptions.UnknownFixError: If there's no concrete fix
+        with this name.
+    """
+    fix_class = _registered_fix(name)
+    if fix_class is None:
+        info = load_index().get(name)
+        if info is not None:
+            importlib.import_module(info.module)
+            fix_class = _registered_fix(name)
+    if fix_class is None or inspect.isabstract(fix_class):
+        raise UnknownFixError(name)
+    return fix_class
+
+
+def _registered_fix(name):
+    """
+    Return a fix that has been registered, defining it first if its factory
+    has been registered.
+
+    :param str name: The fix's name.
+    :returns: The fix or None if it hasn't been registered.
+    :rtype: type
+    """
+    factory = _factories.pop(name, None)
+    if factory is not None:
+        factory()
+    return _fixes.get(name)
+
+
+def get_fix_info(name):
+    """
+    Return a fix's metadata from the index without importing the fix.
+
+    :param str name: The fix's name.
+    :returns: The metadata.
+    :rtype: FixInfo
+    :raises pre_proc.exceptions.UnknownFixError: If the fix isn't in the
+        index.
+    """
+    try:
+        return load_index()[name]
+    except KeyError:
+        raise UnknownFixError(name)
+
+
+def classify_fixes(fix_names):
+    """
+    Classify the fixes to apply to a file from the index without importing
+    them.
+
+    :param list fix_names: The names of the fixes.
+    :returns: 'data' if any of the fixes change the data, 'attribute' if
+        they only change attributes or None if there are no fixes.
+    :rtype: str
+    """
+    kinds = {get_fix_info(name).kind for name in fix_names}
+    if 'data' in kinds:
+        return 'data'
+    elif kinds:
+        return 'attribute'
+    return None
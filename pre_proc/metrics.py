@@ -0,0 +1,405 @@
+"""
+metrics.py
+
+Live counters and histograms of the files fixed by a worker, so that the
+progress of a long campaign can be followed without reading the logs. The
+metrics are updated from each file's pre_proc.results.FileResult and are
+periodically written as a Prometheus textfile, which node_exporter's
+textfile collector can serve, and as a JSON snapshot. Updating the metrics
+for a file only increments a few numbers.
+"""
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+
+from pre_proc.results import DONE, FAILED, SKIPPED
+
+logger = logging.getLogger(__name__)
+
+# The upper bounds in seconds of the histograms' buckets
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1., 5., 10., 30., 60., 300., 1800.)
+
+# The seconds between writing the metrics
+DEFAULT_EXPORT_INTERVAL = 30.
+
+# The prefix of the Prometheus metrics' names
+PREFIX = 'pre_proc_'
+
+
+class Histogram(object):
+    """
+    The distribution of a duration, with the same cumulative buckets as a
+    Prometheus histogram.
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        Initialise the class
+
+        :param tuple buckets: The upper bounds of the buckets in increasing
+            order, not including infinity.
+        """
+        self.buckets = tuple(buckets)
+        # The last count is for the values larger than every bound
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.
+
+    def observe(self, value):
+        """
+        Add a value.
+
+        :param float value: The value.
+        """
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative_counts(self):
+        """
+        Return the number of values less than or equal to each bound.
+
+        :returns: (bound, count) tuples, finishing with infinity.
+        :rtype: list
+        """
+        cumulative = []
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            cumulative.append((bound, total))
+        return cumulative
+
+    def to_dict(self):
+        """
+        Return the histogram for a JSON snapshot.
+
+        :returns: The count, sum, mean and cumulative buckets.
+        :rtype: dict
+        """
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else None,
+            'buckets': {_format_bound(bound): count
+                        for bound, count in self.cumulative_counts()}
+        }
+
+
+class Metrics(object):
+    """
+    The counters and histograms of the files fixed. The class has the same
+    add() and flush() methods as the recorders of results and so it can be
+    used as one. It can be updated from several threads.
+    """
+    def __init__(self, labels=None, buckets=DEFAULT_BUCKETS):
+        """
+        Initialise the class
+
+        :param dict labels: Labels added to every Prometheus metric, for
+            example the worker's name.
+        :param tuple buckets: The upper bounds of the histograms' buckets.
+        """
+        self.labels = dict(labels or {})
+        self.buckets = buckets
+        self.started = time.time()
+        self.lock = threading.Lock()
+        self.files = {DONE: 0, FAILED: 0, SKIPPED: 0}
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.failures = {}
+        self.file_seconds = Histogram(buckets)
+        self.fix_seconds = {}
+        # The number of files that will be fixed, if it's known
+        self.files_planned = None
+        # The number of files in each state in a work queue
+        self.queue_files = {}
+
+    def add(self, result):
+        """
+        Update the metrics with a file's outcome.
+
+        :param pre_proc.results.FileResult result: The finished result.
+        """
+        with self.lock:
+            self.files[result.status] = self.files.get(result.status, 0) + 1
+            if result.status == FAILED:
+                error_class = result.error_class or 'unknown'
+                self.failures[error_class] = (
+                    self.failures.get(error_class, 0) + 1
+                )
+            elif result.status == DONE:
+                self.bytes_read += result.bytes_in or 0
+                self.bytes_written += result.bytes_out or 0
+            if result.status != SKIPPED and result.duration is not None:
+                self.file_seconds.observe(result.duration)
+            for fix_name, seconds in result.fix_durations.items():
+                if fix_name not in self.fix_seconds:
+                    self.fix_seconds[fix_name] = Histogram(self.buckets)
+                self.fix_seconds[fix_name].observe(seconds)
+
+    def flush(self):
+        """
+        The metrics are updated immediately and so there's nothing to
+        flush.
+
+        :returns: Zero.
+        :rtype: int
+        """
+        return 0
+
+    def flush_if_due(self):
+        """
+        The metrics are updated immediately and so there's nothing to
+        flush.
+
+        :returns: Zero.
+        :rtype: int
+        """
+        return 0
+
+    def set_queue_files(self, counts):
+        """
+        Set the number of files in each state in the work queue.
+
+        :param dict counts: The number of files by state, from
+            pre_proc.work_queue.WorkQueue.counts().
+        """
+        with self.lock:
+            self.queue_files = dict(counts)
+
+    def snapshot(self):
+        """
+        Return the current values of the metrics.
+
+        :returns: The metrics, which can be written as JSON.
+        :rtype: dict
+        """
+        with self.lock:
+            now = time.time()
+            elapsed = now - self.started
+            files_total = sum(self.files.values())
+            snapshot = {
+                'labels': dict(self.labels),
+                'started': self.started,
+                'time': now,
+                'elapsed_seconds': elapsed,
+                'files': dict(self.files, total=files_total),
+                'files_planned': self.files_planned,
+                'files_remaining': (None if self.files_planned is None else
+                                    max(self.files_planned - files_total,
+                                        0)),
+                'queue_files': dict(self.queue_files),
+                'files_per_second': files_total / elapsed if elapsed else 0.,
+                'bytes_read': self.bytes_read,
+                'bytes_written': self.bytes_written,
+                'bytes_per_second': (self.bytes_read / elapsed if elapsed
+                                     else 0.),
+                'failures': dict(self.failures),
+                'file_seconds': self.file_seconds.to_dict(),
+                'fix_seconds': {fix_name: histogram.to_dict()
+                                for fix_name, histogram
+                                in sorted(self.fix_seconds.items())}
+            }
+        return snapshot
+
+    def prometheus_text(self):
+        """
+        Return the metrics in Prometheus' text exposition format.
+
+        :returns: The metrics.
+        :rtype: str
+        """
+        lines = []
+
+        def add_metric(name, metric_type, help_text, samples):
+            """ Add the (suffix, labels, value) samples of a metric """
+            lines.append('# HELP {}{} {}'.format(PREFIX, name, help_text))
+            lines.append('# TYPE {}{} {}'.format(PREFIX, name, metric_type))
+            for suffix, labels, value in samples:
+                lines.append('{}{}{}{} {}'.format(
+                    PREFIX, name, suffix,
+                    _format_labels(dict(self.labels, **labels)),
+                    _format_value(value)
+                ))
+
+        with self.lock:
+            add_metric('start_time_seconds', 'gauge',
+                       'The time that the worker started.',
+                       [('', {}, self.started)])
+            add_metric('files_total', 'counter',
+                       'The files processed by outcome.',
+                       [('', {'status': status}, count)
+                        for status, count in sorted(self.files.items())])
+            add_metric('bytes_read_total', 'counter',
+                       'The size of the files fixed before fixing.',
+                       [('', {}, self.bytes_read)])
+            add_metric('bytes_written_total', 'counter',
+                       'The size of the files fixed after fixing.',
+                       [('', {}, self.bytes_written)])
+            add_metric('failures_total', 'counter',
+                       'The files that could not be fixed by exception '
+                       'class.',
+                       [('', {'error_class': error_class}, count)
+                        for error_class, count
+                        in sorted(self.failures.items())])
+            add_metric('file_duration_seconds', 'histogram',
+                       'The time taken to fix each file.',
+                       _histogram_samples(self.file_seconds, {}))
+            add_metric('fix_duration_seconds', 'histogram',
+                       'The time taken by each fix.',
+                       [sample for fix_name, histogram
+                        in sorted(self.fix_seconds.items())
+                        for sample in _histogram_samples(histogram,
+                                                         {'fix': fix_name})])
+            if self.files_planned is not None:
+                add_metric('files_planned', 'gauge',
+                           'The files that the worker will process.',
+                           [('', {}, self.files_planned)])
+            if self.queue_files:
+                add_metric('queue_files', 'gauge',
+                           'The files in the work queue by state.',
+                           [('', {'state': state}, count)
+                            for state, count
+                            in sorted(self.queue_files.items())])
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsExporter(object):
+    """
+    A context manager that rewrites the metrics' files periodically from a
+    background thread, and once more when the context is left.
+    """
+    def __init__(self, metrics, textfile=None, json_file=None,
+                 interval=DEFAULT_EXPORT_INTERVAL, update=None):
+        """
+        Initialise the class
+
+        :param Metrics metrics: The metrics to write.
+        :param str textfile: The full path of the Prometheus textfile to
+            write or None.
+        :param str json_file: The full path of the JSON snapshot to write
+            or None.
+        :param float interval: The seconds between writing the files.
+        :param function update: If not None then this is called with the
+            metrics before they're written, to update values such as the
+            number of files in the work queue.
+        """
+        self.metrics = metrics
+        self.textfile = textfile
+        self.json_file = json_file
+        self.interval = interval
+        self.update = update
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.write()
+        self._thread = threading.Thread(target=self._run,
+                                        name='metrics-exporter')
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._stop.set()
+        self._thread.join()
+        self.write()
+
+    def _run(self):
+        """
+        Write the files until the exporter is stopped.
+        """
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def write(self):
+        """
+        Write the metrics to the files. A failure is logged rather than
+        raised so that it doesn't stop the files being fixed.
+        """
+        try:
+            if self.update is not None:
+                self.update(self.metrics)
+            if self.textfile:
+                _write_atomically(self.textfile,
+                                  self.metrics.prometheus_text())
+            if self.json_file:
+                _write_atomically(self.json_file,
+                                  json.dumps(self.metrics.snapshot(),
+                                             indent=2, sort_keys=True))
+        except Exception as exc:
+            logger.warning('Unable to write the metrics: {}'.format(exc))
+
+
+def _write_atomically(path, contents):
+    """
+    Write a file by renaming a temporary file, so that readers never see a
+    partly written file. The temporary file's name doesn't end in .prom and
+    so the textfile collector ignores it.
+
+    :param str path: The full path of the file.
+    :param str contents: The file's contents.
+    """
+    temp_path = '{}.{}.tmp'.format(path, os.getpid())
+    with open(temp_path, 'w') as fh:
+        fh.write(contents)
+    os.replace(temp_path, path)
+
+
+def _histogram_samples(histogram, labels):
+    """
+    Return the samples of a Prometheus histogram.
+
+    :param Histogram histogram: The histogram.
+    :param dict labels: The histogram's labels.
+    :returns: (suffix, labels, value) tuples.
+    :rtype: list
+    """
+    samples = [('_bucket', dict(labels, le=_format_bound(bound)), count)
+               for bound, count in histogram.cumulative_counts()]
+    samples.append(('_sum', labels, histogram.sum))
+    samples.append(('_count', labels, histogram.count))
+    return samples
+
+
+def _format_bound(bound):
+    """
+    Format the upper bound of a bucket as Prometheus does.
+
+    :param float bound: The bound.
+    :returns: The bound.
+    :rtype: str
+    """
+    return '+Inf' if bound == float('inf') else repr(float(bound))
+
+
+def _format_labels(labels):
+    """
+    Format the labels of a Prometheus sample.
+
+    :param dict labels: The labels.
+    :returns: The labels in braces or an empty string if there are none.
+    :rtype: str
+    """
+    if not labels:
+        return ''
+    return '{{{}}}'.format(','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').
+                         replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels.items()
+    ))
+
+
+def _format_value(value):
+    """
+    Format the value of a Prometheus sample.
+
+    :param value: The value.
+    :returns: The value.
+    :rtype: str
+    """
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
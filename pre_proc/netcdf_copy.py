@@ -0,0 +1,379 @@
+"""
+netcdf_copy.py
+
+Copy a netCDF file while renaming dimensions and variables, changing
+attributes, transforming variables' values or replacing variables with those
+from a donor file. The compressed chunks of variables that don't change are
+moved between the files without being decompressed and recompressed and the
+chunks of variables that do change are compressed in parallel by
+pre_proc.chunk_writer.
+"""
+import contextlib
+import logging
+
+from pre_proc.chunk_writer import deflate_settings, write_compressed
+from pre_proc.common import lazy_import
+from pre_proc.exceptions import UnsupportedNetcdfError
+from pre_proc.tracing import traced_open
+
+h5py = lazy_import('h5py')
+netCDF4 = lazy_import('netCDF4')
+np = lazy_import('numpy')
+
+logger = logging.getLogger(__name__)
+
+# The approximate maximum number of bytes to read at a time when a variable's
+# values have to be copied
+SLAB_BYTES = 64 * 1024 ** 2
+
+
+def copy_netcdf(source_path, dest_path, rename_dimensions=None,
+                rename_variables=None, global_attributes=None,
+                variable_attributes=None, transforms=None,
+                donor_path=None, donor_variables=None, threads=None):
+    """
+    Copy `source_path` to `dest_path`. The new file's variables have the
+    same storage settings as the original's and in netCDF4 files the
+    compressed chunks of each unchanged chunked variable are copied directly.
+
+    :param str source_path: The file to copy.
+    :param str dest_path: The new file to create.
+    :param dict rename_dimensions: Dimensions to rename with the existing
+        names as the keys and new names as the values.
+    :param dict rename_variables: Variables to rename with the existing
+        names as the keys and new names as the values.
+    :param dict global_attributes: Global attributes to set in the new file.
+    :param dict variable_attributes: Variable attributes to set in the new
+        file, with the existing variable names as the keys and dictionaries
+        of the attributes to set as the values.
+    :param dict transforms: Functions that calculate new values for
+        variables, with the existing variable names as the keys. Each
+        function is passed a numpy array of the existing values and returns
+        the new values. Points equal to the _FillValue aren't changed.
+    :param str donor_path: A file to take variables from.
+    :param list donor_variables: The names of the variables to take from
+        `donor_path`. Any existing variables with these names are replaced,
+        with the donor's attributes overwriting any existing attributes.
+    :param int threads: The number of threads to compress the chunks of
+        changed variables with. Defaults to the value from
+        pre_proc.chunk_writer.compression_threads().
+    :raises UnsupportedNetcdfError: If the source file contains groups.
+    """
+    rename_dimensions = rename_dimensions or {}
+    rename_variables = rename_variables or {}
+    variable_attributes = variable_attributes or {}
+    transforms = transforms or {}
+    donor_variables = donor_variables or []
+
+    passthrough = []
+    deferred = []
+    with contextlib.ExitStack() as stack:
+        src = stack.enter_context(traced_open(netCDF4.Dataset, source_path))
+        if src.groups:
+            raise UnsupportedNetcdfError(source_path, 'groups')
+        donor = None
+        if donor_path:
+            donor = stack.enter_context(traced_open(netCDF4.Dataset,
+                                                    donor_path))
+        dst = stack.enter_context(traced_open(netCDF4.Dataset, dest_path, 'w',
+                                              format=src.data_model))
+        for dataset in (src, dst, donor):
+            if dataset is not None:
+                dataset.set_auto_maskandscale(False)
+                dataset.set_auto_chartostring(False)
+
+        dst.setncatts({name: src.getncattr(name)
+                       for name in src.ncattrs()})
+        if global_attributes:
+            dst.setncatts(global_attributes)
+
+        for dim_name, dim in src.dimensions.items():
+            dst.createDimension(
+                rename_dimensions.get(dim_name, dim_name),
+                None if dim.isunlimited() else len(dim)
+            )
+
+        values_to_copy = []
+        for var_name, var in src.variables.items():
+            if var_name in donor_variables:
+                donor_var, new_var = _create_donor_variable(
+                    dst, donor, var_name, var
+                )
+                values_to_copy.append((donor_path, donor_var,
+                                       new_var, None))
+                continue
+            new_name = rename_variables.get(var_name, var_name)
+            dimensions = [rename_dimensions.get(dim, dim)
+                          for dim in var.dimensions]
+            new_var = _create_variable(dst, var, new_name,
+                                       dimensions)
+            if var_name in variable_attributes:
+                new_var.setncatts(variable_attributes[var_name])
+            if (var_name not in transforms and
+                    _can_passthrough(src, var)):
+                passthrough.append((var_name, new_name))
+            else:
+                values_to_copy.append((source_path, var, new_var,
+                                       transforms.get(var_name)))
+
+        for var_name in donor_variables:
+            if var_name not in src.variables:
+                donor_var, new_var = _create_donor_variable(
+                    dst, donor, var_name
+                )
+                values_to_copy.append((donor_path, donor_var,
+                                       new_var, None))
+
+        for path, old_var, new_var, transform in values_to_copy:
+            if _can_compress_in_parallel(dst, new_var):
+                deferred.append((path, old_var.name, new_var.name,
+                                 transform))
+            else:
+                _copy_values(old_var, new_var, transform)
+
+    if passthrough:
+        _copy_chunks(source_path, dest_path, passthrough, threads)
+    if deferred:
+        _write_deferred(dest_path, deferred, threads)
+    logger.debug('Copied {} to {}. Chunks passed through for: {}'.
+                 format(source_path, dest_path,
+                        ', '.join(name for name, _new in passthrough)))
+
+
+def _create_variable(dataset, template, name, dimensions):
+    """
+    Create a variable in `dataset` with the same type, storage settings and
+    attributes as `template`.
+
+    :param netCDF4.Dataset dataset: The dataset to create the variable in.
+    :param netCDF4.Variable template: The variable to base the new one on.
+    :param str name: The new variable's name.
+    :param list dimensions: The names of the new variable's dimensions.
+    :returns: The new variable.
+    :rtype: netCDF4.Variable
+    """
+    kwargs = {}
+    attributes = template.ncattrs()
+    if '_FillValue' in attributes:
+        kwargs['fill_value'] = template.getncattr('_FillValue')
+    filters = template.filters()
+    if filters:
+        if filters.get('zlib'):
+            kwargs['zlib'] = True
+            kwargs['complevel'] = filters['complevel']
+        kwargs['shuffle'] = bool(filters.get('shuffle'))
+        kwargs['fletcher32'] = bool(filters.get('fletcher32'))
+    chunking = template.chunking()
+    if chunking == 'contiguous':
+        kwargs['contiguous'] = True
+    elif chunking:
+        kwargs['chunksizes'] = chunking
+    if isinstance(template.datatype, np.dtype):
+        kwargs['endian'] = template.endian()
+
+    new_var = dataset.createVariable(name, template.datatype, dimensions,
+                                     **kwargs)
+    new_var.setncatts({attr: template.getncattr(attr)
+                       for attr in attributes if attr != '_FillValue'})
+    return new_var
+
+
+def _create_donor_variable(dataset, donor, name, existing=None):
+    """
+    Create a variable in `dataset` from the variable `name` in `donor`,
+    creating any dimensions that don't exist. Attributes of the `existing`
+    variable that the donor doesn't have are kept.
+
+    :param netCDF4.Dataset dataset: The dataset to create the variable in.
+    :param netCDF4.Dataset donor: The dataset to take the variable from.
+    :param str name: The variable's name.
+    :param netCDF4.Variable existing: The variable being replaced, if any.
+    :returns: The donor variable and the new variable.
+    :rtype: tuple
+    """
+    donor_var = donor.variables[name]
+    for dim_name in donor_var.dimensions:
+        if dim_name not in dataset.dimensions:
+            dataset.createDimension(dim_name, len(donor.dimensions[dim_name]))
+    new_var = _create_variable(dataset, donor_var, name,
+                               donor_var.dimensions)
+    if existing is not None:
+        new_var.setncatts({attr: existing.getncattr(attr)
+                           for attr in existing.ncattrs()
+                           if attr not in new_var.ncattrs() and
+                           attr != '_FillValue'})
+    return donor_var, new_var
+
+
+def _can_passthrough(dataset, var):
+    """
+    Check whether the compressed chunks of `var` could be copied directly.
+
+    :param netCDF4.Dataset dataset: The dataset containing `var`.
+    :param netCDF4.Variable var: The variable to check.
+    :returns: True if the chunks could be copied directly.
+    :rtype: bool
+    """
+    return (dataset.data_model.startswith('NETCDF4') and
+            isinstance(var.datatype, np.dtype) and
+            var.chunking() not in (None, 'contiguous'))
+
+
+def _can_compress_in_parallel(dataset, var):
+    """
+    Check whether `var` is compressed with only the shuffle and deflate
+    filters, which pre_proc.chunk_writer can apply itself.
+
+    :param netCDF4.Dataset dataset: The dataset containing `var`.
+    :param netCDF4.Variable var: The variable to check.
+    :returns: True if the chunks can be compressed in parallel.
+    :rtype: bool
+    """
+    if not _can_passthrough(dataset, var):
+        return False
+    filters = var.filters() or {}
+    others = ('fletcher32', 'szip', 'zstd', 'bzip2', 'blosc')
+    return (bool(filters.get('zlib')) and
+            not any(filters.get(name) for name in others))
+
+
+def _fill_value(var):
+    """
+    Return the _FillValue attribute of `var`.
+
+    :param netCDF4.Variable var: The variable.
+    :returns: The fill value or None if it doesn't have one.
+    """
+    if '_FillValue' in var.ncattrs():
+        return var.getncattr('_FillValue')
+    return None
+
+
+def _transform_values(values, transform, fill_value):
+    """
+    Apply `transform` to `values`, keeping the original type and leaving any
+    points equal to `fill_value` unchanged.
+
+    :param numpy.ndarray values: The values to transform.
+    :param transform: The function to apply, or None.
+    :param fill_value: The fill value, or None.
+    :returns: The new values.
+    :rtype: numpy.ndarray
+    """
+    if transform is None:
+        return values
+    values = np.asarray(values)
+    new_values = np.asarray(transform(values)).astype(values.dtype)
+    if fill_value is not None:
+        missing = values == fill_value
+        new_values[missing] = values[missing]
+    return new_values
+
+
+def _copy_values(old_var, new_var, transform=None):
+    """
+    Copy the values from `old_var` to `new_var` in slabs along the first
+    dimension.
+
+    :param netCDF4.Variable old_var: The variable to copy from.
+    :param netCDF4.Variable new_var: The variable to copy to.
+    :param transform: A function to apply to the values, or None.
+    """
+    fill_value = _fill_value(old_var)
+    if not old_var.dimensions:
+        new_var.assignValue(_transform_values(old_var.getValue(), transform,
+                                              fill_value))
+        return
+
+    if isinstance(old_var.datatype, np.dtype):
+        row_bytes = (old_var.datatype.itemsize *
+                     int(np.prod(old_var.shape[1:])))
+        rows = max(1, SLAB_BYTES // max(1, row_bytes))
+    else:
+        rows = old_var.shape[0]
+    for start in range(0, old_var.shape[0], rows):
+        end = min(start + rows, old_var.shape[0])
+        new_var[start:end] = _transform_values(old_var[start:end], transform,
+                                               fill_value)
+
+
+def _copy_chunks(source_path, dest_path, variables, threads=None):
+    """
+    Copy the compressed chunks of the specified variables directly between
+    the HDF5 datasets underlying two netCDF4 files. If the storage of the
+    new variable doesn't match the original then the values are copied
+    instead.
+
+    :param str source_path: The file to copy from.
+    :param str dest_path: The file to copy to.
+    :param list variables: (source name, destination name) tuples.
+    :param int threads: The number of compression threads.
+    """
+    with h5py.File(source_path, 'r') as src, \
+            h5py.File(dest_path, 'r+') as dst:
+        for src_name, dst_name in variables:
+            src_ds = src[src_name]
+            dst_ds = dst[dst_name]
+            if dst_ds.shape != src_ds.shape:
+                dst_ds.resize(src_ds.shape)
+            if (src_ds.dtype == dst_ds.dtype and
+                    src_ds.chunks == dst_ds.chunks and
+                    filter_pipeline(src_ds) == filter_pipeline(dst_ds)):
+                for index in range(src_ds.id.get_num_chunks()):
+                    offset = src_ds.id.get_chunk_info(index).chunk_offset
+                    filter_mask, chunk = src_ds.id.read_direct_chunk(offset)
+                    dst_ds.id.write_direct_chunk(offset, chunk, filter_mask)
+            elif deflate_settings(dst_ds) is not None:
+                logger.debug('Storage differs for {} so recompressing'.
+                             format(src_name))
+                write_compressed(dst_ds, src_ds.__getitem__, threads)
+            else:
+                logger.debug('Storage differs for {} so copying values'.
+                             format(src_name))
+                for chunk_slice in src_ds.iter_chunks():
+                    dst_ds[chunk_slice] = src_ds[chunk_slice]
+
+
+def _write_deferred(dest_path, variables, threads=None):
+    """
+    Write the values of variables that have changed, compressing their
+    chunks in parallel.
+
+    :param str dest_path: The file to write to.
+    :param list variables: (path, existing name, new name, transform)
+        tuples, where the values are read from the variable called
+        `existing name` in the file `path`.
+    :param int threads: The number of compression threads.
+    """
+    with h5py.File(dest_path, 'r+') as dst:
+        for path, old_name, new_name, transform in variables:
+            with traced_open(netCDF4.Dataset, path) as src:
+                src.set_auto_maskandscale(False)
+                old_var = src.variables[old_name]
+                fill_value = _fill_value(old_var)
+                dst_ds = dst[new_name]
+                if dst_ds.shape != old_var.shape:
+                    dst_ds.resize(old_var.shape)
+
+                def read_values(selection):
+                    """ Read and transform part of the existing variable """
+                    return _transform_values(old_var[selection], transform,
+                                             fill_value)
+
+                write_compressed(dst_ds, read_values, threads)
+
+
+def filter_pipeline(h5_dataset):
+    """
+    Return the HDF5 filters applied to a dataset's chunks.
+
+    :param h5py.Dataset h5_dataset: The dataset.
+    :returns: (filter id, client data values) for each filter in order.
+    :rtype: list
+    """
+    plist = h5_dataset.id.get_create_plist()
+    pipeline = []
+    for index in range(plist.get_nfilters()):
+        code, _flags, values, _name = plist.get_filter(index)
+        pipeline.append((code, tuple(values)))
+    return pipeline
@@ -0,0 +1,294 @@
+"""
+orchestrator.py
+
+Fix many files at the same time in a single process. Most of the time
+taken to fix a file is spent waiting for ncatted, ncks and the other
+external tools, which need very little of the Python process, and so one
+process can keep many of them running without the memory of a process for
+each file.
+
+Each file is fixed on its own thread, so that its fixes are applied in
+order, but only one thread runs Python code at a time. A thread gives up
+its turn while it waits for an external command, which is run by
+asyncio.create_subprocess_exec() on the event loop, and while it runs a
+block of code marked by pre_proc.common.blocking(), such as copying the
+file to a temporary directory. This is the same
+cooperative scheduling as asyncio's without having to rewrite the fixes as
+coroutines, and it means that netCDF4, which isn't thread-safe, is never
+used by two threads at once. The number of commands running at once is
+limited, and so is the number of commands and blocking copies running on
+the files on each filesystem.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+import logging
+import os
+import shlex
+import threading
+
+from pre_proc.common import set_blocking_handler, set_command_runner
+
+logger = logging.getLogger(__name__)
+
+# The maximum number of external commands running at once
+DEFAULT_MAX_PROCESSES = 8
+
+# The maximum number of external commands running at once on the files on
+# each filesystem
+DEFAULT_MAX_IO_PER_FILESYSTEM = 4
+
+# The maximum number of files being fixed at once, which must be more than
+# the number of commands so that there's always a file ready to run the
+# next command
+DEFAULT_MAX_FILES = 32
+
+# Characters that mean that a command must be run by the shell
+SHELL_OPERATORS = set('|&;<>()')
+SHELL_EXPANSIONS = set('$`*?[~')
+
+
+def command_arguments(command):
+    """
+    Split a command into the arguments for create_subprocess_exec().
+
+    :param str command: The command as it would be passed to the shell.
+    :returns: The arguments or None if the command uses the shell's
+        operators, variables or wildcards and so must be run by the shell.
+    :rtype: list
+    """
+    if SHELL_EXPANSIONS & set(command):
+        return None
+    # Operators outside quotes are returned as tokens of their own
+    for token in shlex.shlex(command, posix=True, punctuation_chars=True):
+        if set(token) <= SHELL_OPERATORS:
+            return None
+    return shlex.split(command)
+
+
+class AsyncOrchestrator(object):
+    """
+    Fix many files concurrently, running their external commands on an
+    asyncio event loop.
+    """
+    def __init__(self, max_processes=DEFAULT_MAX_PROCESSES,
+                 max_io_per_filesystem=DEFAULT_MAX_IO_PER_FILESYSTEM,
+                 max_files=DEFAULT_MAX_FILES):
+        """
+        Initialise the class
+
+        :param int max_processes: The maximum number of external commands
+            running at once.
+        :param int max_io_per_filesystem: The maximum number of external
+            commands running at once on the files on each filesystem.
+        :param int max_files: The maximum number of files being fixed at
+            once.
+        """
+        self.max_processes = max_processes
+        self.max_io_per_filesystem = max_io_per_filesystem
+        self.max_files = max_files
+        # The most commands that were running at once, in total and on any
+        # one filesystem
+        self.peak_processes = 0
+        self.peak_filesystem_processes = 0
+        self._turn = None
+        self._processes = None
+        self._filesystems = None
+        self._running = None
+
+    def run(self, function, filepaths):
+        """
+        Call a function for each file on its own thread, with the commands
+        that it runs with pre_proc.common.run_command() run on the event
+        loop.
+
+        :param function function: The function that fixes a file, which is
+            called with the file's full path.
+        :param list filepaths: The full paths of the files.
+        :returns: The value returned by the function for each file, or the
+            exception that it raised, in the same order as the files.
+        :rtype: list
+        """
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            return loop.run_until_complete(self._run(loop, function,
+                                                     filepaths))
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+    async def _run(self, loop, function, filepaths):
+        """
+        Fix the files on a pool of threads.
+
+        :param asyncio.AbstractEventLoop loop: The event loop.
+        :param function function: The function that fixes a file.
+        :param list filepaths: The full paths of the files.
+        :returns: The function's return value or exception for each file.
+        :rtype: list
+        """
+        self._turn = threading.Lock()
+        # The semaphores are created here so that they use this loop
+        self._processes = asyncio.Semaphore(self.max_processes)
+        self._filesystems = {}
+        self._running = {}
+        executor = ThreadPoolExecutor(self.max_files)
+        try:
+            return await asyncio.gather(
+                *[loop.run_in_executor(executor, self._fix_file, loop,
+                                       function, filepath)
+                  for filepath in filepaths],
+                return_exceptions=True
+            )
+        finally:
+            executor.shutdown()
+
+    def _fix_file(self, loop, function, filepath):
+        """
+        Fix a file on one of the pool's threads, taking a turn to run Python
+        code.
+
+        :param asyncio.AbstractEventLoop loop: The event loop.
+        :param function function: The function that fixes a file.
+        :param str filepath: The file's full path.
+        :returns: The function's return value.
+        """
+        filesystem = _filesystem(filepath)
+        set_command_runner(partial(self._wait_for_command, loop,
+                                   filesystem))
+        set_blocking_handler(partial(self._blocking, loop))
+        try:
+            with self._turn:
+                return function(filepath)
+        finally:
+            set_command_runner(None)
+            set_blocking_handler(None)
+
+    @contextmanager
+    def _blocking(self, loop, path=None):
+        """
+        Run a block of code without holding the turn, so that other files
+        can be fixed in the meantime. If the block uses a file then it waits
+        for room to run on the file's filesystem first.
+
+        :param asyncio.AbstractEventLoop loop: The event loop.
+        :param str path: The full path of a file used by the block or None.
+        """
+        self._turn.release()
+        try:
+            if path is None:
+                yield
+                return
+            filesystem = _filesystem(path)
+            asyncio.run_coroutine_threadsafe(
+                self._acquire_filesystem(filesystem), loop
+            ).result()
+            try:
+                yield
+            finally:
+                loop.call_soon_threadsafe(
+                    self._filesystems[filesystem].release
+                )
+        finally:
+            self._turn.acquire()
+
+    def _wait_for_command(self, loop, filesystem, command):
+        """
+        Run a command on the event loop and wait for it without holding the
+        turn, so that other files can be fixed in the meantime.
+
+        :param asyncio.AbstractEventLoop loop: The event loop.
+        :param int filesystem: The device of the file being fixed.
+        :param str command: The command.
+        :returns: The command's output as a list of strings.
+        :rtype: list
+        :raises RuntimeError: If the command did not complete successfully.
+        """
+        self._turn.release()
+        try:
+            return asyncio.run_coroutine_threadsafe(
+                self._run_command(command, filesystem), loop
+            ).result()
+        finally:
+            self._turn.acquire()
+
+    async def _run_command(self, command, filesystem):
+        """
+        Run a command once there's room for it to run on its file's
+        filesystem and in total.
+
+        :param str command: The command.
+        :param int filesystem: The device of the file being fixed.
+        :returns: The command's output as a list of strings.
+        :rtype: list
+        :raises RuntimeError: If the command did not complete successfully.
+        """
+        async with self._filesystem_semaphore(filesystem):
+            async with self._processes:
+                self._running[filesystem] += 1
+                self.peak_processes = max(self.peak_processes,
+                                          sum(self._running.values()))
+                self.peak_filesystem_processes = max(
+                    self.peak_filesystem_processes, self._running[filesystem]
+                )
+                try:
+                    arguments = command_arguments(command)
+                    if arguments is None:
+                        process = await asyncio.create_subprocess_shell(
+                            command, stdout=asyncio.subprocess.PIPE,
+                            stderr=asyncio.subprocess.STDOUT
+                        )
+                    else:
+                        process = await asyncio.create_subprocess_exec(
+                            *arguments, stdout=asyncio.subprocess.PIPE,
+                            stderr=asyncio.subprocess.STDOUT
+                        )
+                    output, _stderr = await process.communicate()
+                finally:
+                    self._running[filesystem] -= 1
+
+        if process.returncode:
+            msg = ('Command did not complete sucessfully.\ncommmand:\n{}\n'
+                   'produced error:\n{}'.format(command, output))
+            logger.warning(msg)
+            raise RuntimeError(msg)
+        return output.decode(errors='replace').rstrip().split('\n')
+
+    async def _acquire_filesystem(self, filesystem):
+        """
+        Wait for room to run on a filesystem.
+
+        :param int filesystem: The filesystem's device.
+        """
+        await self._filesystem_semaphore(filesystem).acquire()
+
+    def _filesystem_semaphore(self, filesystem):
+        """
+        Return the semaphore that limits the commands and blocking code
+        running on the files on a filesystem. This must be called on the
+        event loop's thread.
+
+        :param int filesystem: The filesystem's device.
+        :returns: The semaphore.
+        :rtype: asyncio.Semaphore
+        """
+        if filesystem not in self._filesystems:
+            self._filesystems[filesystem] = asyncio.Semaphore(
+                self.max_io_per_filesystem
+            )
+            self._running[filesystem] = 0
+        return self._filesystems[filesystem]
+
+
+def _filesystem(path):
+    """
+    Return the device of the filesystem that a file is on, from its
+    directory so that the file doesn't need to exist yet.
+
+    :param str path: The file's full path.
+    :returns: The device.
+    :rtype: int
+    """
+    return os.stat(os.path.dirname(path) or '.').st_dev
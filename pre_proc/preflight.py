@@ -0,0 +1,259 @@
+"""
+preflight.py
+
+Check the preconditions of the fixes for many files before any of them are
+fixed, so that a fix that would fail, for example because a rule applies
+it to the wrong files, is found before any data is rewritten. Only each
+file's header and the first values of its one dimensional variables are
+read and the files are checked on several processes, because netCDF4
+isn't thread-safe.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import logging
+import os
+
+from netCDF4 import Dataset
+
+from pre_proc.exceptions import CannotLoadSourceFileError, PreProcError
+from pre_proc.file_fix import get_fix_class
+
+logger = logging.getLogger(__name__)
+
+# The number of values read from the start of each one dimensional variable
+LEADING_VALUES = 2
+
+# The number of files sent to a process at a time
+CHUNK_SIZE = 16
+
+
+class FileHeader(object):
+    """
+    The metadata of a netCDF file that the fixes' preconditions are checked
+    against.
+    """
+    def __init__(self, filename, global_attributes=None,
+                 variable_attributes=None, dimensions=None,
+                 variable_values=None, variable_kinds=None):
+        """
+        Initialise the class
+
+        :param str filename: The basename of the file.
+        :param dict global_attributes: The global attributes.
+        :param dict variable_attributes: The attributes of each variable.
+        :param dict dimensions: The size of each dimension.
+        :param dict variable_values: The first values of each one
+            dimensional variable.
+        :param dict variable_kinds: The numpy dtype kind of each variable,
+            for example i for an integer.
+        """
+        self.filename = filename
+        self.global_attributes = global_attributes or {}
+        self.variable_attributes = variable_attributes or {}
+        self.dimensions = dimensions or {}
+        self.variable_values = variable_values or {}
+        self.variable_kinds = variable_kinds or {}
+
+    @classmethod
+    def from_file(cls, filepath):
+        """
+        Read the header of a file.
+
+        :param str filepath: The file's full path.
+        :returns: The header.
+        :rtype: FileHeader
+        :raises pre_proc.exceptions.CannotLoadSourceFileError: If the file
+            can't be read.
+        """
+        try:
+            with Dataset(filepath) as rootgrp:
+                rootgrp.set_auto_mask(False)
+                global_attributes = {name: rootgrp.getncattr(name)
+                                     for name in rootgrp.ncattrs()}
+                dimensions = {name: len(dim)
+                              for name, dim in rootgrp.dimensions.items()}
+                variable_attributes = {}
+                variable_values = {}
+                variable_kinds = {}
+                for name, var in rootgrp.variables.items():
+                    variable_kinds[name] = getattr(var.dtype, 'kind', None)
+                    variable_attributes[name] = {
+                        attr_name: var.getncattr(attr_name)
+                        for attr_name in var.ncattrs()
+                    }
+                    if var.ndim == 1:
+                        variable_values[name] = (
+                            var[:LEADING_VALUES].tolist()
+                        )
+        except (OSError, RuntimeError):
+            raise CannotLoadSourceFileError(filepath)
+        return cls(os.path.basename(filepath), global_attributes,
+                   variable_attributes, dimensions, variable_values,
+                   variable_kinds)
+
+    def leading_values(self, name):
+        """
+        Return the first values of a one dimensional coordinate, which is
+        found by its standard name or its variable name, as Iris does.
+
+        :param str name: The coordinate's standard name or variable name.
+        :returns: The first values or an empty list if there's no such
+            coordinate.
+        :rtype: list
+        """
+        for var_name, attributes in self.variable_attributes.items():
+            if (attributes.get('standard_name') == name and
+                    var_name in self.variable_values):
+                return self.variable_values[var_name]
+        return self.variable_values.get(name, [])
+
+    def set_attribute(self, visibility, name, value):
+        """
+        Set an attribute, as a fix will set it in the file.
+
+        :param str visibility: global or the name of the attribute's
+            variable.
+        :param str name: The attribute's name.
+        :param value: The attribute's new value.
+        """
+        self._attributes(visibility)[name] = value
+
+    def delete_attribute(self, visibility, name):
+        """
+        Delete an attribute, as a fix will delete it from the file.
+
+        :param str visibility: global or the name of the attribute's
+            variable.
+        :param str name: The attribute's name.
+        """
+        self._attributes(visibility).pop(name, None)
+
+    def _attributes(self, visibility):
+        """
+        Return the global attributes or the attributes of a variable.
+
+        :param str visibility: global or the name of the variable.
+        :returns: The attributes.
+        :rtype: dict
+        """
+        if visibility == 'global':
+            return self.global_attributes
+        return self.variable_attributes.setdefault(visibility, {})
+
+
+def check_file(filepath, fix_names):
+    """
+    Check the preconditions of a file's fixes. Each fix is checked against
+    the header as the fixes before it will leave it. An unexpected error
+    from a fix is reported as a problem with that fix rather than stopping
+    the checks.
+
+    :param str filepath: The file's full path.
+    :param list fix_names: The names of the fixes to apply to the file.
+    :returns: (fix name, error) tuples for the fixes that would fail.
+    :rtype: list
+    """
+    if not fix_names:
+        return []
+    try:
+        header = FileHeader.from_file(filepath)
+    except Exception as exc:
+        error = _describe_error(exc, filepath)
+        return [(fix_name, error) for fix_name in fix_names]
+    directory, filename = os.path.split(filepath)
+    problems = []
+    for fix_name in fix_names:
+        try:
+            fix = get_fix_class(fix_name)(filename, directory)
+            fix.check(header)
+            fix.update_header(header)
+        except Exception as exc:
+            problems.append((fix_name, _describe_error(exc, filepath,
+                                                       fix_name)))
+    return problems
+
+
+def _describe_error(exc, filepath, fix_name=None):
+    """
+    Describe an error found while checking a file. An error that isn't a
+    PreProcError is unexpected and so its class is included and its
+    traceback is logged.
+
+    :param Exception exc: The error.
+    :param str filepath: The file's full path.
+    :param str fix_name: The name of the fix being checked, or None if the
+        file's header was being read.
+    :returns: The description of the error.
+    :rtype: str
+    """
+    if isinstance(exc, PreProcError):
+        return str(exc)
+    logger.debug('Unexpected error checking {} for {}'.
+                 format(fix_name or 'the header', filepath), exc_info=True)
+    return '{}: {}'.format(type(exc).__name__, exc)
+
+
+def _check_file(args):
+    """
+    Check a file's fixes on one of the pool's processes.
+
+    :param tuple args: The file's full path and the names of its fixes.
+    :returns: The file's full path and its problems from check_file().
+    :rtype: tuple
+    """
+    filepath, fix_names = args
+    return filepath, check_file(filepath, fix_names)
+
+
+def preflight(datasets, processes=1):
+    """
+    Check the preconditions of the fixes of every file in some datasets.
+
+    :param list datasets: The datasets, whose fixes have been determined.
+    :param int processes: The number of processes to check the files on.
+    :returns: The (fix name, error) tuples for each file with fixes that
+        would fail.
+    :rtype: dict
+    """
+    files = [(filepath, dataset.fix_names) for dataset in datasets
+             for filepath in dataset.filepaths]
+    if processes > 1:
+        with ProcessPoolExecutor(processes) as executor:
+            results = list(executor.map(_check_file, files,
+                                        chunksize=CHUNK_SIZE))
+    else:
+        results = [_check_file(args) for args in files]
+    return {filepath: problems for filepath, problems in results
+            if problems}
+
+
+def problems_by_fix(problems):
+    """
+    Group the problems found by preflight() by fix.
+
+    :param dict problems: The problems for each file from preflight().
+    :returns: (full path, error) tuples for each fix that would fail, in
+        name order.
+    :rtype: dict
+    """
+    by_fix = {}
+    for filepath in sorted(problems):
+        for fix_name, error in problems[filepath]:
+            by_fix.setdefault(fix_name, []).append((filepath, error))
+    return {fix_name: by_fix[fix_name] for fix_name in sorted(by_fix)}
+
+
+def log_problems(problems, examples=3):
+    """
+    Log a summary of the problems found, with an example of the error for
+    each fix.
+
+    :param dict problems: The problems for each file from preflight().
+    :param int examples: The number of files to list for each fix or None
+        to list all of them.
+    """
+    for fix_name, failures in problems_by_fix(problems).items():
+        logger.error('{} would fail on {} files, for example {}: {}'.format(
+            fix_name, len(failures), failures[0][0], failures[0][1]
+        ))
+        for filepath, _error in failures[1:examples]:
+            logger.error('    {}'.format(filepath))
@@ -0,0 +1,258 @@
+"""
+results.py
+
+The outcome of fixing each file, which is recorded by the workers so that
+questions such as which files failed a fix or which files were the slowest
+can be answered without searching the logs. The results are stored in the
+database by pre_proc_app.results.ResultRecorder. The processes of a pool
+send their results in batches to a single process with a QueuedRecorder.
+"""
+import os
+import queue
+import time
+
+# The outcomes of fixing a file
+DONE = 'done'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+# The number of results to hold in memory before writing or sending them
+DEFAULT_BATCH_SIZE = 500
+
+# The maximum seconds to hold a result in memory before writing or sending
+# it
+DEFAULT_FLUSH_INTERVAL = 30.
+
+
+def file_size(filepath):
+    """
+    Return the size of a file.
+
+    :param str filepath: The file's full path.
+    :returns: The size in bytes or None if the file doesn't exist.
+    :rtype: int
+    """
+    try:
+        return os.path.getsize(filepath)
+    except OSError:
+        return None
+
+
+class FileResult(object):
+    """
+    The outcome of fixing a single file.
+    """
+    def __init__(self, filepath, dataset, fix_names=None, worker=''):
+        """
+        Initialise the class, starting the timer and recording the file's
+        size before it's fixed.
+
+        :param str filepath: The file's full path.
+        :param str dataset: The dataset's directory and name from
+            pre_proc.dataset.dataset_key() joined as a path.
+        :param list fix_names: The names of the fixes applied to the file.
+        :param str worker: The name of the worker fixing the file.
+        """
+        self.filepath = filepath
+        self.dataset = dataset
+        self.fix_names = list(fix_names or [])
+        self.worker = worker
+        self.status = None
+        # The fix that was running when the file couldn't be fixed, which
+        # is the first of the fixes if several were applied together
+        self.failed_fix = None
+        # The names of the fixes that were applied together when the file
+        # couldn't be fixed, or None
+        self.failed_batch = None
+        self.error_class = None
+        self.error = None
+        # The seconds taken by each fix that was completed
+        self.fix_durations = {}
+        self.started = time.time()
+        self.finished = None
+        self.bytes_in = file_size(filepath)
+        self.bytes_out = None
+
+    def __repr__(self):
+        return '<FileResult {} {}>'.format(self.filepath, self.status)
+
+    @property
+    def duration(self):
+        """
+        The seconds taken to fix the file.
+
+        :returns: The seconds or None if the file hasn't been finished.
+        :rtype: float
+        """
+        if self.finished is None:
+            return None
+        return self.finished - self.started
+
+    def finish(self, error=None, status=None):
+        """
+        Stop the timer and record the outcome and the file's size after it
+        was fixed.
+
+        :param error: The exception raised, or a message, if the file
+            couldn't be fixed or None if it was fixed.
+        :param str status: The outcome. If None then this is FAILED if there
+            was an error and DONE if there wasn't.
+        :returns: This result.
+        :rtype: FileResult
+        """
+        self.finished = time.time()
+        if error is None:
+            self.status = status or DONE
+            self.bytes_out = file_size(self.filepath)
+        else:
+            self.status = status or FAILED
+            if isinstance(error, Exception):
+                self.error_class = type(error).__name__
+            self.error = str(error)
+        return self
+
+
+class QueuedRecorder(object):
+    """
+    Send results in batches through a queue to another process, in place of
+    a pre_proc_app.results.ResultRecorder in the processes of a pool. The
+    class can be pickled and so it can be passed to the pool's processes.
+    """
+    def __init__(self, result_queue, batch_size=DEFAULT_BATCH_SIZE,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL):
+        """
+        Initialise the class
+
+        :param result_queue: The queue that the other process reads from,
+            which is a multiprocessing.Manager's queue.
+        :param int batch_size: The number of results to hold before sending
+            them.
+        :param float flush_interval: The seconds after the last batch was
+            sent that the results held are sent.
+        """
+        self.result_queue = result_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pending = []
+        self.last_flush = time.time()
+
+    def add(self, result):
+        """
+        Queue a result, sending the queued results once there are enough of
+        them or they've been held for long enough.
+
+        :param FileResult result: The finished result.
+        """
+        self.pending.append(result)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+        else:
+            self.flush_if_due()
+
+    def flush_if_due(self):
+        """
+        Send any queued results if the flush interval has passed since the
+        last batch was sent.
+
+        :returns: The number of results sent.
+        :rtype: int
+        """
+        if time.time() - self.last_flush >= self.flush_interval:
+            return self.flush()
+        return 0
+
+    def flush(self):
+        """
+        Send any queued results to the writer.
+
+        :returns: The number of results sent.
+        :rtype: int
+        """
+        self.last_flush = time.time()
+        if not self.pending:
+            return 0
+        results = self.pending
+        self.pending = []
+        self.result_queue.put(results)
+        return len(results)
+
+
+class RecorderGroup(object):
+    """
+    Pass each result to several recorders, for example to record it in the
+    results database and to update the metrics.
+    """
+    def __init__(self, recorders):
+        """
+        Initialise the class
+
+        :param list recorders: The recorders, which have add(), flush() and
+            flush_if_due() methods.
+        """
+        self.recorders = list(recorders)
+
+    def add(self, result):
+        """
+        Add a result to every recorder.
+
+        :param FileResult result: The finished result.
+        """
+        for recorder in self.recorders:
+            recorder.add(result)
+
+    def flush(self):
+        """
+        Flush every recorder.
+
+        :returns: The total number of results flushed.
+        :rtype: int
+        """
+        return sum(recorder.flush() for recorder in self.recorders)
+
+    def flush_if_due(self):
+        """
+        Flush every recorder whose results are due to be flushed.
+
+        :returns: The total number of results flushed.
+        :rtype: int
+        """
+        return sum(recorder.flush_if_due() for recorder in self.recorders)
+
+
+def combine_recorders(*recorders):
+    """
+    Combine the recorders that are being used.
+
+    :param recorders: The recorders, any of which can be None.
+    :returns: None if there are no recorders, the recorder if there is one
+        or a RecorderGroup.
+    """
+    recorders = [recorder for recorder in recorders if recorder is not None]
+    if not recorders:
+        return None
+    if len(recorders) == 1:
+        return recorders[0]
+    return RecorderGroup(recorders)
+
+
+def drain_results(result_queue, recorder, timeout=DEFAULT_FLUSH_INTERVAL):
+    """
+    Add the batches of results sent by QueuedRecorder objects to a recorder
+    until None is received.
+
+    :param result_queue: The queue of lists of results.
+    :param recorder: The recorder to add the results to, which has add()
+        and flush_if_due() methods.
+    :param float timeout: The seconds to wait for a batch before checking
+        whether the recorder's results are due to be flushed.
+    """
+    while True:
+        try:
+            results = result_queue.get(timeout=timeout)
+        except queue.Empty:
+            recorder.flush_if_due()
+            continue
+        if results is None:
+            break
+        for result in results:
+            recorder.add(result)
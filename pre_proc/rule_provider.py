@@ -0,0 +1,266 @@
+"""
+rule_provider.py
+
+Providers of the names of the fixes to apply to each ESGF submission. The
+fixes can be read from the pre-proc database, which requires Django, or
+from a compiled rules artefact exported from the database, which can be
+loaded without Django in a small fraction of the time.
+
+The artefact is a pickled dictionary containing its format version, the
+SHA-256 hash of its payload and the payload itself. The payload is a
+pickled dictionary mapping each data request's (source_id, experiment_id,
+variant_label, table_id, cmor_name) key to the sorted names of its fixes
+and mapping the same key with the cmor_name's numeric suffix removed to
+the full cmor_names that share it.
+"""
+from functools import lru_cache
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+
+from pre_proc.exceptions import (DataRequestNotFound,
+                                 MultipleDataRequestsFound,
+                                 RulesArtefactError)
+
+logger = logging.getLogger(__name__)
+
+# The version of the artefact's format, which must be incremented if the
+# payload's structure changes
+ARTEFACT_VERSION = 1
+
+# The environment variable that specifies the rules artefact to use. If it
+# isn't set then the fixes are read from the database.
+RULES_ARTEFACT_ENV_VAR = 'PRE_PROC_RULES_ARTEFACT'
+
+
+class RuleProvider(object):
+    """
+    The base class for providers of the fixes for each submission.
+    """
+    def get_fix_names(self, submission):
+        """
+        Return the names of the fixes to apply to a submission.
+
+        :param pre_proc.EsgfSubmission submission: The submission.
+        :returns: The names of the fixes in name order.
+        :rtype: list
+        :raises pre_proc.exceptions.DataRequestNotFound: If no data request
+            matches the submission.
+        :raises pre_proc.exceptions.MultipleDataRequestsFound: If several
+            data requests match the submission.
+        """
+        raise NotImplementedError()
+
+
+class DatabaseRuleProvider(RuleProvider):
+    """
+    Read the fixes from the pre-proc database. Django is set up when the
+    provider is created if it hasn't been already.
+    """
+    def __init__(self):
+        """
+        Initialise the class
+        """
+        import django
+        from django.apps import apps
+        if not apps.ready:
+            django.setup()
+
+    def get_fix_names(self, submission):
+        return list(self._get_data_request(submission).fixes.
+                    order_by('name').values_list('name', flat=True))
+
+    @staticmethod
+    def _get_data_request(submission):
+        """
+        Return the DataRequest object from the database that corresponds to
+        the ESGF submission.
+
+        :param pre_proc.EsgfSubmission submission: The submission.
+        :returns: the data request object corresponding to the submission
+        :rtype: pre_proc_app.models.DataRequest
+        """
+        import django.core.exceptions
+        from pre_proc_app.models import DataRequest
+
+        try:
+            dreq = DataRequest.objects.get(
+                source_id__name=submission.source_id,
+                experiment_id__name=submission.experiment_id,
+                variant_label=submission.variant_label,
+                table_id=submission.table_id,
+                cmor_name=submission.cmor_name
+            )
+        except django.core.exceptions.ObjectDoesNotExist:
+            # The file's variable may not have the data request's numeric
+            # suffix, e.g. ta for ta27
+            try:
+                dreq = DataRequest.objects.get(
+                    source_id__name=submission.source_id,
+                    experiment_id__name=submission.experiment_id,
+                    variant_label=submission.variant_label,
+                    table_id=submission.table_id,
+                    cmor_name_base=submission.cmor_name
+                )
+            except django.core.exceptions.ObjectDoesNotExist:
+                raise DataRequestNotFound(submission.directory,
+                                          submission.filename)
+            except django.core.exceptions.MultipleObjectsReturned:
+                raise MultipleDataRequestsFound(submission.directory,
+                                                submission.filename)
+
+        return dreq
+
+
+class ArtefactRuleProvider(RuleProvider):
+    """
+    Read the fixes from a compiled rules artefact.
+    """
+    def __init__(self, path):
+        """
+        Initialise the class
+
+        :param str path: The full path of the artefact.
+        :raises pre_proc.exceptions.RulesArtefactError: If the artefact is
+            invalid.
+        """
+        self.path = path
+        artefact = load_artefact(path)
+        self.sha256 = artefact['sha256']
+        self.fixes = artefact['fixes']
+        self.suffixes = artefact['suffixes']
+
+    def get_fix_names(self, submission):
+        key = (submission.source_id, submission.experiment_id,
+               submission.variant_label, submission.table_id,
+               submission.cmor_name)
+        if key in self.fixes:
+            return list(self.fixes[key])
+        cmor_names = self.suffixes.get(key, [])
+        if not cmor_names:
+            raise DataRequestNotFound(submission.directory,
+                                      submission.filename)
+        elif len(cmor_names) > 1:
+            raise MultipleDataRequestsFound(submission.directory,
+                                            submission.filename)
+        return list(self.fixes[key[:4] + (cmor_names[0],)])
+
+
+def get_rule_provider():
+    """
+    Return the rule provider to use. The artefact specified by the
+    PRE_PROC_RULES_ARTEFACT environment variable is used if it's set and
+    otherwise the database is used. Providers are reused between calls.
+
+    :returns: The rule provider.
+    :rtype: RuleProvider
+    """
+    return _rule_provider(os.environ.get(RULES_ARTEFACT_ENV_VAR))
+
+
+@lru_cache()
+def _rule_provider(artefact_path):
+    """
+    Create a rule provider.
+
+    :param str artefact_path: The artefact's path or None to use the
+        database.
+    :returns: The rule provider.
+    :rtype: RuleProvider
+    """
+    if artefact_path:
+        provider = ArtefactRuleProvider(artefact_path)
+        logger.debug('Using rules artefact {} ({})'.
+                     format(artefact_path, provider.sha256))
+        return provider
+    return DatabaseRuleProvider()
+
+
+def build_payload(data_requests):
+    """
+    Build the artefact's payload from the data requests' fixes.
+
+    :param data_requests: (source_id, experiment_id, variant_label,
+        table_id, cmor_name, cmor_name_base, fix_names) tuples for every data
+        request.
+    :returns: The pickled payload, which is identical for identical data
+        requests and fixes.
+    :rtype: bytes
+    """
+    fixes = {}
+    suffixes = {}
+    # Sharing a single object for each distinct value lets pickle write it
+    # once, which makes the artefact much smaller and quicker to load
+    values = {}
+    # variant_label may be None
+    for row in sorted(data_requests,
+                      key=lambda row: [value or '' for value in row[:5]]):
+        fix_names = tuple(sorted(row[6]))
+        row = [values.setdefault(value, value) for value in row[:6]]
+        key = tuple(row[:5])
+        fixes[key] = values.setdefault(fix_names, fix_names)
+        if row[5] != row[4]:
+            suffixes.setdefault(key[:4] + (row[5],), []).append(row[4])
+    return pickle.dumps({'fixes': fixes, 'suffixes': suffixes},
+                        protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def write_artefact(path, data_requests):
+    """
+    Write a rules artefact. The file is written to a temporary file in the
+    same directory and then renamed so that jobs reading the artefact never
+    see a partial file.
+
+    :param str path: The full path of the artefact to write.
+    :param data_requests: The data requests and their fixes as described in
+        build_payload().
+    :returns: The SHA-256 hash of the payload.
+    :rtype: str
+    """
+    payload = build_payload(data_requests)
+    sha256 = hashlib.sha256(payload).hexdigest()
+    artefact = {'version': ARTEFACT_VERSION, 'sha256': sha256,
+                'payload': payload}
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.',
+                                     prefix='.rules_artefact')
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            pickle.dump(artefact, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+    except Exception:
+        os.remove(temp_path)
+        raise
+    return sha256
+
+
+def load_artefact(path):
+    """
+    Load and check a rules artefact.
+
+    :param str path: The full path of the artefact.
+    :returns: The artefact's version, hash, fixes and suffixes.
+    :rtype: dict
+    :raises pre_proc.exceptions.RulesArtefactError: If the artefact's
+        version isn't supported or its payload doesn't match its hash.
+    """
+    try:
+        with open(path, 'rb') as fh:
+            artefact = pickle.load(fh)
+    except (IOError, pickle.UnpicklingError, EOFError) as exc:
+        raise RulesArtefactError(path, 'cannot be read: {}'.format(exc))
+    if artefact.get('version') != ARTEFACT_VERSION:
+        raise RulesArtefactError(path, 'has version {} but version {} is '
+                                       'required'.
+                                 format(artefact.get('version'),
+                                        ARTEFACT_VERSION))
+    if hashlib.sha256(artefact['payload']).hexdigest() != artefact['sha256']:
+        raise RulesArtefactError(path, 'does not match its hash')
+    payload = pickle.loads(artefact['payload'])
+    return {
+        'version': artefact['version'],
+        'sha256': artefact['sha256'],
+        'fixes': payload['fixes'],
+        'suffixes': payload['suffixes']
+    }
@@ -0,0 +1,251 @@
+"""
+scanner.py
+
+Find the files below a directory of data in the CMIP6 data reference
+syntax (DRS). The directories are read in parallel by a pool of threads,
+which hides the latency of each read on parallel filesystems such as GPFS,
+and directories whose DRS component isn't wanted (for example an
+unwanted table, variable or version) aren't read at all.
+
+An inventory of the directories read can be kept between scans. A
+directory's entries only change when its modification time does and so a
+directory whose modification time matches the inventory's is not read
+again. Each directory still has to be stat'ed on every scan, because
+changes below a directory don't change its modification time. The
+directories below the scanned directory that weren't seen during a scan,
+because they've been removed or filtered out, are dropped from the
+inventory so that it doesn't keep growing.
+"""
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import logging
+import os
+import pickle
+import tempfile
+import time
+
+logger = logging.getLogger(__name__)
+
+# The components of the CMIP6 DRS directory structure in order
+DRS_DIRECTORIES = ('mip_era', 'activity_id', 'institution_id', 'source_id',
+                   'experiment_id', 'member_id', 'table_id', 'variable_id',
+                   'grid_label', 'version')
+
+# The number of directories read at the same time
+DEFAULT_SCAN_THREADS = 8
+
+# The version of the inventory's format, which must be incremented if its
+# structure changes
+INVENTORY_VERSION = 1
+
+# A directory modified this soon before it was read may be changed again
+# without its modification time changing on filesystems with coarse
+# timestamps and so it's read again on the next scan
+RACY_NANOSECONDS = 2 * 10 ** 9
+
+
+class DirectoryScanner(object):
+    """
+    Find the files with a suffix below a directory, reading directories in
+    parallel and skipping unwanted DRS components.
+    """
+    def __init__(self, suffix='.nc', filters=None, drs_root='mip_era',
+                 threads=DEFAULT_SCAN_THREADS, inventory_path=None):
+        """
+        Initialise the class
+
+        :param str suffix: The suffix of the files of interest.
+        :param dict filters: The names of the directories to scan for each
+            DRS component, e.g. {'table_id': {'Amon', 'day'}}. Directories
+            for components that aren't in the filters are always scanned.
+        :param str drs_root: The DRS component of the directories in the
+            directory being scanned, e.g. 'table_id' when scanning a
+            member_id directory.
+        :param int threads: The number of directories to read at the same
+            time.
+        :param str inventory_path: The file that the inventory is kept in
+            between scans or None to read every directory.
+        :raises ValueError: If a DRS component isn't recognised.
+        """
+        self.suffix = suffix
+        self.filters = filters or {}
+        for component in list(self.filters) + [drs_root]:
+            if component not in DRS_DIRECTORIES:
+                raise ValueError('Unknown DRS component {}'.format(component))
+        self.root_level = DRS_DIRECTORIES.index(drs_root)
+        self.threads = threads
+        self.inventory_path = inventory_path
+        # The modification time in nanoseconds, the sub-directories and the
+        # files of each directory read, by the directory's path
+        self.inventory = {}
+        if inventory_path:
+            self.inventory = load_inventory(inventory_path)
+        self.directories_read = 0
+        self.directories_unchanged = 0
+
+    def scan(self, directory):
+        """
+        Find the files below a directory. The directories below it that
+        aren't seen are dropped from the inventory, which is then saved if
+        one is being kept.
+
+        :param str directory: The directory to scan.
+        :returns: The full paths of the files in name order.
+        :rtype: list
+        """
+        directory = os.path.abspath(directory)
+        filepaths = []
+        seen = set()
+        with ThreadPoolExecutor(self.threads) as executor:
+            # The index in DRS_DIRECTORIES of each directory's DRS component
+            pending = {
+                executor.submit(self._read_directory, directory):
+                    self.root_level - 1
+            }
+            while pending:
+                done, _not_done = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    level = pending.pop(future)
+                    try:
+                        path, mtime, subdirs, filenames = future.result()
+                    except FileNotFoundError:
+                        # A sub-directory removed since its parent was read
+                        if level < self.root_level:
+                            raise
+                        continue
+                    seen.add(path)
+                    if mtime is False:
+                        self.directories_unchanged += 1
+                    else:
+                        self.directories_read += 1
+                        self.inventory[path] = (mtime, subdirs, filenames)
+                    filepaths.extend(os.path.join(path, filename)
+                                     for filename in filenames
+                                     if filename.endswith(self.suffix))
+                    for subdir in subdirs:
+                        if self._wanted(subdir, level + 1):
+                            pending[executor.submit(
+                                self._read_directory,
+                                os.path.join(path, subdir)
+                            )] = level + 1
+        logger.debug('Found {} files below {}: {} directories read, {} '
+                     'unchanged'.format(len(filepaths), directory,
+                                        self.directories_read,
+                                        self.directories_unchanged))
+        self._prune(directory, seen)
+        if self.inventory_path:
+            save_inventory(self.inventory_path, self.inventory)
+        return sorted(filepaths)
+
+    def _prune(self, directory, seen):
+        """
+        Drop the directories at or below a scanned directory that weren't
+        seen during the scan from the inventory. The directories outside of
+        the scanned directory are kept for scans of other directories.
+
+        :param str directory: The full path of the scanned directory.
+        :param set seen: The full paths of the directories seen.
+        """
+        prefix = os.path.join(directory, '')
+        unseen = [path for path in self.inventory
+                  if (path == directory or path.startswith(prefix)) and
+                  path not in seen]
+        for path in unseen:
+            del self.inventory[path]
+        if unseen:
+            logger.debug('Dropped {} directories from the inventory'.
+                         format(len(unseen)))
+
+    def _wanted(self, name, level):
+        """
+        Check whether a directory should be scanned.
+
+        :param str name: The directory's name.
+        :param int level: The index in DRS_DIRECTORIES of the directory's
+            DRS component.
+        :returns: True if the directory should be scanned.
+        :rtype: bool
+        """
+        if level >= len(DRS_DIRECTORIES):
+            return True
+        names = self.filters.get(DRS_DIRECTORIES[level])
+        return names is None or name in names
+
+    def _read_directory(self, path):
+        """
+        Return a directory's sub-directories and files, from the inventory
+        if the directory hasn't been modified since it was last read. This
+        is run in the pool's threads and so doesn't change the scanner.
+
+        :param str path: The directory's full path.
+        :returns: The directory's path, its modification time in nanoseconds
+            (False if it was unchanged and None if it may change without
+            its modification time changing) and the sorted names of its
+            sub-directories and files.
+        :rtype: tuple
+        :raises FileNotFoundError: If the directory doesn't exist.
+        """
+        mtime = os.stat(path).st_mtime_ns
+        cached = self.inventory.get(path)
+        if cached is not None and cached[0] == mtime:
+            return path, False, cached[1], cached[2]
+        read_time = int(time.time() * 10 ** 9)
+        subdirs = []
+        filenames = []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                # is_dir() doesn't need a stat on most filesystems
+                if entry.is_dir():
+                    subdirs.append(entry.name)
+                else:
+                    filenames.append(entry.name)
+        if read_time - mtime < RACY_NANOSECONDS:
+            mtime = None
+        return path, mtime, sorted(subdirs), sorted(filenames)
+
+
+def load_inventory(path):
+    """
+    Load an inventory saved by save_inventory(). An inventory that doesn't
+    exist, can't be read or has a different version is ignored, as the
+    directories will just be read again.
+
+    :param str path: The inventory's full path.
+    :returns: The inventory.
+    :rtype: dict
+    """
+    try:
+        with open(path, 'rb') as fh:
+            saved = pickle.load(fh)
+    except FileNotFoundError:
+        return {}
+    except (IOError, pickle.UnpicklingError, EOFError) as exc:
+        logger.warning('Ignoring inventory {} that cannot be read: {}'.
+                       format(path, exc))
+        return {}
+    if saved.get('version') != INVENTORY_VERSION:
+        logger.warning('Ignoring inventory {} with version {}'.
+                       format(path, saved.get('version')))
+        return {}
+    return saved['directories']
+
+
+def save_inventory(path, inventory):
+    """
+    Save an inventory. The file is written to a temporary file in the same
+    directory and then renamed so that a scan that's interrupted never
+    leaves a partial inventory.
+
+    :param str path: The inventory's full path.
+    :param dict inventory: The inventory.
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.',
+                                     prefix='.inventory')
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            pickle.dump({'version': INVENTORY_VERSION,
+                         'directories': inventory}, fh,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+    except Exception:
+        os.remove(temp_path)
+        raise
@@ -0,0 +1,214 @@
+"""
+scratch.py
+
+Manage the scratch space used for the intermediate files that are generated
+by multi-stage fixes. Each source file's intermediate files are written to a
+private directory in the scratch directory, so that files with the same name
+from different directories can be fixed at once by several processes or
+jobs sharing the scratch directory.
+"""
+import logging
+import os
+import shutil
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+# The environment variable that specifies a fast local directory (or tmpfs)
+# to write intermediate files to. If it isn't set then intermediate files are
+# written beside the file being fixed.
+SCRATCH_DIR_ENV_VAR = 'PRE_PROC_SCRATCH_DIR'
+
+# Intermediate files are uncompressed and so can be several times larger than
+# the compressed source file. The scratch directory must have at least this
+# multiple of the source file's size free before it's used.
+DEFAULT_CAPACITY_FACTOR = 4.0
+
+
+class ScratchManager(object):
+    """
+    Place the intermediate files for a single source file in a scratch
+    directory and move the final artefact back over the source file.
+    """
+    def __init__(self, source_path, scratch_dir=None,
+                 capacity_factor=DEFAULT_CAPACITY_FACTOR):
+        """
+        Initialise the class
+
+        :param str source_path: The full path of the file being fixed.
+        :param str scratch_dir: The directory to write intermediate files to.
+            If None then the directory specified by the PRE_PROC_SCRATCH_DIR
+            environment variable is used and if this isn't set then the
+            source file's directory is used.
+        :param float capacity_factor: The multiple of the source file's size
+            that must be free in the scratch directory.
+        """
+        self.source_path = source_path
+        self.source_dir = os.path.dirname(source_path)
+        self.capacity_factor = capacity_factor
+        self.scratch_dir = self._choose_directory(scratch_dir)
+        # The directory in the scratch directory that only this source
+        # file's intermediate files are written to, which is created when
+        # it's first needed
+        self.private_dir = None
+        self.intermediate_files = []
+        # The number of bytes written to each intermediate file
+        self.intermediate_bytes = {}
+        # The size of the final artefact
+        self.final_bytes = 0
+
+    @property
+    def is_remote(self):
+        """
+        True if the scratch directory is on a different filesystem to the
+        source file.
+        """
+        if self.scratch_dir == self.source_dir:
+            return False
+        return (os.stat(self.scratch_dir).st_dev !=
+                os.stat(self.source_dir).st_dev)
+
+    def intermediate_path(self, suffix):
+        """
+        Return the path of a new intermediate file. The file is in a private
+        directory in the scratch directory or, if the intermediate files are
+        written beside the source file, any file left at this path from a
+        previous failed run is removed.
+
+        :param str suffix: The suffix to append to the source file's name.
+        :returns: The full path of the intermediate file.
+        :rtype: str
+        """
+        filename = os.path.basename(self.source_path) + suffix
+        if self.scratch_dir == self.source_dir:
+            path = os.path.join(self.source_dir, filename)
+            if os.path.exists(path):
+                os.remove(path)
+        else:
+            if self.private_dir is None:
+                self.private_dir = tempfile.mkdtemp(prefix='pre_proc_',
+                                                    dir=self.scratch_dir)
+            path = os.path.join(self.private_dir, filename)
+        self.intermediate_files.append(path)
+        return path
+
+    def move_back(self, final_path):
+        """
+        Replace the source file with the final artefact. This is a rename if
+        the scratch directory is on the same filesystem as the source file
+        and a single sequential copy otherwise. The remaining intermediate
+        files are then removed.
+
+        :param str final_path: The path of the final artefact, which must
+            have been created by `intermediate_path()`.
+        """
+        self.final_bytes = _file_size(final_path)
+        self.intermediate_files.remove(final_path)
+
+        if self.is_remote:
+            copy_path = self.source_path + '.temp_copy'
+            shutil.copyfile(final_path, copy_path)
+            os.remove(self.source_path)
+            os.rename(copy_path, self.source_path)
+            os.remove(final_path)
+        else:
+            os.remove(self.source_path)
+            os.rename(final_path, self.source_path)
+
+        self.remove_intermediates()
+        logger.debug(self.format_io_report())
+
+    def remove_intermediates(self):
+        """
+        Remove any intermediate files that still exist, recording their
+        size, and the private directory.
+        """
+        for path in self.intermediate_files:
+            if os.path.exists(path):
+                self.intermediate_bytes[path] = _file_size(path)
+                os.remove(path)
+        self.intermediate_files = []
+        if self.private_dir is not None:
+            shutil.rmtree(self.private_dir, ignore_errors=True)
+            self.private_dir = None
+
+    def io_report(self):
+        """
+        Calculate the volume of data written beside the source file, both
+        with the scratch directory and if all of the intermediate files had
+        been written beside the source file.
+
+        :returns: the number of bytes written to each location
+        :rtype: dict
+        """
+        intermediate = sum(self.intermediate_bytes.values())
+        before = intermediate + self.final_bytes
+        if self.is_remote:
+            after = self.final_bytes
+            scratch = intermediate + self.final_bytes
+        else:
+            after = before
+            scratch = 0
+        return {
+            'intermediate_bytes': intermediate,
+            'final_bytes': self.final_bytes,
+            'source_bytes_before': before,
+            'source_bytes_after': after,
+            'scratch_bytes': scratch
+        }
+
+    def format_io_report(self):
+        """
+        Return a one line summary of `io_report()`.
+
+        :returns: the summary
+        :rtype: str
+        """
+        report = self.io_report()
+        return ('I/O volume for {}: {} bytes written beside the source file '
+                'before, {} bytes after, {} bytes written to scratch {}'.
+                format(os.path.basename(self.source_path),
+                       report['source_bytes_before'],
+                       report['source_bytes_after'],
+                       report['scratch_bytes'], self.scratch_dir))
+
+    def _choose_directory(self, scratch_dir):
+        """
+        Choose the directory to write the intermediate files to. The source
+        file's directory is used if the scratch directory doesn't have enough
+        free space.
+
+        :param str scratch_dir: The requested scratch directory.
+        :returns: The directory to use.
+        :rtype: str
+        """
+        if scratch_dir is None:
+            scratch_dir = os.environ.get(SCRATCH_DIR_ENV_VAR)
+        if not scratch_dir:
+            return self.source_dir
+
+        os.makedirs(scratch_dir, exist_ok=True)
+        required = self.capacity_factor * _file_size(self.source_path)
+        available = shutil.disk_usage(scratch_dir).free
+        if available < required:
+            logger.warning('Only {} bytes free in scratch directory {} but {} '
+                           'required. Using {} instead.'.
+                           format(available, scratch_dir, int(required),
+                                  self.source_dir))
+            return self.source_dir
+
+        return scratch_dir
+
+
+def _file_size(path):
+    """
+    Return the size of `path` in bytes, or zero if it doesn't exist.
+
+    :param str path: The file's path
+    :returns: The file's size
+    :rtype: int
+    """
+    if os.path.exists(path):
+        return os.path.getsize(path)
+    else:
+        return 0
@@ -0,0 +1,235 @@
+"""
+shard.py
+
+Split the files to fix into shards that are each expected to take a
+similar time, so that each task of a batch array job can process one shard.
+The time taken to fix each file is predicted from its size and the fixes
+that will be applied to it, and the files are then assigned to the shards
+longest first, each to the shard with the least work so far.
+
+Each shard is written to a manifest, which is a text file listing the full
+path of one file on each line. Lines starting with # are comments.
+"""
+import heapq
+import json
+import logging
+import os
+
+from pre_proc.file_fix.registry import get_fix_info
+
+logger = logging.getLogger(__name__)
+
+# The predicted seconds taken to fix a file are the file's coefficients
+# plus the coefficients of each fix, which are looked up by the fix's name
+# and then by its kind. Each set of coefficients is a fixed number of
+# seconds plus a number of seconds for each GB of the file.
+DEFAULT_COEFFICIENTS = {
+    'file': {'seconds': 2.0, 'seconds_per_gb': 2.0},
+    'kinds': {
+        'attribute': {'seconds': 0.2, 'seconds_per_gb': 0.0},
+        'data': {'seconds': 5.0, 'seconds_per_gb': 60.0},
+    },
+    'fixes': {}
+}
+
+# The name of each shard's manifest in the manifest directory. The shards
+# are numbered from one.
+MANIFEST_FILENAME = 'shard_{:04d}.txt'
+
+# The environment variables that batch schedulers use for the index of a
+# task in an array job
+ARRAY_INDEX_ENV_VARS = ['SLURM_ARRAY_TASK_ID', 'LSB_JOBINDEX',
+                        'PBS_ARRAY_INDEX', 'SGE_TASK_ID']
+
+BYTES_PER_GB = 1024 ** 3
+
+
+class CostModel(object):
+    """
+    Predict the time taken to fix a file.
+    """
+    def __init__(self, coefficients=None):
+        """
+        Initialise the class
+
+        :param dict coefficients: Coefficients to use instead of the
+            defaults, which are structured like DEFAULT_COEFFICIENTS. Only
+            the coefficients that are specified are replaced.
+        """
+        self.file = dict(DEFAULT_COEFFICIENTS['file'])
+        self.kinds = {kind: dict(values) for kind, values in
+                      DEFAULT_COEFFICIENTS['kinds'].items()}
+        self.fixes = {}
+        coefficients = coefficients or {}
+        self.file.update(coefficients.get('file', {}))
+        for kind, values in coefficients.get('kinds', {}).items():
+            self.kinds.setdefault(kind, {}).update(values)
+        self.fixes.update(coefficients.get('fixes', {}))
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        Create a cost model from coefficients in a JSON file.
+
+        :param str path: The full path of the JSON file.
+        :returns: The cost model.
+        :rtype: CostModel
+        """
+        with open(path) as fh:
+            return cls(json.load(fh))
+
+    def predict(self, size, fix_names):
+        """
+        Predict the time taken to fix a file.
+
+        :param int size: The file's size in bytes.
+        :param list fix_names: The names of the fixes to apply.
+        :returns: The predicted time in seconds.
+        :rtype: float
+        :raises pre_proc.exceptions.UnknownFixError: If a fix isn't in the
+            index and has no coefficients of its own.
+        """
+        gigabytes = size / BYTES_PER_GB
+        seconds = self._seconds(self.file, gigabytes)
+        for fix_name in fix_names:
+            coefficients = self.fixes.get(fix_name)
+            if coefficients is None:
+                coefficients = self.kinds[get_fix_info(fix_name).kind]
+            seconds += self._seconds(coefficients, gigabytes)
+        return seconds
+
+    @staticmethod
+    def _seconds(coefficients, gigabytes):
+        """
+        Apply a set of coefficients to a file.
+
+        :param dict coefficients: The coefficients.
+        :param float gigabytes: The file's size in GB.
+        :returns: The predicted time in seconds.
+        :rtype: float
+        """
+        return (coefficients.get('seconds', 0.) +
+                coefficients.get('seconds_per_gb', 0.) * gigabytes)
+
+
+class Shard(object):
+    """
+    The files that a single task will fix.
+    """
+    def __init__(self, index):
+        """
+        Initialise the class
+
+        :param int index: The shard's number, starting from one.
+        """
+        self.index = index
+        self.filepaths = []
+        self.cost = 0.
+
+    def __repr__(self):
+        return '<Shard {} ({} files, {:.0f} s)>'.format(
+            self.index, len(self.filepaths), self.cost
+        )
+
+
+def plan_shards(costs, num_shards):
+    """
+    Split files into shards with similar total costs using the longest
+    processing time first heuristic: the files are sorted by decreasing
+    cost and each is added to the shard with the lowest total cost so far.
+    The total cost of the most expensive shard is at most 4/3 of the best
+    possible.
+
+    :param dict costs: The predicted cost of each file by its full path.
+    :param int num_shards: The number of shards.
+    :returns: The shards, whose files are in name order so that files
+        from the same dataset are together.
+    :rtype: list
+    :raises ValueError: If num_shards is less than one.
+    """
+    if num_shards < 1:
+        raise ValueError('The number of shards must be at least one')
+    shards = [Shard(index) for index in range(1, num_shards + 1)]
+    heap = [(0., index) for index in range(num_shards)]
+    for filepath in sorted(costs, key=lambda path: (-costs[path], path)):
+        _total, index = heapq.heappop(heap)
+        shards[index].filepaths.append(filepath)
+        shards[index].cost += costs[filepath]
+        heapq.heappush(heap, (shards[index].cost, index))
+    for shard in shards:
+        shard.filepaths.sort()
+    return shards
+
+
+def write_manifests(directory, shards):
+    """
+    Write a manifest for each shard.
+
+    :param str directory: The directory to write the manifests in, which is
+        created if it doesn't exist.
+    :param list shards: The shards.
+    :returns: The full paths of the manifests.
+    :rtype: list
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for shard in shards:
+        path = os.path.join(directory, MANIFEST_FILENAME.format(shard.index))
+        with open(path, 'w') as fh:
+            fh.write('# Shard {} of {}: {} files, predicted {:.0f} '
+                     'seconds\n'.format(shard.index, len(shards),
+                                        len(shard.filepaths), shard.cost))
+            for filepath in shard.filepaths:
+                fh.write(filepath + '\n')
+        paths.append(path)
+    return paths
+
+
+def read_manifest(path):
+    """
+    Read the files listed in a manifest.
+
+    :param str path: The manifest's full path.
+    :returns: The full paths of the files.
+    :rtype: list
+    """
+    with open(path) as fh:
+        return [line.strip() for line in fh
+                if line.strip() and not line.startswith('#')]
+
+
+def manifest_path(path, shard=None):
+    """
+    Return the path of the manifest to process. If `path` is a directory of
+    manifests written by write_manifests() then the manifest of the
+    specified shard is returned, or if no shard is specified then the shard
+    is the index of the current task in a batch array job.
+
+    :param str path: A manifest or a directory of manifests.
+    :param int shard: The number of the shard, starting from one.
+    :returns: The full path of the manifest.
+    :rtype: str
+    :raises ValueError: If no shard is specified and there is no array
+        index.
+    """
+    if not os.path.isdir(path):
+        return path
+    if shard is None:
+        shard = array_index()
+    return os.path.join(path, MANIFEST_FILENAME.format(shard))
+
+
+def array_index():
+    """
+    Return the index of the current task in a batch array job.
+
+    :returns: The index.
+    :rtype: int
+    :raises ValueError: If no array index is set in the environment.
+    """
+    for env_var in ARRAY_INDEX_ENV_VARS:
+        value = os.environ.get(env_var)
+        if value and value.isdigit():
+            return int(value)
+    raise ValueError('No shard specified and none of {} are set'.
+                     format(', '.join(ARRAY_INDEX_ENV_VARS)))
@@ -0,0 +1,106 @@
+"""
+test_chunk_writer.py
+
+Unit tests for pre_proc.chunk_writer
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import h5py
+import numpy as np
+
+from pre_proc.chunk_writer import (compression_threads, deflate_settings,
+                                   write_compressed,
+                                   COMPRESSION_THREADS_ENV_VAR)
+
+
+class ChunkWriterBaseTest(unittest.TestCase):
+    """ Create an HDF5 file in a temporary directory """
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.path = os.path.join(self.temp_dir, 'test.h5')
+        self.h5_file = h5py.File(self.path, 'w')
+        self.addCleanup(self.h5_file.close)
+        self.values = np.arange(7 * 5 * 6, dtype=np.float32).reshape(7, 5, 6)
+
+    def _create(self, name, **kwargs):
+        """ Create an empty dataset like self.values """
+        return self.h5_file.create_dataset(
+            name, self.values.shape, self.values.dtype, chunks=(2, 3, 4),
+            fillvalue=1.e20, **kwargs
+        )
+
+
+class TestCompressionThreads(unittest.TestCase):
+    """ Test pre_proc.chunk_writer.compression_threads """
+    def test_default(self):
+        """ Test that one thread is used by default """
+        with mock.patch.dict(os.environ):
+            os.environ.pop(COMPRESSION_THREADS_ENV_VAR, None)
+            self.assertEqual(compression_threads(), 1)
+
+    def test_env_var(self):
+        """ Test that the environment variable is used """
+        with mock.patch.dict(os.environ, {COMPRESSION_THREADS_ENV_VAR: '4'}):
+            self.assertEqual(compression_threads(), 4)
+
+
+class TestDeflateSettings(ChunkWriterBaseTest):
+    """ Test pre_proc.chunk_writer.deflate_settings """
+    def test_shuffle_deflate(self):
+        """ Test shuffle and deflate """
+        dataset = self._create('a', compression='gzip', compression_opts=3,
+                               shuffle=True)
+        self.assertEqual(deflate_settings(dataset), (3, True))
+
+    def test_deflate(self):
+        """ Test deflate only """
+        dataset = self._create('a', compression='gzip', compression_opts=1)
+        self.assertEqual(deflate_settings(dataset), (1, False))
+
+    def test_fletcher32(self):
+        """ Test that other filters aren't supported """
+        dataset = self._create('a', compression='gzip', fletcher32=True)
+        self.assertIsNone(deflate_settings(dataset))
+
+    def test_uncompressed(self):
+        """ Test that uncompressed datasets aren't supported """
+        self.assertIsNone(deflate_settings(self._create('a')))
+
+
+class TestWriteCompressed(ChunkWriterBaseTest):
+    """ Test pre_proc.chunk_writer.write_compressed """
+    def test_identical_to_hdf5(self):
+        """ Test that the chunks match those written by HDF5 itself """
+        for shuffle in (True, False):
+            name = 'shuffle' if shuffle else 'no_shuffle'
+            expected = self._create(name + '_hdf5', compression='gzip',
+                                    compression_opts=2, shuffle=shuffle)
+            expected[:] = self.values
+            actual = self._create(name, compression='gzip',
+                                  compression_opts=2, shuffle=shuffle)
+            write_compressed(actual, self.values.__getitem__, threads=3)
+            self.assertEqual(expected.id.get_num_chunks(),
+                             actual.id.get_num_chunks())
+            for index in range(expected.id.get_num_chunks()):
+                offset = expected.id.get_chunk_info(index).chunk_offset
+                self.assertEqual(expected.id.read_direct_chunk(offset),
+                                 actual.id.read_direct_chunk(offset))
+
+    def test_values(self):
+        """ Test that the values read back are correct """
+        dataset = self._create('a', compression='gzip', shuffle=True)
+        with mock.patch('pre_proc.chunk_writer.BATCH_BYTES', 100):
+            write_compressed(dataset, self.values.__getitem__, threads=2)
+        np.testing.assert_array_equal(dataset[:], self.values)
+
+    def test_unsupported(self):
+        """ Test that an exception is raised for other filters """
+        dataset = self._create('a', compression='lzf')
+        self.assertRaisesRegex(ValueError, 'Dataset /a is not compressed',
+                               write_compressed, dataset,
+                               self.values.__getitem__)
@@ -4,9 +4,13 @@ test_common.py
 Unit tests for pre_proc.common
 """
 from abc import ABCMeta, abstractmethod
+import os
+import shutil
+import tempfile
 import unittest
 
-from pre_proc.common import get_concrete_subclasses, to_int, to_float
+from pre_proc.common import (get_concrete_subclasses, ilist_files,
+                             list_files, to_int, to_float)
 
 
 class AbstractParent(object, metaclass=ABCMeta):
@@ -62,6 +66,30 @@ class TestGetConcreteSubclasses(unittest.TestCase):
                          get_concrete_subclasses(ConcreteChild))
 
 
+class TestListFiles(unittest.TestCase):
+    """ test pre_proc.common.list_files() and ilist_files() """
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        for path in ['a.nc', 'b.txt', 'sub/c.nc', 'sub/d.txt',
+                     'sub/sub/e.txt']:
+            path = os.path.join(self.temp_dir, path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            open(path, 'w').close()
+
+    def _expected(self, paths):
+        return sorted(os.path.join(self.temp_dir, path) for path in paths)
+
+    def test_list_files(self):
+        self.assertEqual(sorted(list_files(self.temp_dir)),
+                         self._expected(['a.nc', 'sub/c.nc']))
+
+    def test_ilist_files_suffix(self):
+        self.assertEqual(sorted(ilist_files(self.temp_dir, '.txt')),
+                         self._expected(['b.txt', 'sub/d.txt',
+                                         'sub/sub/e.txt']))
+
+
 class TestToFloat(unittest.TestCase):
     """ test pre_proc.common.to_float() """
     def test_string(self):
@@ -0,0 +1,99 @@
+"""
+test_dataset.py
+
+Unit tests for pre_proc.dataset
+"""
+import unittest
+from unittest import mock
+
+from pre_proc.dataset import dataset_key, group_by_dataset
+
+FILES = [
+    '/a/tas_Amon_Model_expt_r1i1p1f1_gn_195101-195112.nc',
+    '/a/tas_Amon_Model_expt_r1i1p1f1_gn_195001-195012.nc',
+    '/a/pr_Amon_Model_expt_r1i1p1f1_gn_195001-195012.nc',
+    '/b/tas_Amon_Model_expt_r1i1p1f1_gn_195001-195012.nc',
+    '/a/areacella_fx_Model_expt_r1i1p1f1_gn.nc',
+    '/a/1.nc'
+]
+
+
+class TestDatasetKey(unittest.TestCase):
+    """ Test dataset_key """
+    def test_time_range_removed(self):
+        """ Test that the time range isn't part of the key """
+        self.assertEqual(dataset_key(FILES[0]),
+                         ('/a', 'tas_Amon_Model_expt_r1i1p1f1_gn'))
+
+    def test_no_time_range(self):
+        """ Test a file without a time range """
+        self.assertEqual(dataset_key(FILES[4]),
+                         ('/a', 'areacella_fx_Model_expt_r1i1p1f1_gn'))
+
+    def test_other_name(self):
+        """ Test that other names are kept """
+        self.assertEqual(dataset_key(FILES[5]), ('/a', '1'))
+
+
+class TestGroupByDataset(unittest.TestCase):
+    """ Test group_by_dataset """
+    def test_groups(self):
+        """ Test that files are grouped and sorted """
+        datasets = group_by_dataset(FILES)
+        self.assertEqual([dataset.key for dataset in datasets], [
+            ('/a', '1'),
+            ('/a', 'areacella_fx_Model_expt_r1i1p1f1_gn'),
+            ('/a', 'pr_Amon_Model_expt_r1i1p1f1_gn'),
+            ('/a', 'tas_Amon_Model_expt_r1i1p1f1_gn'),
+            ('/b', 'tas_Amon_Model_expt_r1i1p1f1_gn')
+        ])
+        self.assertEqual(datasets[3].filepaths, [FILES[1], FILES[0]])
+
+    def test_empty(self):
+        """ Test no files """
+        self.assertEqual(group_by_dataset([]), [])
+
+
+class TestDatasetGroup(unittest.TestCase):
+    """ Test DatasetGroup """
+    def setUp(self):
+        self.dataset = group_by_dataset(FILES[:2])[0]
+        self.provider = mock.Mock()
+        self.provider.get_fix_names.return_value = ['ParentBranchTimeAdd',
+                                                    'LicenseAdd']
+
+    def test_resolve_fixes(self):
+        """ Test that the fixes are found from the first file """
+        self.assertEqual(self.dataset.resolve_fixes(self.provider),
+                         ['ParentBranchTimeAdd', 'LicenseAdd'])
+        submission = self.provider.get_fix_names.call_args[0][0]
+        self.assertEqual(submission.filename, FILES[1].split('/')[-1])
+        self.assertEqual(submission.variant_label, 'r1i1p1f1')
+
+    def test_fixes_shared(self):
+        """ Test that the fixes are only found once """
+        self.dataset.resolve_fixes(self.provider)
+        submissions = [self.dataset.create_submission(filepath)
+                       for filepath in self.dataset.filepaths]
+        self.provider.get_fix_names.assert_called_once()
+        for submission in submissions:
+            self.assertEqual([type(fix).__name__
+                              for fix in submission.fixes],
+                             ['ParentBranchTimeAdd', 'LicenseAdd'])
+            for fix in submission.fixes:
+                self.assertIs(fix.dataset_values, self.dataset.values)
+        self.assertEqual(submissions[1].fixes[0].filename,
+                         FILES[0].split('/')[-1])
+
+    @mock.patch('pre_proc.dataset.get_rule_provider')
+    def test_resolved_when_needed(self, mock_get_provider):
+        """ Test that the fixes are found when the first file is created """
+        mock_get_provider.return_value = self.provider
+        submission = self.dataset.create_submission(FILES[0])
+        self.assertEqual(len(submission.fixes), 2)
+        self.assertEqual(self.dataset.fix_names,
+                         ['ParentBranchTimeAdd', 'LicenseAdd'])
+
+
+if __name__ == '__main__':
+    unittest.main()
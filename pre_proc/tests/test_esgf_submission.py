@@ -8,7 +8,8 @@ import unittest
 from unittest import mock
 
 from pre_proc import EsgfSubmission
-from pre_proc.file_fix import ChildBranchTimeAdd
+from pre_proc.file_fix import (ChildBranchTimeAdd, ParentBranchTimeAdd,
+                               RealmOcean, ToDegC)
 
 
 class TestEsgfSubmission(unittest.TestCase):
@@ -53,3 +54,77 @@ class TestEsgfSubmission(unittest.TestCase):
         self.esgf.update_history()
         self.mock_get_attr.assert_not_called()
         self.mock_set_attr.assert_not_called()
+
+    @mock.patch.object(RealmOcean, 'apply_fix')
+    @mock.patch.object(ToDegC, 'apply_fix')
+    @mock.patch('pre_proc.file_fix.attribute_add.apply_attribute_fixes')
+    def test_attribute_fixes_grouped(self, mock_apply, mock_data_fix,
+                                     mock_fix):
+        """
+        Test that consecutive fixes from the attribute table are applied
+        together.
+        """
+        self.esgf.fixes = [
+            fix_class(self.esgf.filename, self.esgf.directory)
+            for fix_class in (ChildBranchTimeAdd, ParentBranchTimeAdd,
+                              ToDegC, RealmOcean)
+        ]
+        self.esgf.run_fixes()
+        mock_apply.assert_called_once_with(
+            'path', '/file', ['ChildBranchTimeAdd', 'ParentBranchTimeAdd'],
+            None
+        )
+        mock_data_fix.assert_called_once_with()
+        mock_fix.assert_called_once_with()
+
+    @mock.patch.object(RealmOcean, 'apply_fix')
+    @mock.patch.object(ToDegC, 'apply_fix')
+    def test_failed_fix(self, mock_data_fix, mock_fix):
+        """ Test that the fix that failed is recorded """
+        mock_data_fix.side_effect = ValueError()
+        self.esgf.fixes = [
+            fix_class(self.esgf.filename, self.esgf.directory)
+            for fix_class in (RealmOcean, ToDegC)
+        ]
+        self.assertRaises(ValueError, self.esgf.run_fixes)
+        self.assertEqual(self.esgf.failed_fix, 'ToDegC')
+        self.assertEqual(list(self.esgf.fix_durations), ['RealmOcean'])
+        mock_data_fix.side_effect = None
+        self.esgf.run_fixes()
+        self.assertIsNone(self.esgf.failed_fix)
+        self.assertEqual(list(self.esgf.fix_durations),
+                         ['RealmOcean', 'ToDegC'])
+
+    @mock.patch.object(ToDegC, 'apply_fix')
+    @mock.patch('pre_proc.file_fix.attribute_add.apply_attribute_fixes')
+    def test_failed_batch(self, mock_apply, mock_data_fix):
+        """
+        Test that a failure of fixes applied together records the first
+        fix and all of the fixes in the batch
+        """
+        mock_apply.side_effect = ValueError()
+        self.esgf.fixes = [
+            fix_class(self.esgf.filename, self.esgf.directory)
+            for fix_class in (ToDegC, ChildBranchTimeAdd, ParentBranchTimeAdd)
+        ]
+        self.assertRaises(ValueError, self.esgf.run_fixes)
+        self.assertEqual(self.esgf.failed_fix, 'ChildBranchTimeAdd')
+        self.assertEqual(self.esgf.failed_batch,
+                         ['ChildBranchTimeAdd', 'ParentBranchTimeAdd'])
+        self.assertEqual(list(self.esgf.fix_durations), ['ToDegC'])
+        mock_apply.side_effect = None
+        self.esgf.run_fixes()
+        self.assertIsNone(self.esgf.failed_fix)
+        self.assertIsNone(self.esgf.failed_batch)
+        self.assertEqual(list(self.esgf.fix_durations),
+                         ['ToDegC', 'ChildBranchTimeAdd, ParentBranchTimeAdd'])
+
+    def test_create_fixes(self):
+        """ Test that the fixes are created with the dataset's values """
+        dataset_values = {}
+        self.esgf.create_fixes(['RealmOcean', 'ToDegC'], dataset_values)
+        self.assertEqual([type(fix) for fix in self.esgf.fixes],
+                         [RealmOcean, ToDegC])
+        for fix in self.esgf.fixes:
+            self.assertEqual(fix.filename, 'path')
+            self.assertIs(fix.dataset_values, dataset_values)
@@ -8,6 +8,11 @@ import unittest
 
 import mock
 
+from pre_proc.exceptions import UnknownFixError
+from pre_proc.file_fix import registry
+from pre_proc.file_fix.attribute_add import (ATTRIBUTE_ADD_FIXES,
+                                             TableAttributeAdd,
+                                             apply_attribute_fixes)
 from pre_proc.file_fix import (
     AirTemperatureNameAdd,
     ParentBranchTimeAdd,
@@ -1816,7 +1821,7 @@ class TestHfbasinpmdiffStandardNameAdd(BaseTest):
 
 class TestLicenseAdd(BaseTest):
     """ Test LicenseAdd """
-    @mock.patch('pre_proc.file_fix.attribute_add.Dataset')
+    @mock.patch('pre_proc.file_fix.attribute_add.netCDF4.Dataset')
     def test_subprocess_called_correctly(self, mock_dataset):
         """
         Test that an external call's been made correctly for
@@ -2844,7 +2849,7 @@ class TestWindSpeedStandardNameAdd(BaseTest):
 
 class TestZFurtherInfoUrl(BaseTest):
     """ Test ZFurtherInfoUrl """
-    @mock.patch('pre_proc.file_fix.attribute_add.Dataset')
+    @mock.patch('pre_proc.file_fix.attribute_add.netCDF4.Dataset')
     def test_subprocess_called_correctly(self, mock_dataset):
         """
         Test that an external call's been made correctly for
@@ -2889,5 +2894,103 @@ class TestZZZThetapv2StandardNameAdd(BaseTest):
         )
 
 
+class TestAttributeTable(unittest.TestCase):
+    """ Test the fixes defined in ATTRIBUTE_ADD_FIXES """
+    def test_unique_names(self):
+        """ Test that each fix is only defined once """
+        names = [spec.name for spec in ATTRIBUTE_ADD_FIXES]
+        self.assertEqual(len(names), len(set(names)))
+
+    def test_classes_created(self):
+        """ Test that a class is created for each row """
+        for spec in ATTRIBUTE_ADD_FIXES:
+            fix_class = registry.get_fix_class(spec.name)
+            self.assertTrue(issubclass(fix_class, TableAttributeAdd))
+            self.assertEqual(fix_class.__name__, spec.name)
+            self.assertIs(fix_class.spec, spec)
+
+
+class TestApplyAttributeFixes(BaseTest):
+    """ Test apply_attribute_fixes """
+    def test_single_call(self):
+        """ Test that consecutive fixes are applied together """
+        apply_attribute_fixes(
+            'tas_Amon_Model-id_Expt-id_r1i2p3f10_gn_195601-195612.nc', '/a',
+            ['AirTemperatureNameAdd', 'ForcingIndexFromFilename',
+             'ParentBranchTimeAdd']
+        )
+        self.mock_subprocess.assert_called_once_with(
+            "ncatted -h -a standard_name,tas,o,c,'air_temperature' "
+            "-a forcing_index,global,o,s,10 "
+            "-a branch_time_in_parent,global,o,d,0.0 "
+            "/a/tas_Amon_Model-id_Expt-id_r1i2p3f10_gn_195601-195612.nc",
+            stderr=subprocess.STDOUT,
+            shell=True
+        )
+
+    @mock.patch('pre_proc.file_fix.attribute_add.netCDF4.Dataset')
+    def test_reads_attributes(self, mock_dataset):
+        """
+        Test that earlier fixes are applied before a fix whose value depends
+        on the file's attributes
+        """
+        class MockedDataset:
+            mip_era = 'PRIMAVERA'
+        mock_dataset.return_value.__enter__.return_value = MockedDataset
+
+        apply_attribute_fixes('1.nc', '/a', ['MipEraToPrim',
+                                             'ZFurtherInfoUrl'])
+        self.mock_subprocess.assert_has_calls([
+            mock.call("ncatted -h -a mip_era,global,o,c,'PRIMAVERA' /a/1.nc",
+                      stderr=subprocess.STDOUT, shell=True),
+            mock.call("ncatted -h -a further_info_url,global,o,c,"
+                      "'https://furtherinfo.es-doc.org/PRIMAVERA.None.None."
+                      "None.None.None' /a/1.nc",
+                      stderr=subprocess.STDOUT, shell=True)
+        ])
+        self.assertEqual(self.mock_subprocess.call_count, 2)
+
+    @mock.patch('pre_proc.file_fix.attribute_add.netCDF4.Dataset')
+    def test_dataset_values(self, mock_dataset):
+        """
+        Test that values that are the same for every file in a dataset are
+        only calculated once and that the fixes are then applied together
+        """
+        class MockedDataset:
+            institution_id = 'my-institution'
+        mock_dataset.return_value.__enter__.return_value = MockedDataset
+
+        dataset_values = {}
+        for filename in ('1.nc', '2.nc'):
+            apply_attribute_fixes(filename, '/a',
+                                  ['MipEraToPrim', 'ZFurtherInfoUrl'],
+                                  dataset_values)
+        mock_dataset.assert_called_once_with('/a/1.nc')
+        self.assertEqual(self.mock_subprocess.call_count, 3)
+        self.assertEqual(
+            self.mock_subprocess.call_args[0][0],
+            "ncatted -h -a mip_era,global,o,c,'PRIMAVERA' "
+            "-a further_info_url,global,o,c,'https://furtherinfo.es-doc.org/"
+            "None.my-institution.None.None.None.None' /a/2.nc"
+        )
+
+    def test_tracking_id_not_shared(self):
+        """ Test that each file in a dataset gets a new tracking_id """
+        dataset_values = {}
+        for filename in ('1.nc', '2.nc'):
+            apply_attribute_fixes(filename, '/a', ['TrackingIdNew'],
+                                  dataset_values)
+        commands = [call[0][0] for call in
+                    self.mock_subprocess.call_args_list]
+        self.assertNotEqual(commands[0].split()[3], commands[1].split()[3])
+        self.assertEqual(dataset_values, {})
+
+    def test_unknown(self):
+        """ Test that only fixes from the table can be applied """
+        self.assertRaises(UnknownFixError, apply_attribute_fixes, '1.nc',
+                          '/a', ['ParentBranchTimeAdd', 'BranchTimeDelete'])
+        self.mock_subprocess.assert_not_called()
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -45,16 +45,12 @@ class BaseTest(unittest.TestCase):
 
         self.dataset = MockedNamespace()
 
-        patch = mock.patch('pre_proc.file_fix.abstract.Dataset')
+        # The fixes in abstract and attribute_update share the netCDF4 module
+        patch = mock.patch('pre_proc.file_fix.abstract.netCDF4.Dataset')
         self.mock_dataset = patch.start()
         self.mock_dataset.return_value = self.dataset
         self.addCleanup(patch.stop)
 
-        patch = mock.patch('pre_proc.file_fix.attribute_update.Dataset')
-        self.mock_local_dataset = patch.start()
-        self.mock_local_dataset.return_value = self.dataset
-        self.addCleanup(patch.stop)
-
 
 class TestParentBranchTimeDoubleFix(BaseTest):
     """ Test ParentBranchTimeDoubleFix """
@@ -174,6 +170,21 @@ class TestChildBranchTimeDoubleFix(BaseTest):
             shell=True
         )
 
+    def test_subprocess_called_correctly_already_double(self):
+        """
+        Test that an existing double, for example from ChildBranchTimeAdd,
+        is kept
+        """
+        self.mock_dataset.return_value.branch_time_in_child = 36524.0
+        fix = ChildBranchTimeDoubleFix('1.nc', '/a')
+        fix.apply_fix()
+        self.mock_subprocess.assert_called_once_with(
+            'ncatted -h -a branch_time_in_child,global,o,d,36524.0 '
+            '/a/1.nc',
+            stderr=subprocess.STDOUT,
+            shell=True
+        )
+
 
 class TestInitializationIndexIntFix(BaseTest):
     """ Test InitializationIndexIntFix """
@@ -29,7 +29,7 @@ class BaseTest(unittest.TestCase):
             def __enter__(self):
                 return self
 
-        patch = mock.patch('pre_proc.file_fix.abstract.Dataset')
+        patch = mock.patch('pre_proc.file_fix.abstract.netCDF4.Dataset')
         self.mock_dataset = patch.start()
         self.mock_dataset.return_value = MockedNamespace()
         self.addCleanup(patch.stop)
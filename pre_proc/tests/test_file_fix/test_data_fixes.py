@@ -3,15 +3,21 @@ test_data_fixes.py
 
 Unit tests for all FileFix concrete classes from data_fixes.py
 """
+import os
+import shutil
 import subprocess
+import tempfile
 import unittest
 from unittest import mock
 
 import cf_units
 from iris.tests.stock import realistic_3d
+from netCDF4 import Dataset
 import numpy as np
 
-from pre_proc.exceptions import ExistingAttributeError, NcksError
+from pre_proc.exceptions import (AttributeNotFoundError,
+                                 ExistingAttributeError, NcksError,
+                                 NetcdfCopyError, TimeOffsetError)
 from pre_proc.file_fix import (LatDirection, LevToPlev, AAVarNameToFileName,
                                ToDegC, ZZEcEarthAtmosFix,
                                ZZZEcEarthLongitudeFix,
@@ -36,6 +42,8 @@ from pre_proc.file_fix import (LatDirection, LevToPlev, AAVarNameToFileName,
                                FixMaskCICEOrca1UV,
                                FixMaskCICEOrca025T,
                                FixMaskCICEOrca12T)
+from pre_proc.file_fix.abstract import _load_scalar_variable
+from pre_proc.file_fix.data_fixes import kelvin_to_celsius
 
 
 class NcoDataFixBaseTest(unittest.TestCase):
@@ -57,14 +65,22 @@ class NcoDataFixBaseTest(unittest.TestCase):
         self.mock_rename = patch.start()
         self.addCleanup(patch.stop)
 
+        # the data variable of the files masked is compressed at level 1
+        patch = mock.patch('pre_proc.file_fix.abstract.FixHadGEMMask.'
+                           '_variable_deflation')
+        self.mock_deflation = patch.start()
+        self.mock_deflation.side_effect = lambda filepath: {
+            os.path.basename(filepath).split('_')[0]: 1
+        }
+        self.addCleanup(patch.stop)
+
         patch = mock.patch('pre_proc.file_fix.data_fixes.os.path.exists')
         self.mock_exists = patch.start()
         self.mock_exists.return_value = False
         self.addCleanup(patch.stop)
 
-        patch = mock.patch('pre_proc.file_fix.abstract.shutil.copyfile')
-        self.mock_copyfile = patch.start()
-        self.mock_copyfile.return_value = False
+        patch = mock.patch('pre_proc.file_fix.abstract.copy_netcdf')
+        self.mock_copy = patch.start()
         self.addCleanup(patch.stop)
 
 
@@ -167,18 +183,38 @@ class TestLevToPlev(NcoDataFixBaseTest):
     """
     Test LevToPlev main functionality
     """
-    def test_subprocess_called_correctly(self):
+    def test_copy_called_correctly(self):
         """
-        Test that an external call's been made correctly for
-        LevToPlev
+        Test that the file's been copied correctly for LevToPlev
         """
         fix = LevToPlev('1.nc', '/a')
         fix.apply_fix()
-        self.mock_subprocess.assert_called_with(
-            'ncrename -h -d lev,plev -v lev,plev /a/1.nc /a/1.nc.temp',
-            stderr=subprocess.STDOUT, shell=True
+        self.mock_copy.assert_called_once_with(
+            '/a/1.nc', '/a/1.nc.temp',
+            rename_dimensions={'lev': 'plev'},
+            rename_variables={'lev': 'plev'}
         )
 
+    def test_rename_called_correctly(self):
+        """
+        Test that the copy replaces the original file.
+        """
+        fix = LevToPlev('1.nc', '/a')
+        fix.apply_fix()
+        self.mock_remove.assert_called_once_with('/a/1.nc')
+        self.mock_rename.assert_called_once_with('/a/1.nc.temp', '/a/1.nc')
+
+    def test_copy_error_handled(self):
+        """
+        Test that an exception from the copy is converted.
+        """
+        self.mock_copy.side_effect = ValueError('broken')
+        fix = LevToPlev('1.nc', '/a')
+        self.assertRaisesRegex(NetcdfCopyError,
+                               'Exception in class LevToPlev when copying '
+                               'file 1.nc', fix.apply_fix)
+        self.mock_rename.assert_not_called()
+
 
 class TestLatDirectionLatitudeCheck(unittest.TestCase):
     """
@@ -227,22 +263,17 @@ class TestAAVarNameToFileName(NcoDataFixBaseTest):
         self.mock_iris.return_value = 'hus7h'
         self.addCleanup(patch.stop)
 
-    def test_subprocess_called_correctly(self):
+    def test_copy_called_correctly(self):
         """
-        Test that an external call's been made correctly for
-        AAVarNameToFileName
+        Test that the file's been copied correctly for AAVarNameToFileName
         """
         fix = AAVarNameToFileName('hus_blah_blah.nc', '/a')
         fix.apply_fix()
-        calls = [
-            mock.call('ncrename -h -v hus7h,hus /a/hus_blah_blah.nc '
-                      '/a/hus_blah_blah.nc.temp',
-                      stderr=subprocess.STDOUT, shell=True),
-            mock.call('ncatted -h -a variable_id,global,m,c,hus '
-                      '/a/hus_blah_blah.nc /a/hus_blah_blah.nc.temp',
-                      stderr=subprocess.STDOUT, shell=True)
-        ]
-        self.mock_subprocess.assert_has_calls(calls)
+        self.mock_copy.assert_called_once_with(
+            '/a/hus_blah_blah.nc', '/a/hus_blah_blah.nc.temp',
+            rename_variables={'hus7h': 'hus'},
+            global_attributes={'variable_id': 'hus'}
+        )
 
 
 class TestToDegC(NcoDataFixBaseTest):
@@ -259,21 +290,17 @@ class TestToDegC(NcoDataFixBaseTest):
         self.mock_kelvin_check.return_value = True
         self.addCleanup(patch.stop)
 
-    def test_subprocess_called_correctly(self):
+    def test_copy_called_correctly(self):
         """
-        Test that an external call's been made correctly for
-        LatDirection
+        Test that the file's copied with the data converted and units set
         """
         fix = ToDegC('tos_table.nc', '/a')
         fix.apply_fix()
-        calls = [
-            mock.call("ncap2 -h -s 'tos=tos-273.15f' /a/tos_table.nc "
-                      "/a/tos_table.nc.temp",
-                      stderr=subprocess.STDOUT, shell=True),
-            mock.call("ncatted -h -a units,tos,m,c,'degC' /a/tos_table.nc",
-                      stderr=subprocess.STDOUT, shell=True)
-        ]
-        self.mock_subprocess.assert_has_calls(calls)
+        self.mock_copy.assert_called_once_with(
+            '/a/tos_table.nc', '/a/tos_table.nc.temp',
+            transforms={'tos': kelvin_to_celsius},
+            variable_attributes={'tos': {'units': 'degC'}}
+        )
 
     def test_remove_called_correctly(self):
         """
@@ -303,6 +330,20 @@ class TestToDegC(NcoDataFixBaseTest):
                                'tos_table.nc. Units are not K.', fix.apply_fix)
 
 
+class TestKelvinToCelsius(unittest.TestCase):
+    """
+    Test kelvin_to_celsius()
+    """
+    def test_single_precision(self):
+        """ Test that single precision data stays single precision """
+        values = np.array([273.15, 300.], dtype=np.float32)
+        converted = kelvin_to_celsius(values)
+        self.assertEqual(converted.dtype, np.float32)
+        np.testing.assert_array_equal(
+            converted, values - np.float32(273.15)
+        )
+
+
 class TestToDegCUnitsCheck(unittest.TestCase):
     """
     Test ToDegC._is_kelvin()
@@ -337,7 +378,8 @@ class TestZZEcEarthAtmosFix(unittest.TestCase):
     Test ZZEcEarthAtmosFix
     """
     def setUp(self):
-        patch = mock.patch('pre_proc.file_fix.data_fixes.fix_latlon_atmosphere')
+        patch = mock.patch('pre_proc.file_fix.data_fixes.fix_latlon.'
+                           'fix_latlon_atmosphere')
         self.mock_fix = patch.start()
         self.addCleanup(patch.stop)
 
@@ -363,68 +405,141 @@ class TestZZZEcEarthLongitudeFix(unittest.TestCase):
                                          keepid=True)
 
 
-class TestSetTimeReference1949(NcoDataFixBaseTest):
+class TestSetTimeReference1949(unittest.TestCase):
     """
-    Test SetTimeReference1949
+    Test SetTimeReference1949, which edits a real file in place
     """
-    def test_subprocess_called_correctly(self):
-        """
-        Test that an external call's been made correctly for
-        SetTimeReference1949
-        """
-        fix = SetTimeReference1949('1.nc', '/a')
+    def setUp(self):
+        """ Create a file with a time reference of 1950-01-01 """
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.filename = 'tas_1.nc'
+        self.data = np.arange(6, dtype=np.float32).reshape(3, 2)
+        with Dataset(os.path.join(self.temp_dir, self.filename), 'w') as nc:
+            nc.createDimension('time', None)
+            nc.createDimension('bnds', 2)
+            nc.createDimension('lat', 2)
+            time = nc.createVariable('time', 'f8', ('time',))
+            time.units = 'days since 1950-01-01'
+            time.calendar = 'gregorian'
+            time.bounds = 'time_bnds'
+            time[:] = [0.5, 1.5, 2.5]
+            time_bnds = nc.createVariable('time_bnds', 'f8',
+                                          ('time', 'bnds'))
+            time_bnds[:] = [[0., 1.], [1., 2.], [2., 3.]]
+            tas = nc.createVariable('tas', 'f4', ('time', 'lat'), zlib=True)
+            tas[:] = self.data
+
+    def test_times_rebased(self):
+        """ Test that the time values and units are changed """
+        fix = SetTimeReference1949(self.filename, self.temp_dir)
         fix.apply_fix()
-        self.mock_subprocess.assert_called_with(
-            "cdo -z zip_3 -setreftime,'1949-01-01','00:00:00' /a/1.nc "
-            "/a/1.nc.temp",
-            stderr=subprocess.STDOUT, shell=True
-        )
+        with Dataset(os.path.join(self.temp_dir, self.filename)) as nc:
+            self.assertEqual(nc['time'].units,
+                             'days since 1949-01-01 00:00:00')
+            np.testing.assert_array_equal(nc['time'][:],
+                                          [365.5, 366.5, 367.5])
+            np.testing.assert_array_equal(nc['time_bnds'][:, 0],
+                                          [365., 366., 367.])
+            np.testing.assert_array_equal(nc['tas'][:], self.data)
+
+    def test_no_units(self):
+        """ Test that an exception is raised if time has no units """
+        with Dataset(os.path.join(self.temp_dir, self.filename), 'a') as nc:
+            nc['time'].delncattr('units')
+        fix = SetTimeReference1949(self.filename, self.temp_dir)
+        self.assertRaisesRegex(AttributeNotFoundError,
+                               'Cannot find attribute units in file '
+                               'tas_1.nc', fix.apply_fix)
+
+    def _integer_times(self, units):
+        """ Replace the file with one whose time values are integers """
+        with Dataset(os.path.join(self.temp_dir, self.filename), 'w') as nc:
+            nc.createDimension('time', None)
+            time = nc.createVariable('time', 'i4', ('time',))
+            time.units = units
+            time.calendar = 'gregorian'
+            time[:] = [0, 1, 2]
+
+    def test_integer_times(self):
+        """ Test that a whole number offset is added to integer times """
+        self._integer_times('days since 1950-01-01')
+        fix = SetTimeReference1949(self.filename, self.temp_dir)
+        fix.apply_fix()
+        with Dataset(os.path.join(self.temp_dir, self.filename)) as nc:
+            np.testing.assert_array_equal(nc['time'][:], [365, 366, 367])
+
+    def test_integer_times_fraction(self):
+        """ Test that integer times aren't moved by a fraction of a day """
+        self._integer_times('days since 1950-01-01 12:00:00')
+        fix = SetTimeReference1949(self.filename, self.temp_dir)
+        self.assertRaisesRegex(TimeOffsetError,
+                               'Cannot add the offset 365.5 to the integer '
+                               'values of time in file tas_1.nc',
+                               fix.apply_fix)
+        with Dataset(os.path.join(self.temp_dir, self.filename)) as nc:
+            self.assertEqual(nc['time'].units,
+                             'days since 1950-01-01 12:00:00')
+            np.testing.assert_array_equal(nc['time'][:], [0, 1, 2])
 
 
-class TestZZZAddHeight2m(NcoDataFixBaseTest):
+class TestZZZAddHeight2m(unittest.TestCase):
     """
-    Test ZZZAddHeight2m with some additional tests to check that
-    NcksAppendDataFix works as intended.
+    Test ZZZAddHeight2m, which edits a real file in place, to check that
+    ScalarCoordinateAppend works as intended.
     """
-    def test_subprocess_called_correctly(self):
-        """
-        Test that external calls are made correctly for ZZZAddHeight2m
-        """
-        fix = ZZZAddHeight2m('tas_1.nc', '/a')
-        fix.apply_fix()
-        calls = [
-            mock.call(
-                "ncks -h -A -v height /gws/nopw/j04/primavera1/cache/jseddon/"
-                "reference_files/height2m_reference.nc /a/tas_1.nc.temp",
-                stderr=subprocess.STDOUT, shell=True
-            ),
-            mock.call(
-                "ncatted -h -a coordinates,tas,o,c,'height' /a/tas_1.nc",
-                stderr=subprocess.STDOUT, shell=True
-            ),
-        ]
-        self.mock_subprocess.assert_has_calls(calls)
-
-    def test_remove_called_correctly(self):
-        """
-        Test that input files is removed.
-        """
-        self.mock_exists.return_value = True
-        fix = ZZZAddHeight2m('1.nc', '/a')
+    def setUp(self):
+        """ Create a data file and a reference file """
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.reference = os.path.join(self.temp_dir, 'reference.nc')
+        with Dataset(self.reference, 'w') as nc:
+            height = nc.createVariable('height', 'f8', ())
+            height.units = 'm'
+            height.axis = 'Z'
+            height.positive = 'up'
+            height.standard_name = 'height'
+            height[...] = 2.
+        self.filename = 'tas_1.nc'
+        with Dataset(os.path.join(self.temp_dir, self.filename), 'w') as nc:
+            nc.createDimension('lat', 2)
+            tas = nc.createVariable('tas', 'f4', ('lat',))
+            tas[:] = [280., 290.]
+
+        _load_scalar_variable.cache_clear()
+        self.addCleanup(_load_scalar_variable.cache_clear)
+
+    def _apply_fix(self):
+        """ Apply the fix using the temporary reference file """
+        fix = ZZZAddHeight2m(self.filename, self.temp_dir)
+        fix.reference_file = self.reference
         fix.apply_fix()
-        calls = [
-            mock.call('/a/1.nc.temp'),
-            mock.call('/a/1.nc')
-        ]
-        self.mock_remove.assert_has_calls(calls)
 
-    def test_rename_called_correctly(self):
-        """
-        Test that output file is renamed.
-        """
-        fix = ZZZAddHeight2m('1.nc', '/a')
-        fix.apply_fix()
-        self.mock_rename.assert_called_once_with('/a/1.nc.temp', '/a/1.nc')
+    def test_height_added(self):
+        """ Test that the scalar coordinate and its attributes are added """
+        self._apply_fix()
+        with Dataset(os.path.join(self.temp_dir, self.filename)) as nc:
+            self.assertEqual(nc['height'][...], 2.)
+            self.assertEqual(nc['height'].units, 'm')
+            self.assertEqual(nc['height'].positive, 'up')
+            self.assertEqual(nc['tas'].coordinates, 'height')
+            np.testing.assert_array_equal(nc['tas'][:], [280., 290.])
+
+    def test_existing_coordinates(self):
+        """ Test that existing coordinates are kept """
+        with Dataset(os.path.join(self.temp_dir, self.filename), 'a') as nc:
+            nc['tas'].coordinates = 'lat_bnds'
+        self._apply_fix()
+        self._apply_fix()
+        with Dataset(os.path.join(self.temp_dir, self.filename)) as nc:
+            self.assertEqual(nc['tas'].coordinates, 'lat_bnds height')
+
+    def test_reference_cached(self):
+        """ Test that the reference file is only read once """
+        self._apply_fix()
+        os.remove(self.reference)
+        self._apply_fix()
+        self.assertEqual(_load_scalar_variable.cache_info().hits, 1)
 
 
 class TestRemoveOrca1Halo(NcoDataFixBaseTest):
@@ -474,6 +589,10 @@ class TestMaskOrca1TOlevel(NcoDataFixBaseTest):
         fix = FixMaskOrca1TOlevel('tos_1.nc', '/a')
         fix.apply_fix()
         calls = [
+            mock.call(
+                "ncks -h --no_alphabetize -L 0 /a/tos_1.nc /a/tos_1.nc.temp",
+                stderr=subprocess.STDOUT, shell=True
+            ),
             mock.call(
                 "ncks -h --no_alphabetize -A -v mask_3D_T "
                 "/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/"
@@ -482,12 +601,12 @@ class TestMaskOrca1TOlevel(NcoDataFixBaseTest):
                 stderr=subprocess.STDOUT, shell=True
             ),
             mock.call(
-                "ncap2 -h -s 'where(mask_3D_T!=0) tos=tos@_FillValue' "
+                "ncap2 -h -L 0 -s 'where(mask_3D_T!=0) tos=tos@_FillValue' "
                 "/a/tos_1.nc.temp /a/tos_1.nc.temp_masked",
                 stderr=subprocess.STDOUT, shell=True
             ),
             mock.call(
-                "ncks -h --no_alphabetize -x -v mask_3D_T "
+                "ncks -h --no_alphabetize -L 1 -x -v mask_3D_T "
                 "/a/tos_1.nc.temp_masked /a/tos_1.nc.temp_final",
                 stderr=subprocess.STDOUT, shell=True
             ),
@@ -495,6 +614,62 @@ class TestMaskOrca1TOlevel(NcoDataFixBaseTest):
         self.mock_subprocess.assert_has_calls(calls)
 
 
+class TestMaskDeflation(NcoDataFixBaseTest):
+    """
+    Test that FixHadGEMMask restores the compression of each variable
+    """
+    def test_mixed_levels(self):
+        """
+        Test that the variables with other levels are appended with them
+        """
+        self.mock_deflation.side_effect = None
+        self.mock_deflation.return_value = {
+            'lat': 0, 'lon': 0, 'tos': 5, 'time_bnds': 1, 'time': 0
+        }
+        fix = FixMaskOrca1TOlevel('tos_1.nc', '/a')
+        fix.apply_fix()
+        self.mock_deflation.assert_called_once_with('/a/tos_1.nc')
+        calls = [
+            mock.call(
+                "ncks -h --no_alphabetize -L 5 -x -v "
+                "mask_3D_T,lat,lon,time,time_bnds "
+                "/a/tos_1.nc.temp_masked /a/tos_1.nc.temp_final",
+                stderr=subprocess.STDOUT, shell=True
+            ),
+            mock.call(
+                "ncks -h --no_alphabetize -A -L 0 -v lat,lon,time "
+                "/a/tos_1.nc.temp_masked /a/tos_1.nc.temp_final",
+                stderr=subprocess.STDOUT, shell=True
+            ),
+            mock.call(
+                "ncks -h --no_alphabetize -A -L 1 -v time_bnds "
+                "/a/tos_1.nc.temp_masked /a/tos_1.nc.temp_final",
+                stderr=subprocess.STDOUT, shell=True
+            ),
+        ]
+        self.mock_subprocess.assert_has_calls(calls)
+        self.assertEqual(self.mock_subprocess.call_count, 6)
+
+
+class TestMaskVariableDeflation(unittest.TestCase):
+    """
+    Test FixHadGEMMask._variable_deflation, which reads a real file
+    """
+    def test_variable_deflation(self):
+        """ Test that the deflate levels are read """
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        filepath = os.path.join(temp_dir, 'tos_1.nc')
+        with Dataset(filepath, 'w') as nc:
+            nc.createDimension('lat', 2)
+            nc.createVariable('lat', 'f8', ('lat',))
+            nc.createVariable('tos', 'f4', ('lat',), zlib=True,
+                              complevel=5)
+        fix = FixMaskOrca1TOlevel('tos_1.nc', temp_dir)
+        self.assertEqual(fix._variable_deflation(filepath),
+                         {'lat': 0, 'tos': 5})
+
+
 class TestMaskOrca025TOlevel(NcoDataFixBaseTest):
     """
     Test FixMaskOrca025TOlevel
@@ -506,6 +681,10 @@ class TestMaskOrca025TOlevel(NcoDataFixBaseTest):
         fix = FixMaskOrca025TOlevel('tos_1.nc', '/a')
         fix.apply_fix()
         calls = [
+            mock.call(
+                "ncks -h --no_alphabetize -L 0 /a/tos_1.nc /a/tos_1.nc.temp",
+                stderr=subprocess.STDOUT, shell=True
+            ),
             mock.call(
                 "ncks -h --no_alphabetize -A -v mask_3D_T "
                 "/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/"
@@ -514,12 +693,12 @@ class TestMaskOrca025TOlevel(NcoDataFixBaseTest):
                 stderr=subprocess.STDOUT, shell=True
             ),
             mock.call(
-                "ncap2 -h -s 'where(mask_3D_T!=0) tos=tos@_FillValue' "
+                "ncap2 -h -L 0 -s 'where(mask_3D_T!=0) tos=tos@_FillValue' "
                 "/a/tos_1.nc.temp /a/tos_1.nc.temp_masked",
                 stderr=subprocess.STDOUT, shell=True
             ),
             mock.call(
-                "ncks -h --no_alphabetize -x -v mask_3D_T "
+                "ncks -h --no_alphabetize -L 1 -x -v mask_3D_T "
                 "/a/tos_1.nc.temp_masked /a/tos_1.nc.temp_final",
                 stderr=subprocess.STDOUT, shell=True
             ),
@@ -538,6 +717,10 @@ class TestMaskOrca1UOlevel(NcoDataFixBaseTest):
         fix = FixMaskOrca1UOlevel('uo_1.nc', '/a')
         fix.apply_fix()
         calls = [
+            mock.call(
+                "ncks -h --no_alphabetize -L 0 /a/uo_1.nc /a/uo_1.nc.temp",
+                stderr=subprocess.STDOUT, shell=True
+            ),
             mock.call(
                 "ncks -h --no_alphabetize -A -v mask_3D_U "
                 "/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/"
@@ -546,12 +729,12 @@ class TestMaskOrca1UOlevel(NcoDataFixBaseTest):
                 stderr=subprocess.STDOUT, shell=True
             ),
             mock.call(
-                "ncap2 -h -s 'where(mask_3D_U!=0) uo=uo@_FillValue' "
+                "ncap2 -h -L 0 -s 'where(mask_3D_U!=0) uo=uo@_FillValue' "
                 "/a/uo_1.nc.temp /a/uo_1.nc.temp_masked",
                 stderr=subprocess.STDOUT, shell=True
             ),
             mock.call(
-                "ncks -h --no_alphabetize -x -v mask_3D_U "
+                "ncks -h --no_alphabetize -L 1 -x -v mask_3D_U "
                 "/a/uo_1.nc.temp_masked /a/uo_1.nc.temp_final",
                 stderr=subprocess.STDOUT, shell=True
             ),
@@ -570,6 +753,10 @@ class TestMaskOrca025UOlevel(NcoDataFixBaseTest):
         fix = FixMaskOrca025UOlevel('uo_1.nc', '/a')
         fix.apply_fix()
         calls = [
+            mock.call(
+                "ncks -h --no_alphabetize -L 0 /a/uo_1.nc /a/uo_1.nc.temp",
+                stderr=subprocess.STDOUT, shell=True
+            ),
             mock.call(
                 "ncks -h --no_alphabetize -A -v mask_3D_U "
                 "/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/"
@@ -578,12 +765,12 @@ class TestMaskOrca025UOlevel(NcoDataFixBaseTest):
                 stderr=subprocess.STDOUT, shell=True
             ),
             mock.call(
-                "ncap2 -h -s 'where(mask_3D_U!=0) uo=uo@_FillValue' "
+                "ncap2 -h -L 0 -s 'where(mask_3D_U!=0) uo=uo@_FillValue' "
                 "/a/uo_1.nc.temp /a/uo_1.nc.temp_masked",
                 stderr=subprocess.STDOUT, shell=True
             ),
             mock.call(
-                "ncks -h --no_alphabetize -x -v mask_3D_U "
+                "ncks -h --no_alphabetize -L 1 -x -v mask_3D_U "
                 "/a/uo_1.nc.temp_masked /a/uo_1.nc.temp_final",
                 stderr=subprocess.STDOUT, shell=True
             ),
@@ -602,6 +789,10 @@ class TestMaskOrca1VOlevel(NcoDataFixBaseTest):
         fix = FixMaskOrca1VOlevel('vo_1.nc', '/a')
         fix.apply_fix()
         calls = [
+            mock.call(
+                "ncks -h --no_alphabetize -L 0 /a/vo_1.nc /a/vo_1.nc.temp",
+                stderr=subprocess.STDOUT, shell=True
+            ),
             mock.call(
                 "ncks -h --no_alphabetize -A -v mask_3D_V "
                 "/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/"
@@ -610,12 +801,12 @@ class TestMaskOrca1VOlevel(NcoDataFixBaseTest):
                 stderr=subprocess.STDOUT, shell=True
             ),
             mock.call(
-                "ncap2 -h -s 'where(mask_3D_V!=0) vo=vo@_FillValue' "
+                "ncap2 -h -L 0 -s 'where(mask_3D_V!=0) vo=vo@_FillValue' "
                 "/a/vo_1.nc.temp /a/vo_1.nc.temp_masked",
                 stderr=subprocess.STDOUT, shell=True
             ),
             mock.call(
-                "ncks -h --no_alphabetize -x -v mask_3D_V "
+                "ncks -h --no_alphabetize -L 1 -x -v mask_3D_V "
                 "/a/vo_1.nc.temp_masked /a/vo_1.nc.temp_final",
                 stderr=subprocess.STDOUT, shell=True
             ),
@@ -634,6 +825,10 @@ class TestMaskOrca025VOlevel(NcoDataFixBaseTest):
         fix = FixMaskOrca025VOlevel('vo_1.nc', '/a')
         fix.apply_fix()
         calls = [
+            mock.call(
+                "ncks -h --no_alphabetize -L 0 /a/vo_1.nc /a/vo_1.nc.temp",
+                stderr=subprocess.STDOUT, shell=True
+            ),
             mock.call(
                 "ncks -h --no_alphabetize -A -v mask_3D_V "
                 "/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/"
@@ -642,12 +837,12 @@ class TestMaskOrca025VOlevel(NcoDataFixBaseTest):
                 stderr=subprocess.STDOUT, shell=True
             ),
             mock.call(
-                "ncap2 -h -s 'where(mask_3D_V!=0) vo=vo@_FillValue' "
+                "ncap2 -h -L 0 -s 'where(mask_3D_V!=0) vo=vo@_FillValue' "
                 "/a/vo_1.nc.temp /a/vo_1.nc.temp_masked",
                 stderr=subprocess.STDOUT, shell=True
             ),
             mock.call(
-                "ncks -h --no_alphabetize -x -v mask_3D_V "
+                "ncks -h --no_alphabetize -L 1 -x -v mask_3D_V "
                 "/a/vo_1.nc.temp_masked /a/vo_1.nc.temp_final",
                 stderr=subprocess.STDOUT, shell=True
             ),
@@ -666,6 +861,10 @@ class TestMaskOrca1TSurface(NcoDataFixBaseTest):
         fix = FixMaskOrca1TSurface('tos_1.nc', '/a')
         fix.apply_fix()
         calls = [
+            mock.call(
+                "ncks -h --no_alphabetize -L 0 /a/tos_1.nc /a/tos_1.nc.temp",
+                stderr=subprocess.STDOUT, shell=True
+            ),
             mock.call(
                 "ncks -h --no_alphabetize -A -v mask_2D_T "
                 "/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/"
@@ -674,12 +873,12 @@ class TestMaskOrca1TSurface(NcoDataFixBaseTest):
                 stderr=subprocess.STDOUT, shell=True
             ),
             mock.call(
-                "ncap2 -h -s 'where(mask_2D_T!=0) tos=tos@_FillValue' "
+                "ncap2 -h -L 0 -s 'where(mask_2D_T!=0) tos=tos@_FillValue' "
                 "/a/tos_1.nc.temp /a/tos_1.nc.temp_masked",
                 stderr=subprocess.STDOUT, shell=True
             ),
             mock.call(
-                "ncks -h --no_alphabetize -x -v mask_2D_T "
+                "ncks -h --no_alphabetize -L 1 -x -v mask_2D_T "
                 "/a/tos_1.nc.temp_masked /a/tos_1.nc.temp_final",
                 stderr=subprocess.STDOUT, shell=True
             ),
@@ -698,6 +897,10 @@ class TestMaskOrca025TSurface(NcoDataFixBaseTest):
         fix = FixMaskOrca025TSurface('tos_1.nc', '/a')
         fix.apply_fix()
         calls = [
+            mock.call(
+                "ncks -h --no_alphabetize -L 0 /a/tos_1.nc /a/tos_1.nc.temp",
+                stderr=subprocess.STDOUT, shell=True
+            ),
             mock.call(
                 "ncks -h --no_alphabetize -A -v mask_2D_T "
                 "/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/"
@@ -706,12 +909,12 @@ class TestMaskOrca025TSurface(NcoDataFixBaseTest):
                 stderr=subprocess.STDOUT, shell=True
             ),
             mock.call(
-                "ncap2 -h -s 'where(mask_2D_T!=0) tos=tos@_FillValue' "
+                "ncap2 -h -L 0 -s 'where(mask_2D_T!=0) tos=tos@_FillValue' "
                 "/a/tos_1.nc.temp /a/tos_1.nc.temp_masked",
                 stderr=subprocess.STDOUT, shell=True
             ),
             mock.call(
-                "ncks -h --no_alphabetize -x -v mask_2D_T "
+                "ncks -h --no_alphabetize -L 1 -x -v mask_2D_T "
                 "/a/tos_1.nc.temp_masked /a/tos_1.nc.temp_final",
                 stderr=subprocess.STDOUT, shell=True
             ),
@@ -730,6 +933,10 @@ class TestMaskOrca1USurface(NcoDataFixBaseTest):
         fix = FixMaskOrca1USurface('uo_1.nc', '/a')
         fix.apply_fix()
         calls = [
+            mock.call(
+                "ncks -h --no_alphabetize -L 0 /a/uo_1.nc /a/uo_1.nc.temp",
+                stderr=subprocess.STDOUT, shell=True
+            ),
             mock.call(
                 "ncks -h --no_alphabetize -A -v mask_2D_U "
                 "/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/"
@@ -738,12 +945,12 @@ class TestMaskOrca1USurface(NcoDataFixBaseTest):
                 stderr=subprocess.STDOUT, shell=True
             ),
             mock.call(
-                "ncap2 -h -s 'where(mask_2D_U!=0) uo=uo@_FillValue' "
+                "ncap2 -h -L 0 -s 'where(mask_2D_U!=0) uo=uo@_FillValue' "
                 "/a/uo_1.nc.temp /a/uo_1.nc.temp_masked",
                 stderr=subprocess.STDOUT, shell=True
             ),
             mock.call(
-                "ncks -h --no_alphabetize -x -v mask_2D_U "
+                "ncks -h --no_alphabetize -L 1 -x -v mask_2D_U "
                 "/a/uo_1.nc.temp_masked /a/uo_1.nc.temp_final",
                 stderr=subprocess.STDOUT, shell=True
             ),
@@ -763,6 +970,10 @@ class TestMaskOrca1USingleLevel(NcoDataFixBaseTest):
         fix = FixMaskOrca1USingleLevel('uo_1.nc', '/a')
         fix.apply_fix()
         calls = [
+            mock.call(
+                "ncks -h --no_alphabetize -L 0 /a/uo_1.nc /a/uo_1.nc.temp",
+                stderr=subprocess.STDOUT, shell=True
+            ),
             mock.call(
                 "ncks -h --no_alphabetize -A -v mask_3D_U "
                 "/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/"
@@ -772,12 +983,12 @@ class TestMaskOrca1USingleLevel(NcoDataFixBaseTest):
                 stderr=subprocess.STDOUT, shell=True
             ),
             mock.call(
-                "ncap2 -h -s 'where(mask_3D_U!=0) uo=uo@_FillValue' "
+                "ncap2 -h -L 0 -s 'where(mask_3D_U!=0) uo=uo@_FillValue' "
                 "/a/uo_1.nc.temp /a/uo_1.nc.temp_masked",
                 stderr=subprocess.STDOUT, shell=True
             ),
             mock.call(
-                "ncks -h --no_alphabetize -x -v mask_3D_U "
+                "ncks -h --no_alphabetize -L 1 -x -v mask_3D_U "
                 "/a/uo_1.nc.temp_masked /a/uo_1.nc.temp_final",
                 stderr=subprocess.STDOUT, shell=True
             ),
@@ -796,6 +1007,10 @@ class TestMaskOrca025USurface(NcoDataFixBaseTest):
         fix = FixMaskOrca025USurface('uo_1.nc', '/a')
         fix.apply_fix()
         calls = [
+            mock.call(
+                "ncks -h --no_alphabetize -L 0 /a/uo_1.nc /a/uo_1.nc.temp",
+                stderr=subprocess.STDOUT, shell=True
+            ),
             mock.call(
                 "ncks -h --no_alphabetize -A -v mask_2D_U "
                 "/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/"
@@ -804,12 +1019,12 @@ class TestMaskOrca025USurface(NcoDataFixBaseTest):
                 stderr=subprocess.STDOUT, shell=True
             ),
             mock.call(
-                "ncap2 -h -s 'where(mask_2D_U!=0) uo=uo@_FillValue' "
+                "ncap2 -h -L 0 -s 'where(mask_2D_U!=0) uo=uo@_FillValue' "
                 "/a/uo_1.nc.temp /a/uo_1.nc.temp_masked",
                 stderr=subprocess.STDOUT, shell=True
             ),
             mock.call(
-                "ncks -h --no_alphabetize -x -v mask_2D_U "
+                "ncks -h --no_alphabetize -L 1 -x -v mask_2D_U "
                 "/a/uo_1.nc.temp_masked /a/uo_1.nc.temp_final",
                 stderr=subprocess.STDOUT, shell=True
             ),
@@ -829,6 +1044,10 @@ class TestMaskOrca025USingleLevel(NcoDataFixBaseTest):
         fix = FixMaskOrca025USingleLevel('uo_1.nc', '/a')
         fix.apply_fix()
         calls = [
+            mock.call(
+                "ncks -h --no_alphabetize -L 0 /a/uo_1.nc /a/uo_1.nc.temp",
+                stderr=subprocess.STDOUT, shell=True
+            ),
             mock.call(
                 "ncks -h --no_alphabetize -A -v mask_3D_U "
                 "/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/"
@@ -838,12 +1057,12 @@ class TestMaskOrca025USingleLevel(NcoDataFixBaseTest):
                 stderr=subprocess.STDOUT, shell=True
             ),
             mock.call(
-                "ncap2 -h -s 'where(mask_3D_U!=0) uo=uo@_FillValue' "
+                "ncap2 -h -L 0 -s 'where(mask_3D_U!=0) uo=uo@_FillValue' "
                 "/a/uo_1.nc.temp /a/uo_1.nc.temp_masked",
                 stderr=subprocess.STDOUT, shell=True
             ),
             mock.call(
-                "ncks -h --no_alphabetize -x -v mask_3D_U "
+                "ncks -h --no_alphabetize -L 1 -x -v mask_3D_U "
                 "/a/uo_1.nc.temp_masked /a/uo_1.nc.temp_final",
                 stderr=subprocess.STDOUT, shell=True
             ),
@@ -862,6 +1081,10 @@ class TestMaskOrca1VSurface(NcoDataFixBaseTest):
         fix = FixMaskOrca1VSurface('vo_1.nc', '/a')
         fix.apply_fix()
         calls = [
+            mock.call(
+                "ncks -h --no_alphabetize -L 0 /a/vo_1.nc /a/vo_1.nc.temp",
+                stderr=subprocess.STDOUT, shell=True
+            ),
             mock.call(
                 "ncks -h --no_alphabetize -A -v mask_2D_V "
                 "/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/"
@@ -870,12 +1093,12 @@ class TestMaskOrca1VSurface(NcoDataFixBaseTest):
                 stderr=subprocess.STDOUT, shell=True
             ),
             mock.call(
-                "ncap2 -h -s 'where(mask_2D_V!=0) vo=vo@_FillValue' "
+                "ncap2 -h -L 0 -s 'where(mask_2D_V!=0) vo=vo@_FillValue' "
                 "/a/vo_1.nc.temp /a/vo_1.nc.temp_masked",
                 stderr=subprocess.STDOUT, shell=True
             ),
             mock.call(
-                "ncks -h --no_alphabetize -x -v mask_2D_V "
+                "ncks -h --no_alphabetize -L 1 -x -v mask_2D_V "
                 "/a/vo_1.nc.temp_masked /a/vo_1.nc.temp_final",
                 stderr=subprocess.STDOUT, shell=True
             ),
@@ -895,6 +1118,10 @@ class TestMaskOrca1VSingleLevel(NcoDataFixBaseTest):
         fix = FixMaskOrca1VSingleLevel('vo_1.nc', '/a')
         fix.apply_fix()
         calls = [
+            mock.call(
+                "ncks -h --no_alphabetize -L 0 /a/vo_1.nc /a/vo_1.nc.temp",
+                stderr=subprocess.STDOUT, shell=True
+            ),
             mock.call(
                 "ncks -h --no_alphabetize -A -v mask_3D_V "
                 "/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/"
@@ -904,12 +1131,12 @@ class TestMaskOrca1VSingleLevel(NcoDataFixBaseTest):
                 stderr=subprocess.STDOUT, shell=True
             ),
             mock.call(
-                "ncap2 -h -s 'where(mask_3D_V!=0) vo=vo@_FillValue' "
+                "ncap2 -h -L 0 -s 'where(mask_3D_V!=0) vo=vo@_FillValue' "
                 "/a/vo_1.nc.temp /a/vo_1.nc.temp_masked",
                 stderr=subprocess.STDOUT, shell=True
             ),
             mock.call(
-                "ncks -h --no_alphabetize -x -v mask_3D_V "
+                "ncks -h --no_alphabetize -L 1 -x -v mask_3D_V "
                 "/a/vo_1.nc.temp_masked /a/vo_1.nc.temp_final",
                 stderr=subprocess.STDOUT, shell=True
             ),
@@ -928,6 +1155,10 @@ class TestMaskOrca025VSurface(NcoDataFixBaseTest):
         fix = FixMaskOrca025VSurface('vo_1.nc', '/a')
         fix.apply_fix()
         calls = [
+            mock.call(
+                "ncks -h --no_alphabetize -L 0 /a/vo_1.nc /a/vo_1.nc.temp",
+                stderr=subprocess.STDOUT, shell=True
+            ),
             mock.call(
                 "ncks -h --no_alphabetize -A -v mask_2D_V "
                 "/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/"
@@ -936,12 +1167,12 @@ class TestMaskOrca025VSurface(NcoDataFixBaseTest):
                 stderr=subprocess.STDOUT, shell=True
             ),
             mock.call(
-                "ncap2 -h -s 'where(mask_2D_V!=0) vo=vo@_FillValue' "
+                "ncap2 -h -L 0 -s 'where(mask_2D_V!=0) vo=vo@_FillValue' "
                 "/a/vo_1.nc.temp /a/vo_1.nc.temp_masked",
                 stderr=subprocess.STDOUT, shell=True
             ),
             mock.call(
-                "ncks -h --no_alphabetize -x -v mask_2D_V "
+                "ncks -h --no_alphabetize -L 1 -x -v mask_2D_V "
                 "/a/vo_1.nc.temp_masked /a/vo_1.nc.temp_final",
                 stderr=subprocess.STDOUT, shell=True
             ),
@@ -961,6 +1192,10 @@ class TestMaskOrca025VSingleLevel(NcoDataFixBaseTest):
         fix = FixMaskOrca025VSingleLevel('vo_1.nc', '/a')
         fix.apply_fix()
         calls = [
+            mock.call(
+                "ncks -h --no_alphabetize -L 0 /a/vo_1.nc /a/vo_1.nc.temp",
+                stderr=subprocess.STDOUT, shell=True
+            ),
             mock.call(
                 "ncks -h --no_alphabetize -A -v mask_3D_V "
                 "/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/"
@@ -970,12 +1205,12 @@ class TestMaskOrca025VSingleLevel(NcoDataFixBaseTest):
                 stderr=subprocess.STDOUT, shell=True
             ),
             mock.call(
-                "ncap2 -h -s 'where(mask_3D_V!=0) vo=vo@_FillValue' "
+                "ncap2 -h -L 0 -s 'where(mask_3D_V!=0) vo=vo@_FillValue' "
                 "/a/vo_1.nc.temp /a/vo_1.nc.temp_masked",
                 stderr=subprocess.STDOUT, shell=True
             ),
             mock.call(
-                "ncks -h --no_alphabetize -x -v mask_3D_V "
+                "ncks -h --no_alphabetize -L 1 -x -v mask_3D_V "
                 "/a/vo_1.nc.temp_masked /a/vo_1.nc.temp_final",
                 stderr=subprocess.STDOUT, shell=True
             ),
@@ -987,378 +1222,228 @@ class TestFixGridOrca1T(NcoDataFixBaseTest):
     """
     Test FixGridOrca1T
     """
-    def test_subprocess_called_correctly(self):
+    def test_copy_called_correctly(self):
         """
-        Test that external calls are made correctly for FixGridOrca1T
+        Test that the file is copied correctly for FixGridOrca1T
         """
         fix = FixGridOrca1T('tos_1.nc', '/a')
         fix.apply_fix()
-        calls = [
-            mock.call(
-                "ncks -h --no_alphabetize -3 /a/tos_1.nc /a/tos_1.nc.temp",
-                stderr=subprocess.STDOUT, shell=True
-            ),
-            mock.call(
-                "ncks -h --no_alphabetize -A -v latitude,longitude,"
-                "vertices_latitude,vertices_longitude "
-                "/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/"
-                "grids/ORCA1/ORCA1_grid-t.nc /a/tos_1.nc.temp",
-                stderr=subprocess.STDOUT, shell=True
-            ),
-            mock.call(
-                "ncks -h --no_alphabetize -7 --deflate=3 /a/tos_1.nc.temp "
-                "/a/tos_1.nc",
-                stderr=subprocess.STDOUT, shell=True
-            ),
-        ]
-        self.mock_subprocess.assert_has_calls(calls)
+        self.mock_copy.assert_called_once_with(
+            '/a/tos_1.nc', '/a/tos_1.nc.temp_final',
+            donor_path='/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/'
+                       'grids/ORCA1/ORCA1_grid-t.nc',
+            donor_variables=['latitude', 'longitude', 'vertices_latitude',
+                             'vertices_longitude']
+        )
 
 
 class TestFixGridOrca025T(NcoDataFixBaseTest):
     """
     Test FixGridOrca025T
     """
-    def test_subprocess_called_correctly(self):
+    def test_copy_called_correctly(self):
         """
-        Test that external calls are made correctly for FixGridOrca025T
+        Test that the file is copied correctly for FixGridOrca025T
         """
         fix = FixGridOrca025T('tos_1.nc', '/a')
         fix.apply_fix()
-        calls = [
-            mock.call(
-                "ncks -h --no_alphabetize -3 /a/tos_1.nc /a/tos_1.nc.temp",
-                stderr=subprocess.STDOUT, shell=True
-            ),
-            mock.call(
-                "ncks -h --no_alphabetize -A -v latitude,longitude,"
-                "vertices_latitude,vertices_longitude "
-                "/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/"
-                "grids/ORCA025/ORCA025_grid-t.nc /a/tos_1.nc.temp",
-                stderr=subprocess.STDOUT, shell=True
-            ),
-            mock.call(
-                "ncks -h --no_alphabetize -7 --deflate=3 /a/tos_1.nc.temp "
-                "/a/tos_1.nc",
-                stderr=subprocess.STDOUT, shell=True
-            ),
-        ]
-        self.mock_subprocess.assert_has_calls(calls)
+        self.mock_copy.assert_called_once_with(
+            '/a/tos_1.nc', '/a/tos_1.nc.temp_final',
+            donor_path='/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/'
+                       'grids/ORCA025/ORCA025_grid-t.nc',
+            donor_variables=['latitude', 'longitude', 'vertices_latitude',
+                             'vertices_longitude']
+        )
 
 
 class TestFixGridOrca1U(NcoDataFixBaseTest):
     """
     Test FixGridOrca1U
     """
-    def test_subprocess_called_correctly(self):
+    def test_copy_called_correctly(self):
         """
-        Test that external calls are made correctly for FixGridOrca1U
+        Test that the file is copied correctly for FixGridOrca1U
         """
         fix = FixGridOrca1U('uo_1.nc', '/a')
         fix.apply_fix()
-        calls = [
-            mock.call(
-                "ncks -h --no_alphabetize -3 /a/uo_1.nc /a/uo_1.nc.temp",
-                stderr=subprocess.STDOUT, shell=True
-            ),
-            mock.call(
-                "ncks -h --no_alphabetize -A -v latitude,longitude,"
-                "vertices_latitude,vertices_longitude "
-                "/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/"
-                "grids/ORCA1/ORCA1_grid-u.nc /a/uo_1.nc.temp",
-                stderr=subprocess.STDOUT, shell=True
-            ),
-            mock.call(
-                "ncks -h --no_alphabetize -7 --deflate=3 /a/uo_1.nc.temp "
-                "/a/uo_1.nc",
-                stderr=subprocess.STDOUT, shell=True
-            ),
-        ]
-        self.mock_subprocess.assert_has_calls(calls)
+        self.mock_copy.assert_called_once_with(
+            '/a/uo_1.nc', '/a/uo_1.nc.temp_final',
+            donor_path='/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/'
+                       'grids/ORCA1/ORCA1_grid-u.nc',
+            donor_variables=['latitude', 'longitude', 'vertices_latitude',
+                             'vertices_longitude']
+        )
 
 
 class TestFixGridOrca025U(NcoDataFixBaseTest):
     """
     Test FixGridOrca025U
     """
-    def test_subprocess_called_correctly(self):
+    def test_copy_called_correctly(self):
         """
-        Test that external calls are made correctly for FixGridOrca025U
+        Test that the file is copied correctly for FixGridOrca025U
         """
         fix = FixGridOrca025U('uo_1.nc', '/a')
         fix.apply_fix()
-        calls = [
-            mock.call(
-                "ncks -h --no_alphabetize -3 /a/uo_1.nc /a/uo_1.nc.temp",
-                stderr=subprocess.STDOUT, shell=True
-            ),
-            mock.call(
-                "ncks -h --no_alphabetize -A -v latitude,longitude,"
-                "vertices_latitude,vertices_longitude "
-                "/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/"
-                "grids/ORCA025/ORCA025_grid-u.nc /a/uo_1.nc.temp",
-                stderr=subprocess.STDOUT, shell=True
-            ),
-            mock.call(
-                "ncks -h --no_alphabetize -7 --deflate=3 /a/uo_1.nc.temp "
-                "/a/uo_1.nc",
-                stderr=subprocess.STDOUT, shell=True
-            ),
-        ]
-        self.mock_subprocess.assert_has_calls(calls)
+        self.mock_copy.assert_called_once_with(
+            '/a/uo_1.nc', '/a/uo_1.nc.temp_final',
+            donor_path='/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/'
+                       'grids/ORCA025/ORCA025_grid-u.nc',
+            donor_variables=['latitude', 'longitude', 'vertices_latitude',
+                             'vertices_longitude']
+        )
 
 
 class TestFixGridOrca1V(NcoDataFixBaseTest):
     """
     Test FixGridOrca1V
     """
-    def test_subprocess_called_correctly(self):
+    def test_copy_called_correctly(self):
         """
-        Test that external calls are made correctly for FixGridOrca1V
+        Test that the file is copied correctly for FixGridOrca1V
         """
         fix = FixGridOrca1V('vo_1.nc', '/a')
         fix.apply_fix()
-        calls = [
-            mock.call(
-                "ncks -h --no_alphabetize -3 /a/vo_1.nc /a/vo_1.nc.temp",
-                stderr=subprocess.STDOUT, shell=True
-            ),
-            mock.call(
-                "ncks -h --no_alphabetize -A -v latitude,longitude,"
-                "vertices_latitude,vertices_longitude "
-                "/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/"
-                "grids/ORCA1/ORCA1_grid-v.nc /a/vo_1.nc.temp",
-                stderr=subprocess.STDOUT, shell=True
-            ),
-            mock.call(
-                "ncks -h --no_alphabetize -7 --deflate=3 /a/vo_1.nc.temp "
-                "/a/vo_1.nc",
-                stderr=subprocess.STDOUT, shell=True
-            ),
-        ]
-        self.mock_subprocess.assert_has_calls(calls)
+        self.mock_copy.assert_called_once_with(
+            '/a/vo_1.nc', '/a/vo_1.nc.temp_final',
+            donor_path='/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/'
+                       'grids/ORCA1/ORCA1_grid-v.nc',
+            donor_variables=['latitude', 'longitude', 'vertices_latitude',
+                             'vertices_longitude']
+        )
 
 
 class TestFixGridOrca025V(NcoDataFixBaseTest):
     """
     Test FixGridOrca025V
     """
-    def test_subprocess_called_correctly(self):
+    def test_copy_called_correctly(self):
         """
-        Test that external calls are made correctly for FixGridOrca025V
+        Test that the file is copied correctly for FixGridOrca025V
         """
         fix = FixGridOrca025V('vo_1.nc', '/a')
         fix.apply_fix()
-        calls = [
-            mock.call(
-                "ncks -h --no_alphabetize -3 /a/vo_1.nc /a/vo_1.nc.temp",
-                stderr=subprocess.STDOUT, shell=True
-            ),
-            mock.call(
-                "ncks -h --no_alphabetize -A -v latitude,longitude,"
-                "vertices_latitude,vertices_longitude "
-                "/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/"
-                "grids/ORCA025/ORCA025_grid-v.nc /a/vo_1.nc.temp",
-                stderr=subprocess.STDOUT, shell=True
-            ),
-            mock.call(
-                "ncks -h --no_alphabetize -7 --deflate=3 /a/vo_1.nc.temp "
-                "/a/vo_1.nc",
-                stderr=subprocess.STDOUT, shell=True
-            ),
-        ]
-        self.mock_subprocess.assert_has_calls(calls)
+        self.mock_copy.assert_called_once_with(
+            '/a/vo_1.nc', '/a/vo_1.nc.temp_final',
+            donor_path='/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/'
+                       'grids/ORCA025/ORCA025_grid-v.nc',
+            donor_variables=['latitude', 'longitude', 'vertices_latitude',
+                             'vertices_longitude']
+        )
 
 
 class TestFixCiceCoords1T(NcoDataFixBaseTest):
     """
     Test FixCiceCoords1T
     """
-    def test_subprocess_called_correctly(self):
+    def test_copy_called_correctly(self):
         """
-        Test that external calls are made correctly for FixCiceCoords1T
+        Test that the file is copied correctly for FixCiceCoords1T
         """
         fix = FixCiceCoords1T('siconc_1.nc', '/a')
         fix.apply_fix()
-        calls = [
-            mock.call(
-                "ncks -h --no_alphabetize -3 /a/siconc_1.nc "
-                "/a/siconc_1.nc.temp",
-                stderr=subprocess.STDOUT, shell=True
-            ),
-            mock.call(
-                "ncks -h --no_alphabetize -A -v latitude,longitude,"
-                "vertices_latitude,vertices_longitude "
-                "/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/cice_coords/"
-                "eORCA1/cice_eORCA1_coords_grid-t.nc /a/siconc_1.nc.temp",
-                stderr=subprocess.STDOUT, shell=True
-            ),
-            mock.call(
-                "ncks -h --no_alphabetize -7 --deflate=3 /a/siconc_1.nc.temp "
-                "/a/siconc_1.nc",
-                stderr=subprocess.STDOUT, shell=True
-            ),
-        ]
-        self.mock_subprocess.assert_has_calls(calls)
+        self.mock_copy.assert_called_once_with(
+            '/a/siconc_1.nc', '/a/siconc_1.nc.temp_final',
+            donor_path='/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/'
+                       'cice_coords/eORCA1/cice_eORCA1_coords_grid-t.nc',
+            donor_variables=['latitude', 'longitude', 'vertices_latitude',
+                             'vertices_longitude']
+        )
 
 
 class TestFixCiceCoords1UV(NcoDataFixBaseTest):
     """
     Test FixCiceCoords1UV
     """
-    def test_subprocess_called_correctly(self):
+    def test_copy_called_correctly(self):
         """
-        Test that external calls are made correctly for FixCiceCoords1UV
+        Test that the file is copied correctly for FixCiceCoords1UV
         """
         fix = FixCiceCoords1UV('siv_1.nc', '/a')
         fix.apply_fix()
-        calls = [
-            mock.call(
-                "ncks -h --no_alphabetize -3 /a/siv_1.nc "
-                "/a/siv_1.nc.temp",
-                stderr=subprocess.STDOUT, shell=True
-            ),
-            mock.call(
-                "ncks -h --no_alphabetize -A -v latitude,longitude,"
-                "vertices_latitude,vertices_longitude "
-                "/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/cice_coords/"
-                "eORCA1/cice_eORCA1_coords_grid-uv.nc /a/siv_1.nc.temp",
-                stderr=subprocess.STDOUT, shell=True
-            ),
-            mock.call(
-                "ncks -h --no_alphabetize -7 --deflate=3 /a/siv_1.nc.temp "
-                "/a/siv_1.nc",
-                stderr=subprocess.STDOUT, shell=True
-            ),
-        ]
-        self.mock_subprocess.assert_has_calls(calls)
+        self.mock_copy.assert_called_once_with(
+            '/a/siv_1.nc', '/a/siv_1.nc.temp_final',
+            donor_path='/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/'
+                       'cice_coords/eORCA1/cice_eORCA1_coords_grid-uv.nc',
+            donor_variables=['latitude', 'longitude', 'vertices_latitude',
+                             'vertices_longitude']
+        )
 
 
 class TestFixCiceCoords025T(NcoDataFixBaseTest):
     """
     Test FixCiceCoords025T
     """
-    def test_subprocess_called_correctly(self):
+    def test_copy_called_correctly(self):
         """
-        Test that external calls are made correctly for FixCiceCoords025T
+        Test that the file is copied correctly for FixCiceCoords025T
         """
         fix = FixCiceCoords025T('siconc_1.nc', '/a')
         fix.apply_fix()
-        calls = [
-            mock.call(
-                "ncks -h --no_alphabetize -3 /a/siconc_1.nc "
-                "/a/siconc_1.nc.temp",
-                stderr=subprocess.STDOUT, shell=True
-            ),
-            mock.call(
-                "ncks -h --no_alphabetize -A -v latitude,longitude,"
-                "vertices_latitude,vertices_longitude "
-                "/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/cice_coords/"
-                "eORCA025/cice_eORCA025_coords_grid-t.nc /a/siconc_1.nc.temp",
-                stderr=subprocess.STDOUT, shell=True
-            ),
-            mock.call(
-                "ncks -h --no_alphabetize -7 --deflate=3 /a/siconc_1.nc.temp "
-                "/a/siconc_1.nc",
-                stderr=subprocess.STDOUT, shell=True
-            ),
-        ]
-        self.mock_subprocess.assert_has_calls(calls)
+        self.mock_copy.assert_called_once_with(
+            '/a/siconc_1.nc', '/a/siconc_1.nc.temp_final',
+            donor_path='/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/'
+                       'cice_coords/eORCA025/cice_eORCA025_coords_grid-t.nc',
+            donor_variables=['latitude', 'longitude', 'vertices_latitude',
+                             'vertices_longitude']
+        )
 
 
 class TestFixCiceCoords025UV(NcoDataFixBaseTest):
     """
     Test FixCiceCoords025UV
     """
-    def test_subprocess_called_correctly(self):
+    def test_copy_called_correctly(self):
         """
-        Test that external calls are made correctly for FixCiceCoords025UV
+        Test that the file is copied correctly for FixCiceCoords025UV
         """
         fix = FixCiceCoords025UV('siv_1.nc', '/a')
         fix.apply_fix()
-        calls = [
-            mock.call(
-                "ncks -h --no_alphabetize -3 /a/siv_1.nc "
-                "/a/siv_1.nc.temp",
-                stderr=subprocess.STDOUT, shell=True
-            ),
-            mock.call(
-                "ncks -h --no_alphabetize -A -v latitude,longitude,"
-                "vertices_latitude,vertices_longitude "
-                "/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/cice_coords/"
-                "eORCA025/cice_eORCA025_coords_grid-uv.nc /a/siv_1.nc.temp",
-                stderr=subprocess.STDOUT, shell=True
-            ),
-            mock.call(
-                "ncks -h --no_alphabetize -7 --deflate=3 /a/siv_1.nc.temp "
-                "/a/siv_1.nc",
-                stderr=subprocess.STDOUT, shell=True
-            ),
-        ]
-        self.mock_subprocess.assert_has_calls(calls)
+        self.mock_copy.assert_called_once_with(
+            '/a/siv_1.nc', '/a/siv_1.nc.temp_final',
+            donor_path='/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/'
+                       'cice_coords/eORCA025/cice_eORCA025_coords_grid-uv.nc',
+            donor_variables=['latitude', 'longitude', 'vertices_latitude',
+                             'vertices_longitude']
+        )
 
 
 class TestFixCiceCoords12T(NcoDataFixBaseTest):
     """
     Test FixCiceCoords12T
     """
-    def test_subprocess_called_correctly(self):
+    def test_copy_called_correctly(self):
         """
-        Test that external calls are made correctly for FixCiceCoords12T
+        Test that the file is copied correctly for FixCiceCoords12T
         """
         fix = FixCiceCoords12T('siconc_1.nc', '/a')
         fix.apply_fix()
-        calls = [
-            mock.call(
-                "ncks -h --no_alphabetize -3 /a/siconc_1.nc "
-                "/a/siconc_1.nc.temp",
-                stderr=subprocess.STDOUT, shell=True
-            ),
-            mock.call(
-                "ncks -h --no_alphabetize -A -v latitude,longitude,"
-                "vertices_latitude,vertices_longitude "
-                "/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/cice_coords/"
-                "eORCA12/cice_eORCA12_coords_grid-t.nc /a/siconc_1.nc.temp",
-                stderr=subprocess.STDOUT, shell=True
-            ),
-            mock.call(
-                "ncks -h --no_alphabetize -7 --deflate=3 /a/siconc_1.nc.temp "
-                "/a/siconc_1.nc",
-                stderr=subprocess.STDOUT, shell=True
-            ),
-        ]
-        self.mock_subprocess.assert_has_calls(calls)
+        self.mock_copy.assert_called_once_with(
+            '/a/siconc_1.nc', '/a/siconc_1.nc.temp_final',
+            donor_path='/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/'
+                       'cice_coords/eORCA12/cice_eORCA12_coords_grid-t.nc',
+            donor_variables=['latitude', 'longitude', 'vertices_latitude',
+                             'vertices_longitude']
+        )
 
 
 class TestFixCiceCoords12UV(NcoDataFixBaseTest):
     """
     Test FixCiceCoords12UV
     """
-    def test_subprocess_called_correctly(self):
+    def test_copy_called_correctly(self):
         """
-        Test that external calls are made correctly for FixCiceCoords12UV
+        Test that the file is copied correctly for FixCiceCoords12UV
         """
         fix = FixCiceCoords12UV('siv_1.nc', '/a')
         fix.apply_fix()
-        calls = [
-            mock.call(
-                "ncks -h --no_alphabetize -3 /a/siv_1.nc "
-                "/a/siv_1.nc.temp",
-                stderr=subprocess.STDOUT, shell=True
-            ),
-            mock.call(
-                "ncks -h --no_alphabetize -A -v latitude,longitude,"
-                "vertices_latitude,vertices_longitude "
-                "/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/cice_coords/"
-                "eORCA12/cice_eORCA12_coords_grid-uv.nc /a/siv_1.nc.temp",
-                stderr=subprocess.STDOUT, shell=True
-            ),
-            mock.call(
-                "ncks -h --no_alphabetize -7 --deflate=3 /a/siv_1.nc.temp "
-                "/a/siv_1.nc",
-                stderr=subprocess.STDOUT, shell=True
-            ),
-        ]
-        self.mock_subprocess.assert_has_calls(calls)
+        self.mock_copy.assert_called_once_with(
+            '/a/siv_1.nc', '/a/siv_1.nc.temp_final',
+            donor_path='/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/'
+                       'cice_coords/eORCA12/cice_eORCA12_coords_grid-uv.nc',
+            donor_variables=['latitude', 'longitude', 'vertices_latitude',
+                             'vertices_longitude']
+        )
 
 
 class TestFixMaskCICEOrca1UV(NcoDataFixBaseTest):
@@ -1373,6 +1458,10 @@ class TestFixMaskCICEOrca1UV(NcoDataFixBaseTest):
         fix = FixMaskCICEOrca1UV('uo_1.nc', '/a')
         fix.apply_fix()
         calls = [
+            mock.call(
+                "ncks -h --no_alphabetize -L 0 /a/uo_1.nc /a/uo_1.nc.temp",
+                stderr=subprocess.STDOUT, shell=True
+            ),
             mock.call(
                 "ncks -h --no_alphabetize -A -v mask "
                 "/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/cice_masks/"
@@ -1381,12 +1470,12 @@ class TestFixMaskCICEOrca1UV(NcoDataFixBaseTest):
                 stderr=subprocess.STDOUT, shell=True
             ),
             mock.call(
-                "ncap2 -h -s 'where(mask!=0) uo=uo@_FillValue' "
+                "ncap2 -h -L 0 -s 'where(mask!=0) uo=uo@_FillValue' "
                 "/a/uo_1.nc.temp /a/uo_1.nc.temp_masked",
                 stderr=subprocess.STDOUT, shell=True
             ),
             mock.call(
-                "ncks -h --no_alphabetize -x -v mask "
+                "ncks -h --no_alphabetize -L 1 -x -v mask "
                 "/a/uo_1.nc.temp_masked /a/uo_1.nc.temp_final",
                 stderr=subprocess.STDOUT, shell=True
             ),
@@ -1406,6 +1495,10 @@ class TestFixMaskCICEOrca025T(NcoDataFixBaseTest):
         fix = FixMaskCICEOrca025T('sit_1.nc', '/a')
         fix.apply_fix()
         calls = [
+            mock.call(
+                "ncks -h --no_alphabetize -L 0 /a/sit_1.nc /a/sit_1.nc.temp",
+                stderr=subprocess.STDOUT, shell=True
+            ),
             mock.call(
                 "ncks -h --no_alphabetize -A -v mask "
                 "/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/cice_masks/"
@@ -1414,12 +1507,12 @@ class TestFixMaskCICEOrca025T(NcoDataFixBaseTest):
                 stderr=subprocess.STDOUT, shell=True
             ),
             mock.call(
-                "ncap2 -h -s 'where(mask!=0) sit=sit@_FillValue' "
+                "ncap2 -h -L 0 -s 'where(mask!=0) sit=sit@_FillValue' "
                 "/a/sit_1.nc.temp /a/sit_1.nc.temp_masked",
                 stderr=subprocess.STDOUT, shell=True
             ),
             mock.call(
-                "ncks -h --no_alphabetize -x -v mask "
+                "ncks -h --no_alphabetize -L 1 -x -v mask "
                 "/a/sit_1.nc.temp_masked /a/sit_1.nc.temp_final",
                 stderr=subprocess.STDOUT, shell=True
             ),
@@ -1439,6 +1532,10 @@ class TestFixMaskCICEOrca12T(NcoDataFixBaseTest):
         fix = FixMaskCICEOrca12T('sit_1.nc', '/a')
         fix.apply_fix()
         calls = [
+            mock.call(
+                "ncks -h --no_alphabetize -L 0 /a/sit_1.nc /a/sit_1.nc.temp",
+                stderr=subprocess.STDOUT, shell=True
+            ),
             mock.call(
                 "ncks -h --no_alphabetize -A -v mask "
                 "/gws/nopw/j04/primavera1/masks/HadGEM3Ocean_fixes/cice_masks/"
@@ -1447,12 +1544,12 @@ class TestFixMaskCICEOrca12T(NcoDataFixBaseTest):
                 stderr=subprocess.STDOUT, shell=True
             ),
             mock.call(
-                "ncap2 -h -s 'where(mask!=0) sit=sit@_FillValue' "
+                "ncap2 -h -L 0 -s 'where(mask!=0) sit=sit@_FillValue' "
                 "/a/sit_1.nc.temp /a/sit_1.nc.temp_masked",
                 stderr=subprocess.STDOUT, shell=True
             ),
             mock.call(
-                "ncks -h --no_alphabetize -x -v mask "
+                "ncks -h --no_alphabetize -L 1 -x -v mask "
                 "/a/sit_1.nc.temp_masked /a/sit_1.nc.temp_final",
                 stderr=subprocess.STDOUT, shell=True
             ),
@@ -0,0 +1,143 @@
+"""
+test_registry.py
+
+Unit tests for pre_proc.file_fix.registry
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import pre_proc.file_fix
+from pre_proc.exceptions import UnknownFixError
+from pre_proc.file_fix import registry
+from pre_proc.file_fix.abstract import AttributeAdd
+
+
+class TestIndex(unittest.TestCase):
+    """ Test the index of the fixes """
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.addCleanup(registry.load_index.cache_clear)
+
+    def test_index_up_to_date(self):
+        """ Test that bin/make_fix_index.py has been run """
+        fixes = registry.load_all()
+        expected = {name: registry.fix_info(fix_class)
+                    for name, fix_class in fixes.items()}
+        self.assertEqual(registry.load_index(), expected)
+
+    def test_write_index(self):
+        """ Test that one line is written for each fix """
+        path = os.path.join(self.temp_dir, 'index.json')
+        num_fixes = registry.write_index(path)
+        with open(path) as fh:
+            lines = fh.readlines()
+        self.assertEqual(len(lines), num_fixes + 2)
+        with open(path) as fh:
+            index = json.load(fh)
+        self.assertEqual(index['ParentBranchTimeAdd'], {
+            'module': 'pre_proc.file_fix.attribute_add',
+            'kind': 'attribute',
+            'reads': [],
+            'writes': ['attributes']
+        })
+
+
+class TestGetFixClass(unittest.TestCase):
+    """ Test get_fix_class """
+    def test_known(self):
+        """ Test that a fix is returned """
+        fix_class = registry.get_fix_class('ZZZAddHeight2m')
+        self.assertEqual(fix_class.__name__, 'ZZZAddHeight2m')
+        self.assertEqual(fix_class.__module__,
+                         'pre_proc.file_fix.data_fixes')
+
+    def test_imports_module(self):
+        """ Test that the module defining the fix is imported if required """
+        fix_class = registry.get_fix_class('ParentBranchTimeAdd')
+        with mock.patch.dict(registry._fixes):
+            del registry._fixes['ParentBranchTimeAdd']
+            with mock.patch('pre_proc.file_fix.registry.importlib.'
+                            'import_module') as mock_import:
+                mock_import.side_effect = (
+                    lambda name: registry.register(fix_class)
+                )
+                self.assertIs(registry.get_fix_class('ParentBranchTimeAdd'),
+                              fix_class)
+            mock_import.assert_called_once_with(
+                'pre_proc.file_fix.attribute_add'
+            )
+
+    def test_unknown(self):
+        """ Test that an unknown fix raises an exception """
+        self.assertRaisesRegex(UnknownFixError, 'Unknown fix NotAFix',
+                               registry.get_fix_class, 'NotAFix')
+
+    def test_abstract(self):
+        """ Test that an abstract class isn't returned """
+        self.assertRaises(UnknownFixError, registry.get_fix_class,
+                          'AttributeAdd')
+
+    def test_module_attribute(self):
+        """ Test that fixes can be accessed as attributes of file_fix """
+        self.assertIs(pre_proc.file_fix.ParentBranchTimeAdd,
+                      registry.get_fix_class('ParentBranchTimeAdd'))
+        self.assertRaises(AttributeError, getattr, pre_proc.file_fix,
+                          'NotAFix')
+
+
+class TestRegistration(unittest.TestCase):
+    """ Test that subclasses of FileFix are registered """
+    def test_subclass_registered(self):
+        """ Test that a new subclass is registered with its metadata """
+        with mock.patch.dict(registry._fixes):
+            class NewFix(AttributeAdd):
+                def _calculate_new_value(self):
+                    self.new_value = 'b'
+
+            self.assertIs(registry.get_fix_class('NewFix'), NewFix)
+            self.assertEqual(registry.fix_info(NewFix),
+                             registry.FixInfo('NewFix', __name__,
+                                              'attribute', [],
+                                              ['attributes']))
+        self.assertNotIn('NewFix', registry._fixes)
+
+
+class TestClassifyFixes(unittest.TestCase):
+    """ Test classify_fixes """
+    def test_attribute(self):
+        """ Test fixes that only change attributes """
+        self.assertEqual(registry.classify_fixes(['ParentBranchTimeAdd',
+                                                  'ForcingIndexIntFix']),
+                         'attribute')
+
+    def test_data(self):
+        """ Test that any data fix makes the fixes data fixes """
+        self.assertEqual(registry.classify_fixes(['ParentBranchTimeAdd',
+                                                  'ZZZAddHeight2m']),
+                         'data')
+
+    def test_none(self):
+        """ Test no fixes """
+        self.assertIsNone(registry.classify_fixes([]))
+
+    def test_no_imports(self):
+        """ Test that the fixes' modules aren't imported """
+        with mock.patch.dict(sys.modules):
+            sys.modules.pop('pre_proc.file_fix.data_fixes', None)
+            registry.classify_fixes(['ZZZAddHeight2m'])
+            self.assertNotIn('pre_proc.file_fix.data_fixes', sys.modules)
+
+    def test_unknown(self):
+        """ Test that an unknown fix raises an exception """
+        self.assertRaises(UnknownFixError, registry.classify_fixes,
+                          ['NotAFix'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+"""
+test_metrics.py
+
+Unit tests for pre_proc.metrics
+"""
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from pre_proc.metrics import Histogram, Metrics, MetricsExporter
+from pre_proc.results import FileResult, SKIPPED
+
+
+def make_result(error=None, status=None, duration=2., fix_durations=None,
+                bytes_in=100, bytes_out=120):
+    """
+    Make a finished result without a file.
+    """
+    result = FileResult('/a/tas.nc', '/a', ['ToDegC'])
+    result.finish(error, status)
+    result.started = result.finished - duration
+    result.fix_durations = fix_durations or {}
+    result.bytes_in = bytes_in
+    if error is None:
+        result.bytes_out = bytes_out
+    return result
+
+
+class TestHistogram(unittest.TestCase):
+    """ Test pre_proc.metrics.Histogram """
+    def test_cumulative(self):
+        """ Test that each bucket counts the values up to its bound """
+        histogram = Histogram((1., 10.))
+        for value in (0.5, 1., 5., 50.):
+            histogram.observe(value)
+        self.assertEqual(histogram.cumulative_counts(),
+                         [(1., 2), (10., 3), (float('inf'), 4)])
+        self.assertEqual(histogram.to_dict(), {
+            'count': 4, 'sum': 56.5, 'mean': 14.125,
+            'buckets': {'1.0': 2, '10.0': 3, '+Inf': 4}
+        })
+
+    def test_empty(self):
+        """ Test that the mean of no values is None """
+        self.assertIsNone(Histogram().to_dict()['mean'])
+
+
+class TestMetrics(unittest.TestCase):
+    """ Test pre_proc.metrics.Metrics """
+    def setUp(self):
+        self.metrics = Metrics({'worker': 'node1:10'}, buckets=(1., 10.))
+        self.metrics.add(make_result(fix_durations={'ToDegC': 1.5}))
+        self.metrics.add(make_result(fix_durations={'ToDegC': 0.5}))
+        self.metrics.add(make_result(ValueError('bad'), duration=20.))
+        self.metrics.add(make_result('Blocked', SKIPPED, duration=0.))
+
+    def test_snapshot(self):
+        """ Test the counters and rates """
+        self.metrics.files_planned = 10
+        with mock.patch('pre_proc.metrics.time.time',
+                        return_value=self.metrics.started + 2.):
+            snapshot = self.metrics.snapshot()
+        self.assertEqual(snapshot['files'],
+                         {'done': 2, 'failed': 1, 'skipped': 1, 'total': 4})
+        self.assertEqual(snapshot['files_remaining'], 6)
+        self.assertEqual(snapshot['files_per_second'], 2.)
+        self.assertEqual(snapshot['bytes_read'], 200)
+        self.assertEqual(snapshot['bytes_written'], 240)
+        self.assertEqual(snapshot['bytes_per_second'], 100.)
+        self.assertEqual(snapshot['failures'], {'ValueError': 1})
+        self.assertEqual(snapshot['file_seconds']['count'], 3)
+        self.assertEqual(snapshot['fix_seconds']['ToDegC']['buckets'],
+                         {'1.0': 1, '10.0': 2, '+Inf': 2})
+        json.dumps(snapshot)
+
+    def test_prometheus_text(self):
+        """ Test the text exposition format """
+        self.metrics.set_queue_files({'pending': 5})
+        lines = self.metrics.prometheus_text().splitlines()
+        self.assertIn('# TYPE pre_proc_files_total counter', lines)
+        self.assertIn('pre_proc_files_total{worker="node1:10",'
+                      'status="done"} 2', lines)
+        self.assertIn('pre_proc_failures_total{worker="node1:10",'
+                      'error_class="ValueError"} 1', lines)
+        self.assertIn('pre_proc_fix_duration_seconds_bucket{'
+                      'worker="node1:10",fix="ToDegC",le="+Inf"} 2', lines)
+        self.assertIn('pre_proc_fix_duration_seconds_sum{worker="node1:10",'
+                      'fix="ToDegC"} 2.0', lines)
+        self.assertIn('pre_proc_queue_files{worker="node1:10",'
+                      'state="pending"} 5', lines)
+        self.assertFalse([line for line in lines
+                          if line.startswith('pre_proc_files_planned')])
+
+    def test_label_escaping(self):
+        """ Test that quotes in label values are escaped """
+        metrics = Metrics({'worker': 'a"b\\c'})
+        self.assertIn('{worker="a\\"b\\\\c"}', metrics.prometheus_text())
+
+
+class TestMetricsExporter(unittest.TestCase):
+    """ Test pre_proc.metrics.MetricsExporter """
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.textfile = os.path.join(self.temp_dir, 'pre_proc.prom')
+        self.json_file = os.path.join(self.temp_dir, 'pre_proc.json')
+        self.metrics = Metrics()
+
+    def test_write(self):
+        """ Test that the files are rewritten when the exporter stops """
+        update = mock.Mock()
+        with MetricsExporter(self.metrics, self.textfile, self.json_file,
+                             interval=3600., update=update):
+            self.metrics.add(make_result())
+        with open(self.json_file) as fh:
+            self.assertEqual(json.load(fh)['files']['done'], 1)
+        with open(self.textfile) as fh:
+            self.assertIn('pre_proc_files_total{status="done"} 1\n',
+                          fh.read())
+        self.assertEqual(update.call_count, 2)
+        self.assertEqual(sorted(os.listdir(self.temp_dir)),
+                         ['pre_proc.json', 'pre_proc.prom'])
+
+    def test_periodic(self):
+        """ Test that the files are written while the exporter runs """
+        exporter = MetricsExporter(self.metrics, json_file=self.json_file,
+                                   interval=0.01)
+        with mock.patch.object(exporter, 'write') as mock_write:
+            with exporter:
+                while mock_write.call_count < 3:
+                    time.sleep(0.01)
+
+    def test_failure(self):
+        """ Test that a failure to write is logged """
+        textfile = os.path.join(self.temp_dir, 'missing', 'pre_proc.prom')
+        with self.assertLogs('pre_proc.metrics', 'WARNING'):
+            MetricsExporter(self.metrics, textfile).write()
+
+
+if __name__ == '__main__':
+    unittest.main()
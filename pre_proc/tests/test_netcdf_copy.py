@@ -0,0 +1,195 @@
+"""
+test_netcdf_copy.py
+
+Unit tests for pre_proc.netcdf_copy
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import h5py
+from netCDF4 import Dataset
+import numpy as np
+
+from pre_proc.exceptions import UnsupportedNetcdfError
+from pre_proc.netcdf_copy import copy_netcdf
+
+
+def make_file(path, data_model='NETCDF4_CLASSIC'):
+    """
+    Create a small CMIP6-like file at `path`.
+
+    :param str path: The path of the file to create
+    :param str data_model: The netCDF format to create
+    """
+    with Dataset(path, 'w', format=data_model) as rootgrp:
+        rootgrp.variable_id = 'ta7h'
+        rootgrp.createDimension('time', None)
+        rootgrp.createDimension('lev', 3)
+        rootgrp.createDimension('lat', 4)
+        time = rootgrp.createVariable('time', 'f8', ('time',))
+        time.units = 'days since 1850-01-01'
+        time[:] = np.arange(5)
+        lev = rootgrp.createVariable('lev', 'f8', ('lev',))
+        lev.units = 'Pa'
+        lev[:] = [100000., 85000., 50000.]
+        lat = rootgrp.createVariable('lat', 'f8', ('lat',))
+        lat.standard_name = 'latitude'
+        lat.units = 'degrees_north'
+        lat[:] = [-45., -15., 15., 45.]
+        kwargs = {}
+        if data_model.startswith('NETCDF4'):
+            kwargs = {'zlib': True, 'complevel': 1, 'shuffle': True,
+                      'chunksizes': (1, 3, 4)}
+        ta = rootgrp.createVariable('ta7h', 'f4', ('time', 'lev', 'lat'),
+                                    fill_value=1.e20, **kwargs)
+        ta.units = 'K'
+        ta[:] = np.arange(60, dtype=np.float32).reshape(5, 3, 4)
+        height = rootgrp.createVariable('height', 'f8', ())
+        height.units = 'm'
+        height[...] = 2.
+
+
+class CopyBaseTest(unittest.TestCase):
+    """ Create a source file in a temporary directory """
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.source = os.path.join(self.temp_dir, 'ta_1.nc')
+        self.dest = os.path.join(self.temp_dir, 'ta_1.nc.temp')
+        make_file(self.source)
+
+
+class TestCopyNetcdf(CopyBaseTest):
+    """ Test pre_proc.netcdf_copy.copy_netcdf """
+    def test_unchanged_copy(self):
+        """ Test that a straight copy has the same contents """
+        copy_netcdf(self.source, self.dest)
+        with Dataset(self.source) as src, Dataset(self.dest) as dst:
+            self.assertEqual(src.data_model, dst.data_model)
+            self.assertEqual(list(src.variables), list(dst.variables))
+            self.assertEqual(src.variable_id, dst.variable_id)
+            for var_name in src.variables:
+                np.testing.assert_array_equal(src[var_name][:],
+                                              dst[var_name][:])
+            self.assertEqual(src['ta7h'].filters(), dst['ta7h'].filters())
+            self.assertEqual(src['ta7h'].chunking(), dst['ta7h'].chunking())
+            self.assertEqual(dst['ta7h']._FillValue, np.float32(1.e20))
+            self.assertTrue(dst.dimensions['time'].isunlimited())
+            self.assertEqual(len(dst.dimensions['time']), 5)
+
+    def test_chunks_passed_through(self):
+        """ Test that the compressed chunks are identical """
+        copy_netcdf(self.source, self.dest, rename_variables={'ta7h': 'ta'})
+        with h5py.File(self.source, 'r') as src, \
+                h5py.File(self.dest, 'r') as dst:
+            for index in range(5):
+                offset = (index, 0, 0)
+                self.assertEqual(src['ta7h'].id.read_direct_chunk(offset),
+                                 dst['ta'].id.read_direct_chunk(offset))
+
+    def test_rename(self):
+        """ Test that dimensions and variables are renamed """
+        copy_netcdf(self.source, self.dest,
+                    rename_dimensions={'lev': 'plev'},
+                    rename_variables={'lev': 'plev'})
+        with Dataset(self.dest) as dst:
+            self.assertIn('plev', dst.dimensions)
+            self.assertNotIn('lev', dst.variables)
+            self.assertEqual(dst['plev'].units, 'Pa')
+            self.assertEqual(dst['ta7h'].dimensions, ('time', 'plev', 'lat'))
+
+    def test_global_attributes(self):
+        """ Test that global attributes are set """
+        copy_netcdf(self.source, self.dest,
+                    global_attributes={'variable_id': 'ta'})
+        with Dataset(self.dest) as dst:
+            self.assertEqual(dst.variable_id, 'ta')
+
+    def test_donor_variables(self):
+        """ Test that variables are replaced and added from a donor """
+        donor = os.path.join(self.temp_dir, 'grid.nc')
+        with Dataset(donor, 'w') as rootgrp:
+            rootgrp.createDimension('lat', 4)
+            rootgrp.createDimension('bnds', 2)
+            lat = rootgrp.createVariable('lat', 'f8', ('lat',))
+            lat.units = 'degrees'
+            lat[:] = [-60., -20., 20., 60.]
+            lat_bnds = rootgrp.createVariable('lat_bnds', 'f8',
+                                              ('lat', 'bnds'))
+            lat_bnds[:] = np.ones((4, 2))
+        copy_netcdf(self.source, self.dest, donor_path=donor,
+                    donor_variables=['lat', 'lat_bnds'])
+        with Dataset(self.dest) as dst:
+            np.testing.assert_array_equal(dst['lat'][:],
+                                          [-60., -20., 20., 60.])
+            self.assertEqual(dst['lat'].units, 'degrees')
+            self.assertEqual(dst['lat'].standard_name, 'latitude')
+            self.assertEqual(dst['lat_bnds'].shape, (4, 2))
+            self.assertEqual(list(dst.variables)[:4],
+                             ['time', 'lev', 'lat', 'ta7h'])
+
+    def test_donor_closed(self):
+        """ Test that every file is closed if the copy fails """
+        donor = os.path.join(self.temp_dir, 'grid.nc')
+        with Dataset(donor, 'w') as rootgrp:
+            rootgrp.createDimension('lat', 4)
+        opened = []
+
+        def open_dataset(*args, **kwargs):
+            rootgrp = Dataset(*args, **kwargs)
+            opened.append(rootgrp)
+            return rootgrp
+
+        # The new file can't be created in a directory that doesn't exist
+        dest = os.path.join(self.temp_dir, 'missing', 'ta_1.nc.temp')
+        with mock.patch('pre_proc.netcdf_copy.netCDF4.Dataset',
+                        side_effect=open_dataset):
+            self.assertRaises(OSError, copy_netcdf, self.source, dest,
+                              donor_path=donor, donor_variables=['lat'])
+        self.assertEqual(len(opened), 2)
+        self.assertFalse(any(rootgrp.isopen() for rootgrp in opened))
+
+    def test_groups(self):
+        """ Test that files with groups can't be copied """
+        make_file(self.source, 'NETCDF4')
+        with Dataset(self.source, 'a') as rootgrp:
+            rootgrp.createGroup('extra')
+        self.assertRaisesRegex(UnsupportedNetcdfError,
+                               'copying netCDF groups is not supported',
+                               copy_netcdf, self.source, self.dest)
+
+    def test_netcdf3(self):
+        """ Test that netCDF3 files have their values copied """
+        make_file(self.source, 'NETCDF3_64BIT_OFFSET')
+        copy_netcdf(self.source, self.dest, rename_variables={'ta7h': 'ta'})
+        with Dataset(self.source) as src, Dataset(self.dest) as dst:
+            self.assertEqual(dst.data_model, 'NETCDF3_64BIT_OFFSET')
+            np.testing.assert_array_equal(src['ta7h'][:], dst['ta'][:])
+
+    def test_transforms(self):
+        """ Test that values and attributes are changed """
+        with Dataset(self.source, 'a') as rootgrp:
+            rootgrp['ta7h'][0, 0, 0] = 1.e20
+        copy_netcdf(self.source, self.dest,
+                    transforms={'ta7h': lambda values: values * 2},
+                    variable_attributes={'ta7h': {'units': 'degC'}},
+                    threads=2)
+        with Dataset(self.source) as src, Dataset(self.dest) as dst:
+            self.assertEqual(dst['ta7h'].units, 'degC')
+            self.assertEqual(dst['ta7h'].filters(), src['ta7h'].filters())
+            expected = src['ta7h'][:] * 2
+            np.testing.assert_array_equal(dst['ta7h'][:], expected)
+            self.assertTrue(dst['ta7h'][:].mask[0, 0, 0])
+            np.testing.assert_array_equal(dst['lat'][:], src['lat'][:])
+
+    def test_transforms_netcdf3(self):
+        """ Test that values are changed in netCDF3 files """
+        make_file(self.source, 'NETCDF3_64BIT_OFFSET')
+        copy_netcdf(self.source, self.dest,
+                    transforms={'ta7h': lambda values: values + 1})
+        with Dataset(self.source) as src, Dataset(self.dest) as dst:
+            np.testing.assert_array_equal(dst['ta7h'][:],
+                                          src['ta7h'][:] + 1)
@@ -0,0 +1,159 @@
+"""
+test_orchestrator.py
+
+Unit tests for pre_proc.orchestrator
+"""
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from pre_proc.common import blocking, run_command
+from pre_proc.orchestrator import AsyncOrchestrator, command_arguments
+
+
+class TestCommandArguments(unittest.TestCase):
+    """ Test pre_proc.orchestrator.command_arguments """
+    def test_quoted(self):
+        """ Test that quoted values are a single argument """
+        self.assertEqual(
+            command_arguments("ncatted -h -a license,global,o,c,'Data (CC) "
+                              "; more' /a/b.nc"),
+            ['ncatted', '-h', '-a', 'license,global,o,c,Data (CC) ; more',
+             '/a/b.nc']
+        )
+
+    def test_operators(self):
+        """ Test that commands using the shell's operators are identified """
+        self.assertIsNone(command_arguments('ncks -A a.nc b.nc > log'))
+        self.assertIsNone(command_arguments('ncks a.nc b.nc && rm a.nc'))
+
+    def test_expansions(self):
+        """ Test that commands using expansions are identified """
+        self.assertIsNone(command_arguments('rm $TMPDIR/a.nc'))
+        self.assertIsNone(command_arguments('rm *.temp'))
+
+
+class TestAsyncOrchestrator(unittest.TestCase):
+    """ Test pre_proc.orchestrator.AsyncOrchestrator """
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.filepaths = [os.path.join(self.temp_dir, 'file{}.nc'.format(i))
+                          for i in range(6)]
+        self.python_running = 0
+        self.max_python_running = 0
+
+    def _fix(self, filepath):
+        """ A fix that runs two commands in order """
+        self.python_running += 1
+        self.max_python_running = max(self.max_python_running,
+                                      self.python_running)
+        # Another file would run now if the turn wasn't held
+        time.sleep(0.01)
+        self.python_running -= 1
+        run_command('sleep 0.2')
+        run_command("sh -c 'echo first >> {}'".format(filepath))
+        run_command("sh -c 'echo second >> {}'".format(filepath))
+        return os.path.basename(filepath)
+
+    def test_concurrent(self):
+        """ Test that the files' commands run concurrently """
+        orchestrator = AsyncOrchestrator(max_processes=3,
+                                         max_io_per_filesystem=3)
+        start = time.time()
+        results = orchestrator.run(self._fix, self.filepaths)
+        self.assertLess(time.time() - start, 1.)
+        self.assertEqual(results, ['file{}.nc'.format(i) for i in range(6)])
+        self.assertEqual(orchestrator.peak_processes, 3)
+        self.assertEqual(self.max_python_running, 1)
+
+    def test_order(self):
+        """ Test that each file's commands run in order """
+        AsyncOrchestrator().run(self._fix, self.filepaths)
+        for filepath in self.filepaths:
+            with open(filepath) as fh:
+                self.assertEqual(fh.read(), 'first\nsecond\n')
+
+    def test_filesystem_bound(self):
+        """ Test that commands on one filesystem are limited """
+        orchestrator = AsyncOrchestrator(max_processes=4,
+                                         max_io_per_filesystem=2)
+        orchestrator.run(self._fix, self.filepaths)
+        self.assertEqual(orchestrator.peak_filesystem_processes, 2)
+
+    def test_failure(self):
+        """ Test that a failed command raises an exception for its file """
+        def fix(filepath):
+            run_command('false')
+
+        results = AsyncOrchestrator().run(fix, self.filepaths[:2])
+        self.assertEqual(len(results), 2)
+        for result in results:
+            self.assertIsInstance(result, RuntimeError)
+            self.assertIn('Command did not complete', str(result))
+
+    def test_output(self):
+        """ Test that the output is returned """
+        results = AsyncOrchestrator().run(
+            lambda filepath: run_command('echo a b'), self.filepaths[:1]
+        )
+        self.assertEqual(results, [['a b']])
+
+    def test_blocking_overlaps(self):
+        """ Test that two files' copies run at the same time """
+        both_copying = threading.Barrier(2, timeout=5)
+
+        def fix(filepath):
+            with blocking(filepath):
+                # Only returns once the other file is copying too
+                both_copying.wait()
+                shutil.copyfile(__file__, filepath)
+            return os.path.getsize(filepath)
+
+        results = AsyncOrchestrator().run(fix, self.filepaths[:2])
+        self.assertEqual(results, [os.path.getsize(__file__)] * 2)
+
+    def test_blocking_filesystem_bound(self):
+        """ Test that blocking code on one filesystem is limited """
+        copying = []
+        self.max_copying = 0
+
+        def fix(filepath):
+            with blocking(filepath):
+                copying.append(filepath)
+                self.max_copying = max(self.max_copying, len(copying))
+                time.sleep(0.05)
+                copying.remove(filepath)
+
+        AsyncOrchestrator(max_io_per_filesystem=2).run(fix, self.filepaths)
+        self.assertEqual(self.max_copying, 2)
+
+    def test_blocking_turn(self):
+        """ Test that the turn is taken again after blocking code """
+        def fix(filepath):
+            with blocking():
+                time.sleep(0.05)
+            self.python_running += 1
+            self.max_python_running = max(self.max_python_running,
+                                          self.python_running)
+            time.sleep(0.01)
+            self.python_running -= 1
+
+        AsyncOrchestrator().run(fix, self.filepaths)
+        self.assertEqual(self.max_python_running, 1)
+
+    def test_same_output(self):
+        """ Test that the output matches running the command directly """
+        command = "printf 'a b\\nc\\n'"
+        results = AsyncOrchestrator().run(
+            lambda filepath: run_command(command), self.filepaths[:1]
+        )
+        self.assertEqual(results, [run_command(command)])
+        self.assertEqual(results, [['a b', 'c']])
+
+
+if __name__ == '__main__':
+    unittest.main()
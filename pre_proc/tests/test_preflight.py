@@ -0,0 +1,242 @@
+"""
+test_preflight.py
+
+Unit tests for pre_proc.preflight
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from netCDF4 import Dataset
+
+from pre_proc.dataset import DatasetGroup
+from pre_proc.exceptions import AttributeNotFoundError, TimeOffsetError
+from pre_proc.file_fix import get_fix_class
+from pre_proc.preflight import (check_file, FileHeader, preflight,
+                                problems_by_fix)
+
+
+def make_file(filepath, latitudes=(10., 0., -10.), units='K',
+              further_info_url='http://furtherinfo.es-doc.org/CMIP6.a'):
+    """
+    Write a small file with a latitude coordinate and a data variable.
+    """
+    with Dataset(filepath, 'w') as rootgrp:
+        rootgrp.further_info_url = further_info_url
+        rootgrp.createDimension('lat', len(latitudes))
+        lat = rootgrp.createVariable('lat', 'f8', ('lat',))
+        lat.standard_name = 'latitude'
+        lat[:] = latitudes
+        tos = rootgrp.createVariable('tos', 'f4', ('lat',))
+        tos.units = units
+        tos[:] = 280.
+
+
+class PreflightBaseTest(unittest.TestCase):
+    """ Create files in a temporary directory """
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.good = os.path.join(self.temp_dir,
+                                 'tos_Omon_M_e_r1i1p1f1_gn_1950-1950.nc')
+        make_file(self.good)
+        self.bad = os.path.join(self.temp_dir,
+                                'tos_Omon_M_e_r1i1p1f1_gn_1951-1951.nc')
+        make_file(self.bad, latitudes=(-10., 0., 10.), units='degC',
+                  further_info_url='https://furtherinfo.es-doc.org/a')
+
+
+class TestFileHeader(PreflightBaseTest):
+    """ Test pre_proc.preflight.FileHeader """
+    def test_from_file(self):
+        """ Test that the header is read """
+        header = FileHeader.from_file(self.good)
+        self.assertEqual(header.filename, os.path.basename(self.good))
+        self.assertEqual(header.global_attributes['further_info_url'],
+                         'http://furtherinfo.es-doc.org/CMIP6.a')
+        self.assertEqual(header.variable_attributes['tos'], {'units': 'K'})
+        self.assertEqual(header.dimensions, {'lat': 3})
+        self.assertEqual(header.variable_values['lat'], [10., 0.])
+
+    def test_leading_values(self):
+        """ Test that coordinates are found by their standard name """
+        header = FileHeader.from_file(self.good)
+        self.assertEqual(header.leading_values('latitude'), [10., 0.])
+        self.assertEqual(header.leading_values('longitude'), [])
+
+    def test_delete_attribute(self):
+        """ Test that a fix deleting an attribute updates the header """
+        header = FileHeader('tos_Omon_M_e_r1i1p1f1_gn_1950-1950.nc',
+                            variable_attributes={
+                                'tos': {'units': 'K', 'cell_measures': 'a'}
+                            })
+        fix = get_fix_class('CellMeasuresDelete')(header.filename, '/a')
+        fix.update_header(header)
+        self.assertEqual(header.variable_attributes['tos'], {'units': 'K'})
+
+
+class TestCheckFile(PreflightBaseTest):
+    """ Test pre_proc.preflight.check_file """
+    fix_names = ['LatDirection', 'ToDegC', 'FurtherInfoUrlPrimToHttps']
+
+    def test_passes(self):
+        """ Test a file that all of the fixes can be applied to """
+        self.assertEqual(check_file(self.good, self.fix_names), [])
+
+    def test_fails(self):
+        """ Test that each fix that would fail is reported """
+        problems = check_file(self.bad, self.fix_names)
+        self.assertEqual([fix_name for fix_name, _error in problems],
+                         self.fix_names)
+        self.assertIn('Latitude is not decreasing', problems[0][1])
+        self.assertIn('Units are not K', problems[1][1])
+
+    def test_missing_attribute(self):
+        """ Test that an attribute that's needed is missing """
+        problems = check_file(self.good, ['ParentBranchTimeDoubleFix'])
+        self.assertEqual(problems, [
+            ('ParentBranchTimeDoubleFix',
+             'Cannot find attribute branch_time_in_parent in file '
+             'tos_Omon_M_e_r1i1p1f1_gn_1950-1950.nc')
+        ])
+
+    def test_no_preconditions(self):
+        """ Test that fixes without preconditions pass """
+        self.assertEqual(check_file(self.bad, ['LicenseAdd']), [])
+
+    def test_earlier_fix_adds(self):
+        """ Test that an attribute added by an earlier fix is found """
+        self.assertEqual(check_file(self.good, ['ChildBranchTimeAdd',
+                                                'ChildBranchTimeDoubleFix']),
+                         [])
+
+    def test_earlier_fix_value(self):
+        """ Test that a fix is checked against an earlier fix's value """
+        problems = check_file(self.good, ['TrackingIdNew', 'TrackingIdFix'])
+        self.assertEqual(len(problems), 1)
+        self.assertEqual(problems[0][0], 'TrackingIdFix')
+        self.assertIn('starts with hdl:', problems[0][1])
+
+    def test_unexpected_error(self):
+        """
+        Test that an unexpected error from a fix is reported and the later
+        fixes are still checked
+        """
+        fix_class = get_fix_class('LatDirection')
+        with mock.patch.object(fix_class, 'check',
+                               side_effect=TypeError('bad attribute')):
+            problems = check_file(self.bad, self.fix_names)
+        self.assertEqual(problems[0],
+                         ('LatDirection', 'TypeError: bad attribute'))
+        self.assertEqual([fix_name for fix_name, _error in problems],
+                         self.fix_names)
+
+    def test_unexpected_header_error(self):
+        """ Test that an unexpected error reading the header is reported """
+        with mock.patch.object(FileHeader, 'from_file',
+                               side_effect=KeyError('units')):
+            problems = check_file(self.good, ['ToDegC', 'LicenseAdd'])
+        self.assertEqual(problems, [('ToDegC', "KeyError: 'units'"),
+                                    ('LicenseAdd', "KeyError: 'units'")])
+
+    def test_missing_reference_file(self):
+        """ Test that a missing file that a fix copies from is reported """
+        problems = check_file(self.good, ['FixMaskOrca1TSurface'])
+        self.assertEqual(len(problems), 1)
+        self.assertIn('primavera_byte_masks.nc', problems[0][1])
+
+    def test_unreadable(self):
+        """ Test that every fix fails if the file can't be read """
+        filepath = os.path.join(self.temp_dir, 'broken.nc')
+        with open(filepath, 'w') as fh:
+            fh.write('not netCDF')
+        self.assertEqual(check_file(filepath, ['ToDegC', 'LatDirection']),
+                         [('ToDegC', 'Unable to load file ' + filepath),
+                          ('LatDirection', 'Unable to load file ' + filepath)])
+
+
+class TestFixChecks(unittest.TestCase):
+    """ Test the check() method of fixes against headers """
+    def _check(self, fix_name, header):
+        """ Check a fix against a header """
+        get_fix_class(fix_name)(header.filename, '/a').check(header)
+
+    def test_source_id_needed(self):
+        """ Test that both of the attributes that are read are needed """
+        header = FileHeader('tas_Amon_M_e_r1i1p1f1_gn_1950-1950.nc', {
+            'further_info_url': 'http://furtherinfo.es-doc.org/CMIP6.a'
+        })
+        self.assertRaisesRegex(AttributeNotFoundError, 'source_id',
+                               self._check,
+                               'FurtherInfoUrlAWISourceIdAndHttps', header)
+        header.global_attributes['source_id'] = 'AWI-CM-1-1-HR'
+        self._check('FurtherInfoUrlAWISourceIdAndHttps', header)
+
+    def test_time_units(self):
+        """ Test that the time units need a reference date """
+        header = FileHeader('tas_Amon_M_e_r1i1p1f1_gn_1950-1950.nc',
+                            variable_attributes={'time': {'units': 'days'}})
+        self.assertRaisesRegex(AttributeNotFoundError, 'time.units',
+                               self._check, 'SetTimeReference1949', header)
+        header.variable_attributes['time']['units'] = 'days since 1950-1-1'
+        self._check('SetTimeReference1949', header)
+
+    def test_integer_time_offset(self):
+        """ Test that integer times can only be moved by whole units """
+        header = FileHeader('tas_Amon_M_e_r1i1p1f1_gn_1950-1950.nc',
+                            variable_attributes={'time': {
+                                'units': 'days since 1950-01-01 12:00:00',
+                                'bounds': 'time_bnds'
+                            }},
+                            variable_kinds={'time': 'f', 'time_bnds': 'i'})
+        self.assertRaisesRegex(TimeOffsetError, 'offset 365.5 .* time_bnds',
+                               self._check, 'SetTimeReference1949', header)
+        header.variable_kinds['time_bnds'] = 'f'
+        self._check('SetTimeReference1949', header)
+        header.variable_kinds['time'] = 'i'
+        header.variable_attributes['time']['units'] = 'days since 1950-1-1'
+        self._check('SetTimeReference1949', header)
+
+
+class TestPreflight(PreflightBaseTest):
+    """ Test pre_proc.preflight.preflight """
+    def setUp(self):
+        super().setUp()
+        self.dataset = DatasetGroup(('', ''), [self.good, self.bad])
+        self.dataset.fix_names = ['ToDegC']
+
+    def test_serial(self):
+        """ Test that only the files that would fail are returned """
+        problems = preflight([self.dataset])
+        self.assertEqual(list(problems), [self.bad])
+
+    def test_processes(self):
+        """ Test that the same problems are found on several processes """
+        self.assertEqual(preflight([self.dataset], processes=2),
+                         preflight([self.dataset]))
+
+    def test_processes_unexpected_error(self):
+        """
+        Test that an unexpected error on one of the processes doesn't stop
+        the problems of the other files being reported
+        """
+        fix_class = get_fix_class('ToDegC')
+        with mock.patch.object(fix_class, 'update_header',
+                               side_effect=AttributeError('no units')):
+            problems = preflight([self.dataset], processes=2)
+        self.assertEqual(problems[self.good],
+                         [('ToDegC', 'AttributeError: no units')])
+        self.assertIn('Units are not K', problems[self.bad][0][1])
+
+    def test_by_fix(self):
+        """ Test that the problems are grouped by fix """
+        by_fix = problems_by_fix(preflight([self.dataset]))
+        self.assertEqual(list(by_fix), ['ToDegC'])
+        self.assertEqual([filepath for filepath, _error in by_fix['ToDegC']],
+                         [self.bad])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+"""
+test_results.py
+
+Unit tests for pre_proc.results
+"""
+import os
+import queue
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from pre_proc.results import (combine_recorders, drain_results, FileResult,
+                              QueuedRecorder, RecorderGroup, DONE, FAILED,
+                              SKIPPED)
+
+
+class TestFileResult(unittest.TestCase):
+    """ Test pre_proc.results.FileResult """
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.filepath = os.path.join(self.temp_dir, 'file.nc')
+        with open(self.filepath, 'wb') as fh:
+            fh.write(b'a' * 10)
+        patch = mock.patch('pre_proc.results.time.time', return_value=100.)
+        self.mock_time = patch.start()
+        self.addCleanup(patch.stop)
+        self.result = FileResult(self.filepath, '/a/tas', ['ToDegC'], 'w1')
+
+    def test_done(self):
+        """ Test a file that was fixed """
+        self.mock_time.return_value = 102.5
+        with open(self.filepath, 'ab') as fh:
+            fh.write(b'b' * 5)
+        self.assertIs(self.result.finish(), self.result)
+        self.assertEqual(self.result.status, DONE)
+        self.assertEqual(self.result.duration, 2.5)
+        self.assertEqual(self.result.bytes_in, 10)
+        self.assertEqual(self.result.bytes_out, 15)
+        self.assertIsNone(self.result.error_class)
+
+    def test_failed(self):
+        """ Test that the error is recorded """
+        self.result.finish(ValueError('broken'))
+        self.assertEqual(self.result.status, FAILED)
+        self.assertEqual(self.result.error_class, 'ValueError')
+        self.assertEqual(self.result.error, 'broken')
+        self.assertIsNone(self.result.bytes_out)
+
+    def test_skipped(self):
+        """ Test that a message can be given instead of an exception """
+        self.result.finish('not tried', SKIPPED)
+        self.assertEqual(self.result.status, SKIPPED)
+        self.assertIsNone(self.result.error_class)
+        self.assertEqual(self.result.error, 'not tried')
+
+    def test_missing_file(self):
+        """ Test that the size of a missing file is None """
+        result = FileResult(os.path.join(self.temp_dir, 'missing.nc'), '')
+        self.assertIsNone(result.bytes_in)
+        self.assertIsNone(result.duration)
+
+
+class TestQueuedRecorder(unittest.TestCase):
+    """ Test pre_proc.results.QueuedRecorder and drain_results """
+    def setUp(self):
+        self.result_queue = queue.Queue()
+        self.results = [FileResult('/a/{}.nc'.format(index), '/a').finish()
+                        for index in range(3)]
+
+    def test_batches(self):
+        """ Test that results are sent in batches """
+        recorder = QueuedRecorder(self.result_queue, batch_size=2)
+        for result in self.results:
+            recorder.add(result)
+        self.assertEqual(recorder.flush(), 1)
+        self.assertEqual(recorder.flush(), 0)
+        self.assertEqual([len(results) for results in self.result_queue.queue],
+                         [2, 1])
+
+    def test_flush_interval(self):
+        """ Test that results held for long enough are sent """
+        recorder = QueuedRecorder(self.result_queue, batch_size=10,
+                                  flush_interval=0.)
+        recorder.add(self.results[0])
+        self.assertEqual(self.result_queue.qsize(), 1)
+
+    def test_drain(self):
+        """ Test that every result is added until None is received """
+        recorder = mock.Mock()
+        self.result_queue.put(self.results[:2])
+        self.result_queue.put(self.results[2:])
+        self.result_queue.put(None)
+        drain_results(self.result_queue, recorder)
+        self.assertEqual([call[0][0] for call in recorder.add.call_args_list],
+                         self.results)
+
+
+class TestCombineRecorders(unittest.TestCase):
+    """ Test pre_proc.results.combine_recorders """
+    def test_none(self):
+        """ Test that there's no recorder if none are used """
+        self.assertIsNone(combine_recorders(None, None))
+
+    def test_one(self):
+        """ Test that a single recorder is used directly """
+        recorder = mock.Mock()
+        self.assertIs(combine_recorders(None, recorder), recorder)
+
+    def test_group(self):
+        """ Test that each result is passed to every recorder """
+        recorders = [mock.Mock(), mock.Mock()]
+        for recorder in recorders:
+            recorder.flush.return_value = 1
+        group = combine_recorders(*recorders)
+        self.assertIsInstance(group, RecorderGroup)
+        group.add('result')
+        self.assertEqual(group.flush(), 2)
+        for recorder in recorders:
+            recorder.add.assert_called_once_with('result')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+"""
+test_rule_provider.py
+
+Unit tests for pre_proc.rule_provider
+"""
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from pre_proc.exceptions import (DataRequestNotFound,
+                                 MultipleDataRequestsFound,
+                                 RulesArtefactError)
+from pre_proc.rule_provider import (ArtefactRuleProvider, build_payload,
+                                    get_rule_provider, load_artefact,
+                                    write_artefact, _rule_provider,
+                                    RULES_ARTEFACT_ENV_VAR)
+
+DATA_REQUESTS = [
+    ('Model', 'exp', 'r1i1p1f1', 'Amon', 'tas', 'tas', ['FixB', 'FixA']),
+    ('Model', 'exp', 'r1i1p1f1', 'Amon', 'ta27', 'ta', ['FixC']),
+    ('Model', 'exp', 'r1i1p1f1', 'day', 'ta7', 'ta', []),
+    ('Model', 'exp', 'r1i1p1f1', 'day', 'ta8', 'ta', []),
+    ('Model', 'exp', None, 'day', 'ta8', 'ta', ['FixA']),
+]
+
+
+class MockSubmission(object):
+    """ The attributes of an EsgfSubmission used by the providers """
+    def __init__(self, table_id, cmor_name):
+        self.source_id = 'Model'
+        self.experiment_id = 'exp'
+        self.variant_label = 'r1i1p1f1'
+        self.table_id = table_id
+        self.cmor_name = cmor_name
+        self.directory = '/some/dir'
+        self.filename = 'file.nc'
+
+
+class RuleProviderBaseTest(unittest.TestCase):
+    """ Write an artefact in a temporary directory """
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.path = os.path.join(self.temp_dir, 'rules.pickle')
+        self.sha256 = write_artefact(self.path, DATA_REQUESTS)
+
+
+class TestArtefact(RuleProviderBaseTest):
+    """ Test write_artefact and load_artefact """
+    def test_round_trip(self):
+        """ Test that the artefact is loaded """
+        artefact = load_artefact(self.path)
+        self.assertEqual(artefact['sha256'], self.sha256)
+        self.assertEqual(
+            artefact['fixes'][('Model', 'exp', 'r1i1p1f1', 'Amon', 'tas')],
+            ('FixA', 'FixB')
+        )
+        self.assertEqual(
+            artefact['suffixes'][('Model', 'exp', 'r1i1p1f1', 'day', 'ta')],
+            ['ta7', 'ta8']
+        )
+
+    def test_deterministic(self):
+        """ Test that the payload doesn't depend on the order of the rows """
+        self.assertEqual(build_payload(DATA_REQUESTS),
+                         build_payload(DATA_REQUESTS[::-1]))
+
+    def test_no_temporary_files(self):
+        """ Test that the temporary file is renamed """
+        self.assertEqual(os.listdir(self.temp_dir), ['rules.pickle'])
+
+    def test_hash_mismatch(self):
+        """ Test that a modified payload is detected """
+        with open(self.path, 'rb') as fh:
+            artefact = pickle.load(fh)
+        artefact['payload'] = build_payload(DATA_REQUESTS[:1])
+        with open(self.path, 'wb') as fh:
+            pickle.dump(artefact, fh)
+        self.assertRaisesRegex(RulesArtefactError, 'does not match its hash',
+                               load_artefact, self.path)
+
+    def test_version(self):
+        """ Test that other versions are rejected """
+        with mock.patch('pre_proc.rule_provider.ARTEFACT_VERSION', 2):
+            self.assertRaisesRegex(RulesArtefactError,
+                                   'has version 1 but version 2 is required',
+                                   load_artefact, self.path)
+
+    def test_missing(self):
+        """ Test that a missing file raises an exception """
+        self.assertRaisesRegex(RulesArtefactError, 'cannot be read',
+                               load_artefact,
+                               os.path.join(self.temp_dir, 'missing'))
+
+
+class TestArtefactRuleProvider(RuleProviderBaseTest):
+    """ Test pre_proc.rule_provider.ArtefactRuleProvider """
+    def setUp(self):
+        super().setUp()
+        self.provider = ArtefactRuleProvider(self.path)
+
+    def test_exact(self):
+        """ Test that an exact match is found """
+        self.assertEqual(
+            self.provider.get_fix_names(MockSubmission('Amon', 'tas')),
+            ['FixA', 'FixB']
+        )
+
+    def test_suffix(self):
+        """ Test that a data request with a numeric suffix is found """
+        self.assertEqual(
+            self.provider.get_fix_names(MockSubmission('Amon', 'ta')),
+            ['FixC']
+        )
+
+    def test_not_found(self):
+        """ Test that an exception is raised if nothing matches """
+        self.assertRaises(DataRequestNotFound, self.provider.get_fix_names,
+                          MockSubmission('Amon', 'pr'))
+
+    def test_multiple(self):
+        """ Test that an exception is raised if several suffixes match """
+        self.assertRaises(MultipleDataRequestsFound,
+                          self.provider.get_fix_names,
+                          MockSubmission('day', 'ta'))
+
+
+class TestGetRuleProvider(RuleProviderBaseTest):
+    """ Test pre_proc.rule_provider.get_rule_provider """
+    def setUp(self):
+        super().setUp()
+        _rule_provider.cache_clear()
+        self.addCleanup(_rule_provider.cache_clear)
+
+    def test_artefact(self):
+        """ Test that the artefact is used and reused """
+        with mock.patch.dict(os.environ, {RULES_ARTEFACT_ENV_VAR: self.path}):
+            provider = get_rule_provider()
+            self.assertIsInstance(provider, ArtefactRuleProvider)
+            self.assertIs(get_rule_provider(), provider)
+
+    @mock.patch('pre_proc.rule_provider.DatabaseRuleProvider')
+    def test_database(self, mock_provider):
+        """ Test that the database is used by default """
+        with mock.patch.dict(os.environ):
+            os.environ.pop(RULES_ARTEFACT_ENV_VAR, None)
+            self.assertEqual(get_rule_provider(), mock_provider.return_value)
@@ -0,0 +1,197 @@
+"""
+test_scanner.py
+
+Unit tests for pre_proc.scanner
+"""
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from pre_proc.scanner import (DirectoryScanner, load_inventory,
+                              save_inventory, INVENTORY_VERSION)
+
+# Files below a member_id directory
+FILES = [
+    'Amon/tas/gn/v20180101/tas_Amon_M_e_r1i1p1f1_gn_1950-1950.nc',
+    'Amon/tas/gn/v20180101/tas_Amon_M_e_r1i1p1f1_gn_1951-1951.nc',
+    'Amon/tas/gn/v20190101/tas_Amon_M_e_r1i1p1f1_gn_1950-1950.nc',
+    'Amon/pr/gn/v20180101/pr_Amon_M_e_r1i1p1f1_gn_1950-1950.nc',
+    'day/tas/gn/v20180101/tas_day_M_e_r1i1p1f1_gn_1950-1950.nc',
+]
+
+
+class ScannerBaseTest(unittest.TestCase):
+    """ Create a DRS directory tree in a temporary directory """
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.root = os.path.join(self.temp_dir, 'r1i1p1f1')
+        for path in FILES:
+            self._create(path)
+        self._create('Amon/tas/gn/v20180101/readme.txt')
+        self._age_directories()
+
+    def _create(self, path):
+        """ Create an empty file and its directories """
+        path = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, 'w').close()
+
+    def _age_directories(self):
+        """ Make the directories look as though they were modified earlier """
+        old_time = time.time() - 3600
+        for dirpath, _dirnames, _filenames in os.walk(self.root):
+            os.utime(dirpath, (old_time, old_time))
+
+    def _expected(self, paths):
+        """ The full paths of some of the files """
+        return sorted(os.path.join(self.root, path) for path in paths)
+
+
+class TestScan(ScannerBaseTest):
+    """ Test DirectoryScanner.scan """
+    def test_all(self):
+        """ Test that all of the netCDF files are found """
+        scanner = DirectoryScanner(drs_root='table_id', threads=3)
+        self.assertEqual(scanner.scan(self.root), self._expected(FILES))
+        self.assertEqual(scanner.directories_read, 13)
+
+    def test_suffix(self):
+        """ Test that other suffixes can be found """
+        scanner = DirectoryScanner(suffix='.txt', drs_root='table_id')
+        self.assertEqual(
+            scanner.scan(self.root),
+            self._expected(['Amon/tas/gn/v20180101/readme.txt'])
+        )
+
+    def test_filters(self):
+        """ Test that unwanted DRS components aren't read """
+        scanner = DirectoryScanner(filters={'table_id': {'Amon'},
+                                            'variable_id': {'tas'},
+                                            'version': {'v20180101'}},
+                                   drs_root='table_id')
+        self.assertEqual(scanner.scan(self.root), self._expected(FILES[:2]))
+        self.assertEqual(scanner.directories_read, 5)
+
+    def test_below_drs(self):
+        """ Test directories below the last DRS component """
+        self._create('Amon/tas/gn/v20180101/extra/file.nc')
+        scanner = DirectoryScanner(filters={'version': {'v20180101'}},
+                                   drs_root='variable_id')
+        self.assertEqual(scanner.scan(os.path.join(self.root, 'Amon')),
+                         self._expected(FILES[:2] + [FILES[3]] +
+                                        ['Amon/tas/gn/v20180101/extra/'
+                                         'file.nc']))
+
+    def test_missing(self):
+        """ Test that a missing directory raises an exception """
+        scanner = DirectoryScanner()
+        self.assertRaises(FileNotFoundError, scanner.scan,
+                          os.path.join(self.temp_dir, 'missing'))
+
+    def test_unknown_component(self):
+        """ Test that an unknown DRS component raises an exception """
+        self.assertRaisesRegex(ValueError, 'Unknown DRS component table',
+                               DirectoryScanner, filters={'table': {'Amon'}})
+
+
+class TestInventory(ScannerBaseTest):
+    """ Test that unchanged directories aren't read again """
+    def setUp(self):
+        super().setUp()
+        self.inventory_path = os.path.join(self.temp_dir, 'inventory.pickle')
+        DirectoryScanner(drs_root='table_id',
+                         inventory_path=self.inventory_path).scan(self.root)
+
+    def test_unchanged(self):
+        """ Test that no directories are read if nothing has changed """
+        scanner = DirectoryScanner(drs_root='table_id',
+                                   inventory_path=self.inventory_path)
+        with mock.patch('pre_proc.scanner.os.scandir') as mock_scandir:
+            self.assertEqual(scanner.scan(self.root), self._expected(FILES))
+        mock_scandir.assert_not_called()
+        self.assertEqual(scanner.directories_unchanged, 13)
+
+    def test_changed(self):
+        """ Test that only a changed directory is read again """
+        new_file = 'day/tas/gn/v20180101/tas_day_M_e_r1i1p1f1_gn_1951-1951.nc'
+        self._create(new_file)
+        scanner = DirectoryScanner(drs_root='table_id',
+                                   inventory_path=self.inventory_path)
+        self.assertEqual(scanner.scan(self.root),
+                         self._expected(FILES + [new_file]))
+        self.assertEqual(scanner.directories_read, 1)
+
+    def test_recently_changed(self):
+        """ Test that a directory changed just before it's read is reread """
+        new_file = 'day/tas/gn/v20180101/tas_day_M_e_r1i1p1f1_gn_1951-1951.nc'
+        self._create(new_file)
+        DirectoryScanner(drs_root='table_id',
+                         inventory_path=self.inventory_path).scan(self.root)
+        scanner = DirectoryScanner(drs_root='table_id',
+                                   inventory_path=self.inventory_path)
+        scanner.scan(self.root)
+        self.assertEqual(scanner.directories_read, 1)
+
+    def test_removed(self):
+        """ Test that a directory removed since the last scan is ignored """
+        shutil.rmtree(os.path.join(self.root, 'day'))
+        scanner = DirectoryScanner(drs_root='table_id',
+                                   inventory_path=self.inventory_path)
+        self.assertEqual(scanner.scan(self.root), self._expected(FILES[:4]))
+
+    def test_removed_pruned(self):
+        """ Test that a removed directory is dropped from the inventory """
+        day_dir = os.path.join(self.root, 'day')
+        shutil.rmtree(day_dir)
+        other_dir = os.path.join(self.temp_dir, 'r2i1p1f1')
+        inventory = load_inventory(self.inventory_path)
+        inventory[other_dir] = (1, [], [])
+        save_inventory(self.inventory_path, inventory)
+        DirectoryScanner(drs_root='table_id',
+                         inventory_path=self.inventory_path).scan(self.root)
+        inventory = load_inventory(self.inventory_path)
+        self.assertFalse([path for path in inventory
+                          if path.startswith(day_dir)])
+        self.assertIn(os.path.join(self.root, 'Amon'), inventory)
+        # Directories outside of the scanned directory are kept
+        self.assertIn(other_dir, inventory)
+
+
+class TestLoadInventory(unittest.TestCase):
+    """ Test load_inventory and save_inventory """
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.path = os.path.join(self.temp_dir, 'inventory.pickle')
+
+    def test_round_trip(self):
+        """ Test that the inventory is saved and loaded """
+        inventory = {'/a': (1, ['b'], ['c.nc'])}
+        save_inventory(self.path, inventory)
+        self.assertEqual(load_inventory(self.path), inventory)
+        self.assertEqual(os.listdir(self.temp_dir), ['inventory.pickle'])
+
+    def test_missing(self):
+        """ Test that a missing inventory is empty """
+        self.assertEqual(load_inventory(self.path), {})
+
+    def test_corrupt(self):
+        """ Test that an inventory that can't be read is ignored """
+        with open(self.path, 'wb') as fh:
+            fh.write(b'not a pickle')
+        self.assertEqual(load_inventory(self.path), {})
+
+    def test_version(self):
+        """ Test that an inventory with another version is ignored """
+        save_inventory(self.path, {'/a': (1, [], [])})
+        with mock.patch('pre_proc.scanner.INVENTORY_VERSION',
+                        INVENTORY_VERSION + 1):
+            self.assertEqual(load_inventory(self.path), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
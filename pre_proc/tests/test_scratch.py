@@ -0,0 +1,158 @@
+"""
+test_scratch.py
+
+Unit tests for pre_proc.scratch
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from pre_proc.scratch import ScratchManager, SCRATCH_DIR_ENV_VAR
+
+
+class ScratchBaseTest(unittest.TestCase):
+    """ Create a source file and a scratch directory """
+    def setUp(self):
+        self.source_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.source_dir)
+        self.scratch_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.scratch_dir)
+
+        self.source_path = os.path.join(self.source_dir, 'tos_1.nc')
+        with open(self.source_path, 'wb') as fh:
+            fh.write(b'a' * 100)
+
+        patch = mock.patch.dict(os.environ)
+        patch.start()
+        os.environ.pop(SCRATCH_DIR_ENV_VAR, None)
+        self.addCleanup(patch.stop)
+
+    def _write(self, path, num_bytes):
+        """ Write `num_bytes` to `path` """
+        with open(path, 'wb') as fh:
+            fh.write(b'b' * num_bytes)
+
+
+class TestChooseDirectory(ScratchBaseTest):
+    """ Test pre_proc.scratch.ScratchManager._choose_directory """
+    def test_default_source_dir(self):
+        """ Test that the source directory is used by default """
+        scratch = ScratchManager(self.source_path)
+        self.assertEqual(scratch.scratch_dir, self.source_dir)
+
+    def test_env_var(self):
+        """ Test that the environment variable is used """
+        os.environ[SCRATCH_DIR_ENV_VAR] = self.scratch_dir
+        scratch = ScratchManager(self.source_path)
+        self.assertEqual(scratch.scratch_dir, self.scratch_dir)
+
+    def test_argument(self):
+        """ Test that the argument is used in preference """
+        os.environ[SCRATCH_DIR_ENV_VAR] = self.source_dir
+        scratch = ScratchManager(self.source_path, self.scratch_dir)
+        self.assertEqual(scratch.scratch_dir, self.scratch_dir)
+
+    @mock.patch('pre_proc.scratch.shutil.disk_usage')
+    def test_insufficient_capacity(self, mock_usage):
+        """ Test that the source directory's used if scratch is too full """
+        mock_usage.return_value = mock.Mock(free=399)
+        scratch = ScratchManager(self.source_path, self.scratch_dir)
+        self.assertEqual(scratch.scratch_dir, self.source_dir)
+
+    @mock.patch('pre_proc.scratch.shutil.disk_usage')
+    def test_sufficient_capacity(self, mock_usage):
+        """ Test that the scratch directory's used if it has space """
+        mock_usage.return_value = mock.Mock(free=400)
+        scratch = ScratchManager(self.source_path, self.scratch_dir)
+        self.assertEqual(scratch.scratch_dir, self.scratch_dir)
+
+
+class TestIntermediatePath(ScratchBaseTest):
+    """ Test pre_proc.scratch.ScratchManager.intermediate_path """
+    def test_path(self):
+        """ Test the path that's returned """
+        scratch = ScratchManager(self.source_path, self.scratch_dir)
+        path = scratch.intermediate_path('.temp')
+        self.assertEqual(os.path.basename(path), 'tos_1.nc.temp')
+        self.assertEqual(os.path.dirname(path), scratch.private_dir)
+        self.assertEqual(os.path.dirname(scratch.private_dir),
+                         self.scratch_dir)
+        self.assertEqual(os.path.dirname(scratch.intermediate_path('.b')),
+                         scratch.private_dir)
+
+    def test_same_name(self):
+        """ Test that files with the same name don't share a path """
+        other_dir = os.path.join(self.source_dir, 'v2')
+        os.mkdir(other_dir)
+        other_path = os.path.join(other_dir, 'tos_1.nc')
+        self._write(other_path, 100)
+        scratch = ScratchManager(self.source_path, self.scratch_dir)
+        other_scratch = ScratchManager(other_path, self.scratch_dir)
+        path = scratch.intermediate_path('.temp')
+        self._write(path, 10)
+        other_scratch.intermediate_path('.temp')
+        self.assertTrue(os.path.exists(path))
+        other_scratch.remove_intermediates()
+        self.assertTrue(os.path.exists(path))
+        scratch.remove_intermediates()
+        self.assertEqual(os.listdir(self.scratch_dir), [])
+
+    def test_source_dir(self):
+        """ Test the path when there's no scratch directory """
+        scratch = ScratchManager(self.source_path)
+        self.assertEqual(scratch.intermediate_path('.temp'),
+                         os.path.join(self.source_dir, 'tos_1.nc.temp'))
+        self.assertIsNone(scratch.private_dir)
+
+    def test_old_file_removed(self):
+        """ Test that a file left over from a previous run is removed """
+        old_file = os.path.join(self.source_dir, 'tos_1.nc.temp')
+        self._write(old_file, 10)
+        scratch = ScratchManager(self.source_path)
+        scratch.intermediate_path('.temp')
+        self.assertFalse(os.path.exists(old_file))
+
+
+class TestMoveBack(ScratchBaseTest):
+    """ Test pre_proc.scratch.ScratchManager.move_back """
+    def test_same_filesystem(self):
+        """ Test the final file replaces the source and others removed """
+        scratch = ScratchManager(self.source_path)
+        temp_file = scratch.intermediate_path('.temp')
+        final_file = scratch.intermediate_path('.temp_final')
+        self._write(temp_file, 300)
+        self._write(final_file, 50)
+        scratch.move_back(final_file)
+        self.assertEqual(os.path.getsize(self.source_path), 50)
+        self.assertEqual(os.listdir(self.source_dir), ['tos_1.nc'])
+        self.assertEqual(scratch.io_report(), {
+            'intermediate_bytes': 300,
+            'final_bytes': 50,
+            'source_bytes_before': 350,
+            'source_bytes_after': 350,
+            'scratch_bytes': 0
+        })
+
+    @mock.patch('pre_proc.scratch.ScratchManager.is_remote',
+                new_callable=mock.PropertyMock)
+    def test_different_filesystem(self, mock_remote):
+        """ Test the final file is copied back """
+        mock_remote.return_value = True
+        scratch = ScratchManager(self.source_path, self.scratch_dir)
+        temp_file = scratch.intermediate_path('.temp')
+        final_file = scratch.intermediate_path('.temp_final')
+        self._write(temp_file, 300)
+        self._write(final_file, 50)
+        scratch.move_back(final_file)
+        self.assertEqual(os.path.getsize(self.source_path), 50)
+        self.assertEqual(os.listdir(self.source_dir), ['tos_1.nc'])
+        self.assertEqual(os.listdir(self.scratch_dir), [])
+        self.assertEqual(scratch.io_report(), {
+            'intermediate_bytes': 300,
+            'final_bytes': 50,
+            'source_bytes_before': 350,
+            'source_bytes_after': 50,
+            'scratch_bytes': 350
+        })
@@ -0,0 +1,139 @@
+"""
+test_shard.py
+
+Unit tests for pre_proc.shard
+"""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from pre_proc.exceptions import UnknownFixError
+from pre_proc.shard import (array_index, CostModel, manifest_path,
+                            plan_shards, read_manifest, write_manifests,
+                            BYTES_PER_GB)
+
+
+class TestCostModel(unittest.TestCase):
+    """ Test pre_proc.shard.CostModel """
+    def setUp(self):
+        self.model = CostModel({
+            'file': {'seconds': 1., 'seconds_per_gb': 1.},
+            'kinds': {'data': {'seconds_per_gb': 10.}},
+            'fixes': {'ParentBranchTimeAdd': {'seconds': 3.}}
+        })
+
+    def test_no_fixes(self):
+        """ Test the cost of a file without any fixes """
+        self.assertAlmostEqual(self.model.predict(2 * BYTES_PER_GB, []), 3.)
+
+    def test_kinds(self):
+        """ Test that fixes are costed by their kind """
+        self.assertAlmostEqual(
+            self.model.predict(2 * BYTES_PER_GB, ['ForcingIndexIntFix',
+                                                  'ZZZAddHeight2m']),
+            3. + 0.2 + 5. + 20.
+        )
+
+    def test_fix(self):
+        """ Test that a fix's own coefficients are used """
+        self.assertAlmostEqual(
+            self.model.predict(2 * BYTES_PER_GB, ['ParentBranchTimeAdd']),
+            6.
+        )
+
+    def test_unknown(self):
+        """ Test that an unknown fix raises an exception """
+        self.assertRaises(UnknownFixError, self.model.predict, 1,
+                          ['NotAFix'])
+
+    def test_from_file(self):
+        """ Test that coefficients are read from JSON """
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        path = os.path.join(temp_dir, 'coefficients.json')
+        with open(path, 'w') as fh:
+            json.dump({'file': {'seconds': 7.}}, fh)
+        model = CostModel.from_file(path)
+        self.assertEqual(model.file, {'seconds': 7., 'seconds_per_gb': 2.})
+
+
+class TestPlanShards(unittest.TestCase):
+    """ Test pre_proc.shard.plan_shards """
+    def test_balanced(self):
+        """ Test that the largest files are spread out first """
+        costs = {'a': 7., 'b': 6., 'c': 5., 'd': 4., 'e': 3., 'f': 2.}
+        shards = plan_shards(costs, 3)
+        self.assertEqual([shard.filepaths for shard in shards],
+                         [['a', 'f'], ['b', 'e'], ['c', 'd']])
+        self.assertEqual([shard.cost for shard in shards], [9., 9., 9.])
+        self.assertEqual([shard.index for shard in shards], [1, 2, 3])
+
+    def test_more_shards_than_files(self):
+        """ Test that extra shards are empty """
+        shards = plan_shards({'a': 1.}, 2)
+        self.assertEqual([shard.filepaths for shard in shards], [['a'], []])
+
+    def test_no_shards(self):
+        """ Test that at least one shard is required """
+        self.assertRaises(ValueError, plan_shards, {'a': 1.}, 0)
+
+
+class TestManifests(unittest.TestCase):
+    """ Test writing and finding manifests """
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.shards = plan_shards({'/a/1.nc': 2., '/a/2.nc': 1.,
+                                   '/b/1.nc': 1.}, 2)
+        self.paths = write_manifests(self.temp_dir, self.shards)
+
+    def test_round_trip(self):
+        """ Test that the files are read back """
+        self.assertEqual(self.paths,
+                         [os.path.join(self.temp_dir, 'shard_0001.txt'),
+                          os.path.join(self.temp_dir, 'shard_0002.txt')])
+        self.assertEqual(read_manifest(self.paths[0]), ['/a/1.nc'])
+        self.assertEqual(read_manifest(self.paths[1]),
+                         ['/a/2.nc', '/b/1.nc'])
+
+    def test_file(self):
+        """ Test that a manifest file is used as it is """
+        self.assertEqual(manifest_path(self.paths[1]), self.paths[1])
+
+    def test_shard(self):
+        """ Test that a shard can be chosen from a directory """
+        self.assertEqual(manifest_path(self.temp_dir, 2), self.paths[1])
+
+    @mock.patch.dict(os.environ, {'LSB_JOBINDEX': '2'})
+    def test_array_index(self):
+        """ Test that the shard is the array index by default """
+        self.assertEqual(manifest_path(self.temp_dir), self.paths[1])
+
+
+class TestArrayIndex(unittest.TestCase):
+    """ Test pre_proc.shard.array_index """
+    def setUp(self):
+        patch = mock.patch.dict(os.environ)
+        patch.start()
+        self.addCleanup(patch.stop)
+        for env_var in ['SLURM_ARRAY_TASK_ID', 'LSB_JOBINDEX',
+                        'PBS_ARRAY_INDEX', 'SGE_TASK_ID']:
+            os.environ.pop(env_var, None)
+
+    def test_slurm(self):
+        """ Test the SLURM array index """
+        os.environ['SLURM_ARRAY_TASK_ID'] = '3'
+        self.assertEqual(array_index(), 3)
+
+    def test_undefined(self):
+        """ Test that SGE's undefined index is ignored """
+        os.environ['SGE_TASK_ID'] = 'undefined'
+        self.assertRaisesRegex(ValueError, 'No shard specified',
+                               array_index)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+"""
+test_tracing.py
+
+Unit tests for pre_proc.tracing
+"""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from netCDF4 import Dataset
+
+from pre_proc.common import run_command
+from pre_proc.tracing import (span, start_tracing, stop_tracing, trace_file,
+                              traced_open, Tracer)
+
+
+class TestTracer(unittest.TestCase):
+    """ Test pre_proc.tracing.Tracer """
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.path = os.path.join(self.temp_dir, 'trace.json')
+
+    def test_sampled(self):
+        """ Test that the same fraction of files is always chosen """
+        filepaths = ['/a/file{}.nc'.format(index) for index in range(1000)]
+        tracer = Tracer(self.path, 0.1)
+        sample = [filepath for filepath in filepaths
+                  if tracer.sampled(filepath)]
+        self.assertTrue(50 < len(sample) < 150)
+        self.assertEqual(sample, [filepath for filepath in filepaths
+                                  if tracer.sampled(filepath)])
+        self.assertFalse(any(Tracer(self.path, 0.).sampled(filepath)
+                             for filepath in filepaths))
+        self.assertTrue(all(Tracer(self.path).sampled(filepath)
+                            for filepath in filepaths))
+
+    def test_merge(self):
+        """ Test that the part files of every process are merged """
+        tracer = Tracer(self.path)
+        with open(tracer.part_path(1), 'w') as fh:
+            fh.write(json.dumps({'name': 'other', 'ph': 'X', 'pid': 1}) +
+                     '\n')
+        tracer.add({'name': 'this', 'ph': 'X', 'pid': os.getpid()})
+        self.assertEqual(tracer.merge(), 3)
+        with open(self.path) as fh:
+            events = json.load(fh)['traceEvents']
+        self.assertEqual(sorted(event['name'] for event in events),
+                         ['other', 'process_name', 'this'])
+        self.assertEqual(os.listdir(self.temp_dir), ['trace.json'])
+
+    def test_merge_other_runs(self):
+        """ Test that the part files of other runs are left alone """
+        other_tracer = Tracer(self.path)
+        other_tracer.run_id = 'other-node-{}'.format(os.getpid())
+        other_tracer.add({'name': 'other', 'ph': 'X', 'pid': os.getpid()})
+        other_tracer.flush()
+        tracer = Tracer(self.path)
+        tracer.add({'name': 'this', 'ph': 'X', 'pid': os.getpid()})
+        tracer.flush()
+        self.assertNotEqual(tracer.part_path(), other_tracer.part_path())
+        self.assertEqual(tracer.merge(), 2)
+        with open(self.path) as fh:
+            events = json.load(fh)['traceEvents']
+        self.assertEqual(sorted(event['name'] for event in events),
+                         ['process_name', 'this'])
+        self.assertTrue(os.path.exists(other_tracer.part_path()))
+
+
+class TestTraceFile(unittest.TestCase):
+    """ Test tracing the fixing of a file """
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.path = os.path.join(self.temp_dir, 'trace.json')
+        self.filepath = os.path.join(self.temp_dir, 'tas.nc')
+        with Dataset(self.filepath, 'w') as rootgrp:
+            rootgrp.title = 'test'
+        start_tracing(self.path)
+        self.addCleanup(stop_tracing)
+
+    def _events(self):
+        """ Write the trace and return its complete events """
+        stop_tracing()
+        with open(self.path) as fh:
+            return [event for event in json.load(fh)['traceEvents']
+                    if event['ph'] == 'X']
+
+    def test_nested(self):
+        """ Test that the spans in a file's block are recorded """
+        with trace_file(self.filepath):
+            with span('ToDegC', 'fix'):
+                run_command('true')
+                with traced_open(Dataset, self.filepath, 'a') as rootgrp:
+                    self.assertEqual(rootgrp.title, 'test')
+        events = self._events()
+        self.assertEqual([(event['cat'], event['name']) for event in events],
+                         [('command', 'true'), ('open', 'Dataset'),
+                          ('fix', 'ToDegC'), ('file', 'tas.nc')])
+        self.assertEqual(events[1]['args'],
+                         {'path': self.filepath, 'mode': 'a'})
+        file_event, fix_event = events[3], events[2]
+        self.assertLessEqual(file_event['ts'], fix_event['ts'])
+        self.assertGreaterEqual(file_event['ts'] + file_event['dur'],
+                                fix_event['ts'] + fix_event['dur'])
+        self.assertEqual(len({event['tid'] for event in events}), 1)
+
+    def test_error(self):
+        """ Test that the exception is recorded in the spans """
+        with self.assertRaises(ValueError):
+            with trace_file(self.filepath):
+                with span('ToDegC', 'fix'):
+                    raise ValueError()
+        self.assertEqual([event['args'].get('error')
+                          for event in self._events()],
+                         ['ValueError', 'ValueError'])
+
+    def test_outside_file(self):
+        """ Test that spans outside of a traced file aren't recorded """
+        with span('ToDegC', 'fix'):
+            pass
+        self.assertEqual(self._events(), [])
+
+    def test_not_sampled(self):
+        """ Test that spans in a file not in the sample aren't recorded """
+        stop_tracing()
+        start_tracing(self.path, 0.)
+        with trace_file(self.filepath):
+            with span('ToDegC', 'fix'):
+                pass
+        self.assertEqual(self._events(), [])
+
+    def test_not_started(self):
+        """ Test that nothing is recorded if tracing wasn't started """
+        stop_tracing()
+        with trace_file(self.filepath):
+            with span('ToDegC', 'fix'):
+                pass
+        self.assertIsNone(stop_tracing())
+
+
+if __name__ == '__main__':
+    unittest.main()
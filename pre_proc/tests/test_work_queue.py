@@ -0,0 +1,266 @@
+"""
+test_work_queue.py
+
+Unit tests for pre_proc.work_queue
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from pre_proc.work_queue import (LeaseKeeper, WorkQueue, worker_id, CLAIMED,
+                                 DONE, FAILED, PENDING)
+
+FILES = ['/a/tas_Amon_M_e_r1i1p1f1_gn_1950-1950.nc',
+         '/a/tas_Amon_M_e_r1i1p1f1_gn_1951-1951.nc',
+         '/a/tas_Amon_M_e_r1i1p1f1_gn_1952-1952.nc',
+         '/b/pr_Amon_M_e_r1i1p1f1_gn_1950-1950.nc']
+
+
+def drain_queue(path, results):
+    """
+    Claim files from a queue until it's empty, recording the files claimed
+    by this process. This is run in separate processes.
+    """
+    queue = WorkQueue(path)
+    worker = worker_id()
+    while True:
+        filepaths = queue.claim(worker, 3)
+        if not filepaths:
+            break
+        for filepath in filepaths:
+            results.put((worker, filepath))
+            time.sleep(0.001)
+            queue.complete(worker, filepath,
+                           'error' if filepath.endswith('7.nc') else None)
+
+
+def drain_queue_canary(path, results):
+    """
+    Claim files from a queue with canary set until none are left, waiting
+    while the other files are waiting for their dataset's first file. The
+    files in the directories /bad* can't be fixed. This is run in separate
+    processes.
+    """
+    queue = WorkQueue(path)
+    worker = worker_id()
+    while True:
+        filepaths = queue.claim(worker, 3, canary=True)
+        if not filepaths:
+            if queue.waiting():
+                time.sleep(0.01)
+                continue
+            break
+        for filepath in filepaths:
+            results.put((worker, filepath))
+            time.sleep(0.01)
+            queue.complete(worker, filepath,
+                           'error' if filepath.startswith('/bad') else None)
+
+
+class QueueBaseTest(unittest.TestCase):
+    """ Create a queue in a temporary directory """
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.path = os.path.join(self.temp_dir, 'queue.sqlite3')
+        self.queue = WorkQueue(self.path, lease_seconds=60, max_attempts=2)
+        self.queue.add(FILES)
+
+
+class TestClaim(QueueBaseTest):
+    """ Test adding and claiming files """
+    def test_add_again(self):
+        """ Test that files already in the queue are ignored """
+        self.assertEqual(self.queue.add(FILES[::-1] + ['/c/new.nc']), 1)
+        self.assertEqual(self.queue.counts(), {PENDING: 5})
+
+    def test_claim_dataset(self):
+        """ Test that the files claimed are from a single dataset """
+        self.assertEqual(self.queue.claim('w1', 5), FILES[:3])
+        self.assertEqual(self.queue.claim('w2', 5), FILES[3:])
+        self.assertEqual(self.queue.claim('w3', 5), [])
+        self.assertEqual(self.queue.counts(), {CLAIMED: 4})
+
+    def test_claim_size(self):
+        """ Test that no more than the maximum are claimed """
+        self.assertEqual(self.queue.claim('w1', 2), FILES[:2])
+        self.assertEqual(self.queue.claim('w2', 2), FILES[2:3])
+
+    def test_complete(self):
+        """ Test that outcomes are recorded """
+        self.queue.claim('w1', 2)
+        self.assertTrue(self.queue.complete('w1', FILES[0]))
+        self.assertTrue(self.queue.complete('w1', FILES[1], 'broken'))
+        self.assertEqual(self.queue.counts(), {DONE: 1, FAILED: 1,
+                                               PENDING: 2})
+        self.assertEqual(self.queue.failures(), [(FILES[1], 'broken')])
+
+    def test_complete_other_worker(self):
+        """ Test that a file claimed by another worker isn't changed """
+        self.queue.claim('w1', 1)
+        self.assertFalse(self.queue.complete('w2', FILES[0]))
+        self.assertEqual(self.queue.counts(), {CLAIMED: 1, PENDING: 3})
+
+    def test_release(self):
+        """ Test that a worker's files are returned to the queue """
+        self.queue.claim('w1', 2)
+        self.assertEqual(self.queue.release('w1'), 2)
+        self.assertEqual(self.queue.claim('w2', 2), FILES[:2])
+
+    def test_block_dataset(self):
+        """ Test that a dataset's pending files are failed """
+        self.queue.claim('w1', 1)
+        self.assertEqual(self.queue.block_dataset(FILES[0], 'blocked'), 2)
+        self.assertEqual(self.queue.counts(), {CLAIMED: 1, FAILED: 2,
+                                               PENDING: 1})
+        self.assertEqual(self.queue.failures(), [(FILES[1], 'blocked'),
+                                                 (FILES[2], 'blocked')])
+        self.assertEqual(self.queue.claim('w2', 5), FILES[3:])
+
+    def test_requeue_failed(self):
+        """ Test that failed files can be tried again """
+        self.queue.claim('w1', 1)
+        self.queue.complete('w1', FILES[0], 'broken')
+        self.assertEqual(self.queue.requeue_failed(), 1)
+        self.assertEqual(self.queue.claim('w2', 1), FILES[:1])
+
+
+class TestCanary(QueueBaseTest):
+    """ Test claiming the first file of each dataset on its own """
+    def test_first_file_alone(self):
+        """ Test that the rest of a dataset waits for its first file """
+        self.assertEqual(self.queue.claim('w1', 5, canary=True), FILES[:1])
+        self.assertEqual(self.queue.claim('w2', 5, canary=True), FILES[3:])
+        self.assertEqual(self.queue.claim('w3', 5, canary=True), [])
+        self.assertEqual(self.queue.waiting(), 2)
+        self.assertTrue(self.queue.is_canary(FILES[0]))
+        self.assertFalse(self.queue.is_canary(FILES[1]))
+        self.queue.complete('w1', FILES[0])
+        self.assertEqual(self.queue.waiting(), 0)
+        self.assertEqual(self.queue.claim('w3', 5, canary=True), FILES[1:3])
+
+    def test_first_file_failed(self):
+        """ Test that the rest of a dataset fails if its first file fails """
+        self.queue.claim('w1', 5, canary=True)
+        self.queue.complete('w1', FILES[0], 'broken')
+        self.assertEqual(self.queue.claim('w2', 5, canary=True), FILES[3:])
+        self.assertEqual(self.queue.counts(), {CLAIMED: 1, FAILED: 3})
+        self.assertEqual(self.queue.waiting(), 0)
+
+    def test_first_file_expired(self):
+        """ Test that the first file is claimed again if its lease expires """
+        queue = WorkQueue(self.path, lease_seconds=0.5, max_attempts=2)
+        self.assertEqual(queue.claim('w1', 5, canary=True), FILES[:1])
+        self.assertEqual(queue.claim('w2', 5, canary=True), FILES[3:])
+        time.sleep(0.6)
+        self.assertEqual(queue.claim('w3', 5, canary=True), FILES[:1])
+
+
+class TestLeases(QueueBaseTest):
+    """ Test that the files of dead workers are returned to the queue """
+    def _expire(self):
+        """ Move the clock on past the end of the leases """
+        now = time.time() + 61
+        patch = mock.patch('pre_proc.work_queue.time.time',
+                           return_value=now)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_expired(self):
+        """ Test that expired files are claimed again """
+        self.queue.claim('w1', 5)
+        self._expire()
+        self.assertEqual(self.queue.claim('w2', 5), FILES[:3])
+
+    def test_renewed(self):
+        """ Test that renewed leases aren't expired """
+        self.queue.claim('w1', 5)
+        with mock.patch('pre_proc.work_queue.time.time',
+                        return_value=time.time() + 30):
+            self.assertEqual(self.queue.renew('w1', FILES), 3)
+        self._expire()
+        self.assertEqual(self.queue.claim('w2', 5), FILES[3:])
+
+    def test_late_completion(self):
+        """ Test that a worker can finish a file that wasn't reclaimed """
+        self.queue.claim('w1', 1)
+        self._expire()
+        self.assertEqual(self.queue.requeue_expired(), 1)
+        self.assertTrue(self.queue.complete('w1', FILES[0]))
+
+    def test_max_attempts(self):
+        """ Test that a file is failed after too many attempts """
+        self.queue.claim('w1', 1)
+        self.queue.release('w1')
+        self.queue.claim('w1', 1)
+        with mock.patch('pre_proc.work_queue.time.time',
+                        return_value=time.time() + 61):
+            self.queue.claim('w2', 1)
+        with mock.patch('pre_proc.work_queue.time.time',
+                        return_value=time.time() + 122):
+            self.queue.requeue_expired()
+        self.assertEqual(self.queue.failures(),
+                         [(FILES[0], 'Lease expired 2 times')])
+
+    def test_lease_keeper(self):
+        """ Test that leases are renewed in the background """
+        queue = WorkQueue(self.path, lease_seconds=0.3)
+        queue.claim('w1', 5)
+        with LeaseKeeper(queue, 'w1', FILES[:3]):
+            time.sleep(0.6)
+            self.assertEqual(queue.claim('w2', 5), FILES[3:])
+
+
+class TestWorkers(QueueBaseTest):
+    """ Test several worker processes sharing a queue """
+    def test_processes(self):
+        """ Test that every file is claimed exactly once """
+        filepaths = ['/d{}/tas_Amon_M_e_r1i1p1f1_gn_{}-{}.nc'.
+                     format(index // 5, index, index) for index in range(200)]
+        self.queue.add(filepaths)
+        results = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=drain_queue,
+                                             args=(self.path, results))
+                     for _ in range(4)]
+        for process in processes:
+            process.start()
+        claims = [results.get(timeout=60) for _ in range(204)]
+        for process in processes:
+            process.join(60)
+            self.assertEqual(process.exitcode, 0)
+        claimed = sorted(filepath for _worker, filepath in claims)
+        self.assertEqual(claimed, sorted(FILES + filepaths))
+        self.assertEqual(self.queue.counts(), {DONE: 184, FAILED: 20})
+
+    def test_processes_canary(self):
+        """
+        Test that a bad dataset's first file is the only one of its files
+        that's tried, however many workers there are
+        """
+        filepaths = ['/{}{}/tas_Amon_M_e_r1i1p1f1_gn_{}-{}.nc'.
+                     format('bad' if index < 10 else 'good', index // 5,
+                            index, index) for index in range(40)]
+        self.queue.add(filepaths)
+        results = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=drain_queue_canary,
+                                             args=(self.path, results))
+                     for _ in range(4)]
+        for process in processes:
+            process.start()
+        claimed = [results.get(timeout=60)[1] for _ in range(36)]
+        for process in processes:
+            process.join(60)
+            self.assertEqual(process.exitcode, 0)
+        self.assertTrue(results.empty())
+        self.assertEqual(sorted(claimed),
+                         sorted(FILES + filepaths[0:1] + filepaths[5:6] +
+                                filepaths[10:]))
+        self.assertEqual(self.queue.counts(), {DONE: 34, FAILED: 10})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,276 @@
+"""
+tracing.py
+
+A timeline of where the time went while fixing individual files. Spans are
+nested: each file contains its fixes, which contain the external commands
+they run, the netCDF files they open and the Iris loads. The spans are
+written as Chrome trace-event JSON, which can be opened in a local trace
+viewer such as Perfetto or chrome://tracing.
+
+Only a sample of the files is traced, chosen from a hash of their paths so
+that a rerun traces the same files. A span outside of a traced file does
+nothing except check a thread-local flag. Each process appends the spans
+of each traced file to its own part file, because the processes of a pool
+exit without cleaning up, and stop_tracing() merges the parts. The part
+files are named after the host and the process that started tracing, which
+the processes that it forks inherit, so that runs on other nodes writing
+the same trace don't share or delete each other's parts.
+"""
+import contextlib
+import glob
+import json
+import os
+import threading
+import time
+import zlib
+
+# The fraction of files traced by default
+DEFAULT_SAMPLE_RATE = 1.
+
+# The tracer for this process, set by start_tracing()
+_tracer = None
+
+# Whether the current thread is fixing a file that's being traced
+_local = threading.local()
+
+
+class Tracer(object):
+    """
+    Collect the spans of the traced files and write them to a part file for
+    this process.
+    """
+    def __init__(self, path, sample_rate=DEFAULT_SAMPLE_RATE):
+        """
+        Initialise the class
+
+        :param str path: The full path of the trace to write.
+        :param float sample_rate: The fraction of files to trace.
+        """
+        self.path = path
+        self.sample_rate = sample_rate
+        self.events = []
+        self.lock = threading.Lock()
+        # Identifies the part files of this process and the processes that
+        # it forks
+        self.run_id = '{}-{}'.format(os.uname().nodename, os.getpid())
+        # The processes that have named themselves in their part file
+        self._named_pids = set()
+
+    def sampled(self, filepath):
+        """
+        Check whether a file is in the sample to trace.
+
+        :param str filepath: The file's full path.
+        :returns: True if the file should be traced.
+        :rtype: bool
+        """
+        if self.sample_rate >= 1.:
+            return True
+        return (zlib.crc32(filepath.encode('utf-8')) / 2 ** 32 <
+                self.sample_rate)
+
+    def add(self, event):
+        """
+        Add a trace event.
+
+        :param dict event: The event.
+        """
+        with self.lock:
+            self.events.append(event)
+
+    def part_path(self, pid=None):
+        """
+        Return the path of a process's part file.
+
+        :param int pid: The process id or None for this process.
+        :returns: The full path.
+        :rtype: str
+        """
+        return '{}.{}.{}.part'.format(self.path, self.run_id,
+                                      pid or os.getpid())
+
+    def flush(self):
+        """
+        Append the events collected to this process's part file, one event
+        per line.
+        """
+        with self.lock:
+            events = self.events
+            self.events = []
+            pid = os.getpid()
+            if events and pid not in self._named_pids:
+                self._named_pids.add(pid)
+                events.insert(0, {
+                    'name': 'process_name', 'ph': 'M', 'pid': pid,
+                    'args': {'name': '{}:{}'.format(os.uname().nodename,
+                                                    pid)}
+                })
+            if events:
+                with open(self.part_path(pid), 'a') as fh:
+                    fh.write(''.join(json.dumps(event) + '\n'
+                                     for event in events))
+
+    def merge(self):
+        """
+        Write the trace from the part files of this process and the
+        processes that it forked, and delete those part files.
+
+        :returns: The number of events in the trace.
+        :rtype: int
+        """
+        self.flush()
+        events = []
+        part_paths = sorted(glob.glob(
+            glob.escape('{}.{}'.format(self.path, self.run_id)) + '.*.part'
+        ))
+        for part_path in part_paths:
+            with open(part_path) as fh:
+                events.extend(json.loads(line) for line in fh if line.strip())
+        temp_path = '{}.{}.tmp'.format(self.path, self.run_id)
+        with open(temp_path, 'w') as fh:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, fh)
+        os.replace(temp_path, self.path)
+        for part_path in part_paths:
+            os.remove(part_path)
+        return len(events)
+
+
+class Span(object):
+    """
+    A context manager that records a complete event for the time spent in
+    its block.
+    """
+    def __init__(self, tracer, name, category, args):
+        """
+        Initialise the class
+
+        :param Tracer tracer: The tracer to add the event to.
+        :param str name: The span's name.
+        :param str category: The span's category, for example fix.
+        :param dict args: Details shown with the span.
+        """
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        end = time.time()
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.tracer.add({
+            'name': self.name, 'cat': self.category, 'ph': 'X',
+            'ts': self.start * 1e6, 'dur': (end - self.start) * 1e6,
+            'pid': os.getpid(), 'tid': threading.get_ident(),
+            'args': self.args
+        })
+        return False
+
+
+class _NullSpan(object):
+    """
+    The span used when the current file isn't being traced.
+    """
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def start_tracing(path, sample_rate=DEFAULT_SAMPLE_RATE):
+    """
+    Start tracing the files fixed by this process and any processes that it
+    forks.
+
+    :param str path: The full path of the trace to write.
+    :param float sample_rate: The fraction of files to trace.
+    :returns: The tracer.
+    :rtype: Tracer
+    """
+    global _tracer
+    _tracer = Tracer(path, sample_rate)
+    return _tracer
+
+
+def stop_tracing():
+    """
+    Stop tracing and write the trace from the spans of every process.
+
+    :returns: The number of events in the trace or None if files weren't
+        being traced.
+    :rtype: int
+    """
+    global _tracer
+    tracer = _tracer
+    _tracer = None
+    if tracer is None:
+        return None
+    return tracer.merge()
+
+
+@contextlib.contextmanager
+def trace_file(filepath):
+    """
+    Trace the fixing of a file, if tracing has been started and the file is
+    in the sample, in a span that contains the spans started in its block
+    by this thread.
+
+    :param str filepath: The file's full path.
+    """
+    tracer = _tracer
+    if (tracer is None or getattr(_local, 'tracing', False) or
+            not tracer.sampled(filepath)):
+        yield
+        return
+    _local.tracing = True
+    try:
+        with Span(tracer, os.path.basename(filepath), 'file',
+                  {'path': filepath}):
+            yield
+    finally:
+        _local.tracing = False
+        tracer.flush()
+
+
+def span(name, category, **args):
+    """
+    Return a span for a block of code, which records nothing unless the
+    current thread is fixing a file that's being traced.
+
+    :param str name: The span's name.
+    :param str category: The span's category, for example fix.
+    :param args: Details shown with the span.
+    :returns: The span.
+    """
+    tracer = _tracer
+    if tracer is None or not getattr(_local, 'tracing', False):
+        return _NULL_SPAN
+    return Span(tracer, name, category, args)
+
+
+@contextlib.contextmanager
+def traced_open(opener, filepath, *args, **kwargs):
+    """
+    Open a file, for example with netCDF4.Dataset, in a span that lasts
+    until the file is closed.
+
+    :param opener: The class or function that opens the file, which
+        returns a context manager.
+    :param str filepath: The file's full path.
+    :param args: Further arguments for the opener.
+    :param kwargs: Further keyword arguments for the opener.
+    :returns: The open file.
+    """
+    with span(getattr(opener, '__name__', 'open'), 'open', path=filepath,
+              mode=args[0] if args else kwargs.get('mode', 'r')):
+        with opener(filepath, *args, **kwargs) as handle:
+            yield handle
@@ -0,0 +1,456 @@
+"""
+work_queue.py
+
+A queue of files to fix that workers on many nodes can take files from
+without needing a server. The queue is a SQLite database on a shared
+filesystem, whose locking makes claiming files atomic, and so the
+filesystem must support POSIX locks.
+
+A worker claims files from a single dataset at a time and holds a lease on
+them that it renews while it's fixing them. If a worker dies then its
+leases expire and its files are returned to the queue the next time that
+any worker claims files, unless they've already been tried the maximum
+number of times, when they're marked as failed. The outcome of every file
+is recorded in the queue.
+
+When claiming with canary set, the first file added from each dataset is
+claimed on its own and the dataset's other files aren't claimed until it
+has been fixed. If it fails then they're marked as failed without being
+tried, and so a bad dataset fails once however many workers there are.
+"""
+import contextlib
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+from pre_proc.dataset import dataset_key
+
+logger = logging.getLogger(__name__)
+
+# The seconds that a worker holds its files for unless it renews its lease.
+# This must be much longer than the difference between the clocks of any
+# two nodes.
+DEFAULT_LEASE_SECONDS = 600
+
+# The number of times a file is claimed before it's marked as failed
+DEFAULT_MAX_ATTEMPTS = 3
+
+# The seconds to wait for another worker to release the database's lock
+DEFAULT_LOCK_TIMEOUT = 60.
+
+# The seconds that a worker waits before claiming again when the only
+# pending files are waiting for the first file of their dataset
+DEFAULT_POLL_INTERVAL = 10.
+
+# A subquery for the id of the first file added from the dataset of the
+# work item aliased as w
+FIRST_ID = ('(SELECT MIN(d.id) FROM work_items AS d '
+            'WHERE d.dataset = w.dataset)')
+
+# The states of the files in the queue
+PENDING = 'pending'
+CLAIMED = 'claimed'
+DONE = 'done'
+FAILED = 'failed'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS work_items (
+    id INTEGER PRIMARY KEY,
+    filepath TEXT NOT NULL UNIQUE,
+    dataset TEXT NOT NULL,
+    state TEXT NOT NULL,
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    claimed REAL,
+    finished REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS work_items_state
+    ON work_items (state, dataset);
+CREATE INDEX IF NOT EXISTS work_items_dataset
+    ON work_items (dataset, id);
+"""
+
+
+def worker_id():
+    """
+    Return a name for this process that's unique across the nodes sharing a
+    queue.
+
+    :returns: The host's name and the process id.
+    :rtype: str
+    """
+    return '{}:{}'.format(socket.gethostname(), os.getpid())
+
+
+class WorkQueue(object):
+    """
+    A queue of files in a SQLite database.
+    """
+    def __init__(self, path, lease_seconds=DEFAULT_LEASE_SECONDS,
+                 max_attempts=DEFAULT_MAX_ATTEMPTS,
+                 lock_timeout=DEFAULT_LOCK_TIMEOUT):
+        """
+        Initialise the class, creating the queue if it doesn't exist.
+
+        :param str path: The full path of the queue's database.
+        :param float lease_seconds: The seconds that a claim lasts for
+            unless it's renewed.
+        :param int max_attempts: The number of times that a file is claimed
+            before it's marked as failed.
+        :param float lock_timeout: The seconds to wait for another worker to
+            release the database's lock.
+        """
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.lock_timeout = lock_timeout
+        conn = sqlite3.connect(self.path, timeout=self.lock_timeout)
+        try:
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """
+        Open a connection and hold the database's write lock, committing the
+        changes if there's no exception. A new connection is used each time
+        so that a queue can be used by several threads.
+
+        :returns: The connection.
+        :rtype: sqlite3.Connection
+        """
+        # The default rollback journal is used because WAL mode needs
+        # shared memory, which doesn't work across the nodes
+        conn = sqlite3.connect(self.path, timeout=self.lock_timeout,
+                               isolation_level=None)
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+
+    def add(self, filepaths):
+        """
+        Add files to the queue. Files that are already in the queue are
+        ignored. The files are claimed in name order.
+
+        :param list filepaths: The full paths of the files.
+        :returns: The number of files added.
+        :rtype: int
+        """
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                'INSERT OR IGNORE INTO work_items (filepath, dataset, state) '
+                'VALUES (?, ?, ?)',
+                [(filepath, os.path.join(*dataset_key(filepath)), PENDING)
+                 for filepath in sorted(filepaths)]
+            )
+            return conn.total_changes - before
+
+    def claim(self, worker, max_files=1, canary=False):
+        """
+        Claim pending files, which are all from the same dataset. Files whose
+        leases have expired are returned to the queue first.
+
+        :param str worker: The worker's name.
+        :param int max_files: The maximum number of files to claim.
+        :param bool canary: If True then the first file of a dataset is
+            claimed on its own and the dataset's other files are only
+            claimed once it has been fixed. The pending files of datasets
+            whose first file failed are marked as failed.
+        :returns: The full paths of the files claimed, which is empty if
+            there are no pending files that can be claimed.
+        :rtype: list
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            self._requeue_expired(conn, now)
+            if canary:
+                self._block_failed_canaries(conn, now)
+                row = conn.execute(
+                    'SELECT w.dataset, w.id = f.id FROM work_items AS w '
+                    'JOIN work_items AS f ON f.id = ' + FIRST_ID + ' '
+                    'WHERE w.state = ? AND (w.id = f.id OR f.state = ?) '
+                    'ORDER BY w.id LIMIT 1', (PENDING, DONE)
+                ).fetchone()
+                if row is not None and row[1]:
+                    max_files = 1
+            else:
+                row = conn.execute(
+                    'SELECT dataset FROM work_items WHERE state = ? '
+                    'ORDER BY id LIMIT 1', (PENDING,)
+                ).fetchone()
+            if row is None:
+                return []
+            rows = conn.execute(
+                'SELECT id, filepath FROM work_items '
+                'WHERE state = ? AND dataset = ? ORDER BY id LIMIT ?',
+                (PENDING, row[0], max_files)
+            ).fetchall()
+            conn.executemany(
+                'UPDATE work_items SET state = ?, worker = ?, '
+                'lease_expires = ?, attempts = attempts + 1, claimed = ? '
+                'WHERE id = ?',
+                [(CLAIMED, worker, now + self.lease_seconds, now, item_id)
+                 for item_id, _filepath in rows]
+            )
+        return [filepath for _item_id, filepath in rows]
+
+    def _block_failed_canaries(self, conn, now):
+        """
+        Mark the pending files of the datasets whose first file failed as
+        failed, for example when its lease expired the maximum number of
+        times.
+
+        :param sqlite3.Connection conn: The connection holding the lock.
+        :param float now: The current time.
+        :returns: The number of files marked as failed.
+        :rtype: int
+        """
+        cursor = conn.execute(
+            'UPDATE work_items SET state = ?, finished = ?, error = ? '
+            'WHERE state = ? AND dataset IN ('
+            'SELECT w.dataset FROM work_items AS w '
+            'WHERE w.state = ? AND w.id = ' + FIRST_ID + ')',
+            (FAILED, now, 'Skipped because the first file in the dataset '
+                          'could not be fixed', PENDING, FAILED)
+        )
+        return cursor.rowcount
+
+    def is_canary(self, filepath):
+        """
+        Check whether a file is the first file added from its dataset.
+
+        :param str filepath: The file's full path.
+        :returns: True if the file is its dataset's first file.
+        :rtype: bool
+        """
+        with self._transaction() as conn:
+            row = conn.execute(
+                'SELECT w.id = ' + FIRST_ID + ' FROM work_items AS w '
+                'WHERE w.filepath = ?', (filepath,)
+            ).fetchone()
+        return bool(row and row[0])
+
+    def waiting(self):
+        """
+        Count the pending files that can't be claimed with canary set until
+        the first file of their dataset, which another worker is fixing,
+        has been fixed.
+
+        :returns: The number of files.
+        :rtype: int
+        """
+        with self._transaction() as conn:
+            return conn.execute(
+                'SELECT COUNT(*) FROM work_items AS w '
+                'JOIN work_items AS f ON f.id = ' + FIRST_ID + ' '
+                'WHERE w.state = ? AND f.state = ?', (PENDING, CLAIMED)
+            ).fetchone()[0]
+
+    def renew(self, worker, filepaths):
+        """
+        Extend the leases on files that the worker still holds.
+
+        :param str worker: The worker's name.
+        :param list filepaths: The full paths of the files.
+        :returns: The number of leases renewed.
+        :rtype: int
+        """
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                'UPDATE work_items SET lease_expires = ? '
+                'WHERE filepath = ? AND worker = ? AND state = ?',
+                [(time.time() + self.lease_seconds, filepath, worker,
+                  CLAIMED) for filepath in filepaths]
+            )
+            return conn.total_changes - before
+
+    def complete(self, worker, filepath, error=None):
+        """
+        Record the outcome of fixing a file. The outcome isn't recorded if
+        the worker's lease expired and another worker has claimed the file.
+
+        :param str worker: The worker's name.
+        :param str filepath: The file's full path.
+        :param str error: The error if the file couldn't be fixed or None if
+            it was fixed.
+        :returns: True if the outcome was recorded.
+        :rtype: bool
+        """
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                'UPDATE work_items SET state = ?, worker = ?, '
+                'lease_expires = NULL, finished = ?, error = ? '
+                'WHERE filepath = ? AND '
+                '((state = ? AND worker = ?) OR state = ?)',
+                (FAILED if error else DONE, worker, time.time(), error,
+                 filepath, CLAIMED, worker, PENDING)
+            )
+        if not cursor.rowcount:
+            logger.warning('Outcome of {} not recorded as it has been '
+                           'claimed by another worker'.format(filepath))
+        return bool(cursor.rowcount)
+
+    def block_dataset(self, filepath, error):
+        """
+        Mark the pending files in a file's dataset as failed without trying
+        them, for example when the dataset's first file couldn't be fixed.
+
+        :param str filepath: The full path of one of the dataset's files.
+        :param str error: The reason the files weren't tried.
+        :returns: The number of files marked as failed.
+        :rtype: int
+        """
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                'UPDATE work_items SET state = ?, finished = ?, error = ? '
+                'WHERE state = ? AND dataset = ?',
+                (FAILED, time.time(), error, PENDING,
+                 os.path.join(*dataset_key(filepath)))
+            )
+        return cursor.rowcount
+
+    def release(self, worker):
+        """
+        Return the files claimed by a worker to the queue without counting
+        the attempt, for example when the worker is stopped.
+
+        :param str worker: The worker's name.
+        :returns: The number of files released.
+        :rtype: int
+        """
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                'UPDATE work_items SET state = ?, worker = NULL, '
+                'lease_expires = NULL, attempts = attempts - 1 '
+                'WHERE state = ? AND worker = ?',
+                (PENDING, CLAIMED, worker)
+            )
+        return cursor.rowcount
+
+    def requeue_expired(self):
+        """
+        Return files whose leases have expired to the queue.
+
+        :returns: The number of files whose leases had expired.
+        :rtype: int
+        """
+        with self._transaction() as conn:
+            return self._requeue_expired(conn, time.time())
+
+    def _requeue_expired(self, conn, now):
+        """
+        Return files whose leases have expired to the queue, or mark them as
+        failed if they've been claimed the maximum number of times.
+
+        :param sqlite3.Connection conn: The connection holding the lock.
+        :param float now: The current time.
+        :returns: The number of files whose leases had expired.
+        :rtype: int
+        """
+        cursor = conn.execute(
+            'UPDATE work_items SET '
+            'state = CASE WHEN attempts >= ? THEN ? ELSE ? END, '
+            'error = CASE WHEN attempts >= ? THEN ? ELSE error END, '
+            'worker = NULL, lease_expires = NULL '
+            'WHERE state = ? AND lease_expires < ?',
+            (self.max_attempts, FAILED, PENDING, self.max_attempts,
+             'Lease expired {} times'.format(self.max_attempts), CLAIMED,
+             now)
+        )
+        if cursor.rowcount:
+            logger.warning('Leases on {} files expired'.
+                           format(cursor.rowcount))
+        return cursor.rowcount
+
+    def requeue_failed(self):
+        """
+        Return the failed files to the queue to be tried again.
+
+        :returns: The number of files returned.
+        :rtype: int
+        """
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                'UPDATE work_items SET state = ?, worker = NULL, '
+                'attempts = 0, finished = NULL, error = NULL '
+                'WHERE state = ?', (PENDING, FAILED)
+            )
+        return cursor.rowcount
+
+    def counts(self):
+        """
+        Count the files in each state.
+
+        :returns: The number of files by state.
+        :rtype: dict
+        """
+        with self._transaction() as conn:
+            return dict(conn.execute(
+                'SELECT state, COUNT(*) FROM work_items GROUP BY state'
+            ).fetchall())
+
+    def failures(self):
+        """
+        Return the files that couldn't be fixed.
+
+        :returns: (filepath, error) tuples in name order.
+        :rtype: list
+        """
+        with self._transaction() as conn:
+            return conn.execute(
+                'SELECT filepath, error FROM work_items WHERE state = ? '
+                'ORDER BY filepath', (FAILED,)
+            ).fetchall()
+
+
+class LeaseKeeper(object):
+    """
+    A context manager that renews a worker's leases on a background thread
+    while it fixes the files.
+    """
+    def __init__(self, queue, worker, filepaths):
+        """
+        Initialise the class
+
+        :param WorkQueue queue: The queue.
+        :param str worker: The worker's name.
+        :param list filepaths: The full paths of the files claimed.
+        """
+        self.queue = queue
+        self.worker = worker
+        self.filepaths = filepaths
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._renew, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._stopped.set()
+        self._thread.join()
+
+    def _renew(self):
+        """
+        Renew the leases three times in each lease period until stopped.
+        """
+        while not self._stopped.wait(self.queue.lease_seconds / 3.):
+            try:
+                self.queue.renew(self.worker, self.filepaths)
+            except sqlite3.Error as exc:
+                logger.warning('Unable to renew leases: {}'.format(exc))
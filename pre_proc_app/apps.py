@@ -2,7 +2,37 @@
 
 
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+from pre_proc_app.routers import RESULTS_DATABASE
 
 
 class PreProcAppConfig(AppConfig):
     name = 'pre_proc_app'
+
+    def ready(self):
+        connection_created.connect(configure_sqlite)
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """
+    Run the PRAGMA statements in the SQLITE_PRAGMAS setting, or the
+    RESULTS_SQLITE_PRAGMAS setting for the results database, on each new
+    SQLite connection.
+
+    :param sender: The database wrapper's class.
+    :param connection: The database wrapper for the new connection.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    if connection.alias == RESULTS_DATABASE:
+        pragmas = getattr(settings, 'RESULTS_SQLITE_PRAGMAS', {})
+    else:
+        pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    cursor = connection.connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute('PRAGMA {} = {}'.format(name, value))
+    finally:
+        cursor.close()
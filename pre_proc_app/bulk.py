@@ -0,0 +1,442 @@
+# -*- coding: utf-8 -*-
+"""
+bulk.py
+
+Helpers to load large numbers of objects into the database in a few bulk
+queries inside a single transaction rather than one query per object.
+"""
+import itertools
+import json
+import logging
+import time
+
+from django.db import transaction
+from django.db.models.query import QuerySet
+
+from pre_proc_app.models import (Institution, ClimateModel, Experiment,
+                                 DataRequest, cmor_name_base)
+
+logger = logging.getLogger(__name__)
+
+# The number of objects to hold in memory before writing them
+DEFAULT_BATCH_SIZE = 5000
+
+# The maximum number of parameters in a single SQLite query
+SQLITE_MAX_VARIABLES = 999
+
+# The fields that identify a data request
+DATA_REQUEST_KEY = ('institution_id_id', 'source_id_id', 'experiment_id_id',
+                    'variant_label', 'table_id', 'cmor_name')
+
+# The models that are identified by a unique name
+NAMED_MODELS = {
+    'Institution': Institution,
+    'ClimateModel': ClimateModel,
+    'Experiment': Experiment
+}
+
+
+def iter_json_lists(fh, chunk_size=64 * 1024):
+    """
+    Parse a file containing a single JSON object whose values are lists,
+    yielding each item in the lists one at a time so that the whole file
+    is never held in memory.
+
+    :param fh: The open file to read from.
+    :param int chunk_size: The number of characters to read at a time.
+    :returns: A generator of (key, item) tuples. Values that aren't lists
+        are yielded as a single item.
+    :rtype: generator
+    """
+    reader = _JsonReader(fh, chunk_size)
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+    while True:
+        key = reader.decode()
+        reader.expect(':')
+        if reader.peek() == '[':
+            reader.expect('[')
+            if reader.peek() == ']':
+                reader.expect(']')
+            else:
+                while True:
+                    yield key, reader.decode()
+                    if reader.expect(',]') == ']':
+                        break
+        else:
+            yield key, reader.decode()
+        if reader.expect(',}') == '}':
+            return
+
+
+class _JsonReader(object):
+    """
+    Read JSON values one at a time from a buffer that is refilled from a
+    file as required.
+    """
+    def __init__(self, fh, chunk_size):
+        self.fh = fh
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _read(self):
+        """
+        Read the next chunk from the file, discarding the consumed part of
+        the buffer.
+
+        :returns: False if the end of the file has been reached.
+        :rtype: bool
+        """
+        chunk = self.fh.read(self.chunk_size)
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        if not chunk:
+            self.eof = True
+        return bool(chunk)
+
+    def peek(self):
+        """
+        Skip any whitespace and return the next character.
+
+        :returns: The next character, or an empty string at the end of file.
+        :rtype: str
+        """
+        while True:
+            while (self.pos < len(self.buffer) and
+                   self.buffer[self.pos].isspace()):
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._read():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, characters):
+        """
+        Consume the next character, which must be one of `characters`.
+
+        :param str characters: The allowed characters.
+        :returns: The character consumed.
+        :rtype: str
+        :raises ValueError: If the next character isn't allowed.
+        """
+        character = self.peek()
+        if not character or character not in characters:
+            raise ValueError('Expected one of {} but found {!r}'.
+                             format(characters, character))
+        self.pos += 1
+        return character
+
+    def decode(self):
+        """
+        Decode the next complete JSON value.
+
+        :returns: The decoded value.
+        :raises json.JSONDecodeError: If the value isn't valid JSON.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.eof or not self._read():
+                    raise
+                continue
+            # A number at the end of the buffer may continue in the next
+            # chunk
+            if end == len(self.buffer) and not self.eof and self._read():
+                continue
+            self.pos = end
+            return value
+
+
+class DmtJsonLoader(object):
+    """
+    Load the institutions, climate models, experiments and data requests
+    from a JSON file generated by the DMT. Names are mapped to database ids
+    in memory and the objects are created with bulk inserts inside a single
+    transaction. Objects that already exist are ignored.
+    """
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Initialise the class
+
+        :param int batch_size: The number of objects to hold in memory
+            before writing them to the database.
+        """
+        self.batch_size = batch_size
+        # name to id maps for each named model
+        self.name_maps = {model: {} for model in NAMED_MODELS.values()}
+        self.pending_names = {model: set() for model in NAMED_MODELS.values()}
+        # data requests as (institution, model, experiment, variant_label,
+        # table_id, cmor_name) tuples
+        self.pending_data_requests = []
+        # data requests whose foreign keys haven't been loaded yet
+        self.deferred_data_requests = []
+        self.rows_read = 0
+
+    def load(self, fh):
+        """
+        Load all of the objects in an open file.
+
+        :param fh: The open JSON file.
+        :returns: The number of rows read, objects created, the time taken
+            and the rows loaded per second.
+        :rtype: dict
+        """
+        start_time = time.time()
+        counts_before = self._object_counts()
+        with transaction.atomic():
+            for _key, item in iter_json_lists(fh):
+                self._add(item)
+            self._write_data_requests(final=True)
+        seconds = time.time() - start_time
+        counts_after = self._object_counts()
+        report = {
+            'rows': self.rows_read,
+            'seconds': seconds,
+            'rows_per_second': self.rows_read / seconds if seconds else 0.
+        }
+        for name, count in counts_after.items():
+            report['{}_created'.format(name)] = count - counts_before[name]
+        return report
+
+    def _add(self, item):
+        """
+        Queue a single object from the JSON file, writing a batch of objects
+        once enough have been queued.
+
+        :param dict item: The object's __class__ and __kwargs__.
+        """
+        class_name = item['__class__']
+        kwargs = item['__kwargs__']
+        self.rows_read += 1
+        if class_name in NAMED_MODELS:
+            names = self.pending_names[NAMED_MODELS[class_name]]
+            names.add(kwargs['short_name'])
+            if len(names) >= self.batch_size:
+                self._write_names()
+        elif class_name == 'DataRequest':
+            self.pending_data_requests.append((
+                kwargs['institution_id__name'],
+                kwargs['source_id__name'],
+                kwargs['experiment_id__name'],
+                kwargs['variant_label'],
+                kwargs['table_id'],
+                kwargs['cmor_name']
+            ))
+            if len(self.pending_data_requests) >= self.batch_size:
+                self._write_data_requests()
+        else:
+            msg = ('Cannot load from JSON files class {}'.
+                   format(class_name))
+            raise NotImplementedError(msg)
+
+    def _write_names(self):
+        """
+        Create any queued named objects that don't already exist and add
+        them to the name maps.
+        """
+        for model, names in self.pending_names.items():
+            new_names = names - set(self.name_maps[model])
+            if new_names:
+                model.objects.bulk_create(
+                    [model(name=name) for name in sorted(new_names)],
+                    batch_size=self.batch_size, ignore_conflicts=True
+                )
+                self._map_names(model, new_names)
+            names.clear()
+
+    def _map_names(self, model, names):
+        """
+        Add the ids of any of `names` that exist in the database to the name
+        map for `model`.
+
+        :param model: The Django model class.
+        :param set names: The names to look up.
+        """
+        names = sorted(names - set(self.name_maps[model]))
+        for index in range(0, len(names), SQLITE_MAX_VARIABLES):
+            self.name_maps[model].update(
+                model.objects.
+                filter(name__in=names[index:index + SQLITE_MAX_VARIABLES]).
+                values_list('name', 'id')
+            )
+
+    def _write_data_requests(self, final=False):
+        """
+        Create the queued data requests. Any whose foreign keys don't exist
+        yet are deferred until the end of the file.
+
+        :param bool final: True at the end of the file, when any data
+            requests with missing foreign keys are an error.
+        :raises django.core.exceptions.ObjectDoesNotExist: If a data
+            request's foreign key doesn't exist at the end of the file.
+        """
+        self._write_names()
+        rows = self.pending_data_requests
+        if final:
+            rows = self.deferred_data_requests + rows
+            self.deferred_data_requests = []
+        self.pending_data_requests = []
+
+        models = (Institution, ClimateModel, Experiment)
+        for index, model in enumerate(models):
+            self._map_names(model, {row[index] for row in rows})
+
+        data_requests = []
+        for row in rows:
+            missing = [(model, name) for model, name in zip(models, row)
+                       if name not in self.name_maps[model]]
+            if missing and final:
+                model, name = missing[0]
+                raise model.DoesNotExist('{} {} does not exist'.
+                                         format(model.__name__, name))
+            elif missing:
+                self.deferred_data_requests.append(row)
+                continue
+            data_requests.append(DataRequest(
+                institution_id_id=self.name_maps[Institution][row[0]],
+                source_id_id=self.name_maps[ClimateModel][row[1]],
+                experiment_id_id=self.name_maps[Experiment][row[2]],
+                variant_label=row[3],
+                table_id=row[4],
+                cmor_name=row[5],
+                cmor_name_base=cmor_name_base(row[5])
+            ))
+        # The unique constraint doesn't stop duplicates with a null
+        # variant_label and so the existing data requests are removed first
+        existing = self._existing_keys(data_requests)
+        new_requests = []
+        for data_request in data_requests:
+            key = _data_request_key(data_request)
+            if key not in existing:
+                existing.add(key)
+                new_requests.append(data_request)
+        DataRequest.objects.bulk_create(new_requests,
+                                        batch_size=self.batch_size,
+                                        ignore_conflicts=True)
+        logger.debug('{} data requests written'.format(len(new_requests)))
+
+    @staticmethod
+    def _existing_keys(data_requests):
+        """
+        Find which of `data_requests` already exist in the database.
+
+        :param list data_requests: The unsaved DataRequest objects.
+        :returns: The natural keys of the data requests that exist.
+        :rtype: set
+        """
+        cmor_names = sorted({data_request.cmor_name
+                             for data_request in data_requests})
+        existing = set()
+        for index in range(0, len(cmor_names), SQLITE_MAX_VARIABLES):
+            existing.update(
+                DataRequest.objects.
+                filter(cmor_name__in=cmor_names[index:index +
+                                                SQLITE_MAX_VARIABLES]).
+                values_list(*DATA_REQUEST_KEY)
+            )
+        return existing
+
+    @staticmethod
+    def _object_counts():
+        """
+        Count the objects of each type in the database.
+
+        :returns: The number of each type of object.
+        :rtype: dict
+        """
+        return {
+            'institution_id': Institution.objects.count(),
+            'source_id': ClimateModel.objects.count(),
+            'experiment_id': Experiment.objects.count(),
+            'data_requests': DataRequest.objects.count()
+        }
+
+
+def _data_request_key(data_request):
+    """
+    Return the fields that identify a data request.
+
+    :param pre_proc_app.models.DataRequest data_request: The data request.
+    :returns: The values of the fields in DATA_REQUEST_KEY.
+    :rtype: tuple
+    """
+    return tuple(getattr(data_request, field) for field in DATA_REQUEST_KEY)
+
+
+def attach_fixes(data_requests, fixes):
+    """
+    Add `fixes` to each of `data_requests`. The rows are inserted into the
+    many-to-many table in batches small enough for SQLite's limit on the
+    number of variables in a query. Existing links are skipped and all of
+    the rows are inserted in a single transaction.
+
+    :param data_requests: A QuerySet or list of DataRequest objects.
+    :param fixes: A QuerySet or list of FileFix objects.
+    :returns: The number of new links created.
+    :rtype: int
+    """
+    through = DataRequest.fixes.through
+    fix_ids = _object_ids(fixes)
+    data_request_ids = _object_ids(data_requests)
+    # Each row in the table needs two variables
+    batch_size = SQLITE_MAX_VARIABLES // 2
+    rows = (through(datarequest_id=data_request_id, filefix_id=fix_id)
+            for data_request_id in data_request_ids for fix_id in fix_ids)
+    with transaction.atomic():
+        num_before = through.objects.filter(filefix_id__in=fix_ids).count()
+        while True:
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                break
+            through.objects.bulk_create(batch, batch_size=batch_size,
+                                        ignore_conflicts=True)
+        num_after = through.objects.filter(filefix_id__in=fix_ids).count()
+    return num_after - num_before
+
+
+def detach_fixes(data_requests, fixes=None):
+    """
+    Remove `fixes` from each of `data_requests` in batches small enough for
+    SQLite's limit on the number of variables in a query, in a single
+    transaction.
+
+    :param data_requests: A QuerySet or list of DataRequest objects.
+    :param fixes: A QuerySet or list of FileFix objects. If None then all
+        fixes are removed.
+    :returns: The number of links removed.
+    :rtype: int
+    """
+    through = DataRequest.fixes.through
+    fix_ids = None if fixes is None else _object_ids(fixes)
+    data_request_ids = _object_ids(data_requests)
+    batch_size = SQLITE_MAX_VARIABLES - len(fix_ids or [])
+    num_deleted = 0
+    with transaction.atomic():
+        for index in range(0, len(data_request_ids), batch_size):
+            links = through.objects.filter(
+                datarequest_id__in=data_request_ids[index:index + batch_size]
+            )
+            if fix_ids is not None:
+                links = links.filter(filefix_id__in=fix_ids)
+            num_deleted += links.delete()[0]
+    return num_deleted
+
+
+def _object_ids(objects):
+    """
+    Return the primary keys of a QuerySet with a single query or of a list
+    of objects without any queries.
+
+    :param objects: A QuerySet or list of model instances.
+    :returns: The sorted unique primary keys.
+    :rtype: list
+    """
+    if isinstance(objects, QuerySet):
+        ids = objects.values_list('pk', flat=True)
+    else:
+        ids = [obj.pk for obj in objects]
+    return sorted(set(ids))
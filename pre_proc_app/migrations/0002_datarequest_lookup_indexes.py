@@ -0,0 +1,40 @@
+import re
+
+from django.db import migrations, models
+
+
+def set_cmor_name_base(apps, schema_editor):
+    """
+    Set cmor_name_base for the existing data requests.
+    """
+    DataRequest = apps.get_model('pre_proc_app', 'DataRequest')
+    data_requests = list(DataRequest.objects.only('id', 'cmor_name'))
+    for data_request in data_requests:
+        data_request.cmor_name_base = re.sub(r'\d+$', '',
+                                             data_request.cmor_name)
+    DataRequest.objects.bulk_update(data_requests, ['cmor_name_base'],
+                                    batch_size=499)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pre_proc_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datarequest',
+            name='cmor_name_base',
+            field=models.CharField(blank=True, default='', editable=False, max_length=50, verbose_name='CMOR variable name without suffix'),
+        ),
+        migrations.RunPython(set_cmor_name_base, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='datarequest',
+            index=models.Index(fields=['source_id', 'experiment_id', 'variant_label', 'table_id', 'cmor_name'], name='data_request_lookup'),
+        ),
+        migrations.AddIndex(
+            model_name='datarequest',
+            index=models.Index(fields=['source_id', 'experiment_id', 'variant_label', 'table_id', 'cmor_name_base'], name='data_request_base_lookup'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pre_proc_app', '0002_datarequest_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessingResult',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('filepath', models.CharField(max_length=1000, verbose_name='File')),
+                ('dataset', models.CharField(max_length=1000, verbose_name='Dataset key')),
+                ('fixes', models.TextField(blank=True, default='', verbose_name='Fixes applied')),
+                ('status', models.CharField(choices=[('done', 'Done'), ('failed', 'Failed'), ('skipped', 'Skipped')], max_length=10)),
+                ('failed_fix', models.CharField(blank=True, max_length=1000, null=True, verbose_name='Fix that failed')),
+                ('error_class', models.CharField(blank=True, max_length=100, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('duration', models.FloatField(verbose_name='Seconds')),
+                ('bytes_in', models.BigIntegerField(blank=True, null=True)),
+                ('bytes_out', models.BigIntegerField(blank=True, null=True)),
+                ('worker', models.CharField(blank=True, default='', max_length=200)),
+                ('finished', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Processing Result',
+                'indexes': [models.Index(fields=['dataset', 'status', 'failed_fix'], name='result_dataset_lookup'), models.Index(fields=['failed_fix', 'status'], name='result_fix_lookup'), models.Index(fields=['duration'], name='result_duration'), models.Index(fields=['filepath', 'finished'], name='result_file_lookup')],
+            },
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pre_proc_app', '0003_processingresult'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='processingresult',
+            name='failed_batch',
+            field=models.CharField(blank=True, max_length=1000, null=True, verbose_name='Fixes applied together'),
+        ),
+    ]
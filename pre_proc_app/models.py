@@ -1,9 +1,22 @@
 # -*- coding: utf-8 -*-
-
+import re
 
 from django.db import models
 
 
+def cmor_name_base(cmor_name):
+    """
+    Return a CMOR variable name without any numeric suffix, e.g. `ta` for
+    `ta27`. Files often contain the variable name without the suffix that
+    the data request uses to identify the number of levels.
+
+    :param str cmor_name: The CMOR variable name.
+    :returns: The name without any trailing digits.
+    :rtype: str
+    """
+    return re.sub(r'\d+$', '', cmor_name)
+
+
 class FileFix(models.Model):
     """
     The FileFix objects that can be applied to files that make up data
@@ -83,6 +96,10 @@ class DataRequest(models.Model):
                                 verbose_name='Table name')
     cmor_name = models.CharField(max_length=50, null=False, blank=False,
                                  verbose_name='CMOR variable name')
+    cmor_name_base = models.CharField(max_length=50, null=False, blank=True,
+                                      default='', editable=False,
+                                      verbose_name='CMOR variable name '
+                                                   'without suffix')
 
     fixes = models.ManyToManyField(FileFix)
 
@@ -92,7 +109,81 @@ class DataRequest(models.Model):
                                           self.variant_label, self.table_id,
                                           self.cmor_name)
 
+    def save(self, *args, **kwargs):
+        self.cmor_name_base = cmor_name_base(self.cmor_name)
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = 'Data Request'
         unique_together = ('institution_id', 'source_id', 'experiment_id',
                            'variant_label', 'table_id', 'cmor_name')
+        # The lookups made for each file don't include the institution and
+        # so can't use the unique index
+        indexes = [
+            models.Index(fields=['source_id', 'experiment_id',
+                                 'variant_label', 'table_id', 'cmor_name'],
+                         name='data_request_lookup'),
+            models.Index(fields=['source_id', 'experiment_id',
+                                 'variant_label', 'table_id',
+                                 'cmor_name_base'],
+                         name='data_request_base_lookup'),
+        ]
+
+
+class ProcessingResult(models.Model):
+    """
+    The outcome of fixing a single file. The results are stored in their
+    own database (see pre_proc_app.routers) so that the workers can write
+    them while they share the master database read-only.
+    """
+    # The outcomes in pre_proc.results
+    STATUS_CHOICES = (
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+        ('skipped', 'Skipped'),
+    )
+
+    filepath = models.CharField(max_length=1000, null=False, blank=False,
+                                verbose_name='File')
+    dataset = models.CharField(max_length=1000, null=False, blank=False,
+                               verbose_name='Dataset key')
+    fixes = models.TextField(null=False, blank=True, default='',
+                             verbose_name='Fixes applied')
+    status = models.CharField(max_length=10, null=False, blank=False,
+                              choices=STATUS_CHOICES)
+    failed_fix = models.CharField(max_length=1000, null=True, blank=True,
+                                  verbose_name='Fix that failed')
+    failed_batch = models.CharField(max_length=1000, null=True, blank=True,
+                                    verbose_name='Fixes applied together')
+    error_class = models.CharField(max_length=100, null=True, blank=True)
+    error = models.TextField(null=True, blank=True)
+    duration = models.FloatField(null=False, verbose_name='Seconds')
+    bytes_in = models.BigIntegerField(null=True, blank=True)
+    bytes_out = models.BigIntegerField(null=True, blank=True)
+    worker = models.CharField(max_length=200, null=False, blank=True,
+                              default='')
+    finished = models.DateTimeField(null=False)
+
+    def __str__(self):
+        return '{} {}'.format(self.filepath, self.status)
+
+    @property
+    def fix_names(self):
+        """ The names of the fixes applied as a list """
+        return self.fixes.split(',') if self.fixes else []
+
+    class Meta:
+        verbose_name = 'Processing Result'
+        indexes = [
+            # Which files of a dataset failed a fix
+            models.Index(fields=['dataset', 'status', 'failed_fix'],
+                         name='result_dataset_lookup'),
+            # Which files failed a fix in any dataset
+            models.Index(fields=['failed_fix', 'status'],
+                         name='result_fix_lookup'),
+            # The slowest files
+            models.Index(fields=['duration'], name='result_duration'),
+            # The history of a file
+            models.Index(fields=['filepath', 'finished'],
+                         name='result_file_lookup'),
+        ]
@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+"""
+results.py
+
+Record the outcome of fixing each file in the results database and query
+the results. The results are held in memory and written in batches with a
+single bulk insert in a transaction, rather than one query per file. The
+processes of a pool send their results to a single writer process so that
+they don't compete for the database's lock.
+"""
+import datetime
+import logging
+import multiprocessing
+import re
+import time
+
+from django.db import (connections, DatabaseError, OperationalError,
+                       transaction)
+from django.db.models import Q
+
+from pre_proc.results import (DEFAULT_BATCH_SIZE, DEFAULT_FLUSH_INTERVAL,
+                              drain_results, QueuedRecorder)
+from pre_proc_app.models import ProcessingResult
+from pre_proc_app.routers import RESULTS_DATABASE
+
+logger = logging.getLogger(__name__)
+
+# The number of times to try writing a batch of results while the database
+# is locked or busy
+DEFAULT_MAX_ATTEMPTS = 6
+
+# The seconds to wait before the first retry, which doubles for each retry
+DEFAULT_RETRY_DELAY = 0.5
+
+
+class ResultRecorder(object):
+    """
+    Write pre_proc.results.FileResult objects to the results database in
+    batches.
+    """
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL,
+                 max_attempts=DEFAULT_MAX_ATTEMPTS,
+                 retry_delay=DEFAULT_RETRY_DELAY):
+        """
+        Initialise the class
+
+        :param int batch_size: The number of results to hold in memory
+            before writing them to the database.
+        :param float flush_interval: The seconds after the last write that
+            the results held are written, even if there aren't enough of
+            them for a batch.
+        :param int max_attempts: The number of times to try writing the
+            results while the database is locked or busy.
+        :param float retry_delay: The seconds to wait before the first
+            retry, which doubles for each further retry.
+        """
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.pending = []
+        self.num_written = 0
+        self.num_lost = 0
+        self.last_flush = time.time()
+
+    def add(self, result):
+        """
+        Queue a result, writing the queued results once there are enough of
+        them or they've been held for long enough.
+
+        :param pre_proc.results.FileResult result: The finished result.
+        """
+        self.pending.append(result)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+        else:
+            self.flush_if_due()
+
+    def flush_if_due(self):
+        """
+        Write any queued results if the flush interval has passed since the
+        last write.
+
+        :returns: The number of results written.
+        :rtype: int
+        """
+        if time.time() - self.last_flush >= self.flush_interval:
+            return self.flush()
+        return 0
+
+    def flush(self):
+        """
+        Write any queued results. If the database is locked or busy then the
+        write is retried, waiting twice as long each time. The results are
+        only discarded once the write has been tried max_attempts times or
+        if it fails for another reason.
+
+        :returns: The number of results written.
+        :rtype: int
+        """
+        self.last_flush = time.time()
+        if not self.pending:
+            return 0
+        results = [processing_result(result) for result in self.pending]
+        attempt = 1
+        while True:
+            try:
+                with transaction.atomic(using=RESULTS_DATABASE):
+                    ProcessingResult.objects.bulk_create(
+                        results, batch_size=self.batch_size
+                    )
+                break
+            except OperationalError as exc:
+                if attempt < self.max_attempts:
+                    delay = self.retry_delay * 2 ** (attempt - 1)
+                    logger.warning('Unable to write {} processing results, '
+                                   'retrying in {} seconds: {}'.
+                                   format(len(results), delay, exc))
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+                error = exc
+            except DatabaseError as exc:
+                error = exc
+            # The files have been fixed and so carry on without the results
+            self.pending = []
+            self.num_lost += len(results)
+            logger.error('{} processing results lost after {} attempts to '
+                         'write them: {}'.format(len(results), attempt,
+                                                 error))
+            return 0
+        self.pending = []
+        self.num_written += len(results)
+        self.last_flush = time.time()
+        logger.debug('{} processing results written'.format(len(results)))
+        return len(results)
+
+
+class ResultWriter(object):
+    """
+    A context manager that runs a single process to write the results from
+    the processes of a pool. The processes are given a QueuedRecorder from
+    recorder() and the writer writes any remaining results when the context
+    is left.
+    """
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL):
+        """
+        Initialise the class
+
+        :param int batch_size: The number of results to write to the
+            database at a time.
+        :param float flush_interval: The maximum seconds that the writer
+            holds a result before writing it.
+        """
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.manager = None
+        self.result_queue = None
+        self.process = None
+
+    def __enter__(self):
+        self.manager = multiprocessing.Manager()
+        self.result_queue = self.manager.Queue()
+        # The writer must open its own connection rather than share this
+        # process's
+        connections.close_all()
+        self.process = multiprocessing.Process(
+            target=write_results,
+            args=(self.result_queue, self.batch_size, self.flush_interval),
+            name='result-writer'
+        )
+        self.process.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.result_queue.put(None)
+        self.process.join()
+        self.manager.shutdown()
+        if self.process.exitcode:
+            logger.error('The result writer exited with code {}'.
+                         format(self.process.exitcode))
+
+    def recorder(self):
+        """
+        Create a recorder for the processes of a pool.
+
+        :returns: The recorder.
+        :rtype: pre_proc.results.QueuedRecorder
+        """
+        return QueuedRecorder(self.result_queue, self.batch_size,
+                              self.flush_interval)
+
+
+def write_results(result_queue, batch_size=DEFAULT_BATCH_SIZE,
+                  flush_interval=DEFAULT_FLUSH_INTERVAL):
+    """
+    Write the batches of results from a queue until None is received. This
+    is run by ResultWriter's process.
+
+    :param result_queue: The queue of lists of results.
+    :param int batch_size: The number of results to write at a time.
+    :param float flush_interval: The maximum seconds to hold a result
+        before writing it.
+    :returns: The number of results written.
+    :rtype: int
+    """
+    recorder = ResultRecorder(batch_size, flush_interval)
+    try:
+        drain_results(result_queue, recorder, flush_interval)
+    finally:
+        recorder.flush()
+    logger.debug('{} processing results written by the writer'.
+                 format(recorder.num_written))
+    return recorder.num_written
+
+
+def processing_result(result):
+    """
+    Convert a result from the workers into a model instance.
+
+    :param pre_proc.results.FileResult result: The finished result.
+    :returns: The unsaved model instance.
+    :rtype: pre_proc_app.models.ProcessingResult
+    """
+    return ProcessingResult(
+        filepath=result.filepath,
+        dataset=result.dataset,
+        fixes=','.join(result.fix_names),
+        status=result.status,
+        failed_fix=result.failed_fix,
+        failed_batch=(','.join(result.failed_batch)
+                      if result.failed_batch else None),
+        error_class=result.error_class,
+        error=result.error,
+        duration=result.duration,
+        bytes_in=result.bytes_in,
+        bytes_out=result.bytes_out,
+        worker=result.worker,
+        finished=datetime.datetime.fromtimestamp(result.finished,
+                                                 datetime.timezone.utc)
+    )
+
+
+def failed_files(fix_name=None, dataset=None):
+    """
+    Find the results of the files that couldn't be fixed.
+
+    :param str fix_name: Only include the files where this fix failed,
+        including where it was one of several fixes applied together.
+    :param str dataset: Only include the files in this dataset.
+    :returns: The results.
+    :rtype: django.db.models.query.QuerySet
+    """
+    results = ProcessingResult.objects.filter(status='failed')
+    if dataset is not None:
+        results = results.filter(dataset=dataset)
+    if fix_name is not None:
+        results = results.filter(
+            Q(failed_fix=fix_name) |
+            Q(failed_batch__regex=r'(^|,){}(,|$)'.format(re.escape(fix_name)))
+        )
+    return results.order_by('filepath')
+
+
+def slowest_files(number=100):
+    """
+    Find the results of the files that took the longest to fix.
+
+    :param int number: The number of files.
+    :returns: The results, slowest first.
+    :rtype: django.db.models.query.QuerySet
+    """
+    return ProcessingResult.objects.order_by('-duration')[:number]
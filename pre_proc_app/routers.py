@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""
+routers.py
+
+Send the processing results to their own database, which the workers write
+to while they share the master database read-only.
+"""
+# The alias of the results database in the DATABASES setting
+RESULTS_DATABASE = 'results'
+
+# The models that are stored in the results database
+RESULTS_MODELS = {'processingresult'}
+
+
+class ResultsRouter(object):
+    """
+    Route the processing results to the results database and everything
+    else to the default database.
+    """
+    def _database(self, model):
+        if (model._meta.app_label == 'pre_proc_app' and
+                model._meta.model_name in RESULTS_MODELS):
+            return RESULTS_DATABASE
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._database(model)
+
+    def db_for_write(self, model, **hints):
+        return self._database(model)
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if app_label == 'pre_proc_app' and model_name in RESULTS_MODELS:
+            return db == RESULTS_DATABASE
+        return db != RESULTS_DATABASE
@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+"""
+rule_converter.py
+
+Convert the imperative fix_request scripts in bin/fix_requests into
+declarative rules that can be loaded by pre_proc_app.rules. The main()
+function of each script is interpreted symbolically from its syntax tree
+and so the scripts aren't run. Scripts that do anything other than select
+data requests and attach or detach fixes (for example creating data
+requests) can't be converted.
+"""
+import ast
+
+from pre_proc_app.rules import parse_lookup
+
+
+class ConversionError(ValueError):
+    """
+    When a script contains a statement that can't be converted.
+    """
+    pass
+
+
+class _Selector(object):
+    """
+    The lookups of a DataRequest QuerySet. Each branch is a dictionary of
+    filter lookups and a list of dictionaries of exclude lookups and the
+    QuerySet is the union of the branches.
+    """
+    def __init__(self, branches=None):
+        self.branches = branches or [({}, [])]
+
+    def filter(self, lookups):
+        """ Return a new selector with the additional filter lookups """
+        branches = []
+        for filter_lookups, exclude_lookups in self.branches:
+            for key, value in lookups.items():
+                if key in filter_lookups and filter_lookups[key] != value:
+                    raise ConversionError('Lookup {} used twice'.format(key))
+            branches.append((dict(filter_lookups, **lookups),
+                             exclude_lookups))
+        return _Selector(branches)
+
+    def exclude(self, lookups):
+        """ Return a new selector with the additional exclude lookups """
+        return _Selector([(filter_lookups, exclude_lookups + [lookups])
+                          for filter_lookups, exclude_lookups
+                          in self.branches])
+
+    def __or__(self, other):
+        """ Return the union of two selectors """
+        return _Selector(self.branches + other.branches)
+
+
+class _FixName(str):
+    """
+    The name of a FileFix that's been looked up.
+    """
+    pass
+
+
+class _Ignored(object):
+    """
+    The result of a call that doesn't affect the rules, e.g. count().
+    """
+    pass
+
+
+def convert_script(source, filename='<script>'):
+    """
+    Convert the source code of a fix_request script to a rule file.
+
+    :param str source: The script's source code.
+    :param str filename: The script's name for error messages.
+    :returns: The rule file's contents.
+    :rtype: dict
+    :raises ConversionError: If the script can't be converted.
+    """
+    tree = ast.parse(source, filename)
+    main = None
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef) and node.name == 'main':
+            main = node
+    if main is None:
+        raise ConversionError('No main() in {}'.format(filename))
+
+    interpreter = _Interpreter(filename)
+    interpreter.run(main.body)
+    if not interpreter.rules:
+        raise ConversionError('No fixes attached or detached in {}'.
+                              format(filename))
+    # The first paragraph of the docstring is the script's name
+    description = (ast.get_docstring(tree) or '').strip().split('\n\n', 1)
+    return {
+        'description': description[-1],
+        'rules': interpreter.rules
+    }
+
+
+class _Interpreter(object):
+    """
+    Symbolically run the statements in a fix_request script's main().
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self.env = {}
+        self.rules = []
+
+    def run(self, statements):
+        """ Run a list of statements """
+        for statement in statements:
+            self._statement(statement)
+
+    def _error(self, node, message='Unsupported syntax'):
+        return ConversionError('{} at line {} of {}'.
+                               format(message, getattr(node, 'lineno', '?'),
+                                      self.filename))
+
+    def _statement(self, node):
+        if isinstance(node, ast.Expr):
+            if isinstance(node.value, (ast.Constant, ast.Str)):
+                return
+            self._expression(node.value)
+        elif isinstance(node, ast.Assign):
+            value = self._expression(node.value)
+            for target in node.targets:
+                if not isinstance(target, ast.Name):
+                    raise self._error(node)
+                self.env[target.id] = value
+        elif isinstance(node, ast.For):
+            if not self._modifies_fixes(node):
+                return
+            if not isinstance(node.target, ast.Name) or node.orelse:
+                raise self._error(node)
+            for item in self._expression(node.iter):
+                self.env[node.target.id] = item
+                self.run(node.body)
+        elif isinstance(node, ast.If):
+            # Sanity checks on the number of data requests found
+            if self._modifies_fixes(node):
+                raise self._error(node)
+        else:
+            raise self._error(node)
+
+    def _modifies_fixes(self, node):
+        """ Check whether a statement attaches or detaches any fixes """
+        for child in ast.walk(node):
+            if (isinstance(child, ast.Call) and
+                    isinstance(child.func, ast.Name) and
+                    child.func.id in ('attach_fixes', 'detach_fixes')):
+                return True
+        return False
+
+    def _expression(self, node):
+        if isinstance(node, ast.Name):
+            if node.id not in self.env:
+                raise self._error(node, 'Unknown name {}'.format(node.id))
+            return self.env[node.id]
+        elif isinstance(node, (ast.List, ast.Tuple)):
+            return [self._expression(element) for element in node.elts]
+        elif isinstance(node, ast.Dict):
+            result = {}
+            for key, value in zip(node.keys, node.values):
+                if key is None:
+                    result.update(self._expression(value))
+                else:
+                    result[self._expression(key)] = self._expression(value)
+            return result
+        elif isinstance(node, ast.Subscript):
+            container = self._expression(node.value)
+            index = node.slice
+            if isinstance(index, ast.Index):
+                index = index.value
+            return container[self._expression(index)]
+        elif isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+            return self._expression(node.left) + self._expression(node.right)
+        elif isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitOr):
+            left = self._expression(node.left)
+            right = self._expression(node.right)
+            if not (isinstance(left, _Selector) and
+                    isinstance(right, _Selector)):
+                raise self._error(node)
+            return left | right
+        elif isinstance(node, ast.JoinedStr):
+            return ''.join(
+                format(self._expression(value.value))
+                if isinstance(value, ast.FormattedValue)
+                else ast.literal_eval(value)
+                for value in node.values
+            )
+        elif isinstance(node, ast.Call):
+            return self._call(node)
+        try:
+            return ast.literal_eval(node)
+        except ValueError:
+            raise self._error(node)
+
+    def _keywords(self, node):
+        """ Evaluate the keyword arguments of a call """
+        kwargs = {}
+        for keyword in node.keywords:
+            value = self._expression(keyword.value)
+            if keyword.arg is None:
+                kwargs.update(value)
+            else:
+                kwargs[keyword.arg] = value
+        return kwargs
+
+    def _call(self, node):
+        func = node.func
+        if isinstance(func, ast.Name):
+            if func.id in ('attach_fixes', 'detach_fixes'):
+                self._fix_call(node, func.id)
+                return _Ignored()
+            elif func.id in ('len', 'print'):
+                return _Ignored()
+            raise self._error(node)
+        if not isinstance(func, ast.Attribute):
+            raise self._error(node)
+
+        if func.attr in ('debug', 'info', 'warning', 'error', 'format',
+                         'count', 'exit'):
+            return _Ignored()
+        manager = _manager_name(func.value)
+        if manager == 'DataRequest':
+            if func.attr == 'filter':
+                return self._selector(_Selector().filter(
+                    self._keywords(node)), node)
+            elif func.attr == 'all':
+                return _Selector()
+            raise self._error(node)
+        elif manager == 'FileFix':
+            if func.attr == 'get' and not node.args:
+                kwargs = self._keywords(node)
+                if list(kwargs) == ['name']:
+                    return _FixName(kwargs['name'])
+            raise self._error(node)
+
+        value = self._expression(func.value)
+        if isinstance(value, _Selector):
+            if func.attr == 'filter':
+                return self._selector(value.filter(self._keywords(node)),
+                                      node)
+            elif func.attr == 'exclude':
+                return self._selector(value.exclude(self._keywords(node)),
+                                      node)
+            elif func.attr in ('distinct', 'all'):
+                return value
+        elif isinstance(value, dict) and func.attr == 'items':
+            return list(value.items())
+        elif isinstance(value, dict) and func.attr in ('keys', 'values'):
+            return list(getattr(value, func.attr)())
+        raise self._error(node)
+
+    def _selector(self, selector, node):
+        """ Check that all of a selector's lookups are supported """
+        if node.args:
+            raise self._error(node)
+        for filter_lookups, exclude_lookups in selector.branches:
+            for lookups in [filter_lookups] + exclude_lookups:
+                for key in lookups:
+                    try:
+                        parse_lookup(key)
+                    except ValueError:
+                        raise self._error(node, 'Unsupported lookup {}'.
+                                          format(key))
+        return selector
+
+    def _fix_call(self, node, func_name):
+        """ Convert an attach_fixes() or detach_fixes() call to a rule """
+        args = [self._expression(arg) for arg in node.args]
+        selector = args[0]
+        if not isinstance(selector, _Selector):
+            raise self._error(node, 'Data requests are not a QuerySet')
+        if len(args) == 1 and func_name == 'detach_fixes':
+            action = {'remove_all': True}
+        else:
+            fixes = args[1]
+            if not all(isinstance(fix, _FixName) for fix in fixes):
+                raise self._error(node, 'Fixes are not FileFix objects')
+            key = 'add' if func_name == 'attach_fixes' else 'remove'
+            action = {key: [str(fix) for fix in fixes]}
+        # Adding or removing fixes from a union is the same as adding or
+        # removing them from each part of the union in turn
+        for filter_lookups, exclude_lookups in selector.branches:
+            rule = {'filter': filter_lookups}
+            if exclude_lookups:
+                rule['exclude'] = exclude_lookups
+            rule.update(action)
+            self.rules.append(rule)
+
+
+def _manager_name(node):
+    """
+    Return the model name if `node` is a model's manager, e.g.
+    `DataRequest.objects`.
+
+    :param ast.AST node: The node.
+    :returns: The model's name or None.
+    :rtype: str
+    """
+    if (isinstance(node, ast.Attribute) and node.attr == 'objects' and
+            isinstance(node.value, ast.Name)):
+        return node.value.id
+    return None
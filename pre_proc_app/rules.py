@@ -0,0 +1,354 @@
+# -*- coding: utf-8 -*-
+"""
+rules.py
+
+Load declarative rule files that specify which fixes to add to and remove
+from the data requests and apply all of them in a single transaction.
+
+Each rule file is a JSON object with an optional "description" and a list
+of "rules". Each rule selects data requests with "filter" and "exclude"
+Django-style lookups and then adds and removes the named fixes, e.g.:
+
+    {
+        "description": "CMCC sea ice reference time",
+        "rules": [
+            {
+                "filter": {"institution_id__name": "CMCC",
+                           "table_id__in": ["SIday", "SImon"]},
+                "exclude": [{"cmor_name": "siconc"}],
+                "add": ["SetTimeReference1949"]
+            }
+        ]
+    }
+
+"remove" lists fixes to remove and "remove_all" set to true removes all
+existing fixes before any are added. The rules are applied in order to an
+in-memory copy of the links between the data requests and fixes and only
+the differences are written to the database.
+"""
+import glob
+import json
+import logging
+import os
+import re
+import string
+
+from django.db import transaction
+
+from pre_proc_app.bulk import SQLITE_MAX_VARIABLES
+from pre_proc_app.models import DataRequest, FileFix
+
+logger = logging.getLogger(__name__)
+
+# The data request fields that rules can select on and the keys that they
+# are loaded as
+RULE_FIELDS = {
+    'institution_id__name': 'institution_id__name',
+    'source_id__name': 'source_id__name',
+    'experiment_id__name': 'experiment_id__name',
+    'variant_label': 'variant_label',
+    'table_id': 'table_id',
+    'cmor_name': 'cmor_name'
+}
+
+RULE_KEYS = {'filter', 'exclude', 'add', 'remove', 'remove_all'}
+
+
+# SQLite's LIKE, which Django uses for the contains, startswith, endswith
+# and case-insensitive lookups, ignores the case of ASCII letters only, and
+# so these lookups do the same to select the same data requests
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def _like_fold(value):
+    return value.translate(_ASCII_LOWER)
+
+
+def _exact(value, target):
+    return value == target
+
+
+def _iexact(value, target):
+    return value is not None and _like_fold(value) == _like_fold(target)
+
+
+def _in(value, target):
+    return value in target
+
+
+def _contains(value, target):
+    return value is not None and _like_fold(target) in _like_fold(value)
+
+
+_icontains = _contains
+
+
+def _startswith(value, target):
+    return (value is not None and
+            _like_fold(value).startswith(_like_fold(target)))
+
+
+_istartswith = _startswith
+
+
+def _endswith(value, target):
+    return (value is not None and
+            _like_fold(value).endswith(_like_fold(target)))
+
+
+def _regex(value, target):
+    return value is not None and re.search(target, value) is not None
+
+
+def _isnull(value, target):
+    return (value is None) == bool(target)
+
+
+# The supported lookups and the functions that test them
+LOOKUPS = {
+    'exact': _exact,
+    'iexact': _iexact,
+    'in': _in,
+    'contains': _contains,
+    'icontains': _icontains,
+    'startswith': _startswith,
+    'istartswith': _istartswith,
+    'endswith': _endswith,
+    'regex': _regex,
+    'isnull': _isnull
+}
+
+
+class RuleError(ValueError):
+    """
+    When a rule file is invalid.
+    """
+    pass
+
+
+def parse_lookup(key):
+    """
+    Split a Django-style lookup into the field and the lookup type.
+
+    :param str key: The lookup, e.g. `table_id__in`.
+    :returns: The field and the lookup type.
+    :rtype: tuple
+    :raises RuleError: If the field or lookup isn't supported.
+    """
+    for field in RULE_FIELDS:
+        if key == field:
+            return field, 'exact'
+        elif key.startswith(field + '__'):
+            lookup = key[len(field) + 2:]
+            if lookup in LOOKUPS:
+                return field, lookup
+    raise RuleError('Unsupported lookup {}'.format(key))
+
+
+def load_rule_files(paths):
+    """
+    Load and validate the rules from the rule files. Directories are
+    expanded to the JSON files in them in name order.
+
+    :param list paths: The rule files and directories to load.
+    :returns: The rules in order, each with the name of the file that it
+        came from in its "source" item.
+    :rtype: list
+    :raises RuleError: If a rule is invalid.
+    """
+    rules = []
+    for path in paths:
+        if os.path.isdir(path):
+            filenames = sorted(glob.glob(os.path.join(path, '*.json')))
+        else:
+            filenames = [path]
+        for filename in filenames:
+            with open(filename) as fh:
+                contents = json.load(fh)
+            for rule in contents['rules']:
+                validate_rule(rule, filename)
+                rules.append(dict(rule, source=os.path.basename(filename)))
+    return rules
+
+
+def validate_rule(rule, filename):
+    """
+    Check that a rule only contains supported keys and lookups.
+
+    :param dict rule: The rule.
+    :param str filename: The file that the rule came from.
+    :raises RuleError: If the rule is invalid.
+    """
+    unknown = set(rule) - RULE_KEYS
+    if unknown:
+        raise RuleError('Unknown keys {} in rule in {}'.
+                        format(', '.join(sorted(unknown)), filename))
+    if 'filter' not in rule:
+        raise RuleError('No filter in rule in {}'.format(filename))
+    for lookups in [rule['filter']] + rule.get('exclude', []):
+        for key in lookups:
+            parse_lookup(key)
+
+
+class DataRequestIndex(object):
+    """
+    An in-memory copy of the data requests' fields with indexes of the
+    values of each field, which are built when they're first needed.
+    """
+    def __init__(self, data_requests):
+        """
+        Initialise the class
+
+        :param list data_requests: Dictionaries of each data request's id
+            and the fields in RULE_FIELDS.
+        """
+        self.data_requests = {data_req['id']: data_req
+                              for data_req in data_requests}
+        self.indexes = {}
+
+    @classmethod
+    def from_database(cls):
+        """
+        Load all of the data requests from the database in one query.
+
+        :returns: The index.
+        :rtype: DataRequestIndex
+        """
+        return cls(DataRequest.objects.values('id', *RULE_FIELDS.values()))
+
+    def select(self, filter_lookups, exclude_lookups=None):
+        """
+        Find the data requests that match the filter lookups and that don't
+        match any of the exclude lookups.
+
+        :param dict filter_lookups: The lookups that must all match.
+        :param list exclude_lookups: Dictionaries of lookups where data
+            requests matching all of the lookups in any dictionary are
+            excluded.
+        :returns: The matching data request ids.
+        :rtype: set
+        """
+        candidates = None
+        remaining = []
+        for key, target in filter_lookups.items():
+            field, lookup = parse_lookup(key)
+            if lookup in ('exact', 'in'):
+                values = [target] if lookup == 'exact' else target
+                index = self._index(field)
+                ids = set()
+                for value in values:
+                    ids.update(index.get(value, ()))
+                candidates = (ids if candidates is None
+                              else candidates & ids)
+            else:
+                remaining.append((field, LOOKUPS[lookup], target))
+        if candidates is None:
+            candidates = set(self.data_requests)
+
+        selected = {data_req_id for data_req_id in candidates
+                    if all(test(self.data_requests[data_req_id][field],
+                                target)
+                           for field, test, target in remaining)}
+        for lookups in exclude_lookups or []:
+            selected -= self.select(lookups) & selected
+        return selected
+
+    def _index(self, field):
+        """
+        Return the index of the data request ids for each value of `field`.
+
+        :param str field: The field name.
+        :returns: The ids for each value.
+        :rtype: dict
+        """
+        if field not in self.indexes:
+            index = {}
+            for data_req_id, data_req in self.data_requests.items():
+                index.setdefault(data_req[field], []).append(data_req_id)
+            self.indexes[field] = index
+        return self.indexes[field]
+
+
+def apply_rules(rules):
+    """
+    Apply the rules to the database. The rules are resolved against
+    in-memory copies of the data requests, fixes and the links between them
+    and then the new links are inserted and the removed links deleted in a
+    single transaction.
+
+    :param list rules: The rules from load_rule_files().
+    :returns: The number of links added and removed.
+    :rtype: tuple
+    :raises pre_proc_app.models.FileFix.DoesNotExist: If a rule names a fix
+        that isn't in the database.
+    """
+    through = DataRequest.fixes.through
+    index = DataRequestIndex.from_database()
+    fix_ids = dict(FileFix.objects.values_list('name', 'id'))
+    existing = set(through.objects.values_list('datarequest_id',
+                                               'filefix_id'))
+    links = set(existing)
+
+    for rule in rules:
+        selected = index.select(rule['filter'], rule.get('exclude'))
+        if rule.get('remove_all'):
+            links = {link for link in links if link[0] not in selected}
+        for key in ('remove', 'add'):
+            for fix_name in rule.get(key, []):
+                if fix_name not in fix_ids:
+                    raise FileFix.DoesNotExist(
+                        'FileFix {} in {} does not exist'.
+                        format(fix_name, rule.get('source'))
+                    )
+                rule_links = {(data_req_id, fix_ids[fix_name])
+                              for data_req_id in selected}
+                if key == 'add':
+                    links |= rule_links
+                else:
+                    links -= rule_links
+        logger.debug('{}: {} data requests selected'.
+                     format(rule.get('source'), len(selected)))
+
+    to_add = sorted(links - existing)
+    to_remove = sorted(existing - links)
+    with transaction.atomic():
+        removals = {}
+        for data_req_id, fix_id in to_remove:
+            removals.setdefault(fix_id, []).append(data_req_id)
+        batch_size = SQLITE_MAX_VARIABLES - 1
+        for fix_id, data_req_ids in removals.items():
+            for start in range(0, len(data_req_ids), batch_size):
+                through.objects.filter(
+                    filefix_id=fix_id,
+                    datarequest_id__in=data_req_ids[start:start + batch_size]
+                ).delete()
+        through.objects.bulk_create(
+            [through(datarequest_id=data_req_id, filefix_id=fix_id)
+             for data_req_id, fix_id in to_add],
+            batch_size=SQLITE_MAX_VARIABLES // 2
+        )
+    return len(to_add), len(to_remove)
+
+
+def data_request_fixes():
+    """
+    Load every data request and the names of its fixes in three queries,
+    ready to be compiled into a rules artefact by
+    pre_proc.rule_provider.write_artefact().
+
+    :returns: (source_id, experiment_id, variant_label, table_id,
+        cmor_name, cmor_name_base, fix_names) tuples.
+    :rtype: list
+    """
+    through = DataRequest.fixes.through
+    fix_names = dict(FileFix.objects.values_list('id', 'name'))
+    data_req_fixes = {}
+    for data_req_id, fix_id in through.objects.values_list('datarequest_id',
+                                                           'filefix_id'):
+        data_req_fixes.setdefault(data_req_id, []).append(fix_names[fix_id])
+    rows = DataRequest.objects.values_list(
+        'id', 'source_id__name', 'experiment_id__name', 'variant_label',
+        'table_id', 'cmor_name', 'cmor_name_base'
+    )
+    return [row[1:] + (sorted(data_req_fixes.get(row[0], [])),)
+            for row in rows]
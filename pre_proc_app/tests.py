@@ -1,6 +1,718 @@
 # -*- coding: utf-8 -*-
+"""
+tests.py
 
+Unit tests for pre_proc_app
+"""
+import io
+import json
+import os
+import queue
+import shutil
+import sqlite3
+import tempfile
+from unittest import mock
 
-from django.test import TestCase
+from django.conf import settings
+from django.db import connection, OperationalError
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import override_settings, TestCase
 
-# Create your tests here.
+from pre_proc.esgf_submission import EsgfSubmission
+from pre_proc.exceptions import DataRequestNotFound, MultipleDataRequestsFound
+from pre_proc.results import FileResult, SKIPPED
+from pre_proc.rule_provider import (ArtefactRuleProvider,
+                                    DatabaseRuleProvider, write_artefact)
+from pre_proc_app.bulk import (attach_fixes, detach_fixes, DmtJsonLoader,
+                               iter_json_lists)
+from pre_proc_app.models import (Institution, ClimateModel, Experiment,
+                                 DataRequest, FileFix, ProcessingResult,
+                                 cmor_name_base)
+from pre_proc_app.results import (failed_files, ResultRecorder,
+                                  slowest_files, write_results)
+from pre_proc_app.routers import RESULTS_DATABASE
+from pre_proc_app.rule_converter import convert_script, ConversionError
+from pre_proc_app.rules import (apply_rules, data_request_fixes,
+                                DataRequestIndex, load_rule_files, RuleError)
+
+
+def make_dmt_json(data_requests, institutions=('MOHC',),
+                  models=('HadGEM3-GC31-HM',),
+                  experiments=('highresSST-present',)):
+    """
+    Make a JSON string in the same format as that generated by the DMT.
+
+    :param list data_requests: (table_id, cmor_name) tuples
+    :param tuple institutions: the institution names
+    :param tuple models: the climate model names
+    :param tuple experiments: the experiment names
+    :returns: The JSON
+    :rtype: str
+    """
+    def named(class_name, names):
+        return [{'__class__': class_name, '__module__': 'pdata_app.models',
+                 '__kwargs__': {'short_name': name}} for name in names]
+
+    return json.dumps({
+        'source_id': named('ClimateModel', models),
+        'experiment_id': named('Experiment', experiments),
+        'institution_id': named('Institution', institutions),
+        'data_requests': [{
+            '__class__': 'DataRequest',
+            '__module__': 'pdata_app.models',
+            '__kwargs__': {
+                'table_id': table_id,
+                'cmor_name': cmor_name,
+                'institution_id__name': institutions[0],
+                'source_id__name': models[0],
+                'experiment_id__name': experiments[0],
+                'variant_label': 'r1i1p1f1'
+            }
+        } for table_id, cmor_name in data_requests]
+    }, indent=4)
+
+
+class TestIterJsonLists(TestCase):
+    """ Test pre_proc_app.bulk.iter_json_lists """
+    def test_items(self):
+        """ Test that the items are yielded in order with small reads """
+        json_str = ('{"a": [1, {"b": "x, y]"}, 23456], "c": [], '
+                    '"d": "e" }')
+        self.assertEqual(list(iter_json_lists(io.StringIO(json_str), 3)),
+                         [('a', 1), ('a', {'b': 'x, y]'}), ('a', 23456),
+                          ('d', 'e')])
+
+    def test_empty(self):
+        """ Test an empty object """
+        self.assertEqual(list(iter_json_lists(io.StringIO(' {} '))), [])
+
+    def test_invalid(self):
+        """ Test that invalid JSON raises an exception """
+        generator = iter_json_lists(io.StringIO('{"a": [1, 2}'))
+        self.assertRaises(ValueError, list, generator)
+
+
+class TestDmtJsonLoader(TestCase):
+    """ Test pre_proc_app.bulk.DmtJsonLoader """
+    def test_load(self):
+        """ Test that all objects are created """
+        json_str = make_dmt_json([('Amon', 'tas'), ('Amon', 'pr'),
+                                  ('day', 'tas')])
+        report = DmtJsonLoader(batch_size=2).load(io.StringIO(json_str))
+        self.assertEqual(report['rows'], 6)
+        self.assertEqual(report['data_requests_created'], 3)
+        self.assertEqual(report['institution_id_created'], 1)
+        data_req = DataRequest.objects.get(table_id='day', cmor_name='tas')
+        self.assertEqual(data_req.institution_id.name, 'MOHC')
+        self.assertEqual(data_req.source_id.name, 'HadGEM3-GC31-HM')
+        self.assertEqual(data_req.experiment_id.name, 'highresSST-present')
+        self.assertEqual(data_req.variant_label, 'r1i1p1f1')
+
+    def test_existing_ignored(self):
+        """ Test that loading the same file twice creates no duplicates """
+        json_str = make_dmt_json([('Amon', 'tas'), ('Amon', 'pr')])
+        DmtJsonLoader().load(io.StringIO(json_str))
+        report = DmtJsonLoader().load(io.StringIO(json_str))
+        self.assertEqual(report['data_requests_created'], 0)
+        self.assertEqual(DataRequest.objects.count(), 2)
+        self.assertEqual(Institution.objects.count(), 1)
+
+    def test_null_variant_label(self):
+        """ Test that data requests without a variant_label aren't repeated """
+        items = json.loads(make_dmt_json([('Amon', 'tas'), ('Amon', 'pr')]))
+        items['data_requests'][0]['__kwargs__']['variant_label'] = None
+        json_str = json.dumps(items)
+        DmtJsonLoader().load(io.StringIO(json_str))
+        report = DmtJsonLoader().load(io.StringIO(json_str))
+        self.assertEqual(report['data_requests_created'], 0)
+        self.assertEqual(DataRequest.objects.count(), 2)
+        self.assertEqual(
+            DataRequest.objects.filter(variant_label__isnull=True).count(), 1
+        )
+
+    def test_data_requests_first(self):
+        """ Test that foreign keys can appear after the data requests """
+        json_dict = json.loads(make_dmt_json([('Amon', 'tas')]))
+        reordered = {'data_requests': json_dict.pop('data_requests')}
+        reordered.update(json_dict)
+        DmtJsonLoader().load(io.StringIO(json.dumps(reordered)))
+        self.assertEqual(DataRequest.objects.count(), 1)
+
+    def test_missing_foreign_key(self):
+        """ Test that an exception is raised and nothing is written """
+        json_dict = json.loads(make_dmt_json([('Amon', 'tas')]))
+        json_dict['experiment_id'] = []
+        self.assertRaisesRegex(Experiment.DoesNotExist,
+                               'Experiment highresSST-present does not exist',
+                               DmtJsonLoader().load,
+                               io.StringIO(json.dumps(json_dict)))
+        self.assertEqual(ClimateModel.objects.count(), 0)
+
+    def test_unknown_class(self):
+        """ Test that an unknown class raises an exception """
+        json_str = json.dumps({'a': [{'__class__': 'Foo',
+                                      '__kwargs__': {}}]})
+        self.assertRaisesRegex(NotImplementedError,
+                               'Cannot load from JSON files class Foo',
+                               DmtJsonLoader().load, io.StringIO(json_str))
+
+
+class FixesBaseTest(TestCase):
+    """ Create data requests and fixes """
+    def setUp(self):
+        json_str = make_dmt_json([('Amon', 'v{}'.format(index))
+                                  for index in range(1200)])
+        DmtJsonLoader().load(io.StringIO(json_str))
+        self.data_reqs = DataRequest.objects.all()
+        self.fixes = [FileFix.objects.create(name='Fix{}'.format(index))
+                      for index in range(2)]
+
+
+class TestAttachFixes(FixesBaseTest):
+    """ Test pre_proc_app.bulk.attach_fixes """
+    def test_attached(self):
+        """ Test that more rows than SQLite's variable limit are added """
+        self.assertEqual(attach_fixes(self.data_reqs, self.fixes), 2400)
+        self.assertEqual(self.fixes[1].datarequest_set.count(), 1200)
+        self.assertEqual(
+            list(self.data_reqs.first().fixes.order_by('name')), self.fixes
+        )
+
+    def test_duplicates_skipped(self):
+        """ Test that existing links are skipped """
+        data_req = self.data_reqs.first()
+        data_req.fixes.add(self.fixes[0])
+        self.assertEqual(attach_fixes(self.data_reqs, self.fixes), 2399)
+        self.assertEqual(data_req.fixes.count(), 2)
+
+    def test_list(self):
+        """ Test that a list of data requests can be used """
+        data_reqs = list(self.data_reqs[:3])
+        self.assertEqual(attach_fixes(data_reqs, self.fixes[:1]), 3)
+
+
+class TestDetachFixes(FixesBaseTest):
+    """ Test pre_proc_app.bulk.detach_fixes """
+    def setUp(self):
+        super().setUp()
+        attach_fixes(self.data_reqs, self.fixes)
+
+    def test_detached(self):
+        """ Test that the specified fixes are removed """
+        self.assertEqual(detach_fixes(self.data_reqs, self.fixes[:1]), 1200)
+        self.assertEqual(self.fixes[0].datarequest_set.count(), 0)
+        self.assertEqual(self.fixes[1].datarequest_set.count(), 1200)
+
+    def test_all_detached(self):
+        """ Test that all fixes are removed """
+        self.assertEqual(detach_fixes(self.data_reqs[:10]), 20)
+        self.assertEqual(DataRequest.fixes.through.objects.count(), 2380)
+
+
+class TestCmorNameBase(TestCase):
+    """ Test pre_proc_app.models.cmor_name_base """
+    def test_suffix_removed(self):
+        """ Test that a numeric suffix is removed """
+        self.assertEqual(cmor_name_base('ta27'), 'ta')
+
+    def test_no_suffix(self):
+        """ Test that names without a suffix aren't changed """
+        self.assertEqual(cmor_name_base('hus7h'), 'hus7h')
+
+    def test_set_on_save(self):
+        """ Test that the field is set when a data request is saved """
+        DmtJsonLoader().load(io.StringIO(make_dmt_json([])))
+        data_req = DataRequest.objects.create(
+            institution_id=Institution.objects.get(),
+            source_id=ClimateModel.objects.get(),
+            experiment_id=Experiment.objects.get(),
+            table_id='Amon', cmor_name='ua200'
+        )
+        data_req.refresh_from_db()
+        self.assertEqual(data_req.cmor_name_base, 'ua')
+
+    def test_set_on_load(self):
+        """ Test that the field is set by the bulk loader """
+        DmtJsonLoader().load(io.StringIO(make_dmt_json([('Amon', 'ta27')])))
+        self.assertEqual(DataRequest.objects.get().cmor_name_base, 'ta')
+
+
+class TestRuleProviders(TestCase):
+    """
+    Test pre_proc.rule_provider.DatabaseRuleProvider and that an artefact
+    exported from the database gives the same fixes.
+    """
+    def setUp(self):
+        DmtJsonLoader().load(io.StringIO(make_dmt_json([
+            ('Amon', 'tas'), ('Amon', 'ta27'), ('day', 'ta7'), ('day', 'ta8')
+        ])))
+        for name in ('FixB', 'FixA'):
+            FileFix.objects.create(name=name)
+        attach_fixes(DataRequest.objects.filter(table_id='Amon'),
+                     FileFix.objects.all())
+        attach_fixes(DataRequest.objects.filter(cmor_name='ta7'),
+                     FileFix.objects.filter(name='FixB'))
+
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        artefact_path = os.path.join(temp_dir, 'rules.pickle')
+        write_artefact(artefact_path, data_request_fixes())
+        self.providers = [DatabaseRuleProvider(),
+                          ArtefactRuleProvider(artefact_path)]
+
+    def _submission(self, table_id, cmor_name):
+        return EsgfSubmission('HadGEM3-GC31-HM', 'highresSST-present',
+                              'r1i1p1f1', table_id, cmor_name,
+                              '/some/dir/file.nc')
+
+    def test_exact(self):
+        """ Test that an exact match is found """
+        for provider in self.providers:
+            self.assertEqual(
+                provider.get_fix_names(self._submission('Amon', 'tas')),
+                ['FixA', 'FixB']
+            )
+            self.assertEqual(
+                provider.get_fix_names(self._submission('day', 'ta7')),
+                ['FixB']
+            )
+            self.assertEqual(
+                provider.get_fix_names(self._submission('day', 'ta8')), []
+            )
+
+    def test_suffix(self):
+        """ Test that a data request with a numeric suffix is found """
+        self.assertEqual(
+            DatabaseRuleProvider._get_data_request(
+                self._submission('Amon', 'ta')
+            ).cmor_name,
+            'ta27'
+        )
+        for provider in self.providers:
+            self.assertEqual(
+                provider.get_fix_names(self._submission('Amon', 'ta')),
+                ['FixA', 'FixB']
+            )
+
+    def test_not_found(self):
+        """ Test that an exception is raised if nothing matches """
+        for provider in self.providers:
+            self.assertRaises(DataRequestNotFound, provider.get_fix_names,
+                              self._submission('Amon', 'pr'))
+
+    def test_multiple(self):
+        """ Test that an exception is raised if several suffixes match """
+        for provider in self.providers:
+            self.assertRaises(MultipleDataRequestsFound,
+                              provider.get_fix_names,
+                              self._submission('day', 'ta'))
+
+
+class TestDataRequestIndex(TestCase):
+    """ Test pre_proc_app.rules.DataRequestIndex """
+    def setUp(self):
+        fields = ('institution_id__name', 'source_id__name',
+                  'experiment_id__name', 'variant_label', 'table_id',
+                  'cmor_name')
+        rows = [
+            ('MOHC', 'HadGEM3-GC31-HM', 'hist-1950', 'r1i1p1f1', 'Amon', 'tas'),
+            ('MOHC', 'HadGEM3-GC31-LL', 'hist-1950', 'r1i2p1f1', 'Amon', 'pr'),
+            ('CMCC', 'CMCC-CM2-HR4', 'hist-1950', None, 'SImon', 'siconc'),
+        ]
+        self.index = DataRequestIndex(
+            [dict(zip(('id',) + fields, (index,) + row))
+             for index, row in enumerate(rows)]
+        )
+
+    def test_exact(self):
+        """ Test exact and in lookups """
+        self.assertEqual(self.index.select({'institution_id__name': 'MOHC',
+                                            'cmor_name__in': ['pr', 'ua']}),
+                         {1})
+
+    def test_other_lookups(self):
+        """ Test lookups that aren't indexed """
+        self.assertEqual(
+            self.index.select({'source_id__name__startswith': 'HadGEM3',
+                               'variant_label__regex': r'r1i\dp1f1'}),
+            {0, 1}
+        )
+        self.assertEqual(self.index.select({'variant_label__isnull': True}),
+                         {2})
+
+    def test_like_case(self):
+        """ Test that LIKE lookups ignore the case of ASCII letters """
+        self.assertEqual(
+            self.index.select({'source_id__name__startswith': 'hadgem3-gc31'}),
+            {0, 1}
+        )
+        self.assertEqual(self.index.select({'cmor_name__contains': 'ICON'}),
+                         {2})
+        self.assertEqual(self.index.select({'table_id__endswith': 'MON'}),
+                         {0, 1, 2})
+        self.assertEqual(
+            self.index.select({'source_id__name__contains': 'cm2'}), {2}
+        )
+        self.assertEqual(self.index.select({'cmor_name__iexact': 'TAS'}),
+                         {0})
+
+    def test_exclude(self):
+        """ Test that data requests matching all exclude lookups are removed """
+        self.assertEqual(
+            self.index.select({'experiment_id__name': 'hist-1950'},
+                              [{'table_id': 'Amon', 'cmor_name': 'tas'}]),
+            {1, 2}
+        )
+
+    def test_unsupported(self):
+        """ Test that an unsupported lookup raises an exception """
+        self.assertRaisesRegex(RuleError, 'Unsupported lookup fixes__name',
+                               self.index.select, {'fixes__name': 'A'})
+
+
+class TestApplyRules(TestCase):
+    """ Test pre_proc_app.rules.load_rule_files and apply_rules """
+    def setUp(self):
+        json_str = make_dmt_json([('Amon', 'tas'), ('Amon', 'pr'),
+                                  ('day', 'tas')])
+        DmtJsonLoader().load(io.StringIO(json_str))
+        for name in ('FixA', 'FixB', 'FixC'):
+            FileFix.objects.create(name=name)
+        DataRequest.objects.get(table_id='day').fixes.add(
+            FileFix.objects.get(name='FixC')
+        )
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+
+    def _write(self, filename, rules):
+        """ Write a rule file """
+        with open(os.path.join(self.temp_dir, filename), 'w') as fh:
+            json.dump({'description': 'test', 'rules': rules}, fh)
+
+    def _fixes(self, table_id, cmor_name):
+        """ The names of a data request's fixes """
+        return sorted(DataRequest.objects.get(
+            table_id=table_id, cmor_name=cmor_name
+        ).fixes.values_list('name', flat=True))
+
+    def test_rules_applied_in_order(self):
+        """ Test that later rule files override earlier ones """
+        self._write('fix_request_1.json', [
+            {'filter': {'table_id': 'Amon'}, 'add': ['FixA', 'FixB']},
+            {'filter': {'cmor_name': 'tas'},
+             'exclude': [{'table_id': 'Amon'}], 'add': ['FixA']}
+        ])
+        self._write('fix_request_2.json', [
+            {'filter': {'cmor_name': 'pr'}, 'remove': ['FixB']},
+            {'filter': {'table_id': 'day'}, 'remove_all': True,
+             'add': ['FixB']}
+        ])
+        rules = load_rule_files([self.temp_dir])
+        self.assertEqual(apply_rules(rules), (4, 1))
+        self.assertEqual(self._fixes('Amon', 'tas'), ['FixA', 'FixB'])
+        self.assertEqual(self._fixes('Amon', 'pr'), ['FixA'])
+        self.assertEqual(self._fixes('day', 'tas'), ['FixB'])
+
+    def test_missing_fix(self):
+        """ Test that an unknown fix raises an exception """
+        self._write('a.json', [{'filter': {}, 'add': ['FixD']}])
+        self.assertRaisesRegex(FileFix.DoesNotExist,
+                               'FileFix FixD in a.json does not exist',
+                               apply_rules, load_rule_files([self.temp_dir]))
+
+    def test_invalid_rule(self):
+        """ Test that invalid rules raise an exception """
+        self._write('a.json', [{'filter': {}, 'append': ['FixA']}])
+        self.assertRaisesRegex(RuleError, 'Unknown keys append',
+                               load_rule_files, [self.temp_dir])
+
+
+SCRIPT = '''
+"""
+fix_request_1.py
+
+MOHC.*.*.*.Amon.*
+
+Fix things.
+"""
+from pre_proc_app.bulk import attach_fixes, detach_fixes
+from pre_proc_app.models import DataRequest, FileFix
+
+
+def main():
+    """
+    Main entry point
+    """
+    common = {'institution_id__name': 'MOHC'}
+    amon = DataRequest.objects.filter(**common, table_id='Amon')
+    day = DataRequest.objects.filter(**common).exclude(cmor_name='tas')
+    data_reqs = amon | day.filter(table_id='day')
+
+    fixes = [
+        FileFix.objects.get(name='FixA'),
+    ]
+    attach_fixes(data_reqs, fixes)
+    for name in ['FixB', 'FixC']:
+        detach_fixes(amon, [FileFix.objects.get(name=name)])
+
+    num_data_reqs = data_reqs.count()
+    logger.debug(f'{num_data_reqs} data requests')
+'''
+
+
+class TestConvertScript(TestCase):
+    """ Test pre_proc_app.rule_converter.convert_script """
+    def test_convert(self):
+        """ Test that a script is converted """
+        self.assertEqual(convert_script(SCRIPT), {
+            'description': 'MOHC.*.*.*.Amon.*\n\nFix things.',
+            'rules': [
+                {'filter': {'institution_id__name': 'MOHC',
+                            'table_id': 'Amon'},
+                 'add': ['FixA']},
+                {'filter': {'institution_id__name': 'MOHC',
+                            'table_id': 'day'},
+                 'exclude': [{'cmor_name': 'tas'}],
+                 'add': ['FixA']},
+                {'filter': {'institution_id__name': 'MOHC',
+                            'table_id': 'Amon'},
+                 'remove': ['FixB']},
+                {'filter': {'institution_id__name': 'MOHC',
+                            'table_id': 'Amon'},
+                 'remove': ['FixC']},
+            ]
+        })
+
+    def test_unsupported(self):
+        """ Test that scripts creating data requests can't be converted """
+        script = SCRIPT.replace(
+            "common = {'institution_id__name': 'MOHC'}",
+            "DataRequest.objects.create(table_id='Amon')"
+        )
+        self.assertRaisesRegex(ConversionError, 'Unsupported syntax at line',
+                               convert_script, script)
+
+
+class TestConfigureSqlite(TestCase):
+    """ Test pre_proc_app.apps.configure_sqlite """
+    def test_pragmas(self):
+        """ Test that the pragmas are set on the default connection """
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0],
+                             settings.SQLITE_PRAGMAS['cache_size'])
+
+    def test_read_only(self):
+        """ Test a read-only and immutable connection to a file """
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        path = os.path.join(temp_dir, 'test.sqlite3')
+        with sqlite3.connect(path) as sqlite_conn:
+            sqlite_conn.execute('CREATE TABLE test (value INTEGER)')
+            sqlite_conn.execute('INSERT INTO test VALUES (1)')
+        sqlite_conn.close()
+
+        settings_dict = dict(connection.settings_dict,
+                             NAME='file:{}?mode=ro&immutable=1'.format(path))
+        pragmas = dict(settings.SQLITE_PRAGMAS, query_only=1)
+        with override_settings(SQLITE_PRAGMAS=pragmas):
+            read_only = DatabaseWrapper(settings_dict, alias='read_only')
+            self.addCleanup(read_only.close)
+            with read_only.cursor() as cursor:
+                cursor.execute('SELECT value FROM test')
+                self.assertEqual(cursor.fetchall(), [(1,)])
+                cursor.execute('PRAGMA mmap_size')
+                self.assertEqual(cursor.fetchone()[0],
+                                 settings.SQLITE_PRAGMAS['mmap_size'])
+                self.assertRaises(OperationalError, cursor.execute,
+                                  'INSERT INTO test VALUES (2)')
+
+
+class TestResultRecorder(TestCase):
+    """ Test pre_proc_app.results """
+    databases = {'default', RESULTS_DATABASE}
+
+    def setUp(self):
+        self.recorder = ResultRecorder(batch_size=2)
+
+    def _result(self, filename, dataset='/a/tas', error=None, failed_fix=None,
+                duration=1., failed_batch=None):
+        """ Make a finished result """
+        result = FileResult('/a/tas/' + filename, dataset, ['ToDegC'], 'w1')
+        result.failed_fix = failed_fix
+        result.failed_batch = failed_batch
+        result.finish(error)
+        result.started = result.finished - duration
+        return result
+
+    def test_batches(self):
+        """ Test that the results are written once a batch is full """
+        self.recorder.add(self._result('a.nc'))
+        self.assertEqual(ProcessingResult.objects.count(), 0)
+        self.recorder.add(self._result('b.nc'))
+        self.assertEqual(ProcessingResult.objects.count(), 2)
+        self.recorder.add(self._result('c.nc'))
+        self.assertEqual(self.recorder.flush(), 1)
+        self.assertEqual(self.recorder.num_written, 3)
+        self.assertEqual(self.recorder.flush(), 0)
+
+    def _locked(self, times):
+        """
+        Make writing the results fail as if the database is locked the
+        first `times` times that it's tried
+        """
+        bulk_create = ProcessingResult.objects.bulk_create
+        calls = []
+
+        def locked_bulk_create(*args, **kwargs):
+            calls.append(args)
+            if len(calls) <= times:
+                raise OperationalError('database is locked')
+            return bulk_create(*args, **kwargs)
+
+        patch = mock.patch.object(ProcessingResult.objects, 'bulk_create',
+                                  side_effect=locked_bulk_create)
+        patch.start()
+        self.addCleanup(patch.stop)
+        patch = mock.patch('pre_proc_app.results.time.sleep')
+        self.mock_sleep = patch.start()
+        self.addCleanup(patch.stop)
+        return calls
+
+    def test_locked_retried(self):
+        """ Test that the results are written once the lock is released """
+        calls = self._locked(2)
+        recorder = ResultRecorder(batch_size=2, retry_delay=1.)
+        recorder.add(self._result('a.nc'))
+        recorder.add(self._result('b.nc'))
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(self.mock_sleep.call_args_list,
+                         [mock.call(1.), mock.call(2.)])
+        self.assertEqual(ProcessingResult.objects.count(), 2)
+        self.assertEqual((recorder.num_written, recorder.num_lost), (2, 0))
+        self.assertEqual(recorder.pending, [])
+
+    def test_locked_lost(self):
+        """ Test that the results are only lost after the last attempt """
+        calls = self._locked(3)
+        recorder = ResultRecorder(batch_size=2, max_attempts=3)
+        recorder.add(self._result('a.nc'))
+        with self.assertLogs('pre_proc_app.results', 'ERROR') as logs:
+            recorder.add(self._result('b.nc'))
+        self.assertEqual(len(calls), 3)
+        self.assertIn('2 processing results lost after 3 attempts',
+                      logs.output[0])
+        self.assertEqual((recorder.num_written, recorder.num_lost), (0, 2))
+        self.assertEqual(ProcessingResult.objects.count(), 0)
+
+    def test_flush_interval(self):
+        """ Test that results held for long enough are written """
+        recorder = ResultRecorder(batch_size=100, flush_interval=10.)
+        with mock.patch('pre_proc_app.results.time.time') as mock_time:
+            mock_time.return_value = recorder.last_flush + 5.
+            recorder.add(self._result('a.nc'))
+            self.assertEqual(ProcessingResult.objects.count(), 0)
+            mock_time.return_value = recorder.last_flush + 11.
+            recorder.add(self._result('b.nc'))
+        self.assertEqual(ProcessingResult.objects.count(), 2)
+
+    def test_database(self):
+        """ Test that the results are only in the results database """
+        self.recorder.add(self._result('a.nc'))
+        self.recorder.flush()
+        result = ProcessingResult.objects.get()
+        self.assertEqual(result._state.db, RESULTS_DATABASE)
+        self.assertEqual(result.fix_names, ['ToDegC'])
+        self.assertEqual(result.status, 'done')
+        with connection.cursor() as cursor:
+            self.assertNotIn(ProcessingResult._meta.db_table,
+                             connection.introspection.table_names(cursor))
+
+    def test_failed_files(self):
+        """ Test that the failed files can be found by fix and dataset """
+        self.recorder.add(self._result('a.nc'))
+        self.recorder.add(self._result('b.nc', error=ValueError('x'),
+                                       failed_fix='ToDegC'))
+        self.recorder.add(self._result('c.nc', dataset='/a/pr',
+                                       error=ValueError('y'),
+                                       failed_fix='LatDirection'))
+        self.recorder.add(self._result('d.nc', error='Blocked',
+                                       failed_fix=None))
+        self.recorder.flush()
+        self.assertEqual(
+            [result.filepath for result in failed_files(fix_name='ToDegC')],
+            ['/a/tas/b.nc']
+        )
+        self.assertEqual(
+            [result.filepath for result in failed_files(dataset='/a/pr')],
+            ['/a/tas/c.nc']
+        )
+        self.assertEqual(failed_files().count(), 3)
+        self.assertEqual(failed_files().first().error_class, 'ValueError')
+
+    def test_failed_batch(self):
+        """
+        Test that a file is found by any of the attribute fixes that failed
+        together
+        """
+        batch = ['ParentBranchTimeAdd', 'BranchTimeAdd', 'ParentSourceIdAdd']
+        self.recorder.add(self._result('a.nc', error=ValueError('x'),
+                                       failed_fix=batch[0],
+                                       failed_batch=batch))
+        self.recorder.add(self._result('b.nc', error=ValueError('y'),
+                                       failed_fix='BranchTimeDelete'))
+        self.recorder.flush()
+        self.assertEqual(ProcessingResult.objects.get(
+            filepath='/a/tas/a.nc').failed_batch, ','.join(batch))
+        for fix_name in batch:
+            self.assertEqual(
+                [result.filepath
+                 for result in failed_files(fix_name=fix_name)],
+                ['/a/tas/a.nc']
+            )
+        self.assertEqual(
+            [result.filepath
+             for result in failed_files(fix_name='BranchTimeDelete')],
+            ['/a/tas/b.nc']
+        )
+        self.assertEqual(failed_files(fix_name='Branch').count(), 0)
+
+    def test_skipped(self):
+        """ Test that skipped files aren't failures """
+        self.recorder.add(self._result('a.nc').finish('Blocked', SKIPPED))
+        self.recorder.flush()
+        self.assertEqual(failed_files().count(), 0)
+        self.assertEqual(ProcessingResult.objects.get().error, 'Blocked')
+
+    def test_slowest_files(self):
+        """ Test that the slowest files are first """
+        for filename, duration in (('a.nc', 1.), ('b.nc', 5.), ('c.nc', 3.)):
+            self.recorder.add(self._result(filename, duration=duration))
+        self.recorder.flush()
+        self.assertEqual(
+            [result.filepath for result in slowest_files(2)],
+            ['/a/tas/b.nc', '/a/tas/c.nc']
+        )
+
+
+class TestResultWriter(TestCase):
+    """ Test sending results to a single writer """
+    databases = {'default', RESULTS_DATABASE}
+
+    def _results(self, filenames):
+        """ Make finished results """
+        return [FileResult('/a/' + filename, '/a').finish()
+                for filename in filenames]
+
+    def test_write_results(self):
+        """ Test that every result sent is written once the queue ends """
+        result_queue = queue.Queue()
+        result_queue.put(self._results(['a.nc', 'b.nc']))
+        result_queue.put(self._results(['c.nc']))
+        result_queue.put(None)
+        self.assertEqual(write_results(result_queue, batch_size=2), 3)
+        self.assertEqual(
+            list(ProcessingResult.objects.order_by('filepath').
+                 values_list('filepath', flat=True)),
+            ['/a/a.nc', '/a/b.nc', '/a/c.nc']
+        )
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/1.11/ref/settings/
 """
 
 import os
+import urllib.parse
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -37,7 +38,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
-    'pre_proc_app'
+    'pre_proc_app.apps.PreProcAppConfig'
 ]
 
 MIDDLEWARE = [
@@ -76,13 +77,72 @@ WSGI_APPLICATION = 'pre_proc_site.wsgi.application'
 
 DATABASE_DIR = os.environ['DATABASE_DIR']
 
+DATABASE_PATH = os.path.join(DATABASE_DIR, 'pre-proc_db.sqlite3')
+
+# If PRE_PROC_DATABASE_READ_ONLY is set then the database is opened
+# read-only and immutable through a SQLite URI. SQLite doesn't then take any
+# locks and so the master database can be shared by many concurrent jobs
+# without copying it, but it must not be changed while any jobs are running.
+DATABASE_READ_ONLY = (os.environ.get('PRE_PROC_DATABASE_READ_ONLY', '') not in
+                      ('', '0'))
+
+if DATABASE_READ_ONLY:
+    DATABASE_NAME = 'file:{}?mode=ro&immutable=1'.format(
+        urllib.parse.quote(DATABASE_PATH)
+    )
+else:
+    DATABASE_NAME = DATABASE_PATH
+
+# The outcome of fixing each file is recorded in a separate database, which
+# the workers write to while they share the master database read-only.
+# Create it with `./manage.py migrate --database results`.
+RESULTS_DATABASE_PATH = os.environ.get(
+    'PRE_PROC_RESULTS_DATABASE',
+    os.path.join(DATABASE_DIR, 'pre-proc_results.sqlite3')
+)
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(DATABASE_DIR, 'pre-proc_db.sqlite3'),
+        'NAME': DATABASE_NAME,
+    },
+    'results': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': RESULTS_DATABASE_PATH,
+        # The seconds that a writer waits for another writer to finish,
+        # rather than failing with "database is locked"
+        'OPTIONS': {
+            'timeout': 60,
+        },
     }
 }
 
+DATABASE_ROUTERS = ['pre_proc_app.routers.ResultsRouter']
+
+# The PRAGMA statements run on each new SQLite connection by
+# pre_proc_app.apps.configure_sqlite(). The database is small enough for it
+# all to be memory mapped and cached (a negative cache_size is in KiB).
+SQLITE_PRAGMAS = {
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY'
+}
+
+if DATABASE_READ_ONLY:
+    SQLITE_PRAGMAS['query_only'] = 1
+
+# The PRAGMA statements run on each new connection to the results database,
+# which is never read-only. In WAL mode the queries don't block the writers
+# and a commit doesn't wait for the data to reach the disk, but all of the
+# processes that use the database must be on the same node. Set
+# PRE_PROC_RESULTS_JOURNAL_MODE to DELETE if workers on several nodes share
+# a results database.
+RESULTS_SQLITE_PRAGMAS = {
+    'journal_mode': os.environ.get('PRE_PROC_RESULTS_JOURNAL_MODE', 'WAL'),
+    'synchronous': 'NORMAL',
+    'temp_store': 'MEMORY'
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/1.11/ref/settings/#auth-password-validators